@@ -0,0 +1,80 @@
+"""
+启动耗时测试: 使用 python -X importtime 测试 `amr -h` / `amr -v` 路径的导入耗时,
+超出预算或导入了按需加载的依赖时返回非零退出码
+
+用法: python benchmarks/bench_import_time.py [运行次数]
+"""
+
+import re
+import statistics
+import subprocess
+import sys
+
+# 导入命令行入口的耗时预算 (毫秒, 取中位数)
+BUDGET_MS = 80
+# 只在执行命令时导入的模块
+LAZY_MODULES = (
+    "AlistMediaRename.amr",
+    "AlistMediaRename.models",
+    "AlistMediaRename.output",
+    "AlistMediaRename.task",
+    "httpx",
+    "pydantic",
+    "pyotp",
+    "natsort",
+    "rich",
+    "ruamel",
+)
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def measure() -> tuple[float, dict[str, int]]:
+    """
+    导入一次命令行入口
+
+    :return: (总耗时(毫秒), 模块 -> 累计耗时(微秒))
+    """
+
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import AlistMediaRename.cli"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    # 子模块先于父模块输出, 命令行入口之前、上一个顶层模块之后的均为其导入的模块
+    modules: dict[str, int] = {}
+    for match in LINE.finditer(stderr):
+        top_level = len(match.group(3)) == 1
+        if top_level and match.group(4) != "AlistMediaRename.cli":
+            modules.clear()
+            continue
+        modules[match.group(4)] = int(match.group(2))
+    return modules["AlistMediaRename.cli"] / 1000, modules
+
+
+def main(runs: int = 10) -> int:
+    results = [measure() for _ in range(runs)]
+    totals = [total for total, _ in results]
+    median = statistics.median(totals)
+    modules = results[-1][1]
+
+    print(f"运行次数: {runs}")
+    print(f"导入耗时: 中位数 {median:.1f}ms, 最小 {min(totals):.1f}ms, 预算 {BUDGET_MS}ms")
+    print("耗时最多的模块:")
+    for name, cumulative in sorted(modules.items(), key=lambda item: -item[1])[1:11]:
+        print(f"  {cumulative / 1000:8.1f}ms  {name}")
+
+    loaded = sorted(
+        name
+        for name in modules
+        if any(name == lazy or name.startswith(lazy + ".") for lazy in LAZY_MODULES)
+    )
+    if loaded:
+        print(f"导入了按需加载的模块: {', '.join(loaded)}")
+    if median > BUDGET_MS:
+        print("超出启动耗时预算")
+    return 1 if loaded or median > BUDGET_MS else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*(int(arg) for arg in sys.argv[1:2])))
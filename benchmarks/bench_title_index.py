@@ -0,0 +1,60 @@
+"""
+标题索引性能测试: 生成 10 万个随机标题, 测试建立索引及批量查找耗时
+
+用法: python benchmarks/bench_title_index.py [标题数量] [查询数量]
+"""
+
+import random
+import sys
+import time
+from difflib import SequenceMatcher
+
+from AlistMediaRename.title_index import TitleIndex
+
+LATIN = ["ka", "ri", "to", "shi", "na", "mo", "the", "dark", "star", "night", "blue", "world", "sword", "art", "online", "of", "king", "land"]
+CJK = "刀剑神域间谍过家家进击的巨人庆余年火影忍者海贼王鬼灭之刃咒术回战名侦探柯南龙珠星际牛仔"
+
+
+def random_title(rng: random.Random) -> tuple[str, str]:
+    name = "".join(rng.choice(CJK) for _ in range(rng.randint(2, 7)))
+    original = " ".join(rng.choice(LATIN) for _ in range(rng.randint(1, 4))).title()
+    return name, original
+
+
+def main(total: int = 100_000, query_count: int = 1_000) -> None:
+    rng = random.Random(42)
+    titles = [random_title(rng) for _ in range(total)]
+
+    start = time.perf_counter()
+    index = TitleIndex()
+    for i, names in enumerate(titles):
+        index.add(str(i), names)
+    build = time.perf_counter() - start
+
+    # 查询为已有标题加入少量扰动
+    queries = []
+    for _ in range(query_count):
+        name, original = rng.choice(titles)
+        queries.append(rng.choice([name, original, name[:-1], original.lower() + " 2"]))
+
+    start = time.perf_counter()
+    index.search_many(queries, limit=10, min_score=0.3)
+    search = time.perf_counter() - start
+
+    # 对比逐个 SequenceMatcher 比较 (抽样后按比例估算)
+    sample = titles[:2_000]
+    start = time.perf_counter()
+    for query in queries[:10]:
+        for name, original in sample:
+            SequenceMatcher(None, query, name).ratio()
+            SequenceMatcher(None, query, original).ratio()
+    naive = (time.perf_counter() - start) / 10 / len(sample) * total
+
+    print(f"标题数量: {total}, 查询数量: {query_count}")
+    print(f"建立索引: {build:.2f}s")
+    print(f"批量查找: {search:.2f}s, 平均 {search / query_count * 1000:.2f}ms/次")
+    print(f"逐个比较 (估算): {naive * 1000:.0f}ms/次")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -1,2 +1,20 @@
-from .amr import Amr
-from .config import Config
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .amr import Amr
+    from .config import Config
+
+__all__ = ["Amr", "Config"]
+
+
+def __getattr__(name: str):
+    # 按需导入, 命令行只在执行命令时才导入 httpx/pydantic/rich 等依赖
+    if name == "Amr":
+        from .amr import Amr
+
+        return Amr
+    if name == "Config":
+        from .config import Config
+
+        return Config
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,12 +1,49 @@
 import logging
-from typing import Union
+import os
+import re
+import time
+from collections import Counter
+from typing import Iterator, Optional, Union
+
+from ruamel.yaml import YAML
 
 from .api import AlistApi, TMDBApi
+from .bindings import BindingStore
+from .catalogue import Catalogue
 from .config import Config
-from .models import RenameTask, Folder
-from .output import Message, console
+from .identify import Identifier
+from .journal import RenameJournal
+from .models import (
+    AlistServer,
+    ApiResponse,
+    ApiResponseError,
+    BatchEntry,
+    BatchManifest,
+    Binding,
+    BatchResult,
+    IdentifyResult,
+    LibraryFolder,
+    MediaMeta,
+    PlanItem,
+    WatchEntry,
+    JournalStep,
+    RenameConflict,
+    RenameOutcome,
+    RenamePlan,
+    RenameStep,
+    RenameTask,
+    Shard,
+    ShardReport,
+    VerifyResult,
+    Folder,
+)
+from .output import Message, OutputParser, console
+from .planner import RenamePlanner
+from .storage import LocalStorage, Storage, WebDAVStorage
 from .task import ApiTask, taskManager, TaskManager
 from .utils import Helper
+from .walker import LibraryWalker
+from .watch import WatchRegistry
 
 
 logger = logging.getLogger("Amr")
@@ -42,27 +79,1716 @@ class Amr:
         self._taskManager: TaskManager = taskManager
         self._taskManager.verbose = verbose
         self._taskManager.limit_rate = self.config.amr.limit_rate
+        if self.config.tmdb.cache_ttl > 0:
+            self._taskManager.response_cache.open(
+                os.path.join(self.config.amr.data_dir, "tmdb_cache.sqlite"),
+                self.config.tmdb.cache_ttl,
+            )
+
+        # 跳过重命名确认
+        self.assume_yes = False
+        # 使用已保存的文件夹绑定, 跳过搜索及季度选择
+        self.use_bindings = True
+        # 整理剧集: 重命名后将文件移动到季度文件夹
+        self.organise = False
+        # 已知存在或已创建的文件夹, 移动文件前只创建不存在的文件夹
+        self._known_dirs: set[str] = set()
+        # 重命名后重新获取文件列表校验结果, 只重试未生效的条目
+        self.verify = False
+        # 关键词优先在本地TMDB目录中查找
+        self.use_catalogue = True
+        # 本地TMDB目录, 首次查找时打开, 之后复用同一个数据库连接
+        self._catalogue: Optional[Catalogue] = None
+        # 本次运行的重命名日志运行id, 用于分片报告
+        self.run_ids: list[str] = []
 
         logger.debug("登录Alist...")
 
-        # 初始化 AlistApi 和 TMDBApi
-        self.alist = AlistApi(
-            self.config.alist.url,
-            self.config.alist.user,
-            self.config.alist.password,
-            self.config.alist.totp,
-        )
+        # 初始化存储 (AlistApi, 本地存储或 WebDAV 存储) 和 TMDBApi
+        self.alist: Storage = Amr._create_storage(self.config.alist)
         self.tmdb = TMDBApi(
             self.config.tmdb.api_key,
             self.config.tmdb.api_url,
         )
+        self._taskManager.set_queue(
+            self.alist.queue, self.config.alist.weight, self.config.alist.limit_rate
+        )
+        # Alist 目标名称 -> 存储, 其他目标在首次使用时登录
+        self._alists: dict[str, Storage] = {"": self.alist}
+        # 文件夹路径 -> 所在 Alist, 执行计划时按路径选择 Alist
+        self._routes: dict[str, Storage] = {}
 
         # 登录
-        if (not self.config.alist.guest_mode) and need_login:
-            with console.status("登录Alist..."):
-                taskManager.add_tasks(self.alist.login())
-                (result,) = taskManager.run_tasks()
-                self.alist._token = result.data["token"]
+        if (
+            isinstance(self.alist, AlistApi)
+            and (not self.config.alist.guest_mode)
+            and need_login
+        ):
+            self._login(self.alist)
+
+    @staticmethod
+    def _create_storage(server: AlistServer, name: str = "") -> Storage:
+        """
+        按存储类型创建存储
+
+        :param server: 服务器参数
+        :param name: Alist 目标名称, 为空时为默认 Alist
+        :return: AlistApi, 本地存储或 WebDAV 存储
+        """
+
+        if server.storage == "local":
+            if not server.root:
+                raise ValueError(f"本地存储未配置根目录: {name or 'alist'}")
+            return LocalStorage(server.root, name=name, max_workers=server.limit_rate or None)
+        if server.storage == "webdav":
+            return WebDAVStorage(server.url, server.user, server.password, name=name)
+        return AlistApi(server.url, server.user, server.password, server.totp, name=name)
+
+    def _login(self, alist: AlistApi) -> None:
+        """登录 Alist 并保存 Token"""
+
+        with console.status(f"登录Alist{' ' + alist.name if alist.name else ''}..."):
+            taskManager.add_tasks(alist.login())
+            (result,) = taskManager.run_tasks()
+            alist._token = result.data["token"]
+
+    def alist_target(self, name: str = "") -> Storage:
+        """
+        获取 Alist 目标, 首次使用时登录
+
+        :param name: 配置中 alist.targets 的目标名称, 为空时为默认 Alist
+        :return: 目标存储
+        """
+
+        if name in self._alists:
+            return self._alists[name]
+        server = self.config.alist.targets.get(name)
+        if server is None:
+            raise ValueError(f"未配置的 Alist 目标: {name}")
+        alist = Amr._create_storage(server, name)
+        self._taskManager.set_queue(alist.queue, server.weight, server.limit_rate)
+        if isinstance(alist, AlistApi) and not server.guest_mode:
+            self._login(alist)
+        self._alists[name] = alist
+        return alist
+
+    def _api(self, path: str) -> Storage:
+        """按路径选择执行计划时使用的 Alist, 未登记的路径使用当前 Alist"""
+
+        path = path if path.endswith("/") else path + "/"
+        matched = max(
+            (prefix for prefix in self._routes if path.startswith(prefix)),
+            key=len,
+            default=None,
+        )
+        return self.alist if matched is None else self._routes[matched]
+
+    # TAG: apply_plans
+    def apply_plans(
+        self, plans: list[RenamePlan], folder_password=None
+    ) -> dict[str, list[RenameOutcome]]:
+        """
+        执行一个或多个重命名计划. 从文件加载的计划会重新获取文件列表, 跳过源文件已变更的条目.
+
+        :param plans: 重命名计划列表
+        :param folder_password: 文件夹访问密码
+        :return: 文件类别 -> 重命名结果列表
+        """
+
+        logger.info(f"---Amr apply_plans---\nplans: {len(plans)}")
+
+        # 不同 Alist 中存在相同路径时, 冲突的计划在本轮结束后单独执行
+        plans, deferred = self._route_plans(plans)
+
+        listings: dict[str, list[dict]] = {}
+        for plan in plans:
+            for path, entries in plan.listings.items():
+                names = {entry["name"] for entry in listings.get(path, [])}
+                listings[path] = listings.get(path, []) + [
+                    entry for entry in entries if entry["name"] not in names
+                ]
+
+        # Step 1: 重新获取计划涉及的文件夹列表, 从计划所在的 Alist 获取
+        folders = sorted(
+            {
+                (plan.target, path)
+                for plan in plans
+                if not plan.listings
+                for path in plan.fingerprints
+            }
+        )
+        listings.update(
+            self._list_folders(
+                [path for _, path in folders],
+                folder_password,
+                alists=[self.alist_target(target) for target, _ in folders],
+            )
+        )
+
+        # Step 2: 按文件类别合并计划条目, 跳过源文件已变更的条目
+        rename_lists: dict[str, list[RenameTask]] = {
+            "video": [],
+            "subtitle": [],
+            "folder": [],
+        }
+        moves: list[PlanItem] = []
+        skipped: list[RenameConflict] = []
+        for plan in plans:
+            index = {} if plan.listings else Helper.plan_listing_index(plan, listings)
+            for item in plan.items:
+                reason = "" if plan.listings else Helper.check_plan_item(item, index)
+                if reason:
+                    if item.category != "move":
+                        skipped.append(
+                            RenameConflict(
+                                task_index=-1,
+                                original_name=item.rename_task.original_name,
+                                target_name=item.rename_task.target_name,
+                                reason=reason,
+                            )
+                        )
+                    continue
+                if item.category == "move":
+                    moves.append(item)
+                else:
+                    rename_lists[item.category].append(item.rename_task)
+
+        # Step 3: 预检冲突, 确认后按批次重命名及移动
+        results = self._rename_media_files(
+            rename_lists["video"],
+            rename_lists["subtitle"],
+            rename_lists["folder"],
+            listings,
+            skipped,
+            moves,
+        )
+
+        # Step 4: 全部条目重命名成功的计划保存文件夹绑定
+        self._save_bindings(plans, Amr._plan_outcomes(plans, results))
+        if deferred:
+            for category, outcomes in self.apply_plans(deferred, folder_password).items():
+                results.setdefault(category, []).extend(outcomes)
+        return results
+
+    def _route_plans(
+        self, plans: list[RenamePlan]
+    ) -> tuple[list[RenamePlan], list[RenamePlan]]:
+        """
+        登记计划涉及的文件夹所在的 Alist, 执行时按路径发送到对应 Alist.
+        不同 Alist 的请求进入各自的调度队列, 同一轮中并发执行.
+
+        :return: (本轮执行的计划, 与本轮路径冲突需要稍后执行的计划)
+        """
+
+        self._routes = {}
+        self._known_dirs = set()
+        accepted: list[RenamePlan] = []
+        deferred: list[RenamePlan] = []
+        for plan in plans:
+            alist = self.alist_target(plan.target)
+            # 只登记计划操作的文件夹, 上级文件夹 (如父文件夹重命名所在目录) 可被多个 Alist 共用
+            listed = set(plan.fingerprints) | set(plan.listings)
+            paths = {
+                path
+                for path in listed
+                if not any(other != path and other.startswith(path) for other in listed)
+            }
+            for item in plan.items:
+                task = item.rename_task
+                if item.category == "folder":
+                    paths.add(f"{task.folder_path.path}{task.original_name}/")
+                    paths.add(f"{task.folder_path.path}{task.target_name}/")
+                    continue
+                paths.add(task.folder_path.path)
+                if item.target_folder is not None:
+                    paths.add(item.target_folder.path)
+            if any(self._routes.get(path, alist) is not alist for path in paths):
+                logger.info(f"计划路径与其他 Alist 冲突, 稍后执行: {sorted(paths)}")
+                deferred.append(plan)
+                continue
+            self._routes.update(dict.fromkeys(paths, alist))
+            accepted.append(plan)
+        return accepted, deferred
+
+    @staticmethod
+    def _plan_outcomes(
+        plans: list[RenamePlan], rename_results: dict[str, list[RenameOutcome]]
+    ) -> list[list[bool]]:
+        """
+        统计各计划条目是否重命名成功.
+        重名目标只有排在最前的条目会执行, 按计划顺序依次认领成功结果.
+
+        :return: 与计划及条目顺序对应的结果
+        """
+
+        succeeded: Counter[str] = Counter(
+            outcome.step.target_path
+            for outcomes in rename_results.values()
+            for outcome in outcomes
+            if outcome.response.success
+        )
+        outcomes = []
+        for plan in plans:
+            outcome = []
+            for item in plan.items:
+                folder = item.target_folder or item.rename_task.folder_path
+                target = folder.path + item.rename_task.target_name
+                outcome.append(succeeded[target] > 0)
+                if succeeded[target] > 0:
+                    succeeded[target] -= 1
+            outcomes.append(outcome)
+        return outcomes
+
+    def _save_bindings(
+        self, plans: list[RenamePlan], outcomes: list[list[bool]]
+    ) -> None:
+        """保存全部条目重命名成功的计划的文件夹绑定, 文件夹已重命名时使用新路径"""
+
+        plans = [
+            plan
+            for plan, outcome in zip(plans, outcomes)
+            if plan.binding is not None and all(outcome)
+        ]
+        if not plans:
+            return
+        store = BindingStore(self.config.amr.data_dir)
+        try:
+            for plan in plans:
+                binding = plan.binding.model_copy()
+                for item in plan.items:
+                    if item.category == "folder":
+                        task = item.rename_task
+                        binding.folder = f"{task.folder_path.path}{task.target_name}/"
+                store.save(binding, previous=plan.binding.folder)
+        finally:
+            store.close()
+
+    def _binding(self, folder_path: str, movie: bool) -> Optional[Binding]:
+        """
+        获取文件夹绑定, 未启用绑定或媒体类型不同时返回 None
+
+        :param folder_path: 文件夹路径
+        :param movie: 是否为电影
+        :return: 文件夹绑定
+        """
+
+        if not self.use_bindings or not folder_path:
+            return None
+        store = BindingStore(self.config.amr.data_dir)
+        try:
+            binding = store.get(Folder(path=folder_path).path)
+        finally:
+            store.close()
+        if binding is None or binding.movie != movie:
+            return None
+        if binding.template != BindingStore.template_version(self.config):
+            logger.info(f"命名模板已变化, 按新模板重命名: {binding.folder}")
+        return binding
+
+    def bound_id(self, folder_path: str, movie: bool) -> Optional[str]:
+        """获取文件夹绑定的 TMDB id, 并提示如何重新选择"""
+
+        binding = self._binding(folder_path, movie)
+        if binding is None:
+            return None
+        Message.info(
+            f"使用已绑定的{'电影' if movie else '剧集'}: {binding.tmdb_id}, 可使用 --rebind 重新搜索"
+        )
+        return binding.tmdb_id
+
+    # TAG: batch
+    def batch(self, entries: list[BatchEntry]) -> list[BatchResult]:
+        """
+        依次为清单中的每个文件夹生成重命名计划, 统一确认后一起执行.
+        所有条目共享 Alist 登录凭据, 网络连接, TMDB 请求缓存及并发限制, 单个条目出错不影响其余条目.
+
+        :param entries: 批量重命名清单条目
+        :return: 各条目结果
+        """
+
+        logger.info(f"---Amr batch---\nentries: {len(entries)}")
+
+        # Step 1: 逐个条目生成重命名计划
+        results = [BatchResult(entry=entry) for entry in entries]
+        plans: list[RenamePlan] = []
+        for index, result in enumerate(results, start=1):
+            Message.info(f"[{index}/{len(results)}] {result.entry.dir}")
+            try:
+                plan = self._plan_batch_entry(result.entry)
+            except (ApiResponseError, ValueError, KeyError) as e:
+                logger.warning(f"批量条目失败: {result.entry.dir}, {e}", exc_info=True)
+                result.status = "failed"
+                result.message = str(e)
+                # 请求失败可重试, 未知的 target, 季度不存在等参数错误不重试
+                result.retryable = isinstance(e, ApiResponseError)
+                continue
+            result.status = "planned"
+            result.planned = len(plan.items)
+            plans.append(plan)
+
+        Message.print_batch_results(results)
+        if not plans:
+            return results
+
+        # Step 2: 合并执行所有计划
+        rename_results = self.apply_plans(plans)
+
+        # Step 3: 统计各条目重命名结果
+        outcomes = Amr._plan_outcomes(plans, rename_results)
+        for result, outcome in zip([r for r in results if r.status == "planned"], outcomes):
+            result.succeeded = sum(outcome)
+            result.failed = result.planned - result.succeeded
+            if result.failed == 0:
+                result.status = "success"
+            elif result.succeeded > 0:
+                result.status = "partial"
+            else:
+                result.status = "failed"
+
+        Message.print_batch_results(results)
+        return results
+
+    # TAG: watch_add
+    def watch_add(
+        self,
+        folder_path: str,
+        tmdb_id: str,
+        movie: bool = False,
+        seasons: str = "",
+        first_number: str = "1-",
+        folder_password=None,
+        interval: float = 600,
+    ) -> WatchEntry:
+        """
+        添加监视文件夹, 剧集未指定季度时由用户选择.
+
+        :param folder_path: 文件夹路径
+        :param tmdb_id: 剧集/电影id
+        :param movie: 是否为电影
+        :param seasons: 季度编号, 如 1,2 或 1-3
+        :param first_number: 从指定集数开始重命名
+        :param folder_password: 文件夹访问密码
+        :param interval: 检查间隔(秒)
+        :return: 监视文件夹
+        """
+
+        if not movie and not seasons:
+            seasons = self.select_seasons(tmdb_id)
+        entry = WatchEntry(
+            folder=Folder(path=folder_path).path,
+            movie=movie,
+            tmdb_id=tmdb_id,
+            seasons=seasons,
+            number=first_number,
+            password=folder_password,
+            interval=interval,
+        )
+        registry = WatchRegistry(self.config.amr.data_dir)
+        try:
+            registry.add(entry)
+        finally:
+            registry.close()
+        logger.info(f"添加监视文件夹: {entry.model_dump_json()}")
+        return entry
+
+    def select_seasons(self, tv_id: str) -> str:
+        """获取剧集信息并由用户选择季度, 返回季度编号如 1,2"""
+
+        with console.status("查找指定剧集..."):
+            task_0_tv_info: ApiTask = self.tmdb.tv_info(tv_id, self.config.tmdb.language)
+            self._taskManager.add_tasks(task_0_tv_info)
+            self._taskManager.run_tasks()
+        seasons = task_0_tv_info.response.data["seasons"]
+        season_indexes = Message.select_numbers(len(seasons))
+        return ",".join(str(seasons[index]["season_number"]) for index in season_indexes)
+
+    # TAG: watch
+    def watch(self, once: bool = False) -> None:
+        """
+        按检查间隔轮询监视文件夹, 只重命名新出现的文件.
+
+        :param once: 只检查一次到期的文件夹
+        """
+
+        registry = WatchRegistry(self.config.amr.data_dir)
+        logger.info(f"---Amr watch---\nonce: {once}")
+        try:
+            while True:
+                self.watch_poll(registry)
+                entries = registry.entries()
+                if once or not entries:
+                    if not entries:
+                        Message.warning("没有监视的文件夹, 请先使用 amr watch add 添加")
+                    break
+                delay = max(1.0, min(entry.next_check for entry in entries) - time.time())
+                logger.debug(f"等待下次检查: {delay:.0f}s")
+                time.sleep(delay)
+        finally:
+            registry.close()
+
+    def watch_poll(self, registry: WatchRegistry) -> dict[str, list[str]]:
+        """
+        检查到期的监视文件夹: 先获取文件夹信息, 有变化时才获取完整文件列表, 并重命名新出现的文件.
+
+        :param registry: 监视列表
+        :return: 文件夹路径 -> 新出现的文件
+        """
+
+        now = time.time()
+        due = registry.due(now)
+        if not due:
+            return {}
+
+        # Step 1: 获取文件夹信息, 修改时间未变化的文件夹跳过
+        with console.status("检查监视文件夹..."):
+            tasks_get = [self.alist.get(entry.folder, entry.password) for entry in due]
+            self._run_silently(tasks_get)
+        changed: list[WatchEntry] = []
+        for entry, task in zip(due, tasks_get):
+            if not task.response.success:
+                registry.schedule(entry, task.response.error)
+                continue
+            modified = task.response.data.get("modified", "")
+            if (
+                modified == entry.folder_modified
+                and now - entry.listed_at < WatchRegistry.FULL_LIST_INTERVAL
+            ):
+                registry.schedule(entry)
+                continue
+            entry.folder_modified = modified
+            changed.append(entry)
+
+        # Step 2: 为有变化的文件夹生成重命名计划, 只保留新出现的文件
+        plans: list[RenamePlan] = []
+        watched: list[tuple[WatchEntry, RenamePlan, list[dict]]] = []
+        fresh: dict[str, list[str]] = {}
+        for entry in changed:
+            try:
+                plan, listing, names = self._plan_watch_entry(
+                    entry, registry.snapshot(entry.folder)
+                )
+            except (ApiResponseError, ValueError, KeyError) as e:
+                registry.schedule(entry, str(e))
+                continue
+            entry.listed_at = now
+            fresh[entry.folder] = names
+            watched.append((entry, plan, listing))
+            if plan.items:
+                Message.info(f"{entry.folder}: 发现 {len(names)} 个新文件")
+                plans.append(plan)
+
+        # Step 3: 重命名新文件, 并以重命名后的名称更新快照
+        outcomes: dict[int, list[bool]] = {}
+        if plans:
+            rename_results = self.apply_plans(plans)
+            for plan, outcome in zip(plans, Amr._plan_outcomes(plans, rename_results)):
+                outcomes[id(plan)] = outcome
+        for entry, plan, listing in watched:
+            renamed = {
+                item.rename_task.original_name: item.rename_task.target_name
+                for item, success in zip(plan.items, outcomes.get(id(plan), []))
+                if success
+            }
+            registry.save_snapshot(
+                entry.folder,
+                [
+                    {**file, "name": renamed.get(file["name"], file["name"])}
+                    for file in listing
+                ],
+            )
+            registry.schedule(entry)
+        return fresh
+
+    def _plan_watch_entry(
+        self, entry: WatchEntry, snapshot: dict[str, tuple[int, str]]
+    ) -> tuple[RenamePlan, list[dict], list[str]]:
+        """
+        生成监视文件夹的重命名计划, 只保留新出现或有变化的文件, 不重命名文件夹本身
+
+        :return: (重命名计划, 当前文件列表, 新出现或有变化的文件)
+        """
+
+        for retry in (False, True):
+            if entry.movie:
+                plan = self.movie_plan_id(entry.tmdb_id, entry.folder, entry.password)
+            else:
+                plan = self.tv_plan_id(
+                    entry.tmdb_id, entry.folder, entry.password, entry.number, entry.seasons
+                )
+            listing = plan.listings.get(entry.folder, [])
+            added, changed, _ = WatchRegistry.diff(snapshot, listing)
+            names = set(added + changed)
+            plan.items = [
+                item
+                for item in plan.items
+                if item.category != "folder"
+                and item.rename_task.folder_path.path == entry.folder
+                and item.rename_task.original_name in names
+            ]
+
+            # 新视频文件没有匹配到剧集时, 缓存的季度信息可能已过期, 删除后重新获取一次
+            planned = {item.rename_task.original_name for item in plan.items}
+            unmatched = [
+                name
+                for name in added
+                if name not in planned
+                and re.match(self.config.amr.video_regex_pattern, name)
+            ]
+            if entry.movie or retry or not unmatched or not snapshot:
+                break
+            logger.debug(f"新文件未匹配到剧集, 重新获取季度信息: {unmatched}")
+            self._taskManager.response_cache.discard(f"/tv/{entry.tmdb_id}/season/")
+        return plan, listing, sorted(names)
+
+    # TAG: walk
+    def walk(
+        self,
+        roots: list[str],
+        folder_password=None,
+        max_depth: Optional[int] = None,
+        include: tuple[str, ...] = (),
+        exclude: tuple[str, ...] = (),
+        exclude_regex: Optional[str] = None,
+        skip_bound: bool = True,
+        refresh: bool = False,
+        shard: Optional[Shard] = None,
+    ) -> Iterator[LibraryFolder]:
+        """
+        广度优先遍历文件夹树, 按并发限制分批获取文件列表, 边遍历边输出包含视频文件的文件夹.
+
+        :param roots: 根文件夹路径列表
+        :param folder_password: 文件夹访问密码
+        :param max_depth: 最大遍历深度, 根文件夹为 0
+        :param include: 只输出名称或路径匹配的文件夹 (glob)
+        :param exclude: 跳过名称或路径匹配的文件夹 (glob)
+        :param exclude_regex: 跳过路径匹配正则的文件夹
+        :param skip_bound: 跳过已绑定的文件夹
+        :param refresh: 是否强制刷新文件夹
+        :param shard: 分片, 只遍历属于当前分片的子树
+        :return: 包含视频文件的文件夹
+        """
+
+        logger.info(
+            f"---Amr walk---\nroots: {roots}\nmax_depth: {max_depth}\n"
+            f"include: {include}\nexclude: {exclude}\nexclude_regex: {exclude_regex}\n"
+            f"skip_bound: {skip_bound}\nshard: {shard}"
+        )
+
+        skip_folders: list[str] = []
+        if skip_bound:
+            store = BindingStore(self.config.amr.data_dir)
+            try:
+                skip_folders = [binding.folder for binding in store.entries()]
+            finally:
+                store.close()
+
+        walker = LibraryWalker(
+            lambda folders: self._list_folders(folders, folder_password, refresh),
+            self.config.amr.video_regex_pattern,
+            batch_size=self._taskManager.limit_rate or 10,
+            max_depth=max_depth,
+            include=include,
+            exclude=exclude,
+            exclude_regex=exclude_regex,
+            skip_folders=skip_folders,
+            shard=shard,
+        )
+        return walker.walk(*roots)
+
+    def auto_walk(
+        self,
+        folders: Iterator[LibraryFolder],
+        movie: bool = False,
+        folder_password=None,
+        chunk_size: int = 20,
+    ) -> list[BatchResult]:
+        """
+        遍历过程中每发现一批文件夹即自动识别并重命名
+
+        :param folders: 遍历输出的文件夹
+        :param movie: 是否为电影
+        :param folder_password: 文件夹访问密码
+        :param chunk_size: 每次自动识别的文件夹数量
+        :return: 自动采用条目的重命名结果
+        """
+
+        results: list[BatchResult] = []
+        chunk: list[LibraryFolder] = []
+        for folder in folders:
+            chunk.append(folder)
+            if len(chunk) < chunk_size:
+                continue
+            results.extend(self._auto_chunk(chunk, movie, folder_password))
+            chunk = []
+        if chunk:
+            results.extend(self._auto_chunk(chunk, movie, folder_password))
+        return results
+
+    def _auto_chunk(
+        self, chunk: list[LibraryFolder], movie: bool, folder_password=None
+    ) -> list[BatchResult]:
+        Message.info(f"自动识别 {len(chunk)} 个文件夹...")
+        return self.auto(
+            [folder.path for folder in chunk],
+            movie,
+            folder_password,
+            listings={folder.path: folder.listing for folder in chunk},
+        )
+
+    # TAG: auto
+    def auto(
+        self,
+        folders: list[str],
+        movie: bool = False,
+        folder_password=None,
+        children: bool = False,
+        listings: Optional[dict[str, list[dict]]] = None,
+    ) -> list[BatchResult]:
+        """
+        根据文件夹名称自动识别剧集/电影并重命名, 置信度低于阈值的文件夹加入待审核列表.
+
+        :param folders: 文件夹路径列表
+        :param movie: 是否为电影
+        :param folder_password: 文件夹访问密码
+        :param children: 识别各文件夹下的子文件夹
+        :param listings: 已获取的文件列表, 如遍历时获取的列表
+        :return: 自动采用条目的重命名结果
+        """
+
+        logger.info(
+            f"---Amr auto---\nfolders: {folders}\nmovie: {movie}\nchildren: {children}"
+        )
+
+        if children:
+            folders, listings = self.child_folders(folders, folder_password)
+
+        # Step 1: 识别文件夹
+        results = self.auto_identify(folders, movie, folder_password, listings)
+        Message.print_identify_results(results)
+
+        # Step 2: 低置信度结果加入待审核列表
+        self.save_review(results)
+
+        # Step 3: 批量重命名自动采用的文件夹
+        entries = Amr.accepted_entries(results, movie, folder_password)
+        if not entries:
+            return []
+        return self.batch(entries)
+
+    def child_folders(
+        self, folders: list[str], folder_password=None
+    ) -> tuple[list[str], dict[str, list[dict]]]:
+        """
+        获取各文件夹下的子文件夹
+
+        :return: (子文件夹路径, 已获取的文件列表)
+        """
+
+        listings = self._list_folders(
+            sorted({Folder(path=path).path for path in folders}), folder_password
+        )
+        children = [
+            path + entry["name"] + "/"
+            for path, entries in listings.items()
+            for entry in entries
+            if entry.get("is_dir")
+        ]
+        return children, listings
+
+    def save_review(self, results: list[IdentifyResult]) -> list[IdentifyResult]:
+        """将未自动采用且包含视频文件的识别结果加入待审核列表"""
+
+        review = [
+            result for result in results if not result.accepted and result.file_count > 0
+        ]
+        if review:
+            filepath = Identifier.save_review(self.config.amr.data_dir, review)
+            Message.warning(f"{len(review)} 个文件夹需要人工确认, 已加入待审核列表: {filepath}")
+        return review
+
+    @staticmethod
+    def accepted_entries(
+        results: list[IdentifyResult], movie: bool = False, folder_password=None
+    ) -> list[BatchEntry]:
+        """自动采用的识别结果对应的批量清单条目"""
+
+        return [
+            BatchEntry(
+                dir=result.folder,
+                id=result.candidates[0].tmdb_id,
+                movie=movie,
+                seasons=""
+                if movie
+                else result.candidates[0].seasons or str(result.season or "1-"),
+                password=folder_password,
+            )
+            for result in results
+            if result.accepted
+        ]
+
+    # TAG: auto_identify
+    def auto_identify(
+        self,
+        folders: list[str],
+        movie: bool = False,
+        folder_password=None,
+        listings: Optional[dict[str, list[dict]]] = None,
+    ) -> list[IdentifyResult]:
+        """
+        根据文件夹名称解析标题及年份, 并发搜索TMDB并对候选评分.
+
+        :param folders: 文件夹路径列表
+        :param movie: 是否为电影
+        :param folder_password: 文件夹访问密码
+        :param listings: 已获取的文件列表, 其余文件夹重新获取
+        :return: 识别结果
+        """
+
+        folders = [Folder(path=path).path for path in folders]
+        language = self.config.tmdb.language
+
+        # Step 1: 获取文件列表, 统计视频文件数量
+        listings = dict(listings or {})
+        listings.update(
+            self._list_folders(
+                [path for path in folders if path not in listings], folder_password
+            )
+        )
+        results: list[IdentifyResult] = []
+        for path in folders:
+            title, year, season = Identifier.parse_folder_name(
+                Folder(path=path).current_path()
+            )
+            result = IdentifyResult(
+                folder=path, title=title, year=year, season=season, movie=movie
+            )
+            if path not in listings:
+                result.reason = "文件夹不存在或无法访问"
+            else:
+                result.file_count = len(
+                    [
+                        entry
+                        for entry in listings[path]
+                        if not entry.get("is_dir")
+                        and re.match(self.config.amr.video_regex_pattern, entry["name"])
+                    ]
+                )
+                if result.file_count == 0:
+                    result.reason = "没有视频文件"
+            results.append(result)
+        searchable = [result for result in results if result.title and not result.reason]
+
+        # Step 2: 优先在本地TMDB目录中查找, 其余文件夹并发在线搜索
+        local_data: list[Optional[dict]] = [
+            self._lookup_catalogue(result.title, movie) for result in searchable
+        ]
+        logger.debug("搜索TMDB...")
+        with console.status("搜索TMDB..."):
+            search = self.tmdb.search_movie if movie else self.tmdb.search_tv
+            tasks_search = {
+                i: search(result.title, language)
+                for i, result in enumerate(searchable)
+                if local_data[i] is None
+            }
+            self._run_silently(list(tasks_search.values()))
+        search_data = local_data.copy()
+        for i, task in tasks_search.items():
+            if task.response.success:
+                search_data[i] = task.response.data
+
+        # 本次搜索结果及此前缓存的搜索结果建立标题索引, 一次性为所有文件夹排序候选
+        operation = "tmdb.search_movie:" if movie else "tmdb.search_tv:"
+        cached = [
+            response.data
+            for _, response in self._taskManager.response_cache.items(operation)
+        ]
+        index = Identifier.build_index(
+            cached + [data for data in local_data if data is not None], movie
+        )
+        own_candidates = [
+            Identifier.candidates(data, movie) if data is not None else []
+            for data in search_data
+        ]
+        Identifier.rank_candidates(searchable, own_candidates, index)
+        for i, result in enumerate(searchable):
+            if not result.candidates:
+                result.reason = (
+                    tasks_search[i].response.error if i in tasks_search else ""
+                ) or "未找到候选"
+
+        # Step 3: 剧集获取前几名候选的详情, 比较季度年份及集数
+        if not movie:
+            top = [
+                (result, candidate)
+                for result in searchable
+                for candidate in sorted(
+                    result.candidates, key=lambda c: c.score, reverse=True
+                )[:3]
+            ]
+            with console.status("获取候选剧集信息..."):
+                tasks_tv_info = [
+                    self.tmdb.tv_info(candidate.tmdb_id, language) for _, candidate in top
+                ]
+                self._run_silently(tasks_tv_info)
+            for (result, candidate), task in zip(top, tasks_tv_info):
+                if task.response.success:
+                    Identifier.score_candidate(
+                        candidate,
+                        result.title,
+                        result.year,
+                        result.season,
+                        result.file_count,
+                        task.response.data,
+                    )
+
+        # Step 4: 按阈值决定是否自动采用
+        for result in results:
+            if not result.reason:
+                Identifier.decide(result, self.config.amr.auto_threshold)
+        return results
+
+    def _run_silently(self, tasks: list[ApiTask]) -> None:
+        """执行请求任务, 失败时不中断且不输出结果"""
+
+        for task in tasks:
+            task.raise_error = False
+            task.output_parser = OutputParser.slient_output
+        self._taskManager.add_tasks(*tasks)
+        self._taskManager.run_tasks()
+
+    def _plan_batch_entry(self, entry: BatchEntry) -> RenamePlan:
+        """生成批量清单条目的重命名计划, 文件列表从条目指定的 Alist 获取"""
+
+        alist = self.alist
+        self.alist = self.alist_target(entry.target)
+        try:
+            if entry.movie:
+                movie_id = (
+                    entry.id
+                    or self.bound_id(entry.dir, movie=True)
+                    or self.movie_search(entry.keyword)
+                )
+                plan = self.movie_plan_id(movie_id, entry.dir, entry.password)
+            else:
+                tv_id = (
+                    entry.id
+                    or self.bound_id(entry.dir, movie=False)
+                    or self.tv_search(entry.keyword)
+                )
+                if entry.season_folders:
+                    plan = self.tv_plan_season_folders(
+                        tv_id, entry.dir, entry.password, entry.number
+                    )
+                else:
+                    plan = self.tv_plan_id(
+                        tv_id, entry.dir, entry.password, entry.number, entry.seasons
+                    )
+        finally:
+            self.alist = alist
+        plan.target = entry.target
+        return plan
+
+    @staticmethod
+    def load_manifest(filepath: str) -> list[BatchEntry]:
+        """
+        加载批量重命名清单, 支持 `entries:` 列表或直接为条目列表
+
+        :param filepath: 清单文件路径 (YAML/JSON)
+        :return: 清单条目
+        """
+
+        with open(filepath, "r", encoding="utf-8") as file:
+            data = YAML(typ="safe").load(file)
+        if isinstance(data, list):
+            data = {"entries": data}
+        return BatchManifest.model_validate(data or {}).entries
+
+    def shard_report(
+        self,
+        command: str,
+        shard: Optional[Shard] = None,
+        results: Optional[list[BatchResult]] = None,
+        folders: Optional[list[str]] = None,
+    ) -> ShardReport:
+        """生成本次运行的分片报告"""
+
+        journal_dir = RenameJournal.journal_dir(self.config.amr.data_dir)
+        return ShardReport(
+            command=command,
+            shards=[str(shard)] if shard else [],
+            created_at=time.strftime("%Y-%m-%d %H:%M:%S"),
+            run_ids=list(self.run_ids),
+            journals=[
+                os.path.abspath(os.path.join(journal_dir, f"{run_id}.jsonl"))
+                for run_id in self.run_ids
+            ],
+            folders=folders or [],
+            results=results or [],
+        )
+
+    @staticmethod
+    def save_report(report: ShardReport, filepath: str) -> None:
+        """保存分片报告"""
+
+        os.makedirs(os.path.dirname(os.path.abspath(filepath)), exist_ok=True)
+        with open(filepath, "w", encoding="utf-8") as file:
+            file.write(report.model_dump_json(indent=2))
+
+    @staticmethod
+    def load_report(filepath: str) -> ShardReport:
+        """加载分片报告"""
+
+        with open(filepath, "r", encoding="utf-8") as file:
+            return ShardReport.model_validate_json(file.read())
+
+    # TAG: merge
+    def merge_reports(self, reports: list[ShardReport]) -> ShardReport:
+        """
+        合并各分片的报告及重命名日志. 日志文件优先使用报告中的路径, 不存在时 (如在其他节点生成)
+        在当前运行数据目录中查找, 合并后的日志可一次撤销全部分片的重命名.
+
+        :param reports: 分片报告
+        :return: 合并后的报告
+        """
+
+        commands = {report.command for report in reports}
+        if len(commands) > 1:
+            raise ValueError(f"不能合并不同命令的报告: {', '.join(sorted(commands))}")
+        shards = [shard for report in reports for shard in report.shards]
+        duplicated = sorted(shard for shard, count in Counter(shards).items() if count > 1)
+        if duplicated:
+            raise ValueError(f"分片重复: {', '.join(duplicated)}")
+        counts = {Shard.parse(shard).count for shard in shards}
+        if len(counts) > 1:
+            raise ValueError(f"分片总数不一致: {sorted(counts)}")
+        if counts:
+            (count,) = counts
+            missing = sorted(set(range(1, count + 1)) - {Shard.parse(s).index for s in shards})
+            if missing:
+                Message.warning(f"缺少分片: {', '.join(f'{i}/{count}' for i in missing)}")
+
+        data_dir = self.config.amr.data_dir
+        filepaths: list[str] = []
+        for report in reports:
+            for run_id, filepath in zip(report.run_ids, report.journals):
+                if not os.path.exists(filepath):
+                    filepath = os.path.join(RenameJournal.journal_dir(data_dir), f"{run_id}.jsonl")
+                if not os.path.exists(filepath):
+                    raise FileNotFoundError(f"找不到重命名日志: {run_id}")
+                filepaths.append(filepath)
+        self.run_ids = []
+        if filepaths:
+            journal = RenameJournal.merge(data_dir, filepaths)
+            self.run_ids.append(journal.run_id)
+            logger.info(f"合并重命名日志: {len(filepaths)} 个运行 -> {journal.run_id}")
+
+        merged = self.shard_report(
+            reports[0].command,
+            results=sorted(
+                (result for report in reports for result in report.results),
+                key=lambda result: result.entry.dir,
+            ),
+            folders=sorted(folder for report in reports for folder in report.folders),
+        )
+        merged.shards = sorted(shards, key=lambda shard: Shard.parse(shard).index)
+        return merged
+
+    @staticmethod
+    def save_plan(plan: RenamePlan, filepath: str) -> None:
+        """保存重命名计划"""
+
+        with open(filepath, "w", encoding="utf-8") as file:
+            file.write(plan.model_dump_json(indent=2))
+
+    @staticmethod
+    def load_plan(filepath: str) -> RenamePlan:
+        """加载重命名计划"""
+
+        with open(filepath, "r", encoding="utf-8") as file:
+            return RenamePlan.model_validate_json(file.read())
+
+    def _rename_media_files(
+        self,
+        video_rename_list: list[RenameTask],
+        subtitle_rename_list: list[RenameTask],
+        folder_rename_list: list[RenameTask],
+        listings: dict[str, list[dict]],
+        skipped: Optional[list[RenameConflict]] = None,
+        moves: Optional[list[PlanItem]] = None,
+    ) -> dict[str, list[RenameOutcome]]:
+        """
+        预检重命名冲突, 输出重命名信息, 用户确认后按批次执行重命名.
+        文件重命名后按目标文件夹分组移动文件, 最后重命名父文件夹.
+
+        :param video_rename_list: 视频重命名列表
+        :param subtitle_rename_list: 字幕重命名列表
+        :param folder_rename_list: 父文件夹重命名列表
+        :param listings: 文件夹路径 -> 当前文件列表
+        :param skipped: 预检前已跳过的条目
+        :param moves: 重命名后移动到其他文件夹的条目
+        :return: 文件类别 -> 重命名结果列表
+        """
+
+        folder_rename = len(folder_rename_list) > 0
+
+        # 重命名预检, 排除冲突任务
+        names = Helper.listing_names(listings)
+        file_rename_list = video_rename_list + subtitle_rename_list
+        file_waves, file_conflicts = RenamePlanner.plan(file_rename_list, names)
+        folder_waves, folder_conflicts = RenamePlanner.plan(folder_rename_list, names)
+        # 目标名称与原名称相同的任务 (不排除已重命名的文件时) 不发送请求, 也不输出
+        unchanged = {
+            i
+            for i, task in enumerate(file_rename_list)
+            if task.original_name == task.target_name
+        }
+        file_skipped = {conflict.task_index for conflict in file_conflicts} | unchanged
+        folder_skipped = {conflict.task_index for conflict in folder_conflicts} | {
+            i
+            for i, task in enumerate(folder_rename_list)
+            if task.original_name == task.target_name
+        }
+        video_indexes = [
+            i for i in range(len(video_rename_list)) if i not in file_skipped
+        ]
+        subtitle_indexes = [
+            i
+            for i in range(len(video_rename_list), len(file_rename_list))
+            if i not in file_skipped
+        ]
+        folder_indexes = [
+            i for i in range(len(folder_rename_list)) if i not in folder_skipped
+        ]
+
+        # 输出重命名文件信息
+        Message.print_rename_info(
+            [file_rename_list[i] for i in video_indexes],
+            [file_rename_list[i] for i in subtitle_indexes],
+            [folder_rename_list[i] for i in folder_indexes],
+            folder_rename,
+        )
+        Message.print_rename_conflicts(
+            (skipped or []) + file_conflicts + folder_conflicts
+        )
+        moves = moves or []
+        if moves:
+            Message.print_move_info(moves)
+
+        # 等待用户确认
+        if not self.assume_yes:
+            Message.require_confirmation()
+
+        # 进行文件重命名操作, 执行第一批重命名前写入全部步骤的意图,
+        # 中断后临时名称改回目标名称、移动及文件夹重命名仍可继续执行或撤销
+        journal = RenameJournal(self.config.amr.data_dir)
+        journal.begin()
+        self.run_ids.append(journal.run_id)
+        file_categories = {i: "video" for i in video_indexes}
+        file_categories.update({i: "subtitle" for i in subtitle_indexes})
+        move_candidates = [
+            RenameStep(
+                task_index=i,
+                folder_path=item.rename_task.folder_path,
+                original_name=item.rename_task.target_name,
+                target_name=item.rename_task.target_name,
+                target_folder=item.target_folder,
+            )
+            for i, item in enumerate(moves)
+        ]
+        move_waves = [move_candidates] if move_candidates else []
+        seqs = journal.intend_waves(
+            [[(file_categories[step.task_index], step) for step in wave] for wave in file_waves]
+            + [[("move", step) for step in wave] for wave in move_waves]
+            + [[("folder", step) for step in wave] for wave in folder_waves]
+        )
+        file_seqs = seqs[: len(file_waves)]
+        move_seqs = seqs[len(file_waves)] if move_waves else []
+        folder_seqs = seqs[len(file_waves) + len(move_waves) :]
+        logger.debug(f"正在重命名文件, 运行id: {journal.run_id}")
+        for path, entries in listings.items():
+            self._known_dirs.add(path)
+            self._known_dirs.update(
+                f"{path}{entry['name']}/" for entry in entries if entry.get("is_dir")
+            )
+        with console.status("正在重命名文件..."):
+            file_results = self._run_rename_waves(
+                file_waves, file_categories, journal, file_seqs
+            )
+            # 只移动重命名成功或无需重命名的文件
+            sources = [
+                (task.folder_path.path, task.original_name) for task in file_rename_list
+            ]
+            # 无需重命名的文件按已重命名处理
+            renamed = {
+                (item.rename_task.folder_path.path, item.rename_task.original_name)
+                for item in moves
+            } - {source for i, source in enumerate(sources) if i not in unchanged}
+            renamed.update(
+                sources[i] for i, outcome in file_results.items() if outcome.response.success
+            )
+            move_steps = [
+                step
+                for step, item in zip(move_candidates, moves)
+                if (item.rename_task.folder_path.path, item.rename_task.original_name)
+                in renamed
+            ]
+            moving = {step.task_index for step in move_steps}
+            journal.complete(
+                [
+                    (seq, False, "前置重命名失败, 已跳过")
+                    for step, seq in zip(move_candidates, move_seqs)
+                    if step.task_index not in moving
+                ]
+            )
+            move_results = self._run_rename_waves(
+                [move_steps] if move_steps else [],
+                {step.task_index: "move" for step in move_steps},
+                journal,
+                [[move_seqs[step.task_index] for step in move_steps]] if move_steps else [],
+            )
+            folder_results = self._run_rename_waves(
+                folder_waves, {i: "folder" for i in folder_indexes}, journal, folder_seqs
+            )
+
+        # 校验重命名结果, 已移动的文件校验移动后的位置
+        verify_result: Optional[VerifyResult] = None
+        if self.verify:
+            move_indexes = {
+                (moves[i].rename_task.folder_path.path, moves[i].rename_task.original_name): i
+                for i, outcome in move_results.items()
+                if outcome.response.success
+            }
+            follow = {
+                i: move_indexes[sources[i]] for i in file_results if sources[i] in move_indexes
+            }
+            verify_result = self._verify_renames(
+                {
+                    "file": {
+                        i: Helper.create_rename_step(i, file_rename_list[i]).model_copy(
+                            update={
+                                "target_folder": moves[follow[i]].target_folder
+                                if i in follow
+                                else None
+                            }
+                        )
+                        for i in file_results
+                    },
+                    "move": {step.task_index: step for step in move_steps},
+                    "folder": {
+                        i: Helper.create_rename_step(i, folder_rename_list[i])
+                        for i in folder_results
+                    },
+                },
+                {"file": file_results, "move": move_results, "folder": folder_results},
+                {
+                    "file": file_categories,
+                    "move": {step.task_index: "move" for step in move_steps},
+                    "folder": {i: "folder" for i in folder_indexes},
+                },
+                journal,
+                follow,
+            )
+        journal.finish()
+
+        results: dict[str, list[RenameOutcome]] = {
+            "video": [file_results[i] for i in video_indexes if i in file_results],
+            "subtitle": [
+                file_results[i] for i in subtitle_indexes if i in file_results
+            ],
+            "folder": [
+                folder_results[i] for i in folder_indexes if i in folder_results
+            ],
+            "move": [move_results[i] for i in sorted(move_results)],
+        }
+
+        # 输出重命名结果
+        Message.print_rename_result(
+            results["video"], results["subtitle"], results["folder"], folder_rename
+        )
+        if moves:
+            Message.print_move_result(results["move"], len(moves))
+        if verify_result is not None:
+            Message.print_verify_result(verify_result)
+        Message.info(
+            f"运行id: {journal.run_id}, 可使用 [green]amr undo {journal.run_id}[/green] 撤销本次重命名"
+        )
+        return results
+
+    # TAG: resume
+    def resume(self, run_id: Optional[str] = None) -> dict[str, list[RenameOutcome]]:
+        """
+        继续执行中断的重命名, 无需重新获取TMDB信息及匹配文件.
+
+        :param run_id: 运行id, 为空时继续最近一次未完成的运行
+        :return: 文件类别 -> 重命名结果列表
+        """
+
+        data_dir = self.config.amr.data_dir
+        run_id = run_id or RenameJournal.latest_unfinished(data_dir)
+        logger.info(f"---Amr resume---\nrun_id: {run_id}")
+        if run_id is None:
+            Message.success("没有未完成的重命名")
+            return {}
+        journal, _, steps = RenameJournal.load(data_dir, run_id)
+        pending = [step for step in steps if not step.done]
+
+        # 中断时可能已执行但未记录结果, 根据当前文件列表排除
+        folders = {step.step.folder_path.path for step in pending}
+        folders.update(
+            step.step.target_folder.path for step in pending if step.step.target_folder
+        )
+        listings = Helper.listing_names(self._list_folders(sorted(folders)))
+        remaining: list[JournalStep] = []
+        for step in pending:
+            names = set(listings.get(step.step.folder_path.path, []))
+            target_folder = step.step.target_folder or step.step.folder_path
+            target_names = set(listings.get(target_folder.path, []))
+            if (
+                step.step.original_name not in names
+                and step.step.target_name in target_names
+            ):
+                journal.complete([(step.seq, True, "")])
+            else:
+                remaining.append(step)
+
+        return self._run_journal_steps(
+            journal, remaining, f"继续执行重命名: {run_id}", resumed=True
+        )
+
+    # TAG: verify_run
+    def verify_run(self, run_id: str) -> VerifyResult:
+        """
+        重新校验指定运行中已完成的重命名, 只重试未生效的步骤, 重试写入同一运行.
+        未完成的运行校验后保持未完成, 其余步骤仍可继续执行.
+
+        :param run_id: 运行id
+        :return: 校验结果
+        """
+
+        logger.info(f"---Amr verify_run---\nrun_id: {run_id}")
+        journal, header, journal_steps = RenameJournal.load(
+            self.config.amr.data_dir, run_id
+        )
+        steps: dict[str, dict[int, RenameStep]] = {"file": {}, "move": {}, "folder": {}}
+        categories: dict[str, dict[int, str]] = {stage: {} for stage in steps}
+        results: dict[str, dict[int, RenameOutcome]] = {stage: {} for stage in steps}
+        for journal_step in journal_steps:
+            if not journal_step.done:
+                continue
+            stage = journal_step.category if journal_step.category in steps else "file"
+            step = journal_step.step.model_copy(update={"task_index": journal_step.seq})
+            steps[stage][journal_step.seq] = step
+            categories[stage][journal_step.seq] = journal_step.category
+            # 日志中已记录成功的步骤, 不重新发送请求
+            results[stage][journal_step.seq] = RenameOutcome(
+                step=step,
+                response=ApiResponse(success=True, status_code=200, error="", data={}),
+            )
+
+        # 重命名后又移动的文件按移动后的位置校验
+        move_indexes = {
+            (step.folder_path.path, step.original_name): seq
+            for seq, step in steps["move"].items()
+        }
+        follow: dict[int, int] = {}
+        for seq, step in steps["file"].items():
+            move = move_indexes.get((step.folder_path.path, step.target_name))
+            if move is not None:
+                follow[seq] = move
+                steps["file"][seq] = step.model_copy(
+                    update={"target_folder": steps["move"][move].target_folder}
+                )
+
+        verify = self._verify_renames(steps, results, categories, journal, follow)
+        if header.get("finished"):
+            journal.finish()
+        Message.print_verify_result(verify)
+        return verify
+
+    # TAG: undo
+    def undo(self, run_id: str) -> dict[str, list[RenameOutcome]]:
+        """
+        撤销指定运行中已完成的重命名, 按原批次倒序执行.
+
+        :param run_id: 运行id
+        :return: 文件类别 -> 重命名结果列表
+        """
+
+        logger.info(f"---Amr undo---\nrun_id: {run_id}")
+        data_dir = self.config.amr.data_dir
+        _, _, steps = RenameJournal.load(data_dir, run_id)
+        waves = sorted({step.wave for step in steps if step.done}, reverse=True)
+        inverse: list[JournalStep] = []
+        for new_wave, wave in enumerate(waves):
+            for step in reversed([step for step in steps if step.done and step.wave == wave]):
+                inverse.append(
+                    JournalStep(
+                        seq=step.seq,
+                        wave=new_wave,
+                        category=step.category,
+                        step=step.step.model_copy(
+                            update={
+                                "original_name": step.step.target_name,
+                                "target_name": step.step.original_name,
+                                # 移动步骤移回原文件夹
+                                "folder_path": step.step.target_folder
+                                or step.step.folder_path,
+                                "target_folder": step.step.target_folder
+                                and step.step.folder_path,
+                            }
+                        ),
+                    )
+                )
+
+        journal = RenameJournal(data_dir)
+        return self._run_journal_steps(
+            journal, inverse, f"撤销重命名: {run_id}", undo_of=run_id
+        )
+
+    def _run_journal_steps(
+        self,
+        journal: RenameJournal,
+        steps: list[JournalStep],
+        title: str,
+        resumed: bool = False,
+        undo_of: str = "",
+    ) -> dict[str, list[RenameOutcome]]:
+        """按日志步骤的批次执行重命名"""
+
+        if not steps:
+            Message.success(f"{title}, 没有需要执行的重命名")
+            if resumed:
+                journal.finish()
+            return {}
+
+        Message.print_rename_steps(title, [step.step for step in steps])
+        if not self.assume_yes:
+            Message.require_confirmation()
+
+        if not resumed:
+            journal.begin(kind="undo" if undo_of else "rename", undo_of=undo_of)
+        # 步骤按日志序号区分, 同一文件的前后步骤 (如临时名称) 按路径关联
+        waves: dict[int, list[JournalStep]] = {}
+        for step in steps:
+            waves.setdefault(step.wave, []).append(step)
+        ordered = [waves[wave] for wave in sorted(waves)]
+        categories = {step.seq: step.category for step in steps}
+        with console.status("正在重命名文件..."):
+            results = self._run_rename_waves(
+                [
+                    [step.step.model_copy(update={"task_index": step.seq}) for step in wave]
+                    for wave in ordered
+                ],
+                categories,
+                journal,
+                [[step.seq for step in wave] for wave in ordered] if resumed else None,
+            )
+        journal.finish()
+
+        grouped: dict[str, list[RenameOutcome]] = {
+            "video": [],
+            "subtitle": [],
+            "folder": [],
+            "move": [],
+        }
+        for seq, outcome in results.items():
+            grouped[categories[seq]].append(outcome)
+        Message.print_rename_result(
+            grouped["video"],
+            grouped["subtitle"],
+            grouped["folder"],
+            len(grouped["folder"]) > 0,
+        )
+        if grouped["move"]:
+            Message.print_move_result(grouped["move"], len(grouped["move"]))
+        Message.info(f"运行id: {journal.run_id}")
+        return grouped
+
+    def _list_folders(
+        self,
+        folders: list[str],
+        folder_password=None,
+        refresh: bool = True,
+        alists: Optional[list[Storage]] = None,
+    ) -> dict[str, list[dict]]:
+        """
+        并发获取多个文件夹的文件列表, 获取失败的文件夹不包含在内
+
+        :param alists: 与文件夹对应的 Alist, 为空时按路径选择. 同一路径可在多个 Alist 中获取, 结果合并
+        """
+
+        if not folders:
+            return {}
+        alists = alists or [self._api(path) for path in folders]
+        logger.debug("获取文件列表...")
+        with console.status("获取文件列表..."):
+            tasks_file_list: list[ApiTask] = [
+                alist.file_list(path, folder_password, refresh)
+                for alist, path in zip(alists, folders)
+            ]
+            for task in tasks_file_list:
+                task.raise_error = False
+            self._taskManager.add_tasks(*tasks_file_list)
+            self._taskManager.run_tasks()
+        return Helper.create_listings(
+            *[(task, Folder(path=path)) for task, path in zip(tasks_file_list, folders)]
+        )
+
+    def _verify_renames(
+        self,
+        steps: dict[str, dict[int, RenameStep]],
+        results: dict[str, dict[int, RenameOutcome]],
+        categories: dict[str, dict[int, str]],
+        journal: RenameJournal,
+        follow: Optional[dict[int, int]] = None,
+    ) -> VerifyResult:
+        """
+        重新获取涉及的文件夹列表 (每个文件夹一次) 并与重命名步骤对比, 只重试未生效的步骤.
+        无法确认完成的步骤结果改为失败.
+
+        :param steps: 阶段 (file / move / folder) -> 任务序号 -> 报告成功的步骤, 已移动文件的步骤包含目标文件夹
+        :param results: 阶段 -> 任务序号 -> 重命名结果, 按校验及重试结果更新
+        :param categories: 阶段 -> 任务序号 -> 文件类别
+        :param journal: 重命名日志, 重试步骤写入同一运行
+        :param follow: 文件任务序号 -> 其后的移动任务序号, 重试重命名成功后再重试移动
+        :return: 校验结果
+        """
+
+        follow = follow or {}
+        # 文件列表按父文件夹重命名后的路径获取
+        renamed_folders = {
+            step.folder_path.path + step.original_name + "/": step.folder_path.path
+            + step.target_name
+            + "/"
+            for index, step in steps["folder"].items()
+            if results["folder"][index].response.success
+        }
+        checks = [
+            (stage, index, Helper.relocate_step(step, renamed_folders))
+            for stage, stage_steps in steps.items()
+            for index, step in stage_steps.items()
+            if results[stage][index].response.success
+        ]
+        # 上级文件夹可能被多个 Alist 共用, 按文件所在的 Alist 分别获取后合并
+        folders = {
+            (self._api(step.full_path), path)
+            for *_, step in checks
+            for path in (step.folder_path.path, (step.target_folder or step.folder_path).path)
+        }
+        folders = sorted(folders, key=lambda pair: (pair[1], pair[0].queue))
+        listings = Helper.listing_names(
+            self._list_folders(
+                [path for _, path in folders], alists=[alist for alist, _ in folders]
+            )
+        )
+        self._known_dirs.update(listings)
+        verify = VerifyResult()
+        unchecked = [
+            check
+            for check in checks
+            if check[2].folder_path.path not in listings
+            or (check[2].target_folder or check[2].folder_path).path not in listings
+        ]
+        if unchecked:
+            Message.warning(f"获取文件列表失败, 无法校验: 共计 {len(unchecked)}")
+        checks = [check for check in checks if check not in unchecked]
+        statuses = Helper.diff_renames([step for *_, step in checks], listings)
+
+        # 已移动文件的重命名按移动后的位置校验:
+        # 重命名未生效时移动随其一起重试, 只有移动未生效时重命名视为已完成, 只重试移动
+        status_map = {
+            (stage, index): status
+            for (stage, index, _), status in zip(checks, statuses)
+        }
+        skipped_moves: set[int] = set()
+        for (stage, index, _), status in zip(checks, statuses):
+            if stage != "file" or index not in follow:
+                continue
+            move_status = status_map.get(("move", follow[index]))
+            if status == "missing" and move_status == "unapplied":
+                status_map[(stage, index)] = "verified"
+            elif status in ("verified", "unapplied"):
+                skipped_moves.add(follow[index])
+        retries: dict[str, list[RenameStep]] = {stage: [] for stage in steps}
+        for stage, index, step in checks:
+            status = status_map[(stage, index)]
+            if stage == "move" and index in skipped_moves:
+                continue
+            logger.debug(f"校验 {step.full_path} -> {step.target_path}: {status}")
+            if status == "verified":
+                verify.verified += 1
+                continue
+            if status in ("missing", "unapplied"):
+                verify.missing.append(step.target_path)
+            if status in ("unexpected", "unapplied"):
+                verify.unexpected.append(step.full_path)
+            if status == "unapplied" and stage == "file":
+                # 已移动文件先在原文件夹重试重命名
+                retries[stage].append(step.model_copy(update={"target_folder": None}))
+            elif status == "unapplied":
+                retries[stage].append(step)
+            else:
+                results[stage][index] = Amr._skipped_outcome(
+                    step,
+                    "校验失败: 目标不存在" if status == "missing" else "校验失败: 源文件仍存在",
+                )
+
+        # 按阶段顺序重试, 移动在文件重命名之后, 父文件夹最后
+        with console.status("正在重试未生效的重命名..."):
+            for stage, stage_steps in retries.items():
+                if not stage_steps:
+                    continue
+                retried = self._run_rename_waves([stage_steps], categories[stage], journal)
+                for index, outcome in retried.items():
+                    results[stage][index] = outcome
+                    verify.retried += 1
+                    if outcome.operation:
+                        self._taskManager.metrics.record_retry(outcome.operation, outcome.host)
+                    if not outcome.response.success:
+                        verify.retry_failed += 1
+                    elif stage == "file" and index in follow:
+                        retries["move"].append(
+                            Helper.relocate_step(
+                                steps["move"][follow[index]], renamed_folders
+                            )
+                        )
+        return verify
+
+    @staticmethod
+    def _skipped_outcome(step: RenameStep, error: str) -> RenameOutcome:
+        """未发送请求的重命名步骤的失败结果"""
+
+        return RenameOutcome(
+            step=step,
+            response=ApiResponse(success=False, status_code=-1, error=error, data={}),
+        )
+
+    def _ensure_folders(self, paths: list[str]) -> set[str]:
+        """
+        创建不存在的文件夹, 已知存在或已创建的文件夹不再请求
+
+        :param paths: 文件夹路径列表, 以 / 结尾
+        :return: 创建失败的文件夹路径
+        """
+
+        missing = sorted(set(paths) - self._known_dirs)
+        if not missing:
+            return set()
+        tasks = [self._api(path).mkdir(path.rstrip("/")) for path in missing]
+        self._run_silently(tasks)
+        failed = set()
+        for path, task in zip(missing, tasks):
+            if task.response is not None and task.response.success:
+                self._known_dirs.add(path)
+            else:
+                failed.add(path)
+                logger.warning(f"创建文件夹失败: {path}")
+        return failed
+
+    def _run_rename_waves(
+        self,
+        waves: list[list[RenameStep]],
+        categories: dict[int, str],
+        journal: Optional[RenameJournal] = None,
+        seqs: Optional[list[list[int]]] = None,
+    ) -> dict[int, RenameOutcome]:
+        """
+        按批次执行重命名, 前置步骤失败的任务不再发送请求.
+        包含目标文件夹的步骤为移动, 同一源/目标文件夹的文件合并为一个请求.
+
+        :param waves: 重命名批次列表
+        :param categories: 重命名任务序号 -> 文件类别
+        :param journal: 重命名日志, 发送第一批前写入全部批次的意图, 每批完成后写入结果
+        :param seqs: 各批次步骤的日志序号, 步骤已写入日志 (继续执行) 时传入
+        :return: 重命名任务序号 -> 最后一步的结果
+        """
+
+        if journal is not None and seqs is None:
+            seqs = journal.intend_waves(
+                [[(categories[step.task_index], step) for step in wave] for wave in waves]
+            )
+        results: dict[int, RenameOutcome] = {}
+        failed: set[int] = set()
+        # 重命名失败, 仍被源文件占用的路径
+        blocked: set[str] = set()
+        # 重命名失败, 未生成的目标路径 (如破除循环的临时名称), 以其为源的后续步骤跳过
+        unavailable: set[str] = set()
+        for wave_index, wave in enumerate(waves):
+            wave_seqs = dict(zip(map(id, wave), seqs[wave_index])) if seqs else {}
+            skipped: list[tuple[RenameStep, RenameOutcome]] = []
+            pending: list[tuple[RenameStep, ApiTask]] = []
+            ready: list[RenameStep] = []
+            for step in wave:
+                if (
+                    step.task_index in failed
+                    or step.target_path in blocked
+                    or step.full_path in unavailable
+                ):
+                    skipped.append((step, Amr._skipped_outcome(step, "前置重命名失败, 已跳过")))
+                    continue
+                ready.append(step)
+
+            # 移动步骤: 先创建目标文件夹, 再按源/目标文件夹合并为一个请求
+            moves = [step for step in ready if step.target_folder is not None]
+            failed_dirs = self._ensure_folders([step.target_folder.path for step in moves])
+            move_tasks: dict[tuple[str, str], list[tuple[list[str], ApiTask]]] = {}
+            for step in ready:
+                alist = self._api(step.full_path)
+                if step.target_folder is None:
+                    api_task = alist.rename(name=step.target_name, path=step.full_path)
+                elif step.target_folder.path in failed_dirs:
+                    skipped.append((step, Amr._skipped_outcome(step, "创建文件夹失败")))
+                    continue
+                else:
+                    key = (step.folder_path.path, step.target_folder.path)
+                    chunks = move_tasks.setdefault(key, [])
+                    if not chunks or len(chunks[-1][0]) >= alist.move_chunk_size:
+                        chunks.append(([], None))
+                    names, api_task = chunks[-1]
+                    names.append(step.original_name)
+                    if api_task is None:
+                        # 名称列表在请求发送前补充完整
+                        api_task = alist.move(names=names, src_dir=key[0], dst_dir=key[1])
+                        api_task.raise_error = False
+                        api_task.output_parser = OutputParser.slient_output
+                        chunks[-1] = (names, api_task)
+                pending.append((step, api_task))
+
+            if pending:
+                tasks = list({id(api_task): api_task for _, api_task in pending}.values())
+                self._taskManager.add_tasks(*tasks)
+                self._taskManager.run_tasks()
+            finished = skipped + [
+                (
+                    step,
+                    RenameOutcome(
+                        step=step,
+                        response=api_task.response,
+                        operation=api_task.operation,
+                        host=api_task.host,
+                    ),
+                )
+                for step, api_task in pending
+            ]
+            for step, outcome in finished:
+                results[step.task_index] = outcome
+                if not outcome.response.success:
+                    failed.add(step.task_index)
+                    blocked.add(step.full_path)
+                    unavailable.add(step.target_path)
+            if journal is not None and finished:
+                journal.complete(
+                    [
+                        (
+                            wave_seqs[id(step)],
+                            outcome.response.success,
+                            outcome.response.error,
+                        )
+                        for step, outcome in finished
+                    ]
+                )
+
+        return results
 
     # TAG: tv_rename_id
     def tv_rename_id(
@@ -71,6 +1797,7 @@ class Amr:
         folder_path: str,
         folder_password=None,
         first_number: str = "1-",
+        season_folders: bool = False,
     ) -> bool:
         """
         根据TMDB剧集id获取剧集标题,并批量将Alist指定文件夹中的视频文件及字幕文件重命名为剧集标题.
@@ -79,6 +1806,7 @@ class Amr:
         :param folder_path: 文件夹路径, 如/abc/test/
         :param folder_password: 文件夹访问密码
         :param first_number: 从集数开始命名, 如first_name=5-, 则从第5集开始按顺序重命名
+        :param season_folders: 按季度子文件夹重命名, 文件夹已按此方式绑定时自动启用
         :return: 重命名请求结果
         """
 
@@ -87,13 +1815,104 @@ class Amr:
             f"tv_id: {tv_id}\n"
             f"folder_path: {folder_path}\n"
             f"folder_password: {'******' if folder_password else 'None'}\n"
-            f"first_number: {first_number}"
+            f"first_number: {first_number}\n"
+            f"season_folders: {season_folders}"
         )
 
         if folder_path == "":
             self.tv_info_id(tv_id, first_number)
             return True
 
+        # Step 1: 生成重命名计划
+        if season_folders:
+            plan = self.tv_plan_season_folders(
+                tv_id, folder_path, folder_password, first_number
+            )
+        else:
+            plan = self.tv_plan_id(tv_id, folder_path, folder_password, first_number)
+
+        # Step 2: 预检冲突, 确认后按批次重命名
+        rename_results = self.apply_plans([plan])
+
+        # Step 3: 按季度子文件夹输出结果
+        if plan.binding is not None and plan.binding.season_folders:
+            Message.print_batch_results(
+                Amr._folder_results(plan, Amr._plan_outcomes([plan], rename_results)[0])
+            )
+
+        return True
+
+    @staticmethod
+    def _folder_results(plan: RenamePlan, outcome: list[bool]) -> list[BatchResult]:
+        """按文件所在文件夹统计计划的重命名结果, 不含文件夹重命名"""
+
+        results: dict[str, BatchResult] = {}
+        for item, success in zip(plan.items, outcome):
+            if item.category in ("folder", "move"):
+                continue
+            path = item.rename_task.folder_path.path
+            if path not in results:
+                variables = item.rename_task.media_meta.tv_format_variables
+                results[path] = BatchResult(
+                    entry=BatchEntry(
+                        dir=path,
+                        id=plan.binding.tmdb_id if plan.binding else "-",
+                        seasons=str(variables.season) if variables else "",
+                    )
+                )
+            result = results[path]
+            result.planned += 1
+            result.succeeded += int(success)
+        for result in results.values():
+            result.failed = result.planned - result.succeeded
+            result.status = (
+                "success"
+                if result.failed == 0
+                else "partial"
+                if result.succeeded
+                else "failed"
+            )
+        return list(results.values())
+
+    # TAG: tv_plan_id
+    def tv_plan_id(
+        self,
+        tv_id: str,
+        folder_path: str,
+        folder_password=None,
+        first_number: str = "1-",
+        seasons: str = "",
+    ) -> RenamePlan:
+        """
+        根据TMDB剧集id获取剧集标题, 匹配Alist指定文件夹中的视频文件及字幕文件, 生成重命名计划.
+
+        :param tv_id: 剧集id
+        :param folder_path: 文件夹路径, 如/abc/test/
+        :param folder_password: 文件夹访问密码
+        :param first_number: 从集数开始命名, 如first_name=5-, 则从第5集开始按顺序重命名
+        :param seasons: 季度编号, 如 1,2 或 1-3, 为空时使用文件夹绑定的季度或由用户选择
+        :return: 重命名计划
+        """
+
+        # 文件夹已绑定该剧集时, 使用绑定的季度及起始集数
+        binding = None if seasons else self._binding(folder_path, movie=False)
+        if binding is not None and binding.tmdb_id == tv_id:
+            seasons = binding.seasons
+            if first_number == "1-":
+                first_number = binding.number
+            if binding.season_folders:
+                return self.tv_plan_season_folders(
+                    tv_id, folder_path, folder_password, first_number
+                )
+
+        logger.info(
+            f"---Amr tv_plan_id---\n"
+            f"tv_id: {tv_id}\n"
+            f"folder_path: {folder_path}\n"
+            f"first_number: {first_number}\n"
+            f"seasons: {seasons}"
+        )
+
         ### ------------------------ 获取文件列表 ------------------------ ####
         logger.debug("获取文件列表...")
         with console.status("获取文件列表..."):
@@ -118,13 +1937,25 @@ class Amr:
             self._taskManager.run_tasks()
 
         # Step 4: 根据查找信息选择一个或多个季度
-        season_indexes = Message.select_numbers(
-            len(task_2_tv_info.response.data["seasons"])
-        )
-        season_numbers = [
-            task_2_tv_info.response.data["seasons"][index]["season_number"]
-            for index in season_indexes
+        available_seasons = [
+            season["season_number"] for season in task_2_tv_info.response.data["seasons"]
         ]
+        if seasons:
+            try:
+                season_numbers = [
+                    number
+                    for number in Message.parse_number_ranges(
+                        seasons, max(available_seasons)
+                    )
+                    if number in available_seasons
+                ]
+            except ValueError as e:
+                raise ValueError(f"季度编号错误: {seasons}, {e}")
+            if not season_numbers:
+                raise ValueError(f"未找到指定季度: {seasons}")
+        else:
+            season_indexes = Message.select_numbers(len(available_seasons))
+            season_numbers = [available_seasons[index] for index in season_indexes]
         logger.debug(f"选择季度: {season_numbers}")
 
         # Step 5: 获取所有已选季度的每集信息
@@ -162,64 +1993,212 @@ class Amr:
             task_1_file_list, Folder(path=folder_path), self.config
         )
 
-        # 匹配剧集信息/文件列表
-        video_rename_list: list[RenameTask] = Helper.match_episode_files(
+        # 匹配剧集信息/文件列表, 字幕跟随同名视频文件
+        video_pairs, video_rename_list = Helper.pair_episode_files(
             media_list, video_file_list, self.config
         )
-        subtitle_rename_list: list[RenameTask] = Helper.match_episode_files(
-            media_list, subtitle_file_list, self.config
+        subtitle_rename_list: list[RenameTask] = Helper.match_subtitle_files(
+            video_pairs, media_list, subtitle_file_list, self.config
         )
+        # 整理剧集时已重命名的文件同样需要移动
+        organise_list: list[RenameTask] = []
+        if self.organise:
+            organise_list = video_pairs + Helper.match_subtitle_files(
+                video_pairs,
+                media_list,
+                subtitle_file_list,
+                self.config,
+                exclude_renamed=False,
+            )
 
         # 获取父文件夹重命名标题
         folder_rename_list: list[RenameTask] = Helper.create_folder_rename_list(
             Folder(path=folder_path), folder_media_list
         )
 
-        ### ------------------------ 4. 进行重命名操作 -------------------- ###
-
-        # Step 6: 输出重命名文件信息
-        Message.print_rename_info(
+        # Step 6: 生成重命名计划
+        plan = Helper.create_rename_plan(
             video_rename_list,
             subtitle_rename_list,
             folder_rename_list,
-            self.config.amr.media_folder_rename,
+            Helper.create_listings(
+                (task_1_file_list, Folder(path=folder_path)),
+                (task_0_file_list, Folder(path=Folder(path=folder_path).parent_path())),
+            ),
+            self.config,
         )
+        plan.binding = Binding(
+            folder=Folder(path=folder_path).path,
+            tmdb_id=tv_id,
+            seasons=",".join(str(number) for number in season_numbers),
+            number=first_number,
+            template=BindingStore.template_version(self.config),
+        )
+        if organise_list:
+            self._add_season_moves(plan, organise_list, folder_password)
+        return plan
 
-        # Step 7: 等待用户确认
-        Message.require_confirmation()
+    def _add_season_moves(
+        self, plan: RenamePlan, rename_tasks: list[RenameTask], folder_password=None
+    ) -> None:
+        """
+        为计划添加移动到季度文件夹的条目, 目标文件夹中已存在同名文件的条目跳过
 
-        # Step 8: 进行文件重命名操作
-        logger.debug("正在重命名文件...")
-        with console.status("正在重命名文件..."):
-            # 生成重命名任务列表
-            tasks_4_video_rename_list: list[ApiTask] = [
-                self.alist.rename(name=task.target_name, path=task.full_path)
-                for task in video_rename_list
-            ]
-            tasks_4_subtitle_rename_list: list[ApiTask] = [
-                self.alist.rename(name=task.target_name, path=task.full_path)
-                for task in subtitle_rename_list
-            ]
-            tasks_4_folder_rename_list: list[ApiTask] = [
-                self.alist.rename(name=task.target_name, path=task.full_path)
-                for task in folder_rename_list
-            ]
+        :param plan: 剧集重命名计划
+        :param rename_tasks: 视频及字幕的全部配对
+        :param folder_password: 文件夹访问密码
+        """
+
+        moves = Helper.create_season_moves(rename_tasks, plan.listings, self.config)
+        if not moves:
+            return
+
+        # 获取已存在的季度文件夹列表, 检查目标文件是否已存在
+        existing = []
+        for path in sorted({item.target_folder.path for item in moves}):
+            folder = Folder(path=path)
+            if any(
+                entry["name"] == folder.current_path() and entry.get("is_dir")
+                for entry in plan.listings.get(folder.parent_path(), [])
+            ):
+                existing.append(path)
+        listings = self._list_folders(existing, folder_password)
+        plan.listings.update(listings)
+        plan.fingerprints.update(
+            {path: Helper.listing_fingerprint(items) for path, items in listings.items()}
+        )
+        names = Helper.listing_names(listings)
+        for item in moves:
+            target = item.target_folder.path + item.rename_task.target_name
+            if item.rename_task.target_name in names.get(item.target_folder.path, []):
+                Message.warning(f"季度文件夹中已存在同名文件, 跳过移动: {target}")
+                continue
+            plan.items.append(item)
+
+    # TAG: tv_plan_season_folders
+    def tv_plan_season_folders(
+        self,
+        tv_id: str,
+        folder_path: str,
+        folder_password=None,
+        first_number: str = "1-",
+    ) -> RenamePlan:
+        """
+        识别剧集文件夹下的季度子文件夹 (Season 1 / S01 / 第一季), 每个子文件夹与对应季度的剧集匹配, 生成一个重命名计划.
+
+        :param tv_id: 剧集id
+        :param folder_path: 剧集文件夹路径, 如/abc/test/
+        :param folder_password: 文件夹访问密码
+        :param first_number: 从集数开始命名, 对每个季度生效
+        :return: 重命名计划
+        """
+
+        logger.info(
+            f"---Amr tv_plan_season_folders---\n"
+            f"tv_id: {tv_id}\n"
+            f"folder_path: {folder_path}\n"
+            f"first_number: {first_number}"
+        )
+        folder = Folder(path=folder_path)
+
+        # Step 1: 获取剧集文件夹及其父文件夹列表, 同时查找 TMDB 剧集信息
+        logger.debug("获取文件列表...")
+        with console.status("获取文件列表..."):
+            task_0_file_list: ApiTask = self.alist.file_list(
+                folder.parent_path(), folder_password, True
+            )
+            task_1_file_list: ApiTask = self.alist.file_list(
+                folder.path, folder_password, True
+            )
+            task_2_tv_info: ApiTask = self.tmdb.tv_info(
+                tv_id, self.config.tmdb.language
+            )
+            self._taskManager.add_tasks(task_0_file_list, task_1_file_list, task_2_tv_info)
+            self._taskManager.run_tasks()
+
+        # Step 2: 识别季度子文件夹, 只保留 TMDB 中存在的季度
+        available_seasons = {
+            season["season_number"] for season in task_2_tv_info.response.data["seasons"]
+        }
+        season_folders = {
+            number: name
+            for number, name in Helper.detect_season_folders(
+                task_1_file_list.response.data.get("content") or []
+            ).items()
+            if number in available_seasons
+        }
+        if not season_folders:
+            raise ValueError(f"未找到季度子文件夹: {folder.path}")
+        season_numbers = sorted(season_folders)
+        logger.debug(f"季度子文件夹: {season_folders}")
+
+        # Step 3: 并发获取各季度子文件夹列表及季度信息
+        with console.status("获取季度信息..."):
+            subfolders = {
+                number: Folder(path=f"{folder.path}{season_folders[number]}/")
+                for number in season_numbers
+            }
+            tasks_3_file_list = {
+                number: self.alist.file_list(subfolders[number].path, folder_password, True)
+                for number in season_numbers
+            }
+            tasks_4_tv_season_info = {
+                number: self.tmdb.tv_season_info(tv_id, number, self.config.tmdb.language)
+                for number in season_numbers
+            }
             self._taskManager.add_tasks(
-                *tasks_4_video_rename_list, *tasks_4_subtitle_rename_list
+                *tasks_3_file_list.values(), *tasks_4_tv_season_info.values()
             )
             self._taskManager.run_tasks()
-            if self.config.amr.media_folder_rename:
-                self._taskManager.add_tasks(*tasks_4_folder_rename_list)
-                self._taskManager.run_tasks()
-        # Step 9: 输出重命名结果
-        Message.print_rename_result(
-            tasks_4_video_rename_list,
-            tasks_4_subtitle_rename_list,
-            tasks_4_folder_rename_list,
-            self.config.amr.media_folder_rename,
-        )
 
-        return True
+        # Step 4: 每个子文件夹与对应季度的剧集匹配
+        video_rename_list: list[RenameTask] = []
+        subtitle_rename_list: list[RenameTask] = []
+        folder_media_list: list[MediaMeta] = []
+        for number in season_numbers:
+            media_list, season_folder_media_list = Helper.create_tv_media_list(
+                first_number,
+                task_2_tv_info,
+                tasks_4_tv_season_info[number],
+                tv_id,
+                self.config,
+            )
+            if not folder_media_list:
+                folder_media_list = season_folder_media_list
+            video_file_list, subtitle_file_list = Helper.create_file_list(
+                tasks_3_file_list[number], subfolders[number], self.config
+            )
+            video_pairs, season_video_rename_list = Helper.pair_episode_files(
+                media_list, video_file_list, self.config
+            )
+            video_rename_list.extend(season_video_rename_list)
+            subtitle_rename_list.extend(
+                Helper.match_subtitle_files(
+                    video_pairs, media_list, subtitle_file_list, self.config
+                )
+            )
+
+        # Step 5: 生成重命名计划, 剧集文件夹按第一个季度命名
+        plan = Helper.create_rename_plan(
+            video_rename_list,
+            subtitle_rename_list,
+            Helper.create_folder_rename_list(folder, folder_media_list),
+            Helper.create_listings(
+                (task_1_file_list, folder),
+                (task_0_file_list, Folder(path=folder.parent_path())),
+                *[(tasks_3_file_list[number], subfolders[number]) for number in season_numbers],
+            ),
+            self.config,
+        )
+        plan.binding = Binding(
+            folder=folder.path,
+            tmdb_id=tv_id,
+            seasons=",".join(str(number) for number in season_numbers),
+            number=first_number,
+            season_folders=True,
+            template=BindingStore.template_version(self.config),
+        )
+        return plan
 
     # TAG: tv_rename_keyword
     def tv_rename_keyword(
@@ -228,6 +2207,7 @@ class Amr:
         folder_path: str,
         folder_password=None,
         first_number: str = "1-",
+        season_folders: bool = False,
     ) -> bool:
         """
         根据TMDB剧集关键词获取剧集标题,并批量将Alist指定文件夹中的视频文件及字幕文件重命名为剧集标题.
@@ -236,6 +2216,7 @@ class Amr:
         :param folder_path: 文件夹路径, 结尾必须加'/', 如/abc/test/
         :param folder_password: 文件夹访问密码
         :param first_number: 从指定集数开始命名, 如first_name=5, 则从第5集开始按顺序重命名
+        :param season_folders: 按季度子文件夹重命名
         :return: 重命名请求结果
         """
 
@@ -247,29 +2228,42 @@ class Amr:
             f"first_number: {first_number}"
         )
 
+        # Step 1: 使用文件夹绑定的剧集, 未绑定时使用关键词查找并选择剧集
+        tv_id = self.bound_id(folder_path, movie=False) or self.tv_search(keyword)
+
+        # Step 2: 根据获取到的id调用 tv_rename_id 函数进行重命名
+        self.tv_rename_id(tv_id, folder_path, folder_password, first_number, season_folders)
+
+        return True
+
+    # TAG: tv_search
+    def tv_search(self, keyword: str) -> str:
+        """
+        根据关键词查找TMDB剧集, 并由用户选择其中一项.
+
+        :param keyword: 剧集关键词
+        :return: 剧集id
+        """
+
         ### ------------------------ 1. 查找 TMDB 剧集信息 ------------------------ ####
-        # Step 1: 使用关键词查找剧集
-        logger.debug("查找指定剧集...")
-        with console.status("查找指定剧集..."):
-            task_0_search_tv: ApiTask = self.tmdb.search_tv(
-                keyword, self.config.tmdb.language
-            )
-            self._taskManager.add_tasks(task_0_search_tv)
-            self._taskManager.run_tasks()
+        # Step 1: 优先在本地TMDB目录中查找, 没有结果时使用关键词在线查找
+        search_data = self._search_catalogue(keyword)
+        if search_data is None:
+            logger.debug("查找指定剧集...")
+            with console.status("查找指定剧集..."):
+                task_0_search_tv: ApiTask = self.tmdb.search_tv(
+                    keyword, self.config.tmdb.language
+                )
+                self._taskManager.add_tasks(task_0_search_tv)
+                self._taskManager.run_tasks()
+            search_data = task_0_search_tv.response.data
 
         ### ------------------------ 2. 获取剧集 TMDB ID ------------------------------ ###
         # Step 2: 选择剧集
-        selected_number = Message.select_number(
-            len(task_0_search_tv.response.data["results"])
-        )
+        selected_number = Message.select_number(len(search_data["results"]))
         logger.debug(f"选择剧集: {selected_number}")
-        tv_id = task_0_search_tv.response.data["results"][selected_number]["id"]
-        tv_id: str = str(tv_id)
-
-        # Step 3: 根据获取到的id调用 tv_rename_id 函数进行重命名
-        self.tv_rename_id(tv_id, folder_path, folder_password, first_number)
-
-        return True
+        tv_id = search_data["results"][selected_number]["id"]
+        return str(tv_id)
 
     # TAG: tv_info_id
     def tv_info_id(
@@ -368,6 +2362,33 @@ class Amr:
             self.movie_info_id(movie_id)
             return True
 
+        # Step 1: 生成重命名计划
+        plan = self.movie_plan_id(movie_id, folder_path, folder_password)
+
+        # Step 2: 预检冲突, 确认后按批次重命名
+        self.apply_plans([plan])
+
+        return True
+
+    # TAG: movie_plan_id
+    def movie_plan_id(
+        self, movie_id: str, folder_path: str, folder_password=None
+    ) -> RenamePlan:
+        """
+        根据TMDB电影id获取电影标题, 匹配Alist指定文件夹中的视频文件及字幕文件, 生成重命名计划.
+
+        :param movie_id: 电影id
+        :param folder_path: 文件夹路径
+        :param folder_password: 文件夹访问密码
+        :return: 重命名计划
+        """
+
+        logger.info(
+            f"---Amr movie_plan_id---\n"
+            f"movie_id: {movie_id}\n"
+            f"folder_path: {folder_path}"
+        )
+
         ### ------------------------ 1. 获取文件列表 -------------------- ###
         # Step 1: 获取文件列表
         logger.debug("获取文件列表...")
@@ -409,12 +2430,12 @@ class Amr:
             task_1_file_list, Folder(path=folder_path), self.config
         )
 
-        # 匹配电影信息/文件列表
-        video_rename_list: list[RenameTask] = Helper.match_episode_files(
+        # 匹配电影信息/文件列表, 字幕跟随同名视频文件
+        video_pairs, video_rename_list = Helper.pair_episode_files(
             media_list, video_file_list, self.config
         )
-        subtitle_rename_list: list[RenameTask] = Helper.match_episode_files(
-            media_list, subtitle_file_list, self.config
+        subtitle_rename_list: list[RenameTask] = Helper.match_subtitle_files(
+            video_pairs, media_list, subtitle_file_list, self.config
         )
 
         # 获取父文件夹重命名标题
@@ -422,50 +2443,24 @@ class Amr:
             Folder(path=folder_path), folder_media_list
         )
 
-        ### ------------------------ 4. 进行重命名操作 -------------------- ###
-        # Step 4: 输出重命名文件信息
-        Message.print_rename_info(
+        # Step 4: 生成重命名计划
+        plan = Helper.create_rename_plan(
             video_rename_list,
             subtitle_rename_list,
             folder_rename_list,
-            self.config.amr.media_folder_rename,
+            Helper.create_listings(
+                (task_1_file_list, Folder(path=folder_path)),
+                (task_0_file_list, Folder(path=Folder(path=folder_path).parent_path())),
+            ),
+            self.config,
         )
-
-        # Step 5: 等待用户确认
-        Message.require_confirmation()
-
-        # Step 6: 进行文件重命名操作
-        with console.status("正在重命名文件..."):
-            # 生成重命名任务列表
-            tasks_4_video_rename_list: list[ApiTask] = [
-                self.alist.rename(name=task.target_name, path=task.full_path)
-                for task in video_rename_list
-            ]
-            tasks_4_subtitle_rename_list: list[ApiTask] = [
-                self.alist.rename(name=task.target_name, path=task.full_path)
-                for task in subtitle_rename_list
-            ]
-            tasks_4_folder_rename_list: list[ApiTask] = [
-                self.alist.rename(name=task.target_name, path=task.full_path)
-                for task in folder_rename_list
-            ]
-            self._taskManager.add_tasks(
-                *tasks_4_video_rename_list, *tasks_4_subtitle_rename_list
-            )
-            self._taskManager.run_tasks()
-            if self.config.amr.media_folder_rename:
-                self._taskManager.add_tasks(*tasks_4_folder_rename_list)
-                self._taskManager.run_tasks()
-
-        # Step 7: 输出重命名结果
-        Message.print_rename_result(
-            tasks_4_video_rename_list,
-            tasks_4_subtitle_rename_list,
-            tasks_4_folder_rename_list,
-            self.config.amr.media_folder_rename,
+        plan.binding = Binding(
+            folder=Folder(path=folder_path).path,
+            movie=True,
+            tmdb_id=movie_id,
+            template=BindingStore.template_version(self.config),
         )
-
-        return True
+        return plan
 
     # TAG: movie_rename_keyword
     def movie_rename_keyword(
@@ -480,29 +2475,61 @@ class Amr:
         :return: 重命名请求结果
         """
 
-        ### ------------------------ 1. 查找 TMDB 电影信息 ------------------------ ####
-        # Step 1: 使用关键词查找电影
-        with console.status("查找指定电影..."):
-            task_0_search_movie: ApiTask = self.tmdb.search_movie(
-                keyword, self.config.tmdb.language
-            )
-            self._taskManager.add_tasks(task_0_search_movie)
-            self._taskManager.run_tasks()
+        # Step 1: 使用文件夹绑定的电影, 未绑定时使用关键词查找并选择电影
+        movie_id = self.bound_id(folder_path, movie=True) or self.movie_search(keyword)
 
-        ### ------------------------ 2. 获取剧集 TMDB ID ------------------------------ ###
-        # Step 2: 选择电影
-        selected_number = Message.select_number(
-            len(task_0_search_movie.response.data["results"])
-        )
-        logger.debug(f"选择电影: {selected_number}")
-        movie_id = task_0_search_movie.response.data["results"][selected_number]["id"]
-        movie_id: str = str(movie_id)
-
-        # Step 3: 根据获取到的id调用 movie_rename_id 函数进行重命名
+        # Step 2: 根据获取到的id调用 movie_rename_id 函数进行重命名
         self.movie_rename_id(movie_id, folder_path, folder_password)
 
         return True
 
+    # TAG: movie_search
+    def movie_search(self, keyword: str) -> str:
+        """
+        根据关键词查找TMDB电影, 并由用户选择其中一项.
+
+        :param keyword: 电影关键词
+        :return: 电影id
+        """
+
+        ### ------------------------ 1. 查找 TMDB 电影信息 ------------------------ ####
+        # Step 1: 优先在本地TMDB目录中查找, 没有结果时使用关键词在线查找
+        search_data = self._search_catalogue(keyword, movie=True)
+        if search_data is None:
+            with console.status("查找指定电影..."):
+                task_0_search_movie: ApiTask = self.tmdb.search_movie(
+                    keyword, self.config.tmdb.language
+                )
+                self._taskManager.add_tasks(task_0_search_movie)
+                self._taskManager.run_tasks()
+            search_data = task_0_search_movie.response.data
+
+        ### ------------------------ 2. 获取电影 TMDB ID ------------------------------ ###
+        # Step 2: 选择电影
+        selected_number = Message.select_number(len(search_data["results"]))
+        logger.debug(f"选择电影: {selected_number}")
+        movie_id = search_data["results"][selected_number]["id"]
+        return str(movie_id)
+
+    def _search_catalogue(self, keyword: str, movie: bool = False) -> Optional[dict]:
+        """在本地TMDB目录中查找并输出结果, 未启用或没有结果时返回 None"""
+
+        search_data = self._lookup_catalogue(keyword, movie)
+        if search_data is not None:
+            Message.print_catalogue_results(keyword, search_data["results"], movie)
+        return search_data
+
+    def _lookup_catalogue(self, keyword: str, movie: bool = False) -> Optional[dict]:
+        """在本地TMDB目录中查找, 未启用, 未导入目录或没有可靠结果时返回 None"""
+
+        if not self.use_catalogue:
+            return None
+        if self._catalogue is None:
+            if not Catalogue.exists(self.config.amr.data_dir):
+                return None
+            self._catalogue = Catalogue(self.config.amr.data_dir)
+        return self._catalogue.lookup(keyword, movie)
+
     # TAG: movie_info_id
     def movie_info_id(self, movie_id: str) -> bool:
         """
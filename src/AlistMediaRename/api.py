@@ -1,10 +1,11 @@
 import httpx
 import pyotp
 
+from .storage import Storage
 from .task import ApiTask, taskManager
 
 
-class AlistApi:
+class AlistApi(Storage):
     """
     Alist请求函数, 包含: 登录/获取文件列表/重命名文件/删除文件/新建文件夹/上传文件/获取下载链接/获取存储驱动信息
     Alist api官方文档: https://alist-v3.apifox.cn/
@@ -17,6 +18,7 @@ class AlistApi:
         password: str = "",
         totp_code: str = "",
         token: str = "",
+        name: str = "",
     ):
         """
         初始化参数
@@ -26,6 +28,7 @@ class AlistApi:
         :param password: 密码
         :param totp_code: totp验证码
         :param token: Token
+        :param name: Alist 目标名称, 为空时为默认 Alist
         """
 
         self.url = url
@@ -33,6 +36,9 @@ class AlistApi:
         self.password = password
         self.totp_code = totp_code
         self._token = ""
+        self.name = name
+        # 调度队列, 每个 Alist 的请求单独排队
+        self.queue = f"alist:{name}" if name else "alist"
 
     @ApiTask.create("alist", "login", raise_error=True)
     def login(self) -> httpx.Request:
@@ -84,6 +90,22 @@ class AlistApi:
         }
         return httpx.Request("POST", post_url, headers=post_headers, json=post_params)
 
+    @ApiTask.create("alist", "slient", raise_error=False)
+    def get(self, path: str, password=None) -> httpx.Request:
+        """
+        获取文件/文件夹信息, 可用于检查文件夹是否有变化.
+
+        :param path: 文件/文件夹路径
+        :param password: 路径访问密码, 默认为空
+        :return: 获取文件/文件夹信息请求结果
+        """
+
+        # 发送请求
+        post_url = self.url + "/api/fs/get"
+        post_headers = {"Authorization": self._token}
+        post_json = {"path": path, "password": password}
+        return httpx.Request("POST", post_url, headers=post_headers, json=post_json)
+
     @ApiTask.create("alist", "slient", raise_error=False)
     def rename(self, name: str, path: str) -> httpx.Request:
         """
@@ -165,7 +187,7 @@ class TMDBApi:
         self.api_key = api_key
         self.timeout = 10
 
-    @ApiTask.create("tmdb", "tv_info", raise_error=True)
+    @ApiTask.create("tmdb", "tv_info", raise_error=True, cache=True)
     def tv_info(self, tv_id: str, language: str = "zh-CN") -> httpx.Request:
         """
         根据提供的id获取剧集信息.
@@ -180,7 +202,7 @@ class TMDBApi:
         post_params = {"api_key": self.api_key, "language": language}
         return httpx.Request("GET", post_url, params=post_params)
 
-    @ApiTask.create("tmdb", "search_tv", raise_error=True)
+    @ApiTask.create("tmdb", "search_tv", raise_error=True, cache=True)
     def search_tv(self, keyword: str, language: str = "zh-CN") -> httpx.Request:
         """
         根据关键字匹配剧集, 获取相关信息.
@@ -195,7 +217,7 @@ class TMDBApi:
         post_params = {"api_key": self.api_key, "query": keyword, "language": language}
         return httpx.Request("GET", post_url, params=post_params)
 
-    @ApiTask.create("tmdb", "tv_season_info", raise_error=True)
+    @ApiTask.create("tmdb", "tv_season_info", raise_error=True, cache=True)
     def tv_season_info(
         self, tv_id: str, season_number: int, language: str = "zh-CN"
     ) -> httpx.Request:
@@ -212,7 +234,7 @@ class TMDBApi:
         post_params = {"api_key": self.api_key, "language": language}
         return httpx.Request("GET", post_url, params=post_params)
 
-    @ApiTask.create("tmdb", "movie_info", raise_error=True)
+    @ApiTask.create("tmdb", "movie_info", raise_error=True, cache=True)
     def movie_info(self, movie_id: str, language: str = "zh-CN") -> httpx.Request:
         """
         根据提供的id获取电影信息.
@@ -228,7 +250,7 @@ class TMDBApi:
         post_params = {"api_key": self.api_key, "language": language}
         return httpx.Request("GET", post_url, params=post_params)
 
-    @ApiTask.create("tmdb", "search_movie", raise_error=True)
+    @ApiTask.create("tmdb", "search_movie", raise_error=True, cache=True)
     def search_movie(self, keyword: str, language: str = "zh-CN") -> httpx.Request:
         """
         根据关键字匹配电影, 获取相关信息.
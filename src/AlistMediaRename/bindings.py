@@ -0,0 +1,101 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import time
+from typing import Optional
+
+from .config import Config
+from .models import Binding
+
+logger = logging.getLogger("Amr.Bindings")
+
+
+class BindingStore:
+    """
+    文件夹绑定, 保存在 SQLite 中.
+    文件夹重命名成功后以新路径保存绑定, 再次运行时直接使用绑定的 TMDB id 及季度.
+    """
+
+    FILENAME = "bindings.sqlite"
+    # 参与计算命名模板版本的配置项
+    TEMPLATE_FIELDS = (
+        "tv_name_format",
+        "tv_folder_name_format",
+        "movie_name_format",
+        "movie_folder_name_format",
+        "subtitle_name_format",
+    )
+
+    def __init__(self, data_dir: str):
+        """
+        初始化参数
+
+        :param data_dir: 运行数据保存目录
+        """
+
+        os.makedirs(data_dir, exist_ok=True)
+        self.filepath = os.path.join(data_dir, BindingStore.FILENAME)
+        # 多个分片进程共享绑定, 写入时等待其他进程释放写锁
+        self._db = sqlite3.connect(self.filepath, timeout=30)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS bindings (folder TEXT PRIMARY KEY, binding TEXT)"
+            )
+
+    def close(self) -> None:
+        self._db.close()
+
+    @staticmethod
+    def template_version(config: Config) -> str:
+        """命名模板版本, 命名格式变化时改变"""
+
+        text = "\n".join(
+            getattr(config.amr, field) for field in BindingStore.TEMPLATE_FIELDS
+        )
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()[:8]
+
+    def get(self, folder: str) -> Optional[Binding]:
+        """获取文件夹绑定"""
+
+        row = self._db.execute(
+            "SELECT binding FROM bindings WHERE folder = ?", (folder,)
+        ).fetchone()
+        return None if row is None else Binding.model_validate_json(row[0])
+
+    def save(self, binding: Binding, previous: str = "") -> None:
+        """
+        保存文件夹绑定
+
+        :param binding: 文件夹绑定
+        :param previous: 文件夹重命名前的路径, 删除其绑定
+        """
+
+        binding.updated_at = time.strftime("%Y-%m-%d %H:%M:%S")
+        with self._db:
+            if previous and previous != binding.folder:
+                self._db.execute("DELETE FROM bindings WHERE folder = ?", (previous,))
+            self._db.execute(
+                "INSERT OR REPLACE INTO bindings (folder, binding) VALUES (?, ?)",
+                (binding.folder, binding.model_dump_json()),
+            )
+        logger.debug(f"保存文件夹绑定: {binding.model_dump_json()}")
+
+    def remove(self, folder: str) -> bool:
+        """删除文件夹绑定"""
+
+        with self._db:
+            return (
+                self._db.execute(
+                    "DELETE FROM bindings WHERE folder = ?", (folder,)
+                ).rowcount
+                > 0
+            )
+
+    def entries(self) -> list[Binding]:
+        """全部文件夹绑定"""
+
+        return [
+            Binding.model_validate_json(row[0])
+            for row in self._db.execute("SELECT binding FROM bindings ORDER BY folder")
+        ]
@@ -0,0 +1,136 @@
+import logging
+import os
+import sqlite3
+import time
+from typing import Iterator, Optional
+
+from .models import ApiResponse
+
+logger = logging.getLogger("Amr.Cache")
+
+
+class ResponseCache:
+    """
+    请求结果缓存. 默认仅保存在内存中, 打开缓存文件后同时写入 SQLite, 并在有效期内跨进程复用.
+    """
+
+    def __init__(self):
+        self.ttl: float = 0  # 有效期(秒), 0 为不过期
+        self._memory: dict[str, tuple[float, ApiResponse]] = {}
+        self._db: Optional[sqlite3.Connection] = None
+
+    def open(self, filepath: str, ttl: float) -> None:
+        """
+        打开缓存文件
+
+        :param filepath: 缓存文件路径
+        :param ttl: 有效期(秒)
+        """
+
+        self.close()
+        os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+        self.ttl = ttl
+        # 多个分片进程共享缓存, 写入时等待其他进程释放写锁
+        self._db = sqlite3.connect(filepath, check_same_thread=False, timeout=30)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, created REAL, response TEXT)"
+        )
+        self._db.execute(
+            "DELETE FROM responses WHERE ? > 0 AND created < ?",
+            (ttl, time.time() - ttl),
+        )
+        self._db.commit()
+        logger.debug(f"打开请求缓存: {filepath}, 有效期 {ttl}s")
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl > 0 and time.time() - created > self.ttl
+
+    def get(self, key: str) -> Optional[ApiResponse]:
+        """获取未过期的缓存"""
+
+        if key in self._memory:
+            created, response = self._memory[key]
+            if not self._expired(created):
+                return response
+            del self._memory[key]
+        if self._db is not None:
+            row = self._db.execute(
+                "SELECT created, response FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and not self._expired(row[0]):
+                response = ApiResponse.model_validate_json(row[1])
+                self._memory[key] = (row[0], response)
+                return response
+        return None
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __getitem__(self, key: str) -> ApiResponse:
+        response = self.get(key)
+        if response is None:
+            raise KeyError(key)
+        return response
+
+    def __setitem__(self, key: str, response: ApiResponse) -> None:
+        created = time.time()
+        self._memory[key] = (created, response)
+        if self._db is not None:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, created, response) VALUES (?, ?, ?)",
+                (key, created, response.model_dump_json()),
+            )
+            self._db.commit()
+
+    def keys(self, prefix: str = "") -> list[str]:
+        """缓存键, 可只获取指定前缀的键"""
+
+        keys = {key for key in self._memory if key.startswith(prefix)}
+        if self._db is not None:
+            keys.update(
+                row[0]
+                for row in self._db.execute(
+                    "SELECT key FROM responses WHERE substr(key, 1, ?) = ?",
+                    (len(prefix), prefix),
+                )
+            )
+        return sorted(keys)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def items(self, prefix: str = "") -> Iterator[tuple[str, ApiResponse]]:
+        """遍历未过期的缓存, 可只遍历指定前缀的键"""
+
+        for key in self.keys(prefix):
+            response = self.get(key)
+            if response is not None:
+                yield key, response
+
+    def discard(self, text: str) -> int:
+        """
+        删除键中包含指定文本的缓存, 如剧集有新的集数时删除其季度信息
+
+        :param text: 键中包含的文本
+        :return: 删除数量
+        """
+
+        keys = [key for key in self.keys() if text in key]
+        for key in keys:
+            self._memory.pop(key, None)
+        if self._db is not None:
+            self._db.executemany("DELETE FROM responses WHERE key = ?", [(k,) for k in keys])
+            self._db.commit()
+        logger.debug(f"删除缓存: {text}, {len(keys)} 项")
+        return len(keys)
+
+    def clear(self) -> None:
+        self._memory.clear()
+        if self._db is not None:
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
@@ -0,0 +1,231 @@
+import gzip
+import json
+import logging
+import os
+import sqlite3
+from typing import Iterator, Optional
+
+from .title_index import TitleIndex
+
+logger = logging.getLogger("Amr.Catalogue")
+
+
+class Catalogue:
+    """
+    本地 TMDB 目录, 导入 TMDB 每日 ID 导出文件后可离线按关键词查找剧集/电影.
+    优先使用 SQLite FTS5 trigram 全文索引, 不支持时退回 LIKE 查询.
+    导出文件只包含原始标题, 中文关键词通常仍需在线搜索.
+    """
+
+    FILENAME = "tmdb_catalogue.sqlite"
+    MEDIA_TYPES = {"tv": 0, "movie": 1}
+    # 全文索引初筛的最大条目数, 再按标题相似度排序
+    CANDIDATE_LIMIT = 200
+    # 跳过在线搜索所需的最低标题相似度, 标题完全相同时不受限制
+    MIN_SCORE = 0.6
+
+    def __init__(self, data_dir: str):
+        """
+        初始化参数
+
+        :param data_dir: 运行数据保存目录
+        """
+
+        self.filepath = Catalogue.catalogue_path(data_dir)
+        os.makedirs(data_dir, exist_ok=True)
+        self._db = sqlite3.connect(self.filepath)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS titles ("
+            "rowid INTEGER PRIMARY KEY, media_type INTEGER, tmdb_id INTEGER, "
+            "name TEXT, popularity REAL)"
+        )
+        self.fts = self._create_fts()
+
+    @staticmethod
+    def catalogue_path(data_dir: str) -> str:
+        return os.path.join(data_dir, Catalogue.FILENAME)
+
+    @staticmethod
+    def exists(data_dir: str) -> bool:
+        """是否已导入本地目录"""
+
+        return os.path.isfile(Catalogue.catalogue_path(data_dir))
+
+    def _create_fts(self) -> bool:
+        """创建全文索引, SQLite 不支持 FTS5 trigram 时返回 False"""
+
+        try:
+            self._db.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS titles_fts USING fts5("
+                "name, content='titles', content_rowid='rowid', tokenize='trigram')"
+            )
+            return True
+        except sqlite3.OperationalError as e:
+            logger.warning(f"SQLite 不支持 FTS5 trigram, 使用 LIKE 查询: {e}")
+            return False
+
+    def close(self) -> None:
+        self._db.close()
+
+    @staticmethod
+    def read_export(filepath: str) -> Iterator[tuple[int, int, str, float]]:
+        """
+        逐行读取 TMDB ID 导出文件 (gzip 或未压缩的 JSON Lines)
+
+        :return: (媒体类型, TMDB id, 原始标题, 人气) 迭代器
+        """
+
+        opener = gzip.open if filepath.endswith(".gz") else open
+        with opener(filepath, "rt", encoding="utf-8") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"跳过无法解析的记录: {line!r}")
+                    continue
+                if record.get("adult"):
+                    continue
+                if "original_title" in record:
+                    media_type, name = Catalogue.MEDIA_TYPES["movie"], record["original_title"]
+                elif "original_name" in record:
+                    media_type, name = Catalogue.MEDIA_TYPES["tv"], record["original_name"]
+                else:
+                    continue
+                yield media_type, int(record["id"]), name, float(record.get("popularity") or 0)
+
+    def import_export(self, filepath: str, chunk_size: int = 50_000) -> dict[str, int]:
+        """
+        导入 TMDB ID 导出文件, 替换同类型的已有条目
+
+        :param filepath: 导出文件路径, 如 tv_series_ids_10_19_2026.json.gz
+        :param chunk_size: 每批写入条目数
+        :return: 媒体类型 -> 导入条目数
+        """
+
+        counts = {media_type: 0 for media_type in Catalogue.MEDIA_TYPES}
+        names = {value: key for key, value in Catalogue.MEDIA_TYPES.items()}
+        replaced: set[int] = set()
+        with self._db:
+            chunk: list[tuple[int, int, str, float]] = []
+
+            def flush():
+                for media_type in {row[0] for row in chunk} - replaced:
+                    # 导出文件为完整快照, 首次遇到该类型时清除旧条目
+                    self._db.execute("DELETE FROM titles WHERE media_type = ?", (media_type,))
+                    replaced.add(media_type)
+                self._db.executemany(
+                    "INSERT INTO titles (media_type, tmdb_id, name, popularity) VALUES (?, ?, ?, ?)",
+                    chunk,
+                )
+                for row in chunk:
+                    counts[names[row[0]]] += 1
+                chunk.clear()
+
+            for row in Catalogue.read_export(filepath):
+                chunk.append(row)
+                if len(chunk) >= chunk_size:
+                    flush()
+            if chunk:
+                flush()
+            if self.fts:
+                self._db.execute("INSERT INTO titles_fts(titles_fts) VALUES ('rebuild')")
+        logger.info(f"导入TMDB目录: {filepath}, {counts}")
+        return counts
+
+    def count(self) -> dict[str, int]:
+        """各类型条目数"""
+
+        rows = dict(
+            self._db.execute(
+                "SELECT media_type, COUNT(*) FROM titles GROUP BY media_type"
+            ).fetchall()
+        )
+        return {key: rows.get(value, 0) for key, value in Catalogue.MEDIA_TYPES.items()}
+
+    def search(self, keyword: str, movie: bool = False, limit: int = 20) -> list[dict]:
+        """
+        按关键词查找, 结果格式与 TMDB 搜索接口的 results 相同
+
+        :param keyword: 关键词
+        :param movie: 是否查找电影
+        :param limit: 最多返回条目数
+        :return: 按标题相似度及人气排序的结果
+        """
+
+        return self._search(keyword, movie, limit)[0]
+
+    def _search(
+        self, keyword: str, movie: bool = False, limit: int = 20
+    ) -> tuple[list[dict], bool]:
+        """
+        按关键词查找
+
+        :return: (结果, 是否全部关键词均使用全文索引匹配)
+        """
+
+        media_type = Catalogue.MEDIA_TYPES["movie" if movie else "tv"]
+        words = [word for word in keyword.split() if word]
+        if not words:
+            return [], False
+
+        # 三个字符以上的词使用全文索引, 较短的词使用 LIKE
+        long_words = [word for word in words if len(word) >= 3] if self.fts else []
+        short_words = [word for word in words if word not in long_words]
+        sql = "SELECT t.tmdb_id, t.name, t.popularity FROM titles t"
+        conditions = ["t.media_type = ?"]
+        params: list = [media_type]
+        if long_words:
+            sql += " JOIN titles_fts f ON f.rowid = t.rowid"
+            conditions.append("titles_fts MATCH ?")
+            params.append(
+                " AND ".join('"' + word.replace('"', '""') + '"' for word in long_words)
+            )
+        for word in short_words:
+            conditions.append("t.name LIKE ? ESCAPE '\\'")
+            escaped = word.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            params.append(f"%{escaped}%")
+        sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY t.popularity DESC LIMIT ?"
+        rows = self._db.execute(sql, [*params, Catalogue.CANDIDATE_LIMIT]).fetchall()
+
+        ranked = sorted(
+            rows,
+            key=lambda row: (TitleIndex.similarity(keyword, row[1]), row[2]),
+            reverse=True,
+        )[:limit]
+        date_key = "release_date" if movie else "first_air_date"
+        name_keys = ("title", "original_title") if movie else ("name", "original_name")
+        results = [
+            {
+                "id": tmdb_id,
+                name_keys[0]: name,
+                name_keys[1]: name,
+                date_key: "",
+                "popularity": popularity,
+            }
+            for tmdb_id, name, popularity in ranked
+        ]
+        return results, not short_words
+
+    def lookup(self, keyword: str, movie: bool = False) -> Optional[dict]:
+        """
+        在本地目录中查找关键词, 只有可靠的结果才跳过在线搜索:
+        标题与关键词相同, 或经全文索引匹配且标题相似度不低于 MIN_SCORE.
+        LIKE 查询 (短关键词或 SQLite 不支持 FTS5) 的结果只作为参考, 仍在线搜索
+
+        :return: 与 TMDB 搜索接口相同格式的数据, 没有可靠结果时返回 None
+        """
+
+        results, indexed = self._search(keyword, movie)
+        if not results:
+            logger.debug(f"本地目录查找: {keyword}, 没有结果")
+            return None
+        best = results[0]["title" if movie else "name"]
+        exact = " ".join(best.casefold().split()) == " ".join(keyword.casefold().split())
+        score = TitleIndex.similarity(keyword, best)
+        logger.debug(f"本地目录查找: {keyword}, {len(results)} 项, 最佳: {best} ({score:.2f})")
+        if exact or (indexed and score >= Catalogue.MIN_SCORE):
+            return {"results": results}
+        return None
@@ -1,65 +1,322 @@
-from typing import Union
-from importlib.metadata import version
+from functools import wraps
+import os
+import sys
+from typing import TYPE_CHECKING, Union
 
-from AlistMediaRename import Amr
 from AlistMediaRename.logger_setup import setup_logging, logger
 import click
-from rich.traceback import install
 import time
 
-install(show_locals=False, suppress=[click])
+# amr -h / amr -v 只需要 click, Amr 及其依赖 (httpx, pydantic, rich 等) 在执行命令时导入
+if TYPE_CHECKING:
+    from AlistMediaRename.amr import Amr
 
 
-@click.command(
+class DefaultGroup(click.Group):
+    """未指定子命令时执行默认命令, 兼容 `amr 关键词 -d 路径` 的用法"""
+
+    default_command = "rename"
+
+    def parse_args(self, ctx, args):
+        if (
+            args
+            and args[0] not in self.commands
+            and args[0] not in ctx.help_option_names + ["-v", "--version"]
+        ):
+            args = [self.default_command, *args]
+        return super().parse_args(ctx, args)
+
+
+def common_options(func):
+    """配置文件/日志/速率限制等通用选项"""
+
+    @click.option(
+        "-c",
+        "--config",
+        type=str,
+        default="./config.yaml",
+        show_default=True,
+        help="指定配置文件路径, 默认为程序所在路径(可选)",
+    )
+    @click.option(
+        "-r",
+        "--limit-rate",
+        type=click.IntRange(min=0),
+        default=None,
+        help="限制任务并发数，0 为不限制（可选）",
+    )
+    @click.option(
+        "-t",
+        "--rename-interval",
+        type=click.FloatRange(min=0),
+        default=None,
+        help="每批 Alist/WebDAV 重命名任务完成后的等待时间（秒）",
+    )
+    @click.option("--verbose", is_flag=True, help="显示详细信息(可选)")
+    @click.option("--log-file", type=str, help="输出日志文件路径(可选)", default=None)
+    @click.option(
+        "--log-json",
+        type=str,
+        default=None,
+        help="结构化日志 (JSON Lines) 输出路径, 包含任务操作/参数/结果字段(可选)",
+    )
+    @click.option(
+        "--metrics-out",
+        type=str,
+        default=None,
+        help="请求指标输出路径, .prom 文件为 Prometheus 文本格式, 其余为 JSON(可选)",
+    )
+    @wraps(func)
+    def wrapper(*args, log_json=None, metrics_out=None, **kwargs):
+        # 各命令无需声明这两个参数, 由 create_amr 初始化日志及指标时读取
+        ctx = click.get_current_context()
+        ctx.meta["log_json"] = log_json
+        ctx.meta["metrics_out"] = metrics_out
+        try:
+            return func(*args, **kwargs)
+        finally:
+            if metrics_out:
+                save_metrics(metrics_out)
+
+    return wrapper
+
+
+def current_log_json() -> Union[str, None]:
+    """当前命令的 --log-json 参数, 不在命令中 (如子进程) 时为空"""
+
+    ctx = click.get_current_context(silent=True)
+    return ctx.meta.get("log_json") if ctx is not None else None
+
+
+def current_metrics_out() -> Union[str, None]:
+    """当前命令的 --metrics-out 参数, 不在命令中 (如子进程) 时为空"""
+
+    ctx = click.get_current_context(silent=True)
+    return ctx.meta.get("metrics_out") if ctx is not None else None
+
+
+def save_metrics(filepath: str) -> None:
+    """命令结束时保存请求指标"""
+
+    from AlistMediaRename.task import taskManager
+
+    try:
+        taskManager.metrics.save(filepath)
+    except OSError as e:
+        logger.warning(f"保存指标失败: {e}")
+
+
+def media_options(func):
+    """剧集/电影查找及重命名选项"""
+
+    @click.argument("keyword", type=str, required=True, metavar="关键词")
+    @click.option("-d", "--dir", type=str, default="", help="Alist剧集文件所在文件夹")
+    @click.option("-i", "--id", is_flag=True, help="通过id搜索TMDB剧集信息(可选)")
+    @click.option("-m", "--movie", is_flag=True, help="搜索电影而不是剧集")
+    @click.option(
+        "-n",
+        "--number",
+        type=str,
+        default="1-",
+        # show_default=True,
+        help="指定剧集编号开始重命名(可选)",
+    )
+    @click.option("-p", "--password", type=str, help="文件访问密码(可选)")
+    @click.option(
+        "--folder/--no-folder", default=None, help="是否对父文件夹进行重命名(可选)"
+    )
+    @click.option("--suffix", type=str, help="在文件名后添加自定义后缀(可选)")
+    @click.option("--online", is_flag=True, help="忽略本地TMDB目录, 始终在线搜索(可选)")
+    @click.option("--rebind", is_flag=True, help="忽略已保存的文件夹绑定, 重新搜索及选择(可选)")
+    @click.option(
+        "-S",
+        "--season-folders",
+        is_flag=True,
+        help="按季度子文件夹 (Season 1 / S01 / 第一季) 分别匹配对应季度(可选)",
+    )
+    @click.option(
+        "--organise",
+        is_flag=True,
+        help="重命名后将剧集文件移动到季度文件夹 (Season 01)(可选)",
+    )
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+def parse_shard(ctx, param, value):
+    """解析 --shard 参数"""
+
+    if value is None:
+        return None
+    from AlistMediaRename.models import Shard
+
+    try:
+        return Shard.parse(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+
+def shard_options(func):
+    """分片及报告选项"""
+
+    @click.option(
+        "--shard",
+        type=str,
+        default=None,
+        callback=parse_shard,
+        metavar="i/N",
+        help="按文件夹路径哈希分片, 只处理第 i 个分片, 各进程/节点使用相同的 N(可选)",
+    )
+    @click.option(
+        "--report",
+        type=str,
+        default=None,
+        help="运行报告保存路径, 分片时默认保存在 data_dir/shards 中, 使用 amr merge 合并(可选)",
+    )
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+def save_shard_report(amr: "Amr", command: str, shard, report: Union[str, None], **kwargs):
+    """保存分片报告, 未分片且未指定路径时不保存"""
+
+    from AlistMediaRename.amr import Amr
+    from AlistMediaRename.output import Message
+
+    if shard is None and report is None:
+        return
+    filepath = report or os.path.join(
+        amr.config.amr.data_dir, "shards", f"{command}-{shard.index}-of-{shard.count}.json"
+    )
+    Amr.save_report(amr.shard_report(command, shard, **kwargs), filepath)
+    Message.success(f"运行报告已保存: {filepath}")
+
+
+def catch_errors(func):
+    """捕获顶层未处理异常"""
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        from rich.traceback import install
+
+        from AlistMediaRename.models import ApiResponseError
+
+        install(show_locals=False, suppress=[click])
+        try:
+            result = func(*args, **kwargs)
+            logger.info("任务完成")
+            return result
+        except click.ClickException:
+            raise
+        except ApiResponseError as e:
+            # 请求失败信息已输出
+            logger.info(f"请求失败, 程序退出: {e}")
+            sys.exit(1)
+        except Exception as e:
+            logger.info(f"应用顶层出现未捕获错误: {e}", exc_info=True)
+            from AlistMediaRename.output import console
+
+            console.print(
+                f"[bold red]发生了一个严重错误，详情请查看日志文件 (如果已配置)。错误信息: {e}[/bold red]"
+            )
+
+    return wrapper
+
+
+def create_amr(
+    config: str,
+    limit_rate: Union[int, None],
+    rename_interval: Union[float, None],
+    verbose: bool,
+    log_file: Union[str, None],
+    need_login: bool = True,
+    folder: Union[bool, None] = None,
+    suffix: Union[str, None] = None,
+    log_json: Union[str, None] = None,
+    metrics_out: Union[str, None] = None,
+) -> "Amr":
+    """初始化日志系统及 Amr 实例, 并应用命令行选项"""
+
+    from AlistMediaRename.amr import Amr
+
+    if log_file is None:
+        log_file = f"log_file_{time.strftime('%Y%m%d_%H%M%S')}.log"  # 默认日志文件名格式: log_file_YYYYMMDD_HHMMSS.log
+    setup_logging(
+        verbose=verbose,
+        file_log_path=log_file,
+        json_log_path=log_json or current_log_json(),
+    )
+
+    logger.debug("开始初始化 Amr 实例")
+    amr = Amr(config=config, need_login=need_login, verbose=verbose)
+    # 长时间运行的命令每轮任务结束时定期保存指标
+    amr._taskManager.metrics.output = metrics_out or current_metrics_out() or ""
+
+    # 设置文件名后缀选项
+    if suffix:
+        amr.config.settings.amr.movie_name_format += suffix
+        amr.config.settings.amr.movie_folder_name_format += suffix
+        amr.config.settings.amr.tv_name_format += suffix
+        amr.config.settings.amr.tv_folder_name_format += suffix
+
+    # 设置文件夹重命名选项
+    if folder is not None:
+        amr.config.settings.amr.media_folder_rename = folder
+
+    # 设置API请求速率限制
+    if limit_rate is not None:
+        amr.config.settings.amr.limit_rate = limit_rate
+        amr._taskManager.limit_rate = limit_rate
+
+    # 设置 Alist 重命名任务批次间隔
+    if rename_interval is not None:
+        amr._taskManager.rename_interval = rename_interval
+
+    logger.debug("Amr 实例初始化完成")
+    return amr
+
+
+@click.group(
+    cls=DefaultGroup,
     options_metavar="[选项]",
+    subcommand_metavar="[命令] [参数]...",
     epilog="主页: https://github.com/jkoor/Alist-Media-Rename",
     context_settings=dict(help_option_names=["-h", "--help"]),
 )
-@click.argument("keyword", type=str, required=True, metavar="关键词")
-@click.option(
-    "-c",
-    "--config",
-    type=str,
-    default="./config.yaml",
-    show_default=True,
-    help="指定配置文件路径, 默认为程序所在路径(可选)",
-)
-@click.option("-d", "--dir", type=str, default="", help="Alist剧集文件所在文件夹")
-@click.option("-i", "--id", is_flag=True, help="通过id搜索TMDB剧集信息(可选)")
-@click.option("-m", "--movie", is_flag=True, help="搜索电影而不是剧集")
-@click.option(
-    "-n",
-    "--number",
-    type=str,
-    default="1-",
-    # show_default=True,
-    help="指定剧集编号开始重命名(可选)",
-)
-@click.option("-p", "--password", type=str, help="文件访问密码(可选)")
-@click.option(
-    "-r",
-    "--limit-rate",
-    type=click.IntRange(min=0),
-    default=None,
-    help="限制任务并发数，0 为不限制（可选）",
+@click.version_option(
+    None,
+    "-v",
+    "--version",
+    package_name="AlistMediaRename",
+    help="显示版本信息",
 )
-@click.option(
-    "-t",
-    "--rename-interval",
-    type=click.FloatRange(min=0),
-    default=None,
-    help="每批 Alist 重命名任务完成后的等待时间（秒）",
+def start():
+    """
+    利用TMDB api获取剧集标题, 并对Alist对应剧集文件进行重命名, 便于播放器识别剧集信息\n
+    用例: amr 刀剑神域 -d /阿里云盘/刀剑神域/
+    """
+
+
+@start.command(
+    "rename",
+    options_metavar="[选项]",
+    context_settings=dict(help_option_names=["-h", "--help"]),
 )
+@media_options
 @click.option(
-    "--folder/--no-folder", default=None, help="是否对父文件夹进行重命名(可选)"
-)
-@click.option("--suffix", type=str, help="在文件名后添加自定义后缀(可选)")
-@click.option("--verbose", is_flag=True, help="显示详细信息(可选)")
-@click.option("--log-file", type=str, help="输出日志文件路径(可选)", default=None)
-@click.version_option(
-    version("AlistMediaRename"), "-v", "--version", help="显示版本信息"
+    "--verify",
+    is_flag=True,
+    help="重命名后重新获取文件列表校验结果, 只重试未生效的条目(可选)",
 )
-def start(
+@common_options
+@catch_errors
+def rename(
     config: str,
     dir: str,
     folder: Union[bool, None],
@@ -71,11 +328,16 @@ def start(
     limit_rate: int,
     rename_interval: float,
     suffix: str,
+    online: bool,
+    rebind: bool,
+    season_folders: bool,
+    organise: bool,
+    verify: bool,
     verbose: bool,
     log_file: Union[str, None] = None,
 ):
     """
-    利用TMDB api获取剧集标题, 并对Alist对应剧集文件进行重命名, 便于播放器识别剧集信息\n
+    查找剧集/电影信息, 并对指定文件夹中的媒体文件重命名（默认命令）\n
     用例: amr 刀剑神域 -d /阿里云盘/刀剑神域/
 
     \f
@@ -90,67 +352,1082 @@ def start(
     :param limit_rate: 限制任务并发数
     :param rename_interval: 重命名任务批次间隔时间（秒）
     :param suffix: 在文件名后添加自定义后缀
+    :param online: 忽略本地TMDB目录
+    :param rebind: 忽略已保存的文件夹绑定
+    :param season_folders: 按季度子文件夹分别匹配对应季度
+    :param organise: 重命名后将剧集文件移动到季度文件夹
+    :param verify: 重命名后校验结果并重试未生效的条目
     :param verbose: 显示详细信息
     """
 
-    # 初始化日志系统，现在传递命令行参数
     password_str: str = "*" * len(password) if password else ""
-    if log_file is None:
-        log_file = f"log_file_{time.strftime('%Y%m%d_%H%M%S')}.log"  # 默认日志文件名格式: log_file_YYYYMMDD_HHMMSS.log
-    setup_logging(verbose=verbose, file_log_path=log_file)
+    amr = create_amr(
+        config,
+        limit_rate,
+        rename_interval,
+        verbose,
+        log_file,
+        need_login=dir != "",
+        folder=folder,
+        suffix=suffix,
+    )
+    amr.use_catalogue = not online
+    amr.use_bindings = not rebind
+    amr.organise = organise
+    amr.verify = verify
     logger.info(
-        f"应用启动，参数: keyword='{keyword}', config='{config}', dir='{dir}', folder='{folder}',id={id}, movie={movie}, number='{number}', password='{password_str}', limit_rate={limit_rate}, rename_interval={rename_interval}, verbose={verbose}, log_file='log_file', log_level='log_level'"
+        f"应用启动，参数: keyword='{keyword}', config='{config}', dir='{dir}', folder='{folder}',id={id}, movie={movie}, number='{number}', password='{password_str}', limit_rate={limit_rate}, rename_interval={rename_interval}, verbose={verbose}"
     )
 
-    try:
-        logger.debug("开始初始化 Amr 实例")
+    # TMDB搜索电影
+    if movie:
+        if id:
+            amr.movie_rename_id(keyword, dir, password)
+        else:
+            amr.movie_rename_keyword(keyword, dir, password)
+    # TMDB搜索剧集
+    else:
+        if id:
+            amr.tv_rename_id(keyword, dir, password, number, season_folders)
+        else:
+            amr.tv_rename_keyword(keyword, dir, password, number, season_folders)
+
+
+@start.command(
+    "plan",
+    options_metavar="[选项]",
+    context_settings=dict(help_option_names=["-h", "--help"]),
+)
+@media_options
+@click.option(
+    "-o", "--out", type=str, required=True, help="重命名计划保存路径, 如 plan.json"
+)
+@common_options
+@catch_errors
+def plan(
+    config: str,
+    dir: str,
+    folder: Union[bool, None],
+    id: bool,
+    keyword: str,
+    movie: bool,
+    number: str,
+    password: str,
+    out: str,
+    limit_rate: int,
+    rename_interval: float,
+    suffix: str,
+    online: bool,
+    rebind: bool,
+    season_folders: bool,
+    organise: bool,
+    verbose: bool,
+    log_file: Union[str, None] = None,
+):
+    """
+    生成重命名计划并保存到文件, 不执行重命名\n
+    用例: amr plan 刀剑神域 -d /阿里云盘/刀剑神域/ -o plan.json
+    """
+
+    if dir == "":
+        raise click.UsageError("生成重命名计划需要指定 -d/--dir")
+    amr = create_amr(
+        config,
+        limit_rate,
+        rename_interval,
+        verbose,
+        log_file,
+        folder=folder,
+        suffix=suffix,
+    )
+    amr.use_catalogue = not online
+    amr.use_bindings = not rebind
+    amr.organise = organise
+    logger.info(
+        f"生成重命名计划，参数: keyword='{keyword}', dir='{dir}', id={id}, movie={movie}, number='{number}', out='{out}'"
+    )
+
+    if movie:
+        movie_id = keyword if id else amr.bound_id(dir, True) or amr.movie_search(keyword)
+        rename_plan = amr.movie_plan_id(movie_id, dir, password)
+    else:
+        tv_id = keyword if id else amr.bound_id(dir, False) or amr.tv_search(keyword)
+        if season_folders:
+            rename_plan = amr.tv_plan_season_folders(tv_id, dir, password, number)
+        else:
+            rename_plan = amr.tv_plan_id(tv_id, dir, password, number)
 
-        need_login = False if dir == "" else True
+    amr.save_plan(rename_plan, out)
+    from AlistMediaRename.output import Message
 
-        amr = Amr(config=config, need_login=need_login, verbose=verbose)
+    Message.success(f"重命名计划已保存: {out}, 共计 {len(rename_plan.items)} 项")
 
-        # 设置文件名后缀选项
-        if suffix:
-            amr.config.settings.amr.movie_name_format += suffix
-            amr.config.settings.amr.movie_folder_name_format += suffix
-            amr.config.settings.amr.tv_name_format += suffix
-            amr.config.settings.amr.tv_folder_name_format += suffix
 
-        # 设置文件夹重命名选项
-        if folder is not None:
-            amr.config.settings.amr.media_folder_rename = folder
+@start.command(
+    "apply",
+    options_metavar="[选项]",
+    context_settings=dict(help_option_names=["-h", "--help"]),
+)
+@click.argument("plan_files", type=str, nargs=-1, required=True, metavar="计划文件")
+@click.option("-p", "--password", type=str, help="文件访问密码(可选)")
+@click.option("-y", "--yes", is_flag=True, help="跳过重命名确认(可选)")
+@click.option(
+    "--verify",
+    is_flag=True,
+    help="重命名后重新获取文件列表校验结果, 只重试未生效的条目(可选)",
+)
+@common_options
+@catch_errors
+def apply(
+    config: str,
+    plan_files: tuple[str, ...],
+    password: str,
+    yes: bool,
+    verify: bool,
+    limit_rate: int,
+    rename_interval: float,
+    verbose: bool,
+    log_file: Union[str, None] = None,
+):
+    """
+    执行一个或多个重命名计划, 跳过源文件已变更的条目\n
+    用例: amr apply plan1.json plan2.json
+    """
 
-        # 设置API请求速率限制
-        if limit_rate is not None:
-            amr.config.settings.amr.limit_rate = limit_rate
-            amr._taskManager.limit_rate = limit_rate
+    amr = create_amr(config, limit_rate, rename_interval, verbose, log_file)
+    amr.assume_yes = yes
+    amr.verify = verify
+    logger.info(f"执行重命名计划: {plan_files}")
 
-        # 设置 Alist 重命名任务批次间隔
-        if rename_interval is not None:
-            amr._taskManager.rename_interval = rename_interval
+    plans = [amr.load_plan(filepath) for filepath in plan_files]
+    amr.apply_plans(plans, password)
 
-        logger.debug("Amr 实例初始化完成")
 
-        # TMDB搜索电影
-        if movie:
-            if id:
-                amr.movie_rename_id(keyword, dir, password)
-            else:
-                amr.movie_rename_keyword(keyword, dir, password)
-        # TMDB搜索剧集
-        else:
-            if id:
-                amr.tv_rename_id(keyword, dir, password, number)
-            else:
-                amr.tv_rename_keyword(keyword, dir, password, number)
-        logger.info("任务完成")
-    except Exception as e:
-        logger.info(f"应用顶层出现未捕获错误: {e}", exc_info=True)
-        from AlistMediaRename.output import console
-
-        console.print(
-            f"[bold red]发生了一个严重错误，详情请查看日志文件 (如果已配置)。错误信息: {e}[/bold red]"
-        )
+@start.command(
+    "batch",
+    options_metavar="[选项]",
+    context_settings=dict(help_option_names=["-h", "--help"]),
+)
+@click.argument("manifest", type=str, required=True, metavar="清单文件")
+@click.option(
+    "--folder/--no-folder", default=None, help="是否对父文件夹进行重命名(可选)"
+)
+@click.option("--suffix", type=str, help="在文件名后添加自定义后缀(可选)")
+@click.option("-y", "--yes", is_flag=True, help="跳过重命名确认(可选)")
+@click.option(
+    "--verify",
+    is_flag=True,
+    help="重命名后重新获取文件列表校验结果, 只重试未生效的条目(可选)",
+)
+@shard_options
+@common_options
+@catch_errors
+def batch(
+    config: str,
+    manifest: str,
+    folder: Union[bool, None],
+    suffix: str,
+    yes: bool,
+    verify: bool,
+    shard,
+    report: Union[str, None],
+    limit_rate: int,
+    rename_interval: float,
+    verbose: bool,
+    log_file: Union[str, None] = None,
+):
+    """
+    按清单在同一进程中批量重命名多个文件夹, 单个条目失败不影响其余条目\n
+    用例: amr batch manifest.yaml --shard 1/4
+    """
+
+    from AlistMediaRename.amr import Amr
+
+    entries = Amr.load_manifest(manifest)
+    if shard is not None:
+        entries = [entry for entry in entries if shard.owns(entry.dir)]
+    amr = create_amr(
+        config,
+        limit_rate,
+        rename_interval,
+        verbose,
+        log_file,
+        folder=folder,
+        suffix=suffix,
+    )
+    amr.assume_yes = yes
+    amr.verify = verify
+    logger.info(f"批量重命名清单: {manifest}, 分片: {shard}, 共计 {len(entries)} 项")
+    results = amr.batch(entries)
+    save_shard_report(amr, "batch", shard, report, results=results)
+
+
+@start.command(
+    "auto",
+    options_metavar="[选项]",
+    context_settings=dict(help_option_names=["-h", "--help"]),
+)
+@click.argument("folders", type=str, nargs=-1, required=True, metavar="文件夹")
+@click.option("-m", "--movie", is_flag=True, help="识别电影而不是剧集")
+@click.option("-p", "--password", type=str, help="文件访问密码(可选)")
+@click.option("--children", is_flag=True, help="识别指定文件夹下的各个子文件夹(可选)")
+@click.option("--online", is_flag=True, help="忽略本地TMDB目录, 始终在线搜索(可选)")
+@click.option(
+    "--threshold",
+    type=click.FloatRange(min=0, max=1),
+    default=None,
+    help="自动识别置信度阈值, 默认使用配置文件中的 auto_threshold(可选)",
+)
+@click.option(
+    "--folder/--no-folder", default=None, help="是否对父文件夹进行重命名(可选)"
+)
+@click.option("--suffix", type=str, help="在文件名后添加自定义后缀(可选)")
+@click.option("-y", "--yes", is_flag=True, help="跳过重命名确认(可选)")
+@common_options
+@catch_errors
+def auto(
+    config: str,
+    folders: tuple[str, ...],
+    movie: bool,
+    password: str,
+    children: bool,
+    online: bool,
+    threshold: Union[float, None],
+    folder: Union[bool, None],
+    suffix: str,
+    yes: bool,
+    limit_rate: int,
+    rename_interval: float,
+    verbose: bool,
+    log_file: Union[str, None] = None,
+):
+    """
+    根据文件夹名称自动识别剧集/电影并重命名, 低置信度的文件夹加入待审核列表\n
+    用例: amr auto /阿里云盘/下载/ --children -y
+    """
+
+    amr = create_amr(
+        config,
+        limit_rate,
+        rename_interval,
+        verbose,
+        log_file,
+        folder=folder,
+        suffix=suffix,
+    )
+    amr.assume_yes = yes
+    amr.use_catalogue = not online
+    if threshold is not None:
+        amr.config.settings.amr.auto_threshold = threshold
+    logger.info(
+        f"自动识别，参数: folders={folders}, movie={movie}, children={children}, threshold={threshold}"
+    )
+    amr.auto(list(folders), movie, password, children)
+
+
+@start.command(
+    "walk",
+    options_metavar="[选项]",
+    context_settings=dict(help_option_names=["-h", "--help"]),
+)
+@click.argument("roots", type=str, nargs=-1, required=True, metavar="根文件夹")
+@click.option(
+    "--depth",
+    type=click.IntRange(min=0),
+    default=None,
+    help="最大遍历深度, 根文件夹为 0(可选)",
+)
+@click.option(
+    "--include",
+    type=str,
+    multiple=True,
+    help="只输出名称或路径匹配的文件夹, 可多次指定, 如 '*Season*'(可选)",
+)
+@click.option(
+    "--exclude",
+    type=str,
+    multiple=True,
+    help="跳过名称或路径匹配的文件夹, 可多次指定, 如 '@eaDir'(可选)",
+)
+@click.option("--exclude-regex", type=str, default=None, help="跳过路径匹配正则的文件夹(可选)")
+@click.option(
+    "--skip-bound/--no-skip-bound",
+    default=True,
+    show_default=True,
+    help="是否跳过已绑定的文件夹",
+)
+@click.option("--refresh", is_flag=True, help="强制刷新文件夹, 速度较慢(可选)")
+@click.option("-p", "--password", type=str, help="文件访问密码(可选)")
+@click.option("--auto", "auto_rename", is_flag=True, help="边遍历边自动识别并重命名(可选)")
+@click.option("-m", "--movie", is_flag=True, help="识别电影而不是剧集")
+@click.option(
+    "--threshold",
+    type=click.FloatRange(min=0, max=1),
+    default=None,
+    help="自动识别置信度阈值, 默认使用配置文件中的 auto_threshold(可选)",
+)
+@click.option("-y", "--yes", is_flag=True, help="跳过重命名确认(可选)")
+@shard_options
+@common_options
+@catch_errors
+def walk(
+    config: str,
+    roots: tuple[str, ...],
+    depth: Union[int, None],
+    include: tuple[str, ...],
+    exclude: tuple[str, ...],
+    exclude_regex: Union[str, None],
+    skip_bound: bool,
+    refresh: bool,
+    password: str,
+    auto_rename: bool,
+    movie: bool,
+    threshold: Union[float, None],
+    yes: bool,
+    shard,
+    report: Union[str, None],
+    limit_rate: int,
+    rename_interval: float,
+    verbose: bool,
+    log_file: Union[str, None] = None,
+):
+    """
+    广度优先遍历文件夹树, 列出包含视频文件的文件夹, 可边遍历边自动识别并重命名\n
+    用例: amr walk /阿里云盘/剧集/ --depth 2 --exclude '@eaDir' --auto -y
+    """
+
+    from AlistMediaRename.output import Message
+
+    amr = create_amr(config, limit_rate, rename_interval, verbose, log_file)
+    amr.assume_yes = yes
+    if threshold is not None:
+        amr.config.settings.amr.auto_threshold = threshold
+    logger.info(
+        f"遍历文件夹，参数: roots={roots}, depth={depth}, include={include}, exclude={exclude}, exclude_regex={exclude_regex}, skip_bound={skip_bound}, auto={auto_rename}, shard={shard}"
+    )
+    folders = amr.walk(
+        list(roots),
+        password,
+        depth,
+        include,
+        exclude,
+        exclude_regex,
+        skip_bound,
+        refresh,
+        shard,
+    )
+    if auto_rename:
+        results = amr.auto_walk(folders, movie, password)
+        save_shard_report(amr, "walk", shard, report, results=results)
+        return
+    found: list[str] = []
+    for library_folder in folders:
+        found.append(library_folder.path)
+        Message.print_library_folder(library_folder)
+    Message.success(f"共找到 {len(found)} 个包含视频文件的文件夹")
+    save_shard_report(amr, "walk", shard, report, folders=found)
+
+
+@start.command(
+    "merge",
+    options_metavar="[选项]",
+    context_settings=dict(help_option_names=["-h", "--help"]),
+)
+@click.argument("reports", type=str, nargs=-1, required=True, metavar="报告文件")
+@click.option(
+    "-o", "--out", type=str, required=True, help="合并后的报告保存路径, 如 report.json"
+)
+@common_options
+@catch_errors
+def merge(
+    config: str,
+    reports: tuple[str, ...],
+    out: str,
+    limit_rate: int,
+    rename_interval: float,
+    verbose: bool,
+    log_file: Union[str, None] = None,
+):
+    """
+    合并各分片的运行报告及重命名日志, 合并后的运行可使用 amr undo 一次撤销\n
+    用例: amr merge data/shards/batch-*.json -o report.json
+    """
+
+    from AlistMediaRename.amr import Amr
+    from AlistMediaRename.output import Message
+
+    amr = create_amr(config, limit_rate, rename_interval, verbose, log_file, need_login=False)
+    merged = amr.merge_reports([Amr.load_report(filepath) for filepath in reports])
+    Amr.save_report(merged, out)
+    if merged.results:
+        Message.print_batch_results(merged.results)
+    Message.success(
+        f"已合并 {len(reports)} 个报告 ({', '.join(merged.shards) or '未分片'}), "
+        f"文件夹 {len(merged.folders)} 个, 重命名结果 {len(merged.results)} 项: {out}"
+    )
+    if merged.run_ids:
+        Message.info(f"合并后的运行id: {merged.run_ids[0]}, 可使用 amr undo 撤销全部分片")
+
+
+@start.command(
+    "tmdb-import",
+    options_metavar="[选项]",
+    context_settings=dict(help_option_names=["-h", "--help"]),
+)
+@click.argument("export_files", type=str, nargs=-1, required=True, metavar="导出文件")
+@common_options
+@catch_errors
+def tmdb_import(
+    config: str,
+    export_files: tuple[str, ...],
+    limit_rate: int,
+    rename_interval: float,
+    verbose: bool,
+    log_file: Union[str, None] = None,
+):
+    """
+    导入 TMDB 每日 ID 导出文件, 建立本地目录用于离线关键词查找\n
+    用例: amr tmdb-import tv_series_ids_10_19_2026.json.gz movie_ids_10_19_2026.json.gz
+    """
+
+    from AlistMediaRename.catalogue import Catalogue
+    from AlistMediaRename.output import Message, console
+
+    amr = create_amr(
+        config, limit_rate, rename_interval, verbose, log_file, need_login=False
+    )
+    catalogue = Catalogue(amr.config.amr.data_dir)
+    try:
+        for filepath in export_files:
+            with console.status(f"导入 {filepath}..."):
+                counts = catalogue.import_export(filepath)
+            Message.success(
+                f"已导入 {filepath}: 剧集 {counts['tv']} 项, 电影 {counts['movie']} 项"
+            )
+        counts = catalogue.count()
+    finally:
+        catalogue.close()
+    Message.info(
+        f"本地目录: {catalogue.filepath}, 剧集 {counts['tv']} 项, 电影 {counts['movie']} 项"
+    )
+
+
+@start.group(
+    "watch",
+    options_metavar="[选项]",
+    subcommand_metavar="[命令] [参数]...",
+    context_settings=dict(help_option_names=["-h", "--help"]),
+)
+def watch():
+    """
+    监视文件夹, 定时检查并只重命名新出现的文件\n
+    用例: amr watch add 刀剑神域 -d /阿里云盘/刀剑神域/ ; amr watch run
+    """
+
+
+@watch.command(
+    "add",
+    options_metavar="[选项]",
+    context_settings=dict(help_option_names=["-h", "--help"]),
+)
+@click.argument("keyword", type=str, required=True, metavar="关键词")
+@click.option("-d", "--dir", type=str, required=True, help="Alist剧集文件所在文件夹")
+@click.option("-i", "--id", is_flag=True, help="通过id搜索TMDB剧集信息(可选)")
+@click.option("-m", "--movie", is_flag=True, help="搜索电影而不是剧集")
+@click.option("-s", "--seasons", type=str, default="", help="季度编号, 如 1,2 或 1-3, 默认交互选择")
+@click.option("-n", "--number", type=str, default="1-", help="指定剧集编号开始重命名(可选)")
+@click.option("-p", "--password", type=str, help="文件访问密码(可选)")
+@click.option(
+    "--interval",
+    type=click.FloatRange(min=10),
+    default=600,
+    show_default=True,
+    help="检查间隔（秒）",
+)
+@common_options
+@catch_errors
+def watch_add(
+    config: str,
+    keyword: str,
+    dir: str,
+    id: bool,
+    movie: bool,
+    seasons: str,
+    number: str,
+    password: str,
+    interval: float,
+    limit_rate: int,
+    rename_interval: float,
+    verbose: bool,
+    log_file: Union[str, None] = None,
+):
+    """
+    添加监视文件夹\n
+    用例: amr watch add 刀剑神域 -d /阿里云盘/刀剑神域/ -s 1
+    """
+
+    from AlistMediaRename.output import Message
+
+    amr = create_amr(config, limit_rate, rename_interval, verbose, log_file, need_login=False)
+    if movie:
+        tmdb_id = keyword if id else amr.movie_search(keyword)
+    else:
+        tmdb_id = keyword if id else amr.tv_search(keyword)
+    entry = amr.watch_add(dir, tmdb_id, movie, seasons, number, password, interval)
+    Message.success(f"已添加监视文件夹: {entry.folder}")
+
+
+@watch.command(
+    "list",
+    options_metavar="[选项]",
+    context_settings=dict(help_option_names=["-h", "--help"]),
+)
+@common_options
+@catch_errors
+def watch_list(
+    config: str,
+    limit_rate: int,
+    rename_interval: float,
+    verbose: bool,
+    log_file: Union[str, None] = None,
+):
+    """列出监视文件夹"""
+
+    from AlistMediaRename.output import Message
+    from AlistMediaRename.watch import WatchRegistry
+
+    amr = create_amr(config, limit_rate, rename_interval, verbose, log_file, need_login=False)
+    registry = WatchRegistry(amr.config.amr.data_dir)
+    try:
+        Message.print_watch_entries(registry.entries())
+    finally:
+        registry.close()
+
+
+@watch.command(
+    "remove",
+    options_metavar="[选项]",
+    context_settings=dict(help_option_names=["-h", "--help"]),
+)
+@click.argument("folder", type=str, required=True, metavar="文件夹")
+@common_options
+@catch_errors
+def watch_remove(
+    config: str,
+    folder: str,
+    limit_rate: int,
+    rename_interval: float,
+    verbose: bool,
+    log_file: Union[str, None] = None,
+):
+    """移除监视文件夹"""
+
+    from AlistMediaRename.models import Folder
+    from AlistMediaRename.output import Message
+    from AlistMediaRename.watch import WatchRegistry
+
+    amr = create_amr(config, limit_rate, rename_interval, verbose, log_file, need_login=False)
+    registry = WatchRegistry(amr.config.amr.data_dir)
+    try:
+        path = Folder(path=folder).path
+        if registry.remove(path):
+            Message.success(f"已移除监视文件夹: {path}")
+        else:
+            Message.warning(f"未找到监视文件夹: {path}")
+    finally:
+        registry.close()
+
+
+@watch.command(
+    "run",
+    options_metavar="[选项]",
+    context_settings=dict(help_option_names=["-h", "--help"]),
+)
+@click.option("--once", is_flag=True, help="只检查一次到期的文件夹(可选)")
+@common_options
+@catch_errors
+def watch_run(
+    config: str,
+    once: bool,
+    limit_rate: int,
+    rename_interval: float,
+    verbose: bool,
+    log_file: Union[str, None] = None,
+):
+    """
+    开始监视, 新文件无需确认直接重命名, Ctrl-C 停止\n
+    用例: amr watch run
+    """
+
+    amr = create_amr(config, limit_rate, rename_interval, verbose, log_file)
+    amr.assume_yes = True
+    try:
+        amr.watch(once)
+    except KeyboardInterrupt:
+        logger.info("停止监视")
+
+
+@start.command(
+    "serve",
+    options_metavar="[选项]",
+    context_settings=dict(help_option_names=["-h", "--help"]),
+)
+@click.option("--host", type=str, default="127.0.0.1", show_default=True, help="监听地址")
+@click.option("--port", type=click.IntRange(min=0, max=65535), default=5255, show_default=True, help="监听端口")
+@click.option(
+    "--max-pending",
+    type=click.IntRange(min=1),
+    default=32,
+    show_default=True,
+    help="排队任务数上限, 超出时返回 503",
+)
+@common_options
+@catch_errors
+def serve(
+    config: str,
+    host: str,
+    port: int,
+    max_pending: int,
+    limit_rate: int,
+    rename_interval: float,
+    verbose: bool,
+    log_file: Union[str, None] = None,
+):
+    """
+    启动本地 HTTP/JSON 服务, 保持 Alist 登录, 连接及 TMDB 缓存, 供下载工具回调使用, Ctrl-C 停止
+
+    用例: amr serve --port 5255 ; curl -X POST 'http://127.0.0.1:5255/batch?wait=60' -d '{"entries": [...]}'
+    """
+
+    from AlistMediaRename.serve import AmrService
+
+    # Amr 在服务的工作线程中创建, 线程中没有命令上下文
+    log_json, metrics_out = current_log_json(), current_metrics_out()
+    service = AmrService(
+        lambda: create_amr(
+            config,
+            limit_rate,
+            rename_interval,
+            verbose,
+            log_file,
+            log_json=log_json,
+            metrics_out=metrics_out,
+        ),
+        max_pending=max_pending,
+    )
+    service.serve(host, port)
+
+
+def job_options(func):
+    """任务队列数据库选项"""
+
+    @click.option(
+        "--db",
+        type=str,
+        default="",
+        help="任务队列数据库路径, 默认保存在 data_dir 中, 多台主机可共享同一文件(可选)",
+    )
+    @click.option(
+        "--no-wal",
+        is_flag=True,
+        help="不使用 WAL 模式, 数据库位于网络文件系统时使用(可选)",
+    )
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+def open_job_queue(amr: "Amr", db: str, no_wal: bool):
+    """打开任务队列"""
+
+    from AlistMediaRename.jobs import JobQueue
+
+    return JobQueue.open(amr.config.amr.data_dir, db, wal=not no_wal)
+
+
+def run_worker(
+    config: str,
+    db: str,
+    no_wal: bool,
+    lease: float,
+    drain: bool,
+    limit_rate: Union[int, None],
+    rename_interval: Union[float, None],
+    verbose: bool,
+    log_file: Union[str, None],
+    log_json: Union[str, None] = None,
+    metrics_out: Union[str, None] = None,
+) -> int:
+    """在当前进程中运行一个工作进程, 返回已执行的任务数量"""
+
+    from AlistMediaRename.jobs import JobWorker
+
+    import io
+
+    # 工作进程没有交互输入, 需要选择时任务失败
+    sys.stdin = io.StringIO()
+    amr = create_amr(
+        config,
+        limit_rate,
+        rename_interval,
+        verbose,
+        log_file,
+        log_json=log_json,
+        metrics_out=metrics_out,
+    )
+    amr.assume_yes = True
+    queue = open_job_queue(amr, db, no_wal)
+    try:
+        return JobWorker(amr, queue, lease=lease).run(drain=drain)
+    finally:
+        queue.close()
+        if metrics_out:
+            save_metrics(metrics_out)
+
+
+@start.command(
+    "worker",
+    options_metavar="[选项]",
+    context_settings=dict(help_option_names=["-h", "--help"]),
+)
+@click.option(
+    "-n",
+    "--processes",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="工作进程数量, 每个进程有独立的 Alist 登录及连接",
+)
+@click.option(
+    "--lease",
+    type=click.FloatRange(min=10),
+    default=300,
+    show_default=True,
+    help="任务租约时长（秒）, 工作进程退出后其他进程在租约到期后重新领取",
+)
+@click.option("--drain", is_flag=True, help="队列中没有可执行的任务时退出(可选)")
+@job_options
+@common_options
+@catch_errors
+def worker(
+    config: str,
+    processes: int,
+    lease: float,
+    drain: bool,
+    db: str,
+    no_wal: bool,
+    limit_rate: int,
+    rename_interval: float,
+    verbose: bool,
+    log_file: Union[str, None] = None,
+):
+    """
+    从任务队列领取并执行重命名/识别/校验任务, Ctrl-C 停止\n
+    用例: amr jobs add-rename manifest.yaml ; amr worker -n 4 --drain
+    """
+
+    import multiprocessing
+
+    args = (config, db, no_wal, lease, drain, limit_rate, rename_interval, verbose)
+    log_json, metrics_out = current_log_json(), current_metrics_out()
+    metrics_root, metrics_ext = os.path.splitext(metrics_out or "")
+    context = multiprocessing.get_context("spawn")
+    children = [
+        context.Process(
+            target=run_worker,
+            args=(
+                *args,
+                f"{log_file}.{index}" if log_file else None,
+                f"{log_json}.{index}" if log_json else None,
+                # 保留扩展名, 各进程的 .prom 文件均可被采集
+                f"{metrics_root}.{index}{metrics_ext}" if metrics_out else None,
+            ),
+            name=f"amr-worker-{index}",
+        )
+        for index in range(1, processes)
+    ]
+    for child in children:
+        child.start()
+    try:
+        run_worker(*args, log_file, log_json)
+    except KeyboardInterrupt:
+        logger.info("停止工作进程")
+    finally:
+        for child in children:
+            child.join()
+
+
+@start.group(
+    "jobs",
+    options_metavar="[选项]",
+    subcommand_metavar="[命令] [参数]...",
+    context_settings=dict(help_option_names=["-h", "--help"]),
+)
+def jobs():
+    """
+    管理持久化任务队列, 任务由 amr worker 执行\n
+    用例: amr jobs add-rename manifest.yaml ; amr jobs list
+    """
+
+
+@jobs.command(
+    "add-rename",
+    options_metavar="[选项]",
+    context_settings=dict(help_option_names=["-h", "--help"]),
+)
+@click.argument("manifest", type=str, required=True, metavar="清单文件")
+@click.option("--attempts", type=click.IntRange(min=1), default=3, show_default=True, help="最多尝试次数")
+@job_options
+@common_options
+@catch_errors
+def jobs_add_rename(
+    config: str,
+    manifest: str,
+    attempts: int,
+    db: str,
+    no_wal: bool,
+    limit_rate: int,
+    rename_interval: float,
+    verbose: bool,
+    log_file: Union[str, None] = None,
+):
+    """
+    将批量清单中的每个条目作为一个重命名任务加入队列\n
+    用例: amr jobs add-rename manifest.yaml
+    """
+
+    from AlistMediaRename.amr import Amr
+    from AlistMediaRename.output import Message
+
+    entries = Amr.load_manifest(manifest)
+    amr = create_amr(config, limit_rate, rename_interval, verbose, log_file, need_login=False)
+    queue = open_job_queue(amr, db, no_wal)
+    try:
+        ids = [
+            queue.add("rename", entry.model_dump(mode="json"), attempts) for entry in entries
+        ]
+    finally:
+        queue.close()
+    Message.success(f"已加入 {len(ids)} 个重命名任务")
+
+
+@jobs.command(
+    "add-identify",
+    options_metavar="[选项]",
+    context_settings=dict(help_option_names=["-h", "--help"]),
+)
+@click.argument("folders", type=str, nargs=-1, required=True, metavar="文件夹")
+@click.option("-m", "--movie", is_flag=True, help="识别电影而不是剧集")
+@click.option("-p", "--password", type=str, help="文件访问密码(可选)")
+@click.option("--children", is_flag=True, help="识别指定文件夹下的各个子文件夹(可选)")
+@click.option("--attempts", type=click.IntRange(min=1), default=3, show_default=True, help="最多尝试次数")
+@job_options
+@common_options
+@catch_errors
+def jobs_add_identify(
+    config: str,
+    folders: tuple[str, ...],
+    movie: bool,
+    password: str,
+    children: bool,
+    attempts: int,
+    db: str,
+    no_wal: bool,
+    limit_rate: int,
+    rename_interval: float,
+    verbose: bool,
+    log_file: Union[str, None] = None,
+):
+    """
+    将每个文件夹作为一个识别任务加入队列, 自动采用的文件夹再作为重命名任务加入队列\n
+    用例: amr jobs add-identify /阿里云盘/下载/ --children
+    """
+
+    from AlistMediaRename.output import Message
+
+    amr = create_amr(config, limit_rate, rename_interval, verbose, log_file, need_login=False)
+    queue = open_job_queue(amr, db, no_wal)
+    try:
+        for folder in folders:
+            queue.add(
+                "identify",
+                {"folders": [folder], "movie": movie, "password": password, "children": children},
+                attempts,
+            )
+    finally:
+        queue.close()
+    Message.success(f"已加入 {len(folders)} 个识别任务")
+
+
+@jobs.command(
+    "add-verify",
+    options_metavar="[选项]",
+    context_settings=dict(help_option_names=["-h", "--help"]),
+)
+@click.argument("run_ids", type=str, nargs=-1, required=True, metavar="运行id")
+@job_options
+@common_options
+@catch_errors
+def jobs_add_verify(
+    config: str,
+    run_ids: tuple[str, ...],
+    db: str,
+    no_wal: bool,
+    limit_rate: int,
+    rename_interval: float,
+    verbose: bool,
+    log_file: Union[str, None] = None,
+):
+    """
+    将运行的重命名校验作为任务加入队列, 只重试未生效的步骤\n
+    用例: amr jobs add-verify 20250101-120000-a1b2c3
+    """
+
+    from AlistMediaRename.output import Message
+
+    amr = create_amr(config, limit_rate, rename_interval, verbose, log_file, need_login=False)
+    queue = open_job_queue(amr, db, no_wal)
+    try:
+        for run_id in run_ids:
+            queue.add("verify", {"run_id": run_id}, max_attempts=1)
+    finally:
+        queue.close()
+    Message.success(f"已加入 {len(run_ids)} 个校验任务")
+
+
+@jobs.command(
+    "list",
+    options_metavar="[选项]",
+    context_settings=dict(help_option_names=["-h", "--help"]),
+)
+@click.option(
+    "-s",
+    "--status",
+    type=click.Choice(["queued", "running", "success", "failed"]),
+    default=None,
+    help="只显示指定状态的任务(可选)",
+)
+@click.option("--limit", type=click.IntRange(min=1), default=50, show_default=True, help="显示数量")
+@job_options
+@common_options
+@catch_errors
+def jobs_list(
+    config: str,
+    status: Union[str, None],
+    limit: int,
+    db: str,
+    no_wal: bool,
+    limit_rate: int,
+    rename_interval: float,
+    verbose: bool,
+    log_file: Union[str, None] = None,
+):
+    """
+    列出任务队列中的任务\n
+    用例: amr jobs list -s failed
+    """
+
+    from AlistMediaRename.output import Message
+
+    amr = create_amr(config, limit_rate, rename_interval, verbose, log_file, need_login=False)
+    queue = open_job_queue(amr, db, no_wal)
+    try:
+        Message.print_jobs(queue.list(status or "", limit), queue.counts())
+    finally:
+        queue.close()
+
+
+@jobs.command(
+    "retry",
+    options_metavar="[选项]",
+    context_settings=dict(help_option_names=["-h", "--help"]),
+)
+@click.argument("job_ids", type=int, nargs=-1, required=True, metavar="任务id")
+@job_options
+@common_options
+@catch_errors
+def jobs_retry(
+    config: str,
+    job_ids: tuple[int, ...],
+    db: str,
+    no_wal: bool,
+    limit_rate: int,
+    rename_interval: float,
+    verbose: bool,
+    log_file: Union[str, None] = None,
+):
+    """
+    将失败的任务重新排队\n
+    用例: amr jobs retry 12 13
+    """
+
+    from AlistMediaRename.output import Message
+
+    amr = create_amr(config, limit_rate, rename_interval, verbose, log_file, need_login=False)
+    queue = open_job_queue(amr, db, no_wal)
+    try:
+        retried = [job_id for job_id in job_ids if queue.retry(job_id)]
+    finally:
+        queue.close()
+    Message.success(f"已重新排队 {len(retried)} 个任务")
+
+
+@start.command(
+    "resume",
+    options_metavar="[选项]",
+    context_settings=dict(help_option_names=["-h", "--help"]),
+)
+@click.argument("run_id", type=str, required=False, metavar="运行id")
+@click.option("-y", "--yes", is_flag=True, help="跳过重命名确认(可选)")
+@common_options
+@catch_errors
+def resume(
+    config: str,
+    run_id: Union[str, None],
+    yes: bool,
+    limit_rate: int,
+    rename_interval: float,
+    verbose: bool,
+    log_file: Union[str, None] = None,
+):
+    """
+    继续执行中断的重命名, 默认为最近一次未完成的运行\n
+    用例: amr resume
+    """
+
+    amr = create_amr(config, limit_rate, rename_interval, verbose, log_file)
+    amr.assume_yes = yes
+    amr.resume(run_id)
+
+
+@start.command(
+    "undo",
+    options_metavar="[选项]",
+    context_settings=dict(help_option_names=["-h", "--help"]),
+)
+@click.argument("run_id", type=str, required=True, metavar="运行id")
+@click.option("-y", "--yes", is_flag=True, help="跳过重命名确认(可选)")
+@common_options
+@catch_errors
+def undo(
+    config: str,
+    run_id: str,
+    yes: bool,
+    limit_rate: int,
+    rename_interval: float,
+    verbose: bool,
+    log_file: Union[str, None] = None,
+):
+    """
+    撤销指定运行中已完成的重命名\n
+    用例: amr undo 20250101-120000-a1b2c3
+    """
+
+    amr = create_amr(config, limit_rate, rename_interval, verbose, log_file)
+    amr.assume_yes = yes
+    amr.undo(run_id)
 
 
 if __name__ == "__main__":
@@ -1,17 +1,27 @@
+import hashlib
 import importlib.resources
-from ruamel.yaml import YAML
+import json
+import logging
+import os
+from typing import Optional
+
 from .models import Settings
 from .output import Message
 
+logger = logging.getLogger("Amr.Config")
+
 
 class Config:
     """配置参数"""
 
+    # 配置快照格式版本, 快照内容变化时修改
+    SNAPSHOT_FORMAT = 2
+
     def __init__(self, filepath: str = ""):
         """初始化参数"""
         self.filepath = filepath
         self.settings = Settings()
-        self._yaml = YAML()
+        self._yaml_instance = None
 
         if self.filepath != "":
             try:
@@ -22,6 +32,16 @@ class Config:
                 self.set()
                 self.save(self.filepath)
 
+    @property
+    def _yaml(self):
+        """YAML 读写, 使用配置快照时不导入 ruamel"""
+
+        if self._yaml_instance is None:
+            from ruamel.yaml import YAML
+
+            self._yaml_instance = YAML()
+        return self._yaml_instance
+
     @property
     def alist(self):
         return self.settings.alist
@@ -78,20 +98,92 @@ class Config:
         return True
 
     def load(self, filepath: str, output: bool = True):
-        """加载配置"""
+        """加载配置, 配置文件未修改时使用已校验的配置快照, 跳过 YAML 解析"""
 
-        with open(filepath, "r", encoding="utf-8") as file:
-            data = file.read()
-        config_data = self._yaml.load(data)
-        # 验证配置文件
         version: str = self.settings.version
-        self.settings: Settings = Settings.model_validate(config_data)
-        if version != config_data.get("version", 0):
-            Message.warning("配置文件版本不匹配，已更新配置文件")
-            self.settings.version = version
-            self.save(filepath, output=False)
+        settings = Config.load_snapshot(filepath, version)
+        if settings is not None:
+            self.settings = settings
+        else:
+            with open(filepath, "r", encoding="utf-8") as file:
+                data = file.read()
+            config_data = self._yaml.load(data)
+            # 验证配置文件
+            self.settings: Settings = Settings.model_validate(config_data)
+            if version != config_data.get("version", 0):
+                Message.warning("配置文件版本不匹配，已更新配置文件")
+                self.settings.version = version
+                self.save(filepath, output=False)
+            Config.save_snapshot(filepath, self.settings)
 
         if output:
             Message.success(f"配置文件加载路径: {filepath}")
 
         return True
+
+    @staticmethod
+    def snapshot_path(filepath: str) -> str:
+        """配置快照路径, 按配置文件绝对路径区分, 保存在用户缓存目录"""
+
+        cache_dir = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+            os.path.expanduser("~"), ".cache"
+        )
+        key = hashlib.sha1(os.path.abspath(filepath).encode("utf-8")).hexdigest()[:16]
+        return os.path.join(cache_dir, "AlistMediaRename", f"config-{key}.json")
+
+    @staticmethod
+    def _snapshot_key(filepath: str, version: str) -> dict:
+        """快照键: 配置文件路径, 修改时间, 大小及配置版本"""
+
+        stat = os.stat(filepath)
+        return {
+            "format": Config.SNAPSHOT_FORMAT,
+            "path": os.path.abspath(filepath),
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "version": version,
+        }
+
+    @staticmethod
+    def load_snapshot(filepath: str, version: str) -> Optional[Settings]:
+        """
+        读取配置快照
+
+        :param filepath: 配置文件路径
+        :param version: 当前配置版本
+        :return: 配置, 快照不存在或配置文件已修改时为空
+        """
+
+        try:
+            key = Config._snapshot_key(filepath, version)
+            with open(Config.snapshot_path(filepath), "r", encoding="utf-8") as file:
+                snapshot = json.load(file)
+            if snapshot.get("key") != key:
+                return None
+            return Settings.model_validate(snapshot["settings"])
+        except (OSError, ValueError, KeyError) as e:
+            # 快照只是缓存, 无法使用时重新解析配置文件
+            logger.debug(f"配置快照不可用: {e}")
+            return None
+
+    @staticmethod
+    def save_snapshot(filepath: str, settings: Settings) -> None:
+        """
+        保存配置快照, 先写入临时文件再替换, 多个进程同时启动时不会读到不完整的快照.
+        快照包含 Alist 密码, TOTP 及 TMDB api_key, 只允许当前用户读写
+        """
+
+        snapshot_path = Config.snapshot_path(filepath)
+        try:
+            snapshot = {
+                "key": Config._snapshot_key(filepath, settings.version),
+                "settings": settings.model_dump(mode="json"),
+            }
+            os.makedirs(os.path.dirname(snapshot_path), mode=0o700, exist_ok=True)
+            temp_path = f"{snapshot_path}.{os.getpid()}.tmp"
+            fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with open(fd, "w", encoding="utf-8") as file:
+                json.dump(snapshot, file, ensure_ascii=False)
+            os.replace(temp_path, snapshot_path)
+        except OSError as e:
+            logger.debug(f"保存配置快照失败: {e}")
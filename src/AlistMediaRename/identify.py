@@ -0,0 +1,329 @@
+import json
+import logging
+import os
+import re
+import time
+import unicodedata
+from typing import Optional
+
+from .models import IdentifyCandidate, IdentifyResult
+from .title_index import TitleIndex
+
+logger = logging.getLogger("Amr.Identify")
+
+
+class Identifier:
+    """
+    根据文件夹名称自动识别剧集/电影: 解析标题及年份, 并按标题相似度, 年份及集数对搜索结果评分.
+    """
+
+    # 评分权重, 缺少的评分项不参与计算
+    TITLE_WEIGHT = 0.6
+    YEAR_WEIGHT = 0.25
+    EPISODE_WEIGHT = 0.15
+    # 前两名候选分数差距小于该值时视为无法区分
+    AMBIGUOUS_MARGIN = 0.05
+    # 从索引中补充候选的最低标题相似度
+    INDEX_MIN_SCORE = 0.5
+
+    BRACKET_PATTERN = re.compile(r"[\[【\{]([^\]】\}]*)[\]】\}]")
+    YEAR_PATTERN = re.compile(r"(?<!\d)((?:19|20)\d{2})(?!\d)")
+    SEASON_PATTERN = re.compile(
+        r"(?i)(?<![a-z])(?:s(\d{1,2})(?:e\d+)?|season\s*(\d{1,2}))(?![a-z\d])|第\s*([\d一二三四五六七八九十]+)\s*[季部]"
+    )
+    NOISE_PATTERN = re.compile(
+        r"(?i)(?<![a-z\d])(2160p|1080p|720p|480p|4k|uhd|hdr\d*|web-?dl|webrip|blu-?ray|bdrip|remux|hdtv|x26[45]|h26[45]|hevc|avc|aac|flac|dts|atmos|10bit|8bit|complete|repack|proper|国语|中字|双语|全\d+集)(?![a-z\d])"
+    )
+    CHINESE_NUMBERS = {c: i for i, c in enumerate("零一二三四五六七八九十")}
+
+    @staticmethod
+    def parse_folder_name(name: str) -> tuple[str, Optional[int], Optional[int]]:
+        """
+        从文件夹名称中解析标题, 年份及季度
+
+        :param name: 文件夹名称, 如 The.Show.2020.S02.1080p.WEB-DL
+        :return: (标题, 年份, 季度)
+        """
+
+        text = unicodedata.normalize("NFKC", name).strip("/")
+        # 去除方括号内容 (压制组/分辨率等), 全部为括号时保留括号内文字
+        stripped = Identifier.BRACKET_PATTERN.sub(" ", text).strip()
+        if not stripped:
+            stripped = " ".join(Identifier.BRACKET_PATTERN.findall(text))
+        text = re.sub(r"[._]+", " ", stripped)
+        text = re.sub(r"[()（）]", " ", text)
+
+        year: Optional[int] = None
+        season: Optional[int] = None
+        cut = len(text)
+
+        year_matches = [m for m in Identifier.YEAR_PATTERN.finditer(text) if m.start() > 0]
+        if year_matches:
+            year = int(year_matches[-1].group(1))
+            cut = min(cut, year_matches[-1].start())
+
+        season_match = Identifier.SEASON_PATTERN.search(text)
+        if season_match:
+            value = next(group for group in season_match.groups() if group)
+            season = Identifier.parse_number(value)
+            cut = min(cut, season_match.start())
+
+        noise_match = Identifier.NOISE_PATTERN.search(text)
+        if noise_match:
+            cut = min(cut, noise_match.start())
+
+        title = re.sub(r"\s+", " ", text[:cut]).strip(" -")
+        if not title:
+            title = re.sub(r"\s+", " ", text).strip(" -")
+        return title, year, season
+
+    @staticmethod
+    def parse_number(value: str) -> Optional[int]:
+        """解析阿拉伯数字或中文数字 (十以内及十几)"""
+
+        if value.isdigit():
+            return int(value)
+        if value.startswith("十"):
+            return 10 + Identifier.CHINESE_NUMBERS.get(value[1:], 0)
+        if len(value) == 1:
+            return Identifier.CHINESE_NUMBERS.get(value)
+        return None
+
+    @staticmethod
+    def title_similarity(title: str, names: list[str]) -> float:
+        """标题与候选名称的最高相似度"""
+
+        return max(
+            (TitleIndex.similarity(title, name) for name in names if name),
+            default=0.0,
+        )
+
+    @staticmethod
+    def year_score(year: Optional[int], candidate_years: list[int]) -> Optional[float]:
+        """年份评分, 相差一年计一半分数"""
+
+        if year is None or not candidate_years:
+            return None
+        diff = min(abs(year - candidate_year) for candidate_year in candidate_years)
+        return 1.0 if diff == 0 else 0.5 if diff == 1 else 0.0
+
+    @staticmethod
+    def episode_score(file_count: int, episode_count: int) -> Optional[float]:
+        """集数评分, 视频文件数与剧集集数越接近分数越高"""
+
+        if file_count <= 0 or episode_count <= 0:
+            return None
+        return 1 - abs(file_count - episode_count) / max(file_count, episode_count)
+
+    @staticmethod
+    def combine(
+        title: float, year: Optional[float] = None, episode: Optional[float] = None
+    ) -> float:
+        """按权重合并各评分项"""
+
+        parts = [(title, Identifier.TITLE_WEIGHT)]
+        if year is not None:
+            parts.append((year, Identifier.YEAR_WEIGHT))
+        if episode is not None:
+            parts.append((episode, Identifier.EPISODE_WEIGHT))
+        return round(sum(s * w for s, w in parts) / sum(w for _, w in parts), 4)
+
+    @staticmethod
+    def candidates(search_data: dict, movie: bool) -> list[IdentifyCandidate]:
+        """将搜索结果转换为候选列表"""
+
+        candidates = []
+        for item in search_data.get("results", []):
+            date = item.get("release_date" if movie else "first_air_date") or ""
+            candidates.append(
+                IdentifyCandidate(
+                    tmdb_id=str(item["id"]),
+                    name=item.get("title" if movie else "name", ""),
+                    original_name=item.get(
+                        "original_title" if movie else "original_name", ""
+                    ),
+                    year=int(date[:4]) if date[:4].isdigit() else None,
+                )
+            )
+        return candidates
+
+    @staticmethod
+    def build_index(search_data: list[dict], movie: bool) -> TitleIndex:
+        """
+        将多次搜索结果建立为标题索引, 相同的条目只保留一次
+
+        :param search_data: TMDB 搜索结果列表
+        :param movie: 是否为电影
+        :return: 标题索引, 条目附加数据为候选
+        """
+
+        index = TitleIndex()
+        for data in search_data:
+            for candidate in Identifier.candidates(data, movie):
+                index.add(
+                    candidate.tmdb_id,
+                    [candidate.name, candidate.original_name],
+                    candidate,
+                )
+        return index
+
+    @staticmethod
+    def rank_candidates(
+        results: list[IdentifyResult],
+        own_candidates: list[list[IdentifyCandidate]],
+        index: TitleIndex,
+    ) -> None:
+        """
+        一次性为所有文件夹排序候选: 自身搜索结果及索引中标题相似的候选均参与评分
+
+        :param results: 识别结果
+        :param own_candidates: 各文件夹自身的搜索结果
+        :param index: 本次及缓存搜索结果的标题索引
+        """
+
+        hits = index.search_many(
+            [result.title for result in results],
+            limit=10,
+            min_score=Identifier.INDEX_MIN_SCORE,
+        )
+        for result, own, ranked in zip(results, own_candidates, hits):
+            title_scores = dict(ranked)
+            candidates = {candidate.tmdb_id: candidate for candidate in own}
+            for key, _ in ranked:
+                candidates.setdefault(key, index.payload(key))
+            result.candidates = [
+                Identifier.score_candidate(
+                    candidate.model_copy(),
+                    result.title,
+                    result.year,
+                    result.season,
+                    result.file_count,
+                    title_score=title_scores.get(key),
+                )
+                for key, candidate in candidates.items()
+            ]
+
+    @staticmethod
+    def score_candidate(
+        candidate: IdentifyCandidate,
+        title: str,
+        year: Optional[int],
+        season: Optional[int] = None,
+        file_count: int = 0,
+        tv_info: Optional[dict] = None,
+        title_score: Optional[float] = None,
+    ) -> IdentifyCandidate:
+        """
+        对候选评分, 提供剧集详情时同时比较季度年份及集数, 并选择匹配的季度
+
+        :param candidate: 候选
+        :param title: 文件夹标题
+        :param year: 文件夹年份
+        :param season: 文件夹季度
+        :param file_count: 视频文件数量
+        :param tv_info: TMDB 剧集详情
+        :param title_score: 已计算的标题相似度, 为空时重新计算
+        :return: 已评分的候选
+        """
+
+        names = [candidate.name, candidate.original_name]
+        years = [candidate.year] if candidate.year else []
+        episode: Optional[float] = None
+        seasons = ""
+
+        if tv_info is not None:
+            season_counts = {
+                s["season_number"]: s.get("episode_count", 0)
+                for s in tv_info.get("seasons", [])
+            }
+            years.extend(
+                int(s["air_date"][:4])
+                for s in tv_info.get("seasons", [])
+                if (s.get("air_date") or "")[:4].isdigit()
+            )
+            if season is not None and season in season_counts:
+                episode = Identifier.episode_score(file_count, season_counts[season])
+                seasons = str(season)
+            elif season is None:
+                # 比较每个季度及全部正片季度的集数, 取最接近的一项
+                options = {
+                    str(number): count
+                    for number, count in season_counts.items()
+                    if number > 0
+                }
+                regular = [n for n in season_counts if n > 0]
+                if len(regular) > 1:
+                    options[f"{min(regular)}-{max(regular)}"] = sum(
+                        season_counts[n] for n in regular
+                    )
+                scored = [
+                    (Identifier.episode_score(file_count, count), key)
+                    for key, count in options.items()
+                ]
+                scored = [(s, key) for s, key in scored if s is not None]
+                if scored:
+                    episode, seasons = max(scored, key=lambda item: item[0])
+            else:
+                # 指定季度不存在
+                episode = 0.0
+
+        if title_score is None:
+            title_score = Identifier.title_similarity(title, names)
+        candidate.score = Identifier.combine(
+            title_score,
+            Identifier.year_score(year, years),
+            episode,
+        )
+        candidate.seasons = seasons
+        return candidate
+
+    @staticmethod
+    def decide(result: IdentifyResult, threshold: float) -> IdentifyResult:
+        """
+        按分数排序候选, 最高分不低于阈值且与第二名有明显差距时自动采用
+
+        :param result: 识别结果
+        :param threshold: 自动采用的最低分数
+        :return: 识别结果
+        """
+
+        result.candidates.sort(key=lambda candidate: candidate.score, reverse=True)
+        if not result.candidates:
+            result.reason = "未找到候选"
+            return result
+        best = result.candidates[0]
+        if best.score < threshold:
+            result.reason = f"分数低于阈值 {threshold}"
+        elif (
+            len(result.candidates) > 1
+            and best.score - result.candidates[1].score < Identifier.AMBIGUOUS_MARGIN
+            and best.tmdb_id != result.candidates[1].tmdb_id
+        ):
+            result.reason = "多个候选分数接近"
+        else:
+            result.accepted = True
+        logger.debug(
+            f"识别 {result.folder}: {best.name} ({best.tmdb_id}) {best.score}, accepted={result.accepted}"
+        )
+        return result
+
+    @staticmethod
+    def save_review(data_dir: str, results: list[IdentifyResult]) -> str:
+        """
+        将未自动采用的识别结果追加到待审核列表
+
+        :param data_dir: 运行数据保存目录
+        :param results: 未采用的识别结果
+        :return: 待审核列表文件路径
+        """
+
+        filepath = os.path.join(data_dir, "review.jsonl")
+        os.makedirs(data_dir, exist_ok=True)
+        created_at = time.strftime("%Y-%m-%d %H:%M:%S")
+        with open(filepath, "a", encoding="utf-8") as file:
+            for result in results:
+                record = result.model_dump(mode="json")
+                record["candidates"] = record["candidates"][:5]
+                record["created_at"] = created_at
+                file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return filepath
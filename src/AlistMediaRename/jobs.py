@@ -0,0 +1,400 @@
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable, Optional
+
+from .amr import Amr
+from .models import ApiResponseError, BatchEntry, Job
+
+logger = logging.getLogger("Amr.Jobs")
+
+
+class JobQueue:
+    """
+    持久化任务队列, 保存在 SQLite 中 (默认 WAL 模式).
+    工作进程以租约领取任务: 领取时在写事务中将任务标记为运行中并记录租约到期时间,
+    多个进程 (包括共享数据库文件的其他主机) 可同时领取而不会重复执行;
+    进程崩溃后租约到期, 任务重新排队.
+    """
+
+    FILENAME = "jobs.sqlite"
+    KINDS = ("rename", "identify", "verify")
+    # 失败重试的等待时间按尝试次数指数增长, 最长等待(秒)
+    MAX_BACKOFF = 3600
+
+    def __init__(self, filepath: str, wal: bool = True, timeout: float = 30):
+        """
+        初始化参数
+
+        :param filepath: 数据库文件路径
+        :param wal: 使用 WAL 模式, 数据库位于网络文件系统时需要关闭
+        :param timeout: 等待其他进程释放写锁的时间(秒)
+        """
+
+        directory = os.path.dirname(os.path.abspath(filepath))
+        os.makedirs(directory, exist_ok=True)
+        self.filepath = filepath
+        self.wal = wal
+        # 事务由 BEGIN IMMEDIATE 显式开启
+        self._db = sqlite3.connect(filepath, timeout=timeout, isolation_level=None)
+        self._db.execute(f"PRAGMA journal_mode={'WAL' if wal else 'DELETE'}")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT, payload TEXT, "
+            "status TEXT, attempts INTEGER DEFAULT 0, max_attempts INTEGER, "
+            "available_at REAL, lease_owner TEXT DEFAULT '', lease_until REAL DEFAULT 0, "
+            "result TEXT DEFAULT '', error TEXT DEFAULT '', "
+            "created_at REAL, updated_at REAL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, available_at)"
+        )
+
+    @classmethod
+    def open(cls, data_dir: str, filepath: str = "", wal: bool = True) -> "JobQueue":
+        """
+        打开任务队列
+
+        :param data_dir: 运行数据保存目录
+        :param filepath: 数据库文件路径, 为空时保存在运行数据目录
+        :param wal: 使用 WAL 模式
+        """
+
+        return cls(filepath or os.path.join(data_dir, JobQueue.FILENAME), wal)
+
+    def close(self) -> None:
+        self._db.close()
+
+    @staticmethod
+    def _job(row: tuple) -> Job:
+        (
+            id,
+            kind,
+            payload,
+            status,
+            attempts,
+            max_attempts,
+            available_at,
+            lease_owner,
+            lease_until,
+            result,
+            error,
+            created_at,
+            updated_at,
+        ) = row
+        return Job(
+            id=id,
+            kind=kind,
+            payload=json.loads(payload),
+            status=status,
+            attempts=attempts,
+            max_attempts=max_attempts,
+            available_at=available_at,
+            lease_owner=lease_owner,
+            lease_until=lease_until,
+            result=json.loads(result) if result else None,
+            error=error,
+            created_at=created_at,
+            updated_at=updated_at,
+        )
+
+    def add(self, kind: str, payload: dict, max_attempts: int = 3) -> int:
+        """
+        添加任务
+
+        :param kind: 任务类型, rename / identify / verify
+        :param payload: 任务参数
+        :param max_attempts: 最多尝试次数
+        :return: 任务id
+        """
+
+        if kind not in JobQueue.KINDS:
+            raise ValueError(f"未知的任务类型: {kind}")
+        now = time.time()
+        cursor = self._db.execute(
+            "INSERT INTO jobs (kind, payload, status, max_attempts, available_at, created_at, updated_at) "
+            "VALUES (?, ?, 'queued', ?, ?, ?, ?)",
+            (kind, json.dumps(payload, ensure_ascii=False), max_attempts, now, now, now),
+        )
+        return int(cursor.lastrowid or 0)
+
+    def get(self, job_id: int) -> Optional[Job]:
+        """获取任务"""
+
+        row = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return None if row is None else JobQueue._job(row)
+
+    def list(self, status: str = "", limit: int = 100) -> list[Job]:
+        """按id倒序列出任务"""
+
+        rows = self._db.execute(
+            "SELECT * FROM jobs WHERE ? = '' OR status = ? ORDER BY id DESC LIMIT ?",
+            (status, status, limit),
+        )
+        return [JobQueue._job(row) for row in rows]
+
+    def counts(self) -> dict[str, int]:
+        """各状态的任务数量"""
+
+        return dict(self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"))
+
+    def claim(self, owner: str, lease: float) -> Optional[Job]:
+        """
+        领取一个可执行的任务: 排队中且已到重试时间, 或运行中但租约已过期 (工作进程已退出)
+
+        :param owner: 工作进程标识
+        :param lease: 租约时长(秒), 到期前未续约时其他进程可重新领取
+        :return: 任务, 没有可执行的任务时为空
+        """
+
+        now = time.time()
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._db.execute(
+                "SELECT * FROM jobs WHERE (status = 'queued' AND available_at <= ?) "
+                "OR (status = 'running' AND lease_until < ?) ORDER BY id LIMIT 1",
+                (now, now),
+            ).fetchone()
+            if row is None:
+                self._db.execute("COMMIT")
+                return None
+            job = JobQueue._job(row)
+            if job.status == "running" and job.attempts >= job.max_attempts:
+                # 多次执行中途退出, 不再重试
+                self._db.execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, lease_owner = '', updated_at = ? WHERE id = ?",
+                    (f"租约过期: {job.lease_owner}", now, job.id),
+                )
+                self._db.execute("COMMIT")
+                return self.claim(owner, lease)
+            self._db.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, "
+                "lease_owner = ?, lease_until = ?, updated_at = ? WHERE id = ?",
+                (owner, now + lease, now, job.id),
+            )
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        job.status, job.attempts, job.lease_owner = "running", job.attempts + 1, owner
+        job.lease_until = now + lease
+        return job
+
+    def renew(self, job: Job, lease: float) -> bool:
+        """
+        续约, 租约已被其他进程接管时失败
+
+        :return: 是否续约成功
+        """
+
+        now = time.time()
+        renewed = self._db.execute(
+            "UPDATE jobs SET lease_until = ?, updated_at = ? "
+            "WHERE id = ? AND status = 'running' AND lease_owner = ?",
+            (now + lease, now, job.id, job.lease_owner),
+        ).rowcount
+        return renewed > 0
+
+    def complete(self, job: Job, result) -> bool:
+        """
+        记录任务成功, 只有持有租约的进程可以提交结果
+
+        :return: 是否提交成功
+        """
+
+        return self._finish(job, "success", result=result)
+
+    def fail(self, job: Job, error: str, retry: bool = True) -> bool:
+        """
+        记录任务失败, 未达到尝试次数上限时按指数退避重新排队
+
+        :param job: 任务
+        :param error: 错误信息
+        :param retry: 是否允许重试, 参数错误等无法重试的错误为否
+        :return: 是否提交成功
+        """
+
+        if retry and job.attempts < job.max_attempts:
+            delay = min(30 * 2 ** (job.attempts - 1), JobQueue.MAX_BACKOFF)
+            return self._finish(job, "queued", error=error, delay=delay)
+        return self._finish(job, "failed", error=error)
+
+    def _finish(
+        self, job: Job, status: str, result=None, error: str = "", delay: float = 0
+    ) -> bool:
+        now = time.time()
+        updated = self._db.execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, available_at = ?, "
+            "lease_owner = '', lease_until = 0, updated_at = ? "
+            "WHERE id = ? AND status = 'running' AND lease_owner = ?",
+            (
+                status,
+                "" if result is None else json.dumps(result, ensure_ascii=False),
+                error,
+                now + delay,
+                now,
+                job.id,
+                job.lease_owner,
+            ),
+        ).rowcount
+        if not updated:
+            logger.warning(f"任务 {job.id} 的租约已被其他进程接管, 结果未保存")
+        return updated > 0
+
+    def retry(self, job_id: int) -> bool:
+        """将失败的任务重新排队, 重置尝试次数"""
+
+        return (
+            self._db.execute(
+                "UPDATE jobs SET status = 'queued', attempts = 0, error = '', available_at = ?, "
+                "updated_at = ? WHERE id = ? AND status = 'failed'",
+                (time.time(), time.time(), job_id),
+            ).rowcount
+            > 0
+        )
+
+
+class JobError(Exception):
+    """任务失败, retry 为否时不再重试"""
+
+    def __init__(self, message: str, retry: bool = True):
+        super().__init__(message)
+        self.retry = retry
+
+
+class JobWorker:
+    """
+    工作进程: 循环领取任务并使用同一个 Amr 实例执行, 执行期间在后台线程中定时续约.
+    多个进程可同时运行, 由任务队列的租约保证每个任务只被一个进程执行.
+    """
+
+    def __init__(
+        self,
+        amr: Amr,
+        queue: JobQueue,
+        lease: float = 300,
+        poll_interval: float = 5,
+        owner: str = "",
+    ):
+        """
+        初始化参数
+
+        :param amr: Amr 实例
+        :param queue: 任务队列
+        :param lease: 租约时长(秒), 每隔三分之一租约时长续约一次
+        :param poll_interval: 没有任务时的等待时间(秒)
+        :param owner: 工作进程标识, 默认为 主机名:进程id:随机值
+        """
+
+        self.amr = amr
+        self.queue = queue
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.handlers: dict[str, Callable[[dict], object]] = {
+            "rename": self.rename,
+            "identify": self.identify,
+            "verify": self.verify,
+        }
+
+    def run(self, drain: bool = False, max_jobs: int = 0) -> int:
+        """
+        领取并执行任务
+
+        :param drain: 没有可执行的任务时退出, 否则持续等待新任务
+        :param max_jobs: 最多执行的任务数量, 0 为不限制
+        :return: 已执行的任务数量
+        """
+
+        executed = 0
+        while not max_jobs or executed < max_jobs:
+            job = self.queue.claim(self.owner, self.lease)
+            if job is None:
+                if drain:
+                    break
+                time.sleep(self.poll_interval)
+                continue
+            self.execute(job)
+            executed += 1
+        return executed
+
+    def execute(self, job: Job) -> None:
+        """执行一个已领取的任务并提交结果"""
+
+        logger.info(f"执行任务 {job.id}: {job.kind}, 第 {job.attempts} 次")
+        stop = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat, args=(job, stop), name=f"amr-lease-{job.id}", daemon=True
+        )
+        heartbeat.start()
+        try:
+            result = self.handlers[job.kind](job.payload)
+        except JobError as e:
+            self.queue.fail(job, str(e), e.retry)
+        except EOFError:
+            self.queue.fail(job, "工作进程无法交互选择, 请指定 id 及 seasons", retry=False)
+        except ValueError as e:
+            self.queue.fail(job, str(e), retry=False)
+        except (ApiResponseError, KeyError) as e:
+            self.queue.fail(job, str(e))
+        except Exception as e:
+            logger.warning(f"任务 {job.id} 出错: {e}", exc_info=True)
+            self.queue.fail(job, str(e))
+        else:
+            self.queue.complete(job, result)
+        finally:
+            stop.set()
+            heartbeat.join()
+
+    def _heartbeat(self, job: Job, stop: threading.Event) -> None:
+        """定时续约, 使用独立的数据库连接"""
+
+        queue = JobQueue(self.queue.filepath, self.queue.wal)
+        try:
+            while not stop.wait(self.lease / 3):
+                if not queue.renew(job, self.lease):
+                    logger.warning(f"任务 {job.id} 续约失败")
+                    return
+        finally:
+            queue.close()
+
+    def rename(self, payload: dict) -> dict:
+        """重命名任务, 参数同批量清单条目"""
+
+        (result,) = self.amr.batch([BatchEntry.model_validate(payload)])
+        if result.status == "failed":
+            raise JobError(result.message or "重命名失败", retry=result.retryable)
+        return result.model_dump(mode="json")
+
+    def identify(self, payload: dict) -> dict:
+        """
+        识别任务: 识别文件夹, 自动采用的文件夹作为重命名任务加入队列, 其余加入待审核列表
+
+        :param payload: {"folders": [...], "movie": false, "password": null, "children": false}
+        """
+
+        movie = bool(payload.get("movie", False))
+        password = payload.get("password")
+        folders, listings = payload.get("folders", []), None
+        if payload.get("children"):
+            folders, listings = self.amr.child_folders(folders, password)
+        results = self.amr.auto_identify(folders, movie, password, listings)
+        review = self.amr.save_review(results)
+        jobs = [
+            self.queue.add("rename", entry.model_dump(mode="json"))
+            for entry in Amr.accepted_entries(results, movie, password)
+        ]
+        return {"jobs": jobs, "review": [result.folder for result in review]}
+
+    def verify(self, payload: dict) -> dict:
+        """校验任务: 重新校验指定运行, 只重试未生效的步骤"""
+
+        result = self.amr.verify_run(payload["run_id"])
+        if result.retry_failed:
+            raise JobError(f"重试失败 {result.retry_failed} 项", retry=False)
+        return result.model_dump(mode="json")
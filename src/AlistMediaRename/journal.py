@@ -0,0 +1,244 @@
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Optional
+
+from .models import JournalStep, RenameStep
+
+logger = logging.getLogger("Amr.Journal")
+
+
+class RenameJournal:
+    """
+    重命名预写日志, 每次运行对应一个 JSON Lines 文件.
+    执行第一批重命名前写入全部批次的意图记录, 每批完成后写入结果记录, 中断后可据此继续执行或撤销.
+    """
+
+    def __init__(self, data_dir: str, run_id: str = ""):
+        """
+        初始化参数
+
+        :param data_dir: 运行数据保存目录
+        :param run_id: 运行id, 为空时生成新的运行id
+        """
+
+        self.run_id = run_id or (
+            time.strftime("%Y%m%d-%H%M%S") + "-" + uuid.uuid4().hex[:6]
+        )
+        self.directory = RenameJournal.journal_dir(data_dir)
+        self.filepath = os.path.join(self.directory, f"{self.run_id}.jsonl")
+        self._next_seq = 0
+        self._next_wave = 0
+
+    @staticmethod
+    def journal_dir(data_dir: str) -> str:
+        return os.path.join(data_dir, "journal")
+
+    def _write(self, *records: dict) -> None:
+        """追加记录并落盘"""
+
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.filepath, "a", encoding="utf-8") as file:
+            for record in records:
+                file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+
+    def begin(self, kind: str = "rename", undo_of: str = "") -> None:
+        """写入运行信息"""
+
+        self._write(
+            {
+                "op": "begin",
+                "run_id": self.run_id,
+                "kind": kind,
+                "undo_of": undo_of,
+                "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            }
+        )
+
+    def intend(self, steps: list[tuple[str, RenameStep]]) -> list[int]:
+        """
+        写入一批重命名意图
+
+        :param steps: (文件类别, 重命名步骤) 列表
+        :return: 各步骤序号
+        """
+
+        return self.intend_waves([steps])[0]
+
+    def intend_waves(self, waves: list[list[tuple[str, RenameStep]]]) -> list[list[int]]:
+        """
+        一次写入多批重命名意图, 批次号依次递增.
+        中断在任意批次之后, 之后的批次 (如破除循环的临时名称改回目标名称) 仍可继续执行或撤销
+
+        :param waves: 各批次的 (文件类别, 重命名步骤) 列表
+        :return: 各批次的步骤序号
+        """
+
+        records: list[dict] = []
+        seqs: list[list[int]] = []
+        for steps in waves:
+            wave = self._next_wave
+            self._next_wave += 1
+            seqs.append(list(range(self._next_seq, self._next_seq + len(steps))))
+            self._next_seq += len(steps)
+            records += [
+                {
+                    "op": "intent",
+                    "seq": seq,
+                    "wave": wave,
+                    "category": category,
+                    "step": step.model_dump(mode="json"),
+                }
+                for seq, (category, step) in zip(seqs[-1], steps)
+            ]
+        if records:
+            self._write(*records)
+        return seqs
+
+    def complete(self, results: list[tuple[int, bool, str]]) -> None:
+        """
+        写入重命名结果
+
+        :param results: (步骤序号, 是否成功, 错误信息) 列表
+        """
+
+        if not results:
+            return
+        self._write(
+            *[
+                {"op": "done", "seq": seq, "success": success, "error": error}
+                for seq, success, error in results
+            ]
+        )
+
+    def finish(self) -> None:
+        """写入运行结束标记"""
+
+        self._write({"op": "end"})
+
+    @classmethod
+    def load(cls, data_dir: str, run_id: str) -> tuple["RenameJournal", dict, list[JournalStep]]:
+        """
+        读取重命名日志
+
+        :return: (可继续追加的日志, 运行信息, 全部步骤)
+        """
+
+        journal = cls(data_dir, run_id)
+        header, steps = RenameJournal.read(journal.filepath)
+        if steps:
+            journal._next_seq = steps[-1].seq + 1
+            journal._next_wave = max(step.wave for step in steps) + 1
+        return journal, header, steps
+
+    @staticmethod
+    def read(filepath: str) -> tuple[dict, list[JournalStep]]:
+        """
+        读取日志文件
+
+        :return: (运行信息, 按序号排列的全部步骤)
+        """
+
+        header: dict = {}
+        steps: dict[int, JournalStep] = {}
+        with open(filepath, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # 中断时可能残留不完整的最后一行
+                    logger.warning(f"跳过无法解析的日志记录: {line!r}")
+                    continue
+                if record["op"] == "begin":
+                    header = record
+                elif record["op"] == "intent":
+                    steps[record["seq"]] = JournalStep(
+                        seq=record["seq"],
+                        wave=record["wave"],
+                        category=record["category"],
+                        step=RenameStep.model_validate(record["step"]),
+                    )
+                elif record["op"] == "done" and record["success"]:
+                    if record["seq"] not in steps:
+                        # 意图记录不完整时已被跳过
+                        logger.warning(f"跳过没有意图记录的结果: {line!r}")
+                        continue
+                    steps[record["seq"]].done = True
+                elif record["op"] == "end":
+                    header["finished"] = True
+        return header, sorted(steps.values(), key=lambda step: step.seq)
+
+    @classmethod
+    def merge(cls, data_dir: str, filepaths: list[str]) -> "RenameJournal":
+        """
+        将多个运行 (如各分片的运行) 的日志合并为一个新的运行, 步骤序号及批次依次顺延,
+        撤销合并后的运行即撤销全部运行
+
+        :param data_dir: 运行数据保存目录
+        :param filepaths: 日志文件路径
+        :return: 合并后的日志
+        """
+
+        journal = cls(data_dir)
+        sources: list[tuple[dict, list[JournalStep]]] = [
+            RenameJournal.read(filepath) for filepath in filepaths
+        ]
+        journal._write(
+            {
+                "op": "begin",
+                "run_id": journal.run_id,
+                "kind": "merge",
+                "undo_of": "",
+                "merged_from": [header.get("run_id", "") for header, _ in sources],
+                "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            }
+        )
+        for _, steps in sources:
+            if not steps:
+                continue
+            seq_offset, wave_offset = journal._next_seq, journal._next_wave
+            journal._write(
+                *[
+                    {
+                        "op": "intent",
+                        "seq": step.seq + seq_offset,
+                        "wave": step.wave + wave_offset,
+                        "category": step.category,
+                        "step": step.step.model_dump(mode="json"),
+                    }
+                    for step in steps
+                ]
+            )
+            journal.complete([(step.seq + seq_offset, True, "") for step in steps if step.done])
+            journal._next_seq = steps[-1].seq + seq_offset + 1
+            journal._next_wave = max(step.wave for step in steps) + wave_offset + 1
+        if all(header.get("finished") for header, _ in sources):
+            journal.finish()
+        return journal
+
+    @staticmethod
+    def list_runs(data_dir: str) -> list[str]:
+        """按时间顺序列出全部运行id"""
+
+        directory = RenameJournal.journal_dir(data_dir)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(
+            filename[: -len(".jsonl")]
+            for filename in os.listdir(directory)
+            if filename.endswith(".jsonl")
+        )
+
+    @staticmethod
+    def latest_unfinished(data_dir: str) -> Optional[str]:
+        """获取最近一次未完成的运行id"""
+
+        for run_id in reversed(RenameJournal.list_runs(data_dir)):
+            _, header, _ = RenameJournal.load(data_dir, run_id)
+            if not header.get("finished"):
+                return run_id
+        return None
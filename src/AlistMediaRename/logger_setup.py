@@ -1,8 +1,13 @@
+import atexit
+import json
 import logging
 import os
-from typing import Optional
-from rich.logging import RichHandler
-from AlistMediaRename.output import console as rich_console_instance  # 可以考虑复用
+import time
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+if TYPE_CHECKING:
+    import logging.handlers
+    import queue
 
 # 获取根 logger
 logger = logging.getLogger("Amr")  # 为您的应用创建一个专用的 logger 实例
@@ -10,28 +15,134 @@ logger = logging.getLogger("Amr")  # 为您的应用创建一个专用的 logger
 # 默认的日志格式，如果需要可以硬编码或作为参数传递
 DEFAULT_LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(module)s.%(funcName)s:%(lineno)d - %(message)s"
 
+# 日志文件按大小轮转: 单个文件上限及保留的历史文件数量
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+
+# 后台写入日志的监听线程, 由 setup_logging 启动
+_listener: Optional["logging.handlers.QueueListener"] = None
+
+
+class LogPayload:
+    """
+    延迟序列化的日志数据: 作为日志参数传入 (logger.debug("%s", LogPayload(data))),
+    只有日志实际输出时才序列化, 列表及文本按上限截断, 避免为无人读取的日志生成大量文本
+    """
+
+    MAX_ITEMS = 20  # 列表最多保留的项数
+    MAX_CHARS = 4000  # 序列化后最多保留的字符数
+
+    def __init__(
+        self,
+        data: Any = None,
+        factory: Optional[Callable[[], Any]] = None,
+        max_items: int = MAX_ITEMS,
+        max_chars: int = MAX_CHARS,
+    ):
+        """
+        初始化参数
+
+        :param data: 日志数据
+        :param factory: 生成日志数据的函数, 输出时才调用, 如获取任务参数
+        :param max_items: 列表最多保留的项数
+        :param max_chars: 序列化后最多保留的字符数
+        """
+
+        self._data = data
+        self._factory = factory
+        self.max_items = max_items
+        self.max_chars = max_chars
+
+    def _trim(self, data: Any) -> Any:
+        if isinstance(data, dict):
+            return {str(key): self._trim(value) for key, value in data.items()}
+        if isinstance(data, (list, tuple)):
+            items = [self._trim(item) for item in data[: self.max_items]]
+            if len(data) > self.max_items:
+                items.append(f"... 共 {len(data)} 项")
+            return items
+        if isinstance(data, (str, int, float, bool)) or data is None:
+            return data
+        return str(data)
+
+    def value(self) -> Any:
+        """截断后的数据, 可直接序列化为 JSON"""
+
+        return self._trim(self._factory() if self._factory is not None else self._data)
+
+    def __str__(self) -> str:
+        text = json.dumps(self.value(), ensure_ascii=False)
+        if len(text) > self.max_chars:
+            text = f"{text[: self.max_chars]}... (共 {len(text)} 字符)"
+        return text
+
+
+class DeferredQueueHandler(logging.Handler):
+    """
+    将日志记录放入队列, 由监听线程格式化及写入. 与 logging.handlers.QueueHandler 不同, 入队前不格式化消息,
+    LogPayload 等参数的序列化也在监听线程中进行, 并保留异常信息供 RichHandler 输出完整堆栈
+    """
+
+    def __init__(self, log_queue: "queue.SimpleQueue"):
+        super().__init__()
+        self.queue = log_queue
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.queue.put_nowait(record)
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """结构化日志, 每条记录输出为一行 JSON, 通过 extra={"fields": {...}} 附加字段"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created))
+            + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "source": f"{record.module}.{record.funcName}:{record.lineno}",
+        }
+        for key, value in getattr(record, "fields", {}).items():
+            entry[key] = value.value() if isinstance(value, LogPayload) else value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
 
 def setup_logging(
     verbose: bool = False,  # 来自 --verbose 的布尔值
     file_log_path: Optional[str] = None,  # 来自 --log-file
     file_log_level: str = "INFO",  # 来自 --log-level，或硬编码默认值
+    json_log_path: Optional[str] = None,  # 来自 --log-json
+    max_bytes: int = LOG_MAX_BYTES,
+    backup_count: int = LOG_BACKUP_COUNT,
 ):
     """
     根据命令行参数配置日志系统。
+    记录通过队列交给后台监听线程写入控制台及文件, 事件循环线程中不进行阻塞的日志 I/O。
 
     :param verbose: 是否启用在控制台输出详细日志。
     :param file_log_path: 日志文件的路径。如果为 None，则不记录到文件。
     :param file_log_level: 文件日志的级别字符串 (e.g., "INFO", "DEBUG").
-    :param log_format: 日志记录的格式字符串。
+    :param json_log_path: 结构化日志 (JSON Lines) 文件路径。如果为 None，则不输出。
+    :param max_bytes: 日志文件大小上限, 超出后轮转, 0 为不轮转。
+    :param backup_count: 轮转时保留的历史日志文件数量。
     """
+    global _listener
+    # 执行命令时才导入 rich 及 logging.handlers, 加快 amr -h / amr -v 的启动
+    import logging.handlers
+    import queue
+
+    from rich.logging import RichHandler
+    from AlistMediaRename.output import console as rich_console_instance  # 可以考虑复用
+
     logger.setLevel(
         logging.DEBUG
     )  # 设置根 logger 的级别为 DEBUG，由 handlers 控制实际输出级别
 
     # 清理现有的 handlers，防止重复日志
-    for handler in logger.handlers[:]:
-        logger.removeHandler(handler)
-        handler.close()  # 关闭旧的 handler
+    stop_logging()
 
     # --- 控制台 Handler ---
     # 使用 RichHandler 替代 StreamHandler
@@ -62,31 +173,81 @@ def setup_logging(
     # msg_formatter = logging.Formatter("%(message)s") # 只格式化消息本身
     # console_handler.setFormatter(msg_formatter) # 但通常不这么用 RichHandler
 
-    logger.addHandler(console_handler)
+    handlers: list[logging.Handler] = [console_handler]
+    messages: list[tuple[int, str]] = []
 
     # 文件 Handler (如果指定了路径)
     if verbose and file_log_path:
         try:
-            # 确保日志文件目录存在
-            log_dir = os.path.dirname(file_log_path)
-            if log_dir and not os.path.exists(log_dir):
-                os.makedirs(log_dir, exist_ok=True)  # exist_ok=True 避免并发问题
-            file_log_formatter = logging.Formatter(DEFAULT_LOG_FORMAT)
-            file_handler = logging.FileHandler(
-                file_log_path, mode="a", encoding="utf-8"
-            )
+            file_handler = _rotating_handler(file_log_path, max_bytes, backup_count)
             # 设置文件处理器的级别
             # file_actual_level = getattr(logging, file_log_level.upper(), logging.DEBUG)
             file_handler.setLevel(logging.DEBUG)
-            file_handler.setFormatter(file_log_formatter)
-            logger.addHandler(file_handler)
-            logger.info(
-                f"文件日志已启用。日志文件: {os.path.abspath(file_log_path)}, 级别: {file_log_level.upper()}"
+            file_handler.setFormatter(logging.Formatter(DEFAULT_LOG_FORMAT))
+            handlers.append(file_handler)
+            messages.append(
+                (
+                    logging.INFO,
+                    f"文件日志已启用。日志文件: {os.path.abspath(file_log_path)}, 级别: {file_log_level.upper()}",
+                )
             )
         except Exception as e:
-            logger.error(f"配置文件日志失败 ({file_log_path}): {e}", exc_info=True)
             # 确保控制台能看到这个错误
-            logger.error(f"无法初始化文件日志处理器: {e}")  # 再次记录，确保显示
+            messages.append((logging.ERROR, f"无法初始化文件日志处理器 ({file_log_path}): {e}"))
 
     else:
-        logger.info("文件日志未启用 (未提供 --log-file 参数)。")
+        messages.append((logging.INFO, "文件日志未启用 (未提供 --log-file 参数)。"))
+
+    # 结构化日志 Handler (如果指定了路径)
+    if json_log_path:
+        json_handler = _rotating_handler(json_log_path, max_bytes, backup_count)
+        json_handler.setLevel(logging.DEBUG if verbose else logging.INFO)
+        json_handler.setFormatter(JsonLinesFormatter())
+        handlers.append(json_handler)
+
+    # 监听线程持有全部 handler, 按各自级别过滤
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    logger.addHandler(DeferredQueueHandler(log_queue))
+    _listener = logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True
+    )
+    _listener.start()
+
+    # logger 级别取各 handler 的最低级别, 没有 handler 输出的级别在创建记录前即被过滤
+    logger.setLevel(min(handler.level for handler in handlers))
+    for level, message in messages:
+        logger.log(level, message)
+
+
+def _rotating_handler(
+    filepath: str, max_bytes: int, backup_count: int
+) -> "logging.handlers.RotatingFileHandler":
+    """按大小轮转的日志文件 Handler"""
+
+    import logging.handlers
+
+    # 确保日志文件目录存在
+    log_dir = os.path.dirname(filepath)
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)  # exist_ok=True 避免并发问题
+    return logging.handlers.RotatingFileHandler(
+        filepath, mode="a", maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+    )
+
+
+def stop_logging() -> None:
+    """停止监听线程, 写入队列中剩余的日志并关闭全部 handler"""
+
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+    for handler in logger.handlers[:]:
+        logger.removeHandler(handler)
+        handler.close()  # 关闭旧的 handler
+
+
+# 进程退出前写入剩余的日志
+atexit.register(stop_logging)
@@ -0,0 +1,237 @@
+import json
+import logging
+import os
+import time
+from collections import deque
+
+logger = logging.getLogger("Amr.Metrics")
+
+
+class OperationStats:
+    """单个操作 (如 alist.rename) 在单个主机上的请求统计"""
+
+    # 延迟直方图的桶上限(秒), 与 Prometheus 直方图一致
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+    # 计算分位数保留的最近延迟样本数
+    MAX_SAMPLES = 10000
+
+    def __init__(self):
+        self.count = 0  # 发送的请求数
+        self.errors = 0  # 失败的请求数
+        self.cache_hits = 0  # 使用缓存的请求数
+        self.retries = 0  # 重试的请求数
+        self.bytes_in = 0  # 接收字节数
+        self.bytes_out = 0  # 发送字节数
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.buckets = [0] * (len(OperationStats.BUCKETS) + 1)
+        self.samples: deque[float] = deque(maxlen=OperationStats.MAX_SAMPLES)
+        self.wait_sum = 0.0  # 等待并发名额的总时间
+        self.wait_max = 0.0
+
+    def observe(self, latency: float) -> None:
+        self.latency_sum += latency
+        self.latency_max = max(self.latency_max, latency)
+        self.samples.append(latency)
+        for index, bound in enumerate(OperationStats.BUCKETS):
+            if latency <= bound:
+                self.buckets[index] += 1
+                return
+        self.buckets[-1] += 1
+
+    def quantile(self, q: float) -> float:
+        """延迟分位数 (最近的样本)"""
+
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class MetricsRegistry:
+    """
+    请求指标: 按 操作/主机 统计请求数, 错误数, 延迟分布, 收发字节数, 重试次数及等待并发名额的时间,
+    按调度队列统计并发使用情况. 由任务管理器在发送请求时记录, 可输出为 JSON 或 Prometheus 文本格式.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.operations: dict[tuple[str, str], OperationStats] = {}
+        # 调度队列 -> 最大同时运行数 / 并发上限
+        self.inflight_max: dict[str, int] = {}
+        self.queue_limits: dict[str, int] = {}
+        self.interval_wait = 0.0  # 重命名批次间隔的等待时间
+        # 自动保存: 长时间运行的命令 (watch/serve/worker) 定期写入
+        self.output = ""
+        self.save_interval = 15.0
+        self._saved_at = 0.0
+
+    def stats(self, operation: str, host: str) -> OperationStats:
+        key = (operation, host)
+        if key not in self.operations:
+            self.operations[key] = OperationStats()
+        return self.operations[key]
+
+    def record(
+        self,
+        operation: str,
+        host: str,
+        latency: float,
+        success: bool,
+        bytes_in: int = 0,
+        bytes_out: int = 0,
+        wait: float = 0.0,
+    ) -> None:
+        """
+        记录一次请求
+
+        :param operation: 操作, 如 alist.rename
+        :param host: 主机
+        :param latency: 请求耗时(秒)
+        :param success: 是否成功
+        :param bytes_in: 接收字节数
+        :param bytes_out: 发送字节数
+        :param wait: 发送前等待并发名额的时间(秒)
+        """
+
+        stats = self.stats(operation, host)
+        stats.count += 1
+        stats.errors += not success
+        stats.bytes_in += bytes_in
+        stats.bytes_out += bytes_out
+        stats.wait_sum += wait
+        stats.wait_max = max(stats.wait_max, wait)
+        stats.observe(latency)
+
+    def record_cache_hit(self, operation: str, host: str) -> None:
+        self.stats(operation, host).cache_hits += 1
+
+    def record_retry(self, operation: str, host: str) -> None:
+        self.stats(operation, host).retries += 1
+
+    def record_inflight(self, queue: str, inflight: int, limit: int) -> None:
+        """记录调度队列的同时运行数"""
+
+        self.inflight_max[queue] = max(self.inflight_max.get(queue, 0), inflight)
+        self.queue_limits[queue] = limit
+
+    def snapshot(self) -> dict:
+        """当前指标, 可序列化为 JSON"""
+
+        elapsed = max(time.time() - self.started_at, 1e-9)
+        return {
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started_at)),
+            "elapsed": round(elapsed, 3),
+            "operations": [
+                {
+                    "operation": operation,
+                    "host": host,
+                    "count": stats.count,
+                    "errors": stats.errors,
+                    "cache_hits": stats.cache_hits,
+                    "retries": stats.retries,
+                    "throughput": round(stats.count / elapsed, 3),
+                    "bytes_in": stats.bytes_in,
+                    "bytes_out": stats.bytes_out,
+                    "latency": {
+                        "mean": round(stats.latency_sum / stats.count, 6) if stats.count else 0.0,
+                        "p50": round(stats.quantile(0.5), 6),
+                        "p95": round(stats.quantile(0.95), 6),
+                        "p99": round(stats.quantile(0.99), 6),
+                        "max": round(stats.latency_max, 6),
+                    },
+                    "wait": {"total": round(stats.wait_sum, 6), "max": round(stats.wait_max, 6)},
+                }
+                for (operation, host), stats in sorted(self.operations.items())
+            ],
+            "queues": {
+                queue: {"inflight_max": inflight, "limit": self.queue_limits.get(queue, 0)}
+                for queue, inflight in sorted(self.inflight_max.items())
+            },
+            "rename_interval_wait": round(self.interval_wait, 6),
+        }
+
+    def prometheus(self) -> str:
+        """Prometheus 文本格式, 可供 node_exporter 的 textfile 采集器读取"""
+
+        def labels(**values: str) -> str:
+            escaped = (
+                key + '="' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+                for key, value in values.items()
+            )
+            return "{" + ",".join(escaped) + "}"
+
+        lines: list[str] = []
+        counters = (
+            ("amr_requests_total", "请求数", "count"),
+            ("amr_request_errors_total", "失败的请求数", "errors"),
+            ("amr_cache_hits_total", "使用缓存的请求数", "cache_hits"),
+            ("amr_retries_total", "重试的请求数", "retries"),
+            ("amr_received_bytes_total", "接收字节数", "bytes_in"),
+            ("amr_sent_bytes_total", "发送字节数", "bytes_out"),
+            ("amr_queue_wait_seconds_total", "等待并发名额的时间", "wait_sum"),
+        )
+        items = sorted(self.operations.items())
+        for name, help_text, attribute in counters:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            lines += [
+                f"{name}{labels(operation=operation, host=host)} {getattr(stats, attribute)}"
+                for (operation, host), stats in items
+            ]
+
+        name = "amr_request_duration_seconds"
+        lines += [f"# HELP {name} 请求耗时", f"# TYPE {name} histogram"]
+        for (operation, host), stats in items:
+            cumulative = 0
+            for bound, count in zip((*OperationStats.BUCKETS, "+Inf"), stats.buckets):
+                cumulative += count
+                lines.append(
+                    f"{name}_bucket{labels(operation=operation, host=host, le=str(bound))} {cumulative}"
+                )
+            lines.append(f"{name}_sum{labels(operation=operation, host=host)} {stats.latency_sum}")
+            lines.append(f"{name}_count{labels(operation=operation, host=host)} {stats.count}")
+
+        for name, help_text, values in (
+            ("amr_queue_inflight_max", "调度队列最大同时运行数", self.inflight_max),
+            ("amr_queue_limit", "调度队列并发上限", self.queue_limits),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+            lines += [f"{name}{labels(queue=queue)} {value}" for queue, value in sorted(values.items())]
+        lines += [
+            "# HELP amr_rename_interval_wait_seconds 重命名批次间隔的等待时间",
+            "# TYPE amr_rename_interval_wait_seconds counter",
+            f"amr_rename_interval_wait_seconds {self.interval_wait}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def save(self, filepath: str = "") -> None:
+        """
+        保存指标, .prom 文件使用 Prometheus 文本格式, 其余使用 JSON.
+        先写入临时文件再替换, 采集器不会读到不完整的文件.
+
+        :param filepath: 保存路径, 为空时使用自动保存路径
+        """
+
+        filepath = filepath or self.output
+        if not filepath:
+            return
+        if filepath.endswith(".prom"):
+            content = self.prometheus()
+        else:
+            content = json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+        directory = os.path.dirname(os.path.abspath(filepath))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = f"{filepath}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            file.write(content)
+        os.replace(temp_path, filepath)
+        self._saved_at = time.time()
+
+    def autosave(self) -> None:
+        """距上次保存超过保存间隔时保存, 每轮任务结束时调用"""
+
+        if self.output and time.time() - self._saved_at >= self.save_interval:
+            try:
+                self.save()
+            except OSError as e:
+                logger.warning(f"保存指标失败: {e}")
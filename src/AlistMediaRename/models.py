@@ -1,10 +1,11 @@
 import re
-from typing import Optional
+import zlib
+from typing import Optional, Union
 from pydantic import BaseModel, field_validator, model_validator, Field
 
 
-class AlistConfig(BaseModel):
-    """Alist配置参数"""
+class AlistServer(BaseModel):
+    """Alist服务器参数"""
 
     # Alist 主页链接
     url: str = ""
@@ -16,6 +17,28 @@ class AlistConfig(BaseModel):
     password: str = ""
     # Alist 2FA 验证码
     totp: str = ""
+    # 调度权重, 多个 Alist 同时执行时按权重分配并发
+    weight: int = Field(default=1, ge=1)
+    # 该 Alist 的并发上限, 0 为只受全局并发数限制
+    limit_rate: int = Field(default=0, ge=0)
+    # 存储类型: alist 通过 Alist api 操作, local 直接操作本地文件夹, webdav 通过 WebDAV (url 为 WebDAV 地址)
+    storage: str = "alist"
+    # 本地存储根目录, 存储类型为 local 时使用, 路径相对该目录
+    root: str = ""
+
+    @field_validator("storage", mode="after")
+    @classmethod
+    def validate_storage(cls, value: str) -> str:
+        if value not in ("alist", "local", "webdav"):
+            raise ValueError(f"不支持的存储类型: {value}")
+        return value
+
+
+class AlistConfig(AlistServer):
+    """Alist配置参数"""
+
+    # 其他 Alist 目标, 名称 -> 服务器参数, 批量清单条目通过 target 指定
+    targets: dict[str, AlistServer] = {}
 
 
 class TmdbConfig(BaseModel):
@@ -27,6 +50,8 @@ class TmdbConfig(BaseModel):
     api_key: str = ""
     # TMDB 搜索语言
     language: str = "zh-CN"
+    # TMDB 请求缓存有效期(秒), 0 为不保存缓存文件
+    cache_ttl: int = 43200
 
 
 class AmrConfig(BaseModel):
@@ -46,10 +71,18 @@ class AmrConfig(BaseModel):
     tv_name_format: str = "{name}-S{season:0>2}E{episode:0>2}.{title}"
     # 剧集父文件夹命名格式
     tv_folder_name_format: str = "{name} ({year})"
+    # 整理剧集时季度文件夹命名格式
+    season_folder_name_format: str = "Season {season:0>2}"
     # 视频文件匹配正则表达式
     video_regex_pattern: str = r"(?i).*\.(avi|flv|wmv|mov|mp4|mkv|rm|rmvb)$"
     # 字幕文件匹配正则表达式
     subtitle_regex_pattern: str = r"(?i).*\.(ass|srt|ssa|sub)$"
+    # 字幕文件命名格式
+    subtitle_name_format: str = "{video_name}{subtitle_tag}"
+    # 运行数据保存目录
+    data_dir: str = "./amr_data"
+    # 自动识别置信度阈值, 低于该值的文件夹加入待审核列表
+    auto_threshold: float = 0.8
 
 
 class Settings(BaseModel):
@@ -58,7 +91,7 @@ class Settings(BaseModel):
     alist: AlistConfig = AlistConfig()
     tmdb: TmdbConfig = TmdbConfig()
     amr: AmrConfig = AmrConfig()
-    version: str = "3.3.1"
+    version: str = "3.4.0"
 
     # 将version转换为string
     @field_validator("version", mode="before")
@@ -180,6 +213,7 @@ class FileMeta(BaseModel):
     filename: str  # 原始完整文件名
     folder_path: Folder  # 文件夹路径
     preserve_extension: bool = True  # 是否保留原始文件扩展名
+    subtitle_tag: str = ""  # 字幕语言/轨道后缀, 如 .zh, .en.forced
 
     # 自动生成参数
     prefix_name: str = ""  # 原始无后缀文件名
@@ -207,6 +241,7 @@ class RenameTask(BaseModel):
     # 输入参数
     file_meta: FileMeta  # 文件元数据
     media_meta: MediaMeta  # 媒体元数据
+    subtitle_format: str = ""  # 字幕命名格式, 为空时按媒体名称命名
 
     # 自动生成参数
     original_name: str = ""  # 原始文件名
@@ -218,12 +253,273 @@ class RenameTask(BaseModel):
     # 提取参数
     def get_args(self) -> "RenameTask":
         self.original_name = self.file_meta.filename
-        self.target_name = self.media_meta.fullname + self.file_meta.extension
+        if self.subtitle_format:
+            self.target_name = (
+                self.subtitle_format.format(
+                    video_name=self.media_meta.fullname,
+                    subtitle_tag=self.file_meta.subtitle_tag,
+                )
+                + self.file_meta.extension
+            )
+        else:
+            self.target_name = self.media_meta.fullname + self.file_meta.extension
         self.folder_path = self.file_meta.folder_path
         self.full_path = self.folder_path.path + self.original_name
         return self
 
 
+class RenameStep(BaseModel):
+    """重命名步骤, 由重命名任务经冲突预检后生成"""
+
+    task_index: int  # 对应重命名任务序号
+    folder_path: Folder  # 文件夹路径
+    original_name: str  # 当前文件名
+    target_name: str  # 目标文件名
+    temporary: bool = False  # 是否为破除循环使用的临时名称
+    target_folder: Optional[Folder] = None  # 移动目标文件夹, 不为空时为移动步骤
+
+    @property
+    def full_path(self) -> str:
+        return self.folder_path.path + self.original_name
+
+    @property
+    def target_path(self) -> str:
+        return (self.target_folder or self.folder_path).path + self.target_name
+
+
+class JournalStep(BaseModel):
+    """重命名日志中的一个步骤"""
+
+    seq: int  # 步骤序号
+    wave: int  # 所在批次
+    category: str  # 文件类别, video / subtitle / folder
+    step: RenameStep  # 重命名步骤
+    done: bool = False  # 是否已成功执行
+
+
+class RenameConflict(BaseModel):
+    """重命名冲突"""
+
+    task_index: int  # 对应重命名任务序号
+    original_name: str  # 原始文件名
+    target_name: str  # 目标文件名
+    reason: str  # 冲突原因
+
+
+class VerifyResult(BaseModel):
+    """重命名后按文件列表校验的结果"""
+
+    verified: int = 0  # 已确认完成的数量
+    missing: list[str] = []  # 文件列表中缺少的目标路径
+    unexpected: list[str] = []  # 文件列表中仍存在的源路径
+    retried: int = 0  # 重试数量
+    retry_failed: int = 0  # 重试失败数量
+
+
+class PlanItem(BaseModel):
+    """重命名计划条目"""
+
+    category: str  # 文件类别, video / subtitle / folder / move
+    rename_task: RenameTask  # 重命名任务, 移动条目为移动前的重命名任务
+    target_folder: Optional[Folder] = None  # 移动条目的目标文件夹
+    source_size: int = -1  # 生成计划时源文件大小
+    source_modified: str = ""  # 生成计划时源文件修改时间
+
+
+class Binding(BaseModel):
+    """文件夹与 TMDB 剧集/电影的绑定, 重命名成功后保存, 再次运行时无需搜索及选择"""
+
+    folder: str  # 文件夹路径
+    movie: bool = False
+    tmdb_id: str
+    seasons: str = ""  # 季度编号, 如 1,2 或 1-3
+    number: str = "1-"  # 从指定集数开始重命名
+    season_folders: bool = False  # 是否按季度子文件夹重命名
+    template: str = ""  # 命名模板版本
+    updated_at: str = ""  # 更新时间
+
+
+class RenamePlan(BaseModel):
+    """重命名计划, 可导出为文件后单独执行"""
+
+    version: int = 1  # 计划文件格式版本
+    created_at: str = ""  # 生成时间
+    fingerprints: dict[str, str] = {}  # 文件夹路径 -> 文件列表指纹
+    items: list[PlanItem] = []  # 重命名条目
+    binding: Optional[Binding] = None  # 执行成功后保存的文件夹绑定
+    target: str = ""  # Alist 目标名称, 为空时使用默认 Alist
+    # 生成计划时获取的文件列表, 仅在当前进程内使用, 不写入计划文件
+    listings: dict[str, list[dict]] = Field(default={}, exclude=True)
+
+
+class BatchEntry(BaseModel):
+    """批量重命名清单条目"""
+
+    dir: str  # Alist 文件夹路径
+    id: str = ""  # TMDB id, 优先于关键词
+    keyword: str = ""  # TMDB 搜索关键词
+    movie: bool = False  # 是否为电影
+    seasons: str = ""  # 季度编号, 如 1,2 或 1-3, 为空时交互选择
+    number: str = "1-"  # 从指定集数开始重命名
+    season_folders: bool = False  # 是否按季度子文件夹重命名
+    password: Optional[str] = None  # 文件夹访问密码
+    target: str = ""  # Alist 目标名称, 为空时使用默认 Alist
+
+    @field_validator("id", "seasons", "number", mode="before")
+    def to_string(cls, value):
+        return str(value) if isinstance(value, int) else value
+
+    @model_validator(mode="after")
+    def check_source(self):
+        if not self.id and not self.keyword:
+            raise ValueError(f"{self.dir}: 需要指定 id 或 keyword")
+        return self
+
+
+class BatchManifest(BaseModel):
+    """批量重命名清单"""
+
+    entries: list[BatchEntry] = []
+
+
+class BatchResult(BaseModel):
+    """批量重命名条目结果"""
+
+    entry: BatchEntry
+    status: str = "pending"  # pending / planned / success / partial / failed
+    message: str = ""
+    retryable: bool = True  # 失败时可重试, 参数错误等生成计划时的错误重试也不会成功
+    planned: int = 0  # 计划重命名数量
+    succeeded: int = 0  # 重命名成功数量
+    failed: int = 0  # 重命名失败数量
+
+
+class WatchEntry(BaseModel):
+    """监视文件夹及其绑定的剧集/电影"""
+
+    folder: str  # 文件夹路径
+    movie: bool = False
+    tmdb_id: str
+    seasons: str = ""  # 季度编号, 如 1,2 或 1-3
+    number: str = "1-"  # 从指定集数开始重命名
+    password: Optional[str] = None  # 文件夹访问密码
+    interval: float = 600  # 检查间隔(秒)
+    next_check: float = 0  # 下次检查时间戳
+    failures: int = 0  # 连续失败次数
+    folder_modified: str = ""  # 上次获取的文件夹修改时间
+    listed_at: float = 0  # 上次获取完整文件列表的时间戳
+
+
+class LibraryFolder(BaseModel):
+    """遍历时发现的包含视频文件的文件夹"""
+
+    path: str  # 文件夹路径
+    depth: int = 0  # 相对根文件夹的深度
+    video_count: int = 0  # 视频文件数量
+    # 遍历时获取的文件列表, 仅在当前进程内使用
+    listing: list[dict] = Field(default=[], exclude=True)
+
+
+class Shard(BaseModel):
+    """分片: 按文件夹路径的稳定哈希将文件夹分配给 N 个进程/节点之一"""
+
+    index: int  # 分片编号, 从 1 开始
+    count: int  # 分片总数
+
+    def __str__(self):
+        return f"{self.index}/{self.count}"
+
+    @model_validator(mode="after")
+    def check_index(self) -> "Shard":
+        if not 1 <= self.index <= self.count:
+            raise ValueError(f"分片编号需要在 1-{self.count} 之间: {self.index}")
+        return self
+
+    @classmethod
+    def parse(cls, text: str) -> "Shard":
+        """解析 i/N 格式的分片"""
+
+        index, _, count = text.partition("/")
+        if not index.strip().isdigit() or not count.strip().isdigit():
+            raise ValueError(f"分片格式应为 i/N, 如 1/4: {text}")
+        return cls(index=int(index), count=int(count))
+
+    def owns(self, path: str) -> bool:
+        """文件夹是否属于当前分片, 使用 crc32 保证不同进程及主机的结果一致"""
+
+        key = Folder(path=path).path.encode("utf-8")
+        return zlib.crc32(key) % self.count == self.index - 1
+
+
+class ShardReport(BaseModel):
+    """分片运行报告, 合并后包含全部分片"""
+
+    command: str  # batch / walk
+    shards: list[str] = []  # 已包含的分片, 如 ["1/4"]
+    created_at: str = ""
+    run_ids: list[str] = []  # 重命名日志运行id
+    journals: list[str] = []  # 重命名日志文件路径, 合并时优先使用
+    folders: list[str] = []  # 遍历发现的文件夹
+    results: list[BatchResult] = []  # 重命名结果
+
+
+class IdentifyCandidate(BaseModel):
+    """自动识别候选"""
+
+    tmdb_id: str
+    name: str = ""
+    original_name: str = ""
+    year: Optional[int] = None
+    score: float = 0.0  # 置信度 0-1
+    seasons: str = ""  # 匹配的季度编号
+
+
+class IdentifyResult(BaseModel):
+    """文件夹自动识别结果"""
+
+    folder: str  # 文件夹路径
+    title: str = ""  # 解析出的标题
+    year: Optional[int] = None  # 解析出的年份
+    season: Optional[int] = None  # 解析出的季度
+    movie: bool = False
+    file_count: int = 0  # 视频文件数量
+    candidates: list[IdentifyCandidate] = []
+    accepted: bool = False  # 是否自动采用最高分候选
+    reason: str = ""  # 未采用原因
+
+
+class ServiceJob(BaseModel):
+    """服务模式任务"""
+
+    id: str
+    kind: str  # plan / apply / batch
+    status: str = "queued"  # queued / running / success / failed
+    payload: dict = {}  # 请求参数
+    result: Optional[Union[dict, list]] = None  # 任务结果
+    error: str = ""
+    created_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+
+class Job(BaseModel):
+    """持久化任务队列中的任务"""
+
+    id: int
+    kind: str  # rename / identify / verify
+    payload: dict = {}  # 任务参数
+    status: str = "queued"  # queued / running / success / failed
+    attempts: int = 0  # 已尝试次数
+    max_attempts: int = 3  # 最多尝试次数
+    available_at: float = 0.0  # 可领取时间, 失败重试时延后
+    lease_owner: str = ""  # 持有租约的工作进程
+    lease_until: float = 0.0  # 租约到期时间
+    result: Optional[Union[dict, list]] = None
+    error: str = ""
+    created_at: float = 0.0
+    updated_at: float = 0.0
+
+
 class ApiResponse(BaseModel):
     success: bool
     status_code: int
@@ -231,5 +527,14 @@ class ApiResponse(BaseModel):
     data: dict
 
 
+class RenameOutcome(BaseModel):
+    """重命名步骤的执行结果, 未发送请求的步骤 (如前置步骤失败) 只记录失败原因"""
+
+    step: RenameStep  # 重命名步骤
+    response: ApiResponse  # 请求结果
+    operation: str = ""  # 请求类型, 如 alist.rename, 未发送请求时为空
+    host: str = ""  # 请求主机, 未发送请求时为空
+
+
 class ApiResponseError(Exception):
     pass
@@ -5,8 +5,9 @@ from rich.console import Console
 from rich.prompt import Prompt, Confirm
 from rich.table import Table
 from rich.text import Text
-from .models import RenameTask, MediaMeta
+from .models import BatchResult, IdentifyResult, Job, LibraryFolder, PlanItem, RenameConflict, RenameOutcome, VerifyResult, WatchEntry, RenameStep, RenameTask, MediaMeta
 import sys
+import time
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -167,11 +168,210 @@ class Message:
                 )
                 logger.debug(f"{subtitle.original_name} -> {subtitle.target_name}")
             console.print(table)
-        if folder_rename:
+        if folder_rename and folder_rename_list:
             Message.info(
                 f"文件夹重命名: [grey53]{folder_rename_list[0].original_name}[/grey53] [grey70]->[/grey70] {folder_rename_list[0].target_name}"
             )
 
+    @staticmethod
+    def print_rename_steps(title: str, steps: list[RenameStep]):
+        """打印重命名步骤"""
+        Message.info(f"{title}: 共计 {len(steps)}")
+        table = Table(box=box.SIMPLE)
+        table.add_column("文件夹", justify="left", style="grey53", no_wrap=True)
+        table.add_column("原文件名", justify="left", style="grey53", no_wrap=True)
+        table.add_column(" ", justify="left", style="grey70")
+        table.add_column("目标文件名", justify="left", no_wrap=True)
+        for step in steps:
+            # 移动步骤显示目标文件夹
+            target = (
+                step.target_folder.path + step.target_name
+                if step.target_folder is not None
+                else step.target_name
+            )
+            table.add_row(
+                step.folder_path.path,
+                Message.text_regex(step.original_name),
+                "->",
+                Message.text_regex(target),
+            )
+            logger.debug(f"{step.full_path} -> {target}")
+        console.print(table)
+
+    @staticmethod
+    def print_rename_conflicts(conflicts: list[RenameConflict]):
+        """打印重命名冲突信息"""
+        if len(conflicts) == 0:
+            return
+        Message.warning(f"以下文件存在命名冲突，将跳过重命名: 共计 {len(conflicts)}")
+        table = Table(box=box.SIMPLE)
+        table.add_column("原文件名", justify="left", style="grey53", no_wrap=True)
+        table.add_column(" ", justify="left", style="grey70")
+        table.add_column("目标文件名", justify="left", no_wrap=True)
+        table.add_column("冲突原因", justify="left", style="yellow")
+        for conflict in conflicts:
+            table.add_row(
+                Message.text_regex(conflict.original_name),
+                "->",
+                Message.text_regex(conflict.target_name),
+                conflict.reason,
+            )
+            logger.debug(
+                f"命名冲突: {conflict.original_name} -> {conflict.target_name}, {conflict.reason}"
+            )
+        console.print(table)
+
+    @staticmethod
+    def print_jobs(jobs: list[Job], counts: dict[str, int]):
+        """打印任务队列"""
+        STATUS_STYLE = {
+            "success": "green",
+            "failed": "red",
+            "running": "cyan",
+            "queued": "grey70",
+        }
+        table = Table(box=box.SIMPLE)
+        table.add_column("id", justify="right", style="grey53")
+        table.add_column("类型", justify="left")
+        table.add_column("参数", justify="left", no_wrap=True)
+        table.add_column("状态", justify="left")
+        table.add_column("尝试", justify="right")
+        table.add_column("更新时间", justify="left", style="grey70")
+        table.add_column("信息", justify="left", style="grey70")
+        for job in jobs:
+            style = STATUS_STYLE.get(job.status, "")
+            target = (
+                job.payload.get("dir")
+                or job.payload.get("run_id")
+                or ", ".join(job.payload.get("folders", []))
+            )
+            table.add_row(
+                str(job.id),
+                job.kind,
+                str(target),
+                f"[{style}]{job.status}[/{style}]",
+                f"{job.attempts}/{job.max_attempts}",
+                time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(job.updated_at)),
+                job.lease_owner if job.status == "running" else job.error,
+            )
+        console.print(table)
+        Message.info(
+            "任务数量: " + ", ".join(f"{status} {count}" for status, count in sorted(counts.items()))
+            if counts
+            else "任务队列为空"
+        )
+
+    @staticmethod
+    def print_batch_results(results: list[BatchResult]):
+        """打印批量重命名各条目结果"""
+        STATUS_STYLE = {
+            "success": "green",
+            "partial": "yellow",
+            "failed": "red",
+            "planned": "grey70",
+            "pending": "grey53",
+        }
+        table = Table(box=box.SIMPLE)
+        table.add_column("#", justify="right", style="grey53")
+        table.add_column("文件夹", justify="left", no_wrap=True)
+        table.add_column("状态", justify="left")
+        table.add_column("计划", justify="right")
+        table.add_column("成功", justify="right", style="green")
+        table.add_column("失败", justify="right", style="red")
+        table.add_column("信息", justify="left", style="grey70")
+        for index, result in enumerate(results, start=1):
+            style = STATUS_STYLE.get(result.status, "")
+            table.add_row(
+                str(index),
+                result.entry.dir,
+                f"[{style}]{result.status}[/{style}]",
+                str(result.planned),
+                str(result.succeeded),
+                str(result.failed),
+                result.message,
+            )
+            logger.info(
+                f"批量条目 {result.entry.dir}: {result.status}, 计划 {result.planned}, 成功 {result.succeeded}, 失败 {result.failed} {result.message}"
+            )
+        console.print(table)
+
+    @staticmethod
+    def print_identify_results(results: list[IdentifyResult]):
+        """打印自动识别结果"""
+        table = Table(box=box.SIMPLE)
+        table.add_column("文件夹", justify="left")
+        table.add_column("文件", justify="right", style="grey53")
+        table.add_column("识别结果", justify="left", no_wrap=True)
+        table.add_column("季度", justify="left", style="grey70")
+        table.add_column("置信度", justify="right")
+        table.add_column("状态", justify="left")
+        for result in results:
+            best = result.candidates[0] if result.candidates else None
+            table.add_row(
+                result.folder.split("/")[-2],
+                str(result.file_count),
+                f"{best.name} [{best.tmdb_id}]" if best else "-",
+                best.seasons if best else "",
+                f"{best.score:.2f}" if best else "-",
+                "[green]自动[/green]" if result.accepted else f"[yellow]{result.reason}[/yellow]",
+            )
+            logger.info(
+                f"自动识别 {result.folder}: 标题={result.title}, 年份={result.year}, 季度={result.season}, "
+                f"候选={best.tmdb_id if best else None}, 置信度={best.score if best else None}, 采用={result.accepted}"
+            )
+        console.print(table)
+
+    @staticmethod
+    def print_catalogue_results(keyword: str, results: list[dict], movie: bool):
+        """打印本地TMDB目录查找结果"""
+        Message.success(f"关键词: {keyword} (本地目录)")
+        table = Table(box=box.SIMPLE)
+        table.add_column("人气", justify="right", style="cyan")
+        table.add_column("TMDB ID", justify="center", style="magenta")
+        table.add_column("序号", justify="center", style="green")
+        table.add_column("电影标题" if movie else "剧名", justify="left", no_wrap=True)
+        for i, r in enumerate(results):
+            name = r["title"] if movie else r["name"]
+            table.add_row(f"{r['popularity']:.1f}", str(r["id"]), str(i), name)
+            logger.debug(f"本地目录: {name} TMDB ID: {r['id']}")
+        console.print(table)
+
+    @staticmethod
+    def print_library_folder(folder: LibraryFolder):
+        """遍历时逐行输出包含视频文件的文件夹"""
+        console.print(
+            f"[grey53]{folder.depth:>2}[/grey53]  [cyan]{folder.video_count:>4}[/cyan]  {folder.path}",
+            highlight=False,
+        )
+
+    @staticmethod
+    def print_watch_entries(entries: list[WatchEntry]):
+        """打印监视文件夹"""
+        if not entries:
+            Message.warning("没有监视的文件夹")
+            return
+        table = Table(box=box.SIMPLE)
+        table.add_column("文件夹", justify="left")
+        table.add_column("类型", justify="center", style="grey70")
+        table.add_column("TMDB ID", justify="center", style="magenta")
+        table.add_column("季度", justify="center", style="grey70")
+        table.add_column("间隔", justify="right", style="grey53")
+        table.add_column("下次检查", justify="center", style="cyan")
+        table.add_column("失败", justify="right", style="red")
+        for entry in entries:
+            table.add_row(
+                entry.folder,
+                "电影" if entry.movie else "剧集",
+                entry.tmdb_id,
+                entry.seasons,
+                f"{entry.interval:.0f}s",
+                time.strftime("%m-%d %H:%M:%S", time.localtime(entry.next_check))
+                if entry.next_check
+                else "-",
+                str(entry.failures),
+            )
+        console.print(table)
+
     @staticmethod
     def require_confirmation() -> bool:
         """确认操作"""
@@ -271,9 +471,9 @@ class Message:
 
     @staticmethod
     def print_rename_result(
-        tasks_4_video_rename_list: list["ApiTask"],
-        tasks_4_subtitle_rename_list: list["ApiTask"],
-        tasks_4_folder_rename_list: list["ApiTask"],
+        tasks_4_video_rename_list: list[RenameOutcome],
+        tasks_4_subtitle_rename_list: list[RenameOutcome],
+        tasks_4_folder_rename_list: list[RenameOutcome],
         folder_rename: bool,
     ):
         """打印重命名结果"""
@@ -284,7 +484,7 @@ class Message:
         subtitle_error_count = 0
         folder_count = len(tasks_4_folder_rename_list) if folder_rename else 0
         folder_error_count = 0
-        error_list: list["ApiTask"] = []
+        error_list: list[RenameOutcome] = []
 
         # 统计视频重命名结果
         for task in tasks_4_video_rename_list:
@@ -313,13 +513,13 @@ class Message:
             table.add_column("错误信息", justify="left")
             for task in error_list:
                 table.add_row(
-                    task.args["path"].split("/")[-1],
+                    task.step.original_name,
                     "->",
-                    Message.text_regex(task.args["name"]),
+                    Message.text_regex(task.step.target_name),
                     task.response.error,
                 )
                 logger.debug(
-                    f"重命名失败: {task.args['path'].split('/')[-1]} -> {task.args['name']}, 错误信息: {task.response.error}"
+                    f"重命名失败: {task.step.original_name} -> {task.step.target_name}, 错误信息: {task.response.error}"
                 )
             console.print(table)
 
@@ -346,6 +546,84 @@ class Message:
         # 程序运行结束
         Message.congratulation("重命名完成")
 
+    @staticmethod
+    def print_verify_result(result: VerifyResult):
+        """打印重命名校验结果"""
+        if result.missing or result.unexpected:
+            table = Table(box=box.SIMPLE, title="校验差异列表")
+            table.add_column("路径", justify="left", no_wrap=True)
+            table.add_column("差异", justify="left", style="yellow")
+            for path in result.missing:
+                table.add_row(Message.text_regex(path), "缺少目标")
+            for path in result.unexpected:
+                table.add_row(Message.text_regex(path), "源文件仍存在")
+            console.print(table)
+            logger.debug(f"校验差异: 缺少 {result.missing}, 仍存在 {result.unexpected}")
+        Message.info(
+            f"校验结果: 已确认 [green]{result.verified}[/green], 缺少 [yellow]{len(result.missing)}[/yellow], 仍存在 [yellow]{len(result.unexpected)}[/yellow]"
+        )
+        if result.retry_failed > 0:
+            Message.error(
+                f"重试: 成功 [green]{result.retried - result.retry_failed}[/green], 失败 [red]{result.retry_failed}[/red]"
+            )
+        elif result.retried > 0:
+            Message.success(f"重试: 成功 [green]{result.retried}[/green]")
+
+    @staticmethod
+    def print_move_info(moves: list[PlanItem]):
+        """打印移动到季度文件夹的文件数量"""
+        counts: dict[str, int] = {}
+        for item in moves:
+            counts[item.target_folder.path] = counts.get(item.target_folder.path, 0) + 1
+        Message.info(f"重命名后移动到季度文件夹: 共计 {len(moves)}")
+        table = Table(box=box.SIMPLE)
+        table.add_column("目标文件夹", justify="left", no_wrap=True)
+        table.add_column("文件数", justify="right", style="cyan")
+        for path, count in sorted(counts.items()):
+            table.add_row(path, str(count))
+        console.print(table)
+
+    @staticmethod
+    def print_move_result(tasks_move_list: list[RenameOutcome], move_count: int):
+        """
+        打印移动结果
+
+        :param tasks_move_list: 各文件的移动结果
+        :param move_count: 计划移动的文件数, 重命名失败未移动的文件计为失败
+        """
+        error_count = move_count - sum(
+            1 for task in tasks_move_list if task.response.success
+        )
+        # 同一源/目标文件夹及错误信息的文件合并为一行
+        failed: dict[tuple[str, str, str], int] = {}
+        for task in tasks_move_list:
+            if not task.response.success:
+                key = (
+                    task.step.folder_path.path,
+                    (task.step.target_folder or task.step.folder_path).path,
+                    task.response.error,
+                )
+                failed[key] = failed.get(key, 0) + 1
+        if failed:
+            table = Table(box=box.SIMPLE, title="移动失败列表")
+            table.add_column("源文件夹", justify="left", style="grey53")
+            table.add_column(" ", justify="left", style="grey70")
+            table.add_column("目标文件夹", justify="left")
+            table.add_column("文件数", justify="right")
+            table.add_column("错误信息", justify="left")
+            for (src_dir, dst_dir, error), count in failed.items():
+                table.add_row(src_dir, "->", dst_dir, str(count), error)
+                logger.debug(
+                    f"移动失败: {src_dir} -> {dst_dir}, {count} 项, 错误信息: {error}"
+                )
+            console.print(table)
+        if error_count > 0:
+            Message.error(
+                f"移动文件: 成功 [green]{move_count - error_count}[/green], 失败 [red]{error_count}[/red]"
+            )
+        elif move_count > 0:
+            Message.success(f"移动文件: 成功 [green]{move_count}[/green]")
+
     @staticmethod
     def print_tv_info(media_list: list["MediaMeta"]) -> None:
         """打印剧集信息"""
@@ -0,0 +1,171 @@
+import logging
+from typing import Optional
+
+from .models import Folder, RenameConflict, RenameStep, RenameTask
+
+logger = logging.getLogger("Amr.Planner")
+
+
+class RenamePlanner:
+    """
+    重命名预检, 根据已获取的文件列表检查命名冲突, 并将重命名任务排列为互不冲突的批次.
+    如 A->B, B->C 会先执行 B->C; A->B, B->A 的循环会借助临时名称拆开.
+    """
+
+    TEMPORARY_SUFFIX = ".amr-tmp"
+
+    @staticmethod
+    def plan(
+        rename_list: list[RenameTask],
+        listings: Optional[dict[str, list[str]]] = None,
+    ) -> tuple[list[list[RenameStep]], list[RenameConflict]]:
+        """
+        生成重命名批次
+
+        :param rename_list: 重命名任务列表
+        :param listings: 文件夹路径 -> 当前文件名列表, 缺少的文件夹仅检查任务之间的冲突
+        :return: (重命名批次列表, 冲突列表), 目标名称与原名称相同的任务不包含在内
+        """
+
+        listings = listings or {}
+
+        # 按文件夹分组, 不同文件夹之间的重命名互不影响
+        folders: dict[str, list[int]] = {}
+        for index, task in enumerate(rename_list):
+            folders.setdefault(task.folder_path.path, []).append(index)
+
+        waves: list[list[RenameStep]] = []
+        conflicts: list[RenameConflict] = []
+        for folder_path, indexes in folders.items():
+            folder_waves, folder_conflicts = RenamePlanner._plan_folder(
+                Folder(path=folder_path),
+                {index: rename_list[index] for index in indexes},
+                listings.get(folder_path),
+            )
+            conflicts.extend(folder_conflicts)
+            # 合并各文件夹的同一批次, 使不同文件夹的任务并发执行
+            for i, wave in enumerate(folder_waves):
+                if i == len(waves):
+                    waves.append([])
+                waves[i].extend(wave)
+
+        conflicts.sort(key=lambda conflict: conflict.task_index)
+        logger.debug(f"重命名预检: {len(waves)} 个批次, {len(conflicts)} 个冲突")
+        return waves, conflicts
+
+    @staticmethod
+    def _plan_folder(
+        folder_path: Folder,
+        tasks: dict[int, RenameTask],
+        listing: Optional[list[str]],
+    ) -> tuple[list[list[RenameStep]], list[RenameConflict]]:
+        """生成单个文件夹的重命名批次"""
+
+        conflicts: list[RenameConflict] = []
+
+        def reject(index: int, reason: str):
+            task = tasks.pop(index)
+            conflicts.append(
+                RenameConflict(
+                    task_index=index,
+                    original_name=task.original_name,
+                    target_name=task.target_name,
+                    reason=reason,
+                )
+            )
+
+        # 目标名称与原名称相同, 无需重命名
+        for index in [
+            i for i, task in tasks.items() if task.original_name == task.target_name
+        ]:
+            tasks.pop(index)
+
+        # 同一文件只能重命名一次
+        sources: set[str] = set()
+        for index in list(tasks):
+            if tasks[index].original_name in sources:
+                reject(index, "同一文件存在多个重命名任务")
+            else:
+                sources.add(tasks[index].original_name)
+
+        # 源文件不存在
+        if listing is not None:
+            names = set(listing)
+            for index in [
+                i for i, task in tasks.items() if task.original_name not in names
+            ]:
+                reject(index, "源文件不存在")
+
+        # 检查目标名称冲突; 移除的任务会使其源文件继续占用名称, 需反复检查直至稳定
+        while True:
+            # 文件列表已知时, 被移除任务的源文件均在列表中 (源文件不存在的任务不占用名称);
+            # 未知时只能按被移除任务的源文件名判断
+            sources = {task.original_name for task in tasks.values()}
+            occupied = (
+                set(listing) - sources
+                if listing is not None
+                else {conflict.original_name for conflict in conflicts}
+            )
+            targets: set[str] = set()
+            rejected = False
+            for index in list(tasks):
+                target_name = tasks[index].target_name
+                if target_name in targets:
+                    reject(index, "多个文件重命名为同一名称")
+                    rejected = True
+                elif target_name in occupied:
+                    reject(index, "目标文件已存在")
+                    rejected = True
+                else:
+                    targets.add(target_name)
+            if not rejected:
+                break
+
+        # 按依赖关系排列批次: 目标名称仍被其他待执行任务占用时需等待
+        all_names = set(listing or []) | {task.target_name for task in tasks.values()}
+        current: dict[int, str] = {
+            index: task.original_name for index, task in tasks.items()
+        }
+        waves: list[list[RenameStep]] = []
+        while current:
+            pending_sources = set(current.values())
+            wave: list[RenameStep] = [
+                RenameStep(
+                    task_index=index,
+                    folder_path=folder_path,
+                    original_name=name,
+                    target_name=tasks[index].target_name,
+                )
+                for index, name in current.items()
+                if tasks[index].target_name not in pending_sources
+            ]
+
+            if not wave:
+                # 剩余任务均处于循环中, 将其中一个文件先重命名为临时名称
+                index, name = next(iter(current.items()))
+                temporary_name = name + RenamePlanner.TEMPORARY_SUFFIX
+                counter = 1
+                while temporary_name in all_names or temporary_name in pending_sources:
+                    counter += 1
+                    temporary_name = f"{name}{RenamePlanner.TEMPORARY_SUFFIX}{counter}"
+                all_names.add(temporary_name)
+                logger.debug(f"破除重命名循环: {name} -> {temporary_name}")
+                waves.append(
+                    [
+                        RenameStep(
+                            task_index=index,
+                            folder_path=folder_path,
+                            original_name=name,
+                            target_name=temporary_name,
+                            temporary=True,
+                        )
+                    ]
+                )
+                current[index] = temporary_name
+                continue
+
+            for step in wave:
+                current.pop(step.task_index)
+            waves.append(wave)
+
+        return waves, conflicts
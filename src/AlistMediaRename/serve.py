@@ -0,0 +1,309 @@
+import asyncio
+import io
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from pydantic import ValidationError
+
+from .amr import Amr
+from .models import ApiResponseError, BatchEntry, RenamePlan, ServiceJob
+from .output import Message
+from .task import taskManager
+
+logger = logging.getLogger("Amr.Serve")
+
+
+class AmrService:
+    """
+    常驻服务: 在工作线程中保持一个 Amr 实例 (Alist 登录, 连接池, TMDB 缓存, 调度器),
+    通过本地 HTTP/JSON 接口接收计划/执行/批量任务. 任务进入有界队列后依次执行,
+    任务管理器为单例且绑定工作线程的事件循环, 因此同一时间只执行一个任务, 任务内部的请求仍并发发送.
+    """
+
+    KINDS = ("plan", "apply", "batch")
+
+    def __init__(
+        self,
+        create_amr: Callable[[], Amr],
+        max_pending: int = 32,
+        history: int = 200,
+    ):
+        """
+        初始化参数
+
+        :param create_amr: 创建 Amr 实例的函数, 在工作线程中调用
+        :param max_pending: 排队任务数上限, 超出时拒绝新任务
+        :param history: 保留的已完成任务数量
+        """
+
+        self._create_amr = create_amr
+        self.history = history
+        self.amr: Optional[Amr] = None
+        self.jobs: dict[str, ServiceJob] = {}
+        self._done: dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._queue: queue.Queue[Optional[str]] = queue.Queue(maxsize=max_pending)
+        self._ready = threading.Event()
+        self._startup_error: Optional[BaseException] = None
+        self._worker = threading.Thread(target=self._work, name="amr-serve", daemon=True)
+        self.started_at = 0.0
+
+    def start(self) -> None:
+        """启动工作线程, 等待 Amr 初始化 (登录) 完成"""
+
+        self.started_at = time.time()
+        self._worker.start()
+        self._ready.wait()
+        if self._startup_error is not None:
+            raise self._startup_error
+
+    def stop(self) -> None:
+        """等待当前任务完成后停止工作线程"""
+
+        self._queue.put(None)
+        self._worker.join()
+
+    def submit(self, kind: str, payload: dict) -> ServiceJob:
+        """
+        添加任务, 参数在加入队列前校验
+
+        :param kind: 任务类型
+        :param payload: 请求参数
+        :return: 任务
+        :raises ValueError: 任务类型或参数无效
+        :raises queue.Full: 排队任务已满
+        """
+
+        if kind not in AmrService.KINDS:
+            raise ValueError(f"未知的任务类型: {kind}")
+        AmrService._parse(kind, payload)
+        job = ServiceJob(
+            id=uuid.uuid4().hex[:12], kind=kind, payload=payload, created_at=time.time()
+        )
+        with self._lock:
+            self.jobs[job.id] = job
+            self._done[job.id] = threading.Event()
+            try:
+                self._queue.put_nowait(job.id)
+            except queue.Full:
+                del self.jobs[job.id], self._done[job.id]
+                raise
+        logger.info(f"任务加入队列: {job.id} {kind}")
+        return job
+
+    def wait(self, job: ServiceJob, timeout: float) -> ServiceJob:
+        """等待任务完成, 超时后返回当前状态"""
+
+        done = self._done.get(job.id)
+        if done is not None:
+            done.wait(timeout)
+        return job
+
+    def info(self) -> dict:
+        """服务状态"""
+
+        with self._lock:
+            jobs = list(self.jobs.values())
+        return {
+            "uptime": round(time.time() - self.started_at, 3),
+            "queued": sum(job.status == "queued" for job in jobs),
+            "running": [job.id for job in jobs if job.status == "running"],
+            "finished": sum(job.status in ("success", "failed") for job in jobs),
+            "targets": ["", *self.amr.config.alist.targets] if self.amr else [],
+        }
+
+    @staticmethod
+    def _parse(kind: str, payload: dict):
+        """校验并转换请求参数"""
+
+        if kind == "plan":
+            return BatchEntry.model_validate(payload)
+        if kind == "apply":
+            return [RenamePlan.model_validate(plan) for plan in payload.get("plans", [])]
+        return [BatchEntry.model_validate(entry) for entry in payload.get("entries", [])]
+
+    def _work(self) -> None:
+        """工作线程: 创建 Amr 后依次执行队列中的任务"""
+
+        # 任务管理器使用当前线程的事件循环, 连接池随之绑定在工作线程
+        asyncio.set_event_loop(asyncio.new_event_loop())
+        try:
+            self.amr = self._create_amr()
+            self.amr.assume_yes = True
+        except BaseException as e:
+            self._startup_error = e
+            return
+        finally:
+            self._ready.set()
+
+        while True:
+            job_id = self._queue.get()
+            if job_id is None:
+                return
+            job = self.jobs[job_id]
+            job.status = "running"
+            job.started_at = time.time()
+            try:
+                job.result = self._execute(job)
+                job.status = "success"
+            except EOFError:
+                job.status = "failed"
+                job.error = "服务模式无法交互选择, 请指定 id 及 seasons"
+            except (ApiResponseError, ValueError, KeyError) as e:
+                job.status = "failed"
+                job.error = str(e)
+            except Exception as e:
+                logger.warning(f"任务出错: {job.id}, {e}", exc_info=True)
+                job.status = "failed"
+                job.error = str(e)
+            job.finished_at = time.time()
+            logger.info(
+                f"任务完成: {job.id} {job.kind} {job.status}, 耗时 {job.finished_at - job.started_at:.3f}s"
+            )
+            self._done[job.id].set()
+            self._prune()
+
+    def _execute(self, job: ServiceJob):
+        """执行任务, 返回可序列化的结果"""
+
+        assert self.amr is not None
+        parsed = AmrService._parse(job.kind, job.payload)
+        if job.kind == "plan":
+            return self.amr._plan_batch_entry(parsed).model_dump(mode="json")
+        if job.kind == "batch":
+            return [result.model_dump(mode="json") for result in self.amr.batch(parsed)]
+
+        self.amr.verify = bool(job.payload.get("verify", False))
+        try:
+            results = self.amr.apply_plans(parsed, job.payload.get("password"))
+        finally:
+            self.amr.verify = False
+        outcomes = Amr._plan_outcomes(parsed, results)
+        return {
+            "plans": [
+                {
+                    "target": plan.target,
+                    "planned": len(plan.items),
+                    "succeeded": sum(outcome),
+                }
+                for plan, outcome in zip(parsed, outcomes)
+            ]
+        }
+
+    def _prune(self) -> None:
+        """只保留最近的已完成任务"""
+
+        with self._lock:
+            finished = [
+                job.id for job in self.jobs.values() if job.status in ("success", "failed")
+            ]
+            for job_id in finished[: max(len(finished) - self.history, 0)]:
+                del self.jobs[job_id]
+                del self._done[job_id]
+
+    def handler(self) -> type[BaseHTTPRequestHandler]:
+        """创建请求处理类"""
+
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            server_version = "amr"
+
+            def log_message(self, format, *args):
+                logger.debug(f"{self.address_string()} {format % args}")
+
+            def _reply(self, status: int, body) -> None:
+                data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _reply_text(self, status: int, content_type: str, text: str) -> None:
+                data = text.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                path = urlsplit(self.path).path.rstrip("/")
+                if path == "/info":
+                    return self._reply(200, service.info())
+                if path == "/metrics":
+                    # 请求指标, Prometheus 文本格式
+                    return self._reply_text(
+                        200,
+                        "text/plain; version=0.0.4; charset=utf-8",
+                        taskManager.metrics.prometheus(),
+                    )
+                if path == "/jobs":
+                    with service._lock:
+                        jobs = list(service.jobs.values())
+                    return self._reply(
+                        200,
+                        [job.model_dump(mode="json", exclude={"payload", "result"}) for job in jobs],
+                    )
+                if path.startswith("/jobs/"):
+                    job = service.jobs.get(path.removeprefix("/jobs/"))
+                    if job is None:
+                        return self._reply(404, {"error": "任务不存在"})
+                    return self._reply(200, job.model_dump(mode="json"))
+                self._reply(404, {"error": "未知的接口"})
+
+            def do_POST(self):
+                url = urlsplit(self.path)
+                kind = url.path.strip("/")
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                    payload = json.loads(self.rfile.read(length) or b"{}")
+                    job = service.submit(kind, payload)
+                except ValueError as e:
+                    # 包含 json 解析错误及参数校验错误
+                    error = e.errors() if isinstance(e, ValidationError) else str(e)
+                    return self._reply(
+                        404 if kind not in AmrService.KINDS else 400,
+                        {"error": json.loads(json.dumps(error, default=str))},
+                    )
+                except queue.Full:
+                    return self._reply(503, {"error": "任务队列已满"})
+
+                wait = float(parse_qs(url.query).get("wait", ["0"])[0] or 0)
+                if wait > 0:
+                    job = service.wait(job, wait)
+                finished = job.status in ("success", "failed")
+                self._reply(200 if finished else 202, job.model_dump(mode="json"))
+
+        return Handler
+
+    def serve(self, host: str = "127.0.0.1", port: int = 5255) -> None:
+        """
+        启动服务并阻塞, 直到收到中断信号
+
+        :param host: 监听地址
+        :param port: 监听端口
+        """
+
+        # 服务模式没有交互输入, 需要选择时任务失败
+        sys.stdin = io.StringIO()
+        self.start()
+        server = ThreadingHTTPServer((host, port), self.handler())
+        logger.info(f"服务已启动: http://{host}:{server.server_port}")
+        Message.success(f"服务已启动: http://{host}:{server.server_port}, Ctrl-C 停止")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stop()
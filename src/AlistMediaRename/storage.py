@@ -0,0 +1,625 @@
+from abc import ABC, abstractmethod
+import asyncio
+import base64
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import partial, wraps
+from typing import Awaitable, Callable, Iterator, Optional
+from urllib.parse import quote, unquote, urlsplit
+from xml.etree import ElementTree
+
+import httpx
+
+from .models import ApiResponse, ApiResponseError
+from .output import OutputParser
+from .task import ApiTask, taskManager
+
+
+class Storage(ABC):
+    """
+    存储后端接口, 包含: 获取文件列表/获取文件信息/重命名/移动/新建文件夹.
+    各方法返回 ApiTask, 由任务管理器统一调度执行, 请求结果格式与 Alist api 相同:
+    文件列表为 {"content": [{"name", "size", "is_dir", "modified"}, ...], "total": 数量}
+    """
+
+    name: str = ""  # 目标名称, 为空时为默认存储
+    queue: str = ""  # 调度队列
+    # 每个移动任务包含的文件数上限, 为 1 时每个文件一个任务, 结果按文件区分且由调度队列并发执行
+    move_chunk_size: int = 100
+
+    @abstractmethod
+    def file_list(
+        self,
+        path: str = "/",
+        password=None,
+        refresh: bool = True,
+        per_page: int = 0,
+        page: int = 1,
+    ) -> ApiTask:
+        """获取文件列表, per_page 为 0 时获取全部"""
+
+    @abstractmethod
+    def get(self, path: str, password=None) -> ApiTask:
+        """获取文件/文件夹信息"""
+
+    @abstractmethod
+    def rename(self, name: str, path: str) -> ApiTask:
+        """重命名文件/文件夹, 目标名称已存在时失败"""
+
+    @abstractmethod
+    def move(self, names: list, src_dir: str, dst_dir: str) -> ApiTask:
+        """移动文件/文件夹到目标文件夹"""
+
+    @abstractmethod
+    def mkdir(self, path: str) -> ApiTask:
+        """新建文件夹, 已存在时视为成功"""
+
+    def iter_entries(
+        self, path: str, password=None, page_size: int = 200
+    ) -> Iterator[dict]:
+        """
+        逐页获取文件列表并逐项返回, 不需要一次保存整个文件夹的文件列表
+
+        :param path: 文件夹路径
+        :param password: 路径访问密码
+        :param page_size: 每页数量
+        :return: 文件信息
+        """
+
+        page = 1
+        while True:
+            taskManager.add_tasks(self.file_list(path, password, page == 1, page_size, page))
+            (response,) = taskManager.run_tasks()
+            content = response.data.get("content") or []
+            yield from content
+            if len(content) < page_size or page * page_size >= response.data.get(
+                "total", 0
+            ):
+                return
+            page += 1
+
+
+class LocalTask(ApiTask):
+    """本地文件系统任务, 在存储的线程池中执行阻塞的文件操作"""
+
+    async def send(self, client=None) -> ApiResponse:
+        """执行文件操作, 操作系统错误视为请求失败"""
+
+        storage: LocalStorage = self._args[0]
+        self.host = "local"
+        loop = asyncio.get_running_loop()
+        try:
+            data = await loop.run_in_executor(
+                storage.executor, partial(self.func, *self._args, **self._kwargs)
+            )
+            self.response = ApiResponse(
+                success=True, status_code=200, error="", data=data or {}
+            )
+        except OSError as e:
+            self.response = ApiResponse(
+                success=False,
+                status_code=-1,
+                error=f"{e.strerror or e}: {e.filename}" if e.filename else str(e),
+                data={},
+            )
+        self.output_parser(self)
+        if not self.response.success and self.raise_error:
+            raise ApiResponseError(f"{self.operation}: {self.response.error}")
+        return self.response
+
+    @classmethod
+    def create(
+        cls, output_parser: str, raise_error: bool
+    ) -> Callable[..., Callable[..., "ApiTask"]]:
+        """创建任务实例"""
+
+        def decorator(func) -> Callable[..., "ApiTask"]:
+            @wraps(func)
+            def wrapper(storage: "LocalStorage", *args, **kwargs) -> "ApiTask":
+                return cls(
+                    func,
+                    (storage, *args),
+                    kwargs,
+                    f"local.{func.__name__}",
+                    lambda response: response,
+                    OutputParser.parser(output_parser),
+                    raise_error,
+                    queue=storage.queue,
+                )
+
+            return wrapper
+
+        return decorator
+
+
+class LocalStorage(Storage):
+    """
+    本地文件系统存储, 路径为相对根目录的 Alist 格式路径 (/剧集/Season 1/).
+    使用 os.scandir 获取文件列表, os.rename 重命名及移动, 阻塞操作在线程池中执行.
+    """
+
+    # 每个文件单独移动, 部分文件失败时其余文件的结果不受影响
+    move_chunk_size = 1
+
+    def __init__(self, root: str, name: str = "", max_workers: Optional[int] = None):
+        """
+        初始化参数
+
+        :param root: 根目录
+        :param name: 存储目标名称, 为空时为默认存储
+        :param max_workers: 线程池大小, 为空时使用默认值
+        """
+
+        self.root = os.path.realpath(root)
+        self.name = name
+        self.queue = f"local:{name}" if name else "local"
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="amr-local"
+        )
+
+    def local_path(self, path: str) -> str:
+        """将存储路径转换为本地路径, 不允许超出根目录"""
+
+        local = os.path.normpath(os.path.join(self.root, path.lstrip("/")))
+        if os.path.commonpath([self.root, local]) != self.root:
+            raise PermissionError(0, "路径超出存储根目录", path)
+        return local
+
+    @staticmethod
+    def _entry(name: str, stat: os.stat_result, is_dir: bool) -> dict:
+        """文件信息, 格式与 Alist 相同"""
+
+        return {
+            "name": name,
+            "size": 0 if is_dir else stat.st_size,
+            "is_dir": is_dir,
+            "modified": datetime.fromtimestamp(stat.st_mtime, timezone.utc).isoformat(),
+        }
+
+    def iter_entries(
+        self, path: str, password=None, page_size: int = 200
+    ) -> Iterator[dict]:
+        """使用 os.scandir 按目录顺序逐项返回文件列表, 跳过失效的符号链接"""
+
+        with os.scandir(self.local_path(path)) as entries:
+            for entry in entries:
+                try:
+                    yield LocalStorage._entry(entry.name, entry.stat(), entry.is_dir())
+                except FileNotFoundError:
+                    continue
+
+    @LocalTask.create("file_list", raise_error=True)
+    def file_list(
+        self,
+        path: str = "/",
+        password=None,
+        refresh: bool = True,
+        per_page: int = 0,
+        page: int = 1,
+    ) -> dict:
+        """
+        获取文件列表
+
+        :param path: 路径, 默认为根目录/
+        :param password: 无作用, 与 Alist 接口保持一致
+        :param refresh: 无作用, 与 Alist 接口保持一致
+        :param per_page: 每页文件数量, 默认为0, 获取全部
+        :param page: 当前页数, 默认为1
+        :return: 文件列表
+        """
+
+        content = sorted(self.iter_entries(path), key=lambda entry: entry["name"])
+        total = len(content)
+        if per_page > 0:
+            content = content[(page - 1) * per_page : page * per_page]
+        return {"content": content, "total": total}
+
+    @LocalTask.create("slient", raise_error=False)
+    def get(self, path: str, password=None) -> dict:
+        """
+        获取文件/文件夹信息
+
+        :param path: 文件/文件夹路径
+        :param password: 无作用, 与 Alist 接口保持一致
+        :return: 文件信息
+        """
+
+        local = self.local_path(path)
+        return LocalStorage._entry(
+            os.path.basename(local.rstrip(os.sep)), os.stat(local), os.path.isdir(local)
+        )
+
+    @staticmethod
+    def _check_target(source: str, target: str) -> None:
+        """目标已存在时失败, 与 Alist 行为一致; 仅大小写不同的同一文件允许重命名"""
+
+        if os.path.lexists(target) and not (
+            os.path.normcase(source) == os.path.normcase(target)
+            or os.path.samefile(source, target)
+        ):
+            raise FileExistsError(17, "file exists", target)
+
+    @LocalTask.create("slient", raise_error=False)
+    def rename(self, name: str, path: str) -> dict:
+        """
+        重命名文件/文件夹
+
+        :param name: 重命名名称
+        :param path: 源文件/文件夹路径
+        """
+
+        if not name or "/" in name or os.sep in name:
+            raise OSError(22, "invalid file name", name)
+        source = self.local_path(path)
+        target = os.path.join(os.path.dirname(source.rstrip(os.sep)), name)
+        LocalStorage._check_target(source, target)
+        os.rename(source, target)
+        return {}
+
+    @LocalTask.create("move", raise_error=False)
+    def move(self, names: list, src_dir: str, dst_dir: str) -> dict:
+        """
+        移动文件/文件夹, 任一文件失败时停止, 已移动的文件不回退.
+        重命名时每个任务只包含一个文件 (move_chunk_size), 直接调用时部分移动的结果
+        需重新获取文件列表确认 (amr resume 即按文件列表排除已完成的步骤)
+
+        :param names: 需要移动的文件名称列表
+        :param src_dir: 源文件所在文件夹
+        :param dst_dir: 目标文件夹
+        """
+
+        source_dir = self.local_path(src_dir)
+        target_dir = self.local_path(dst_dir)
+        for name in names:
+            source = os.path.join(source_dir, name)
+            target = os.path.join(target_dir, name)
+            LocalStorage._check_target(source, target)
+            os.replace(source, target)
+        return {}
+
+    @LocalTask.create("mkdir", raise_error=False)
+    def mkdir(self, path: str) -> dict:
+        """
+        新建文件夹, 包含不存在的上级文件夹
+
+        :param path: 新建文件夹路径
+        """
+
+        os.makedirs(self.local_path(path), exist_ok=True)
+        return {}
+
+
+class WebDAVTask(ApiTask):
+    """
+    WebDAV 请求任务, 请求函数返回请求列表 (如移动多个文件时每个文件一个 MOVE 请求),
+    使用任务管理器的连接池依次发送, 任一请求失败时停止.
+    解析器参数为 (client, request, task), 可直接读取响应流
+    """
+
+    async def send(self, client=None) -> ApiResponse:
+        """发送请求, 解析器直接读取响应流"""
+
+        try:
+            requests: list[httpx.Request] = self.build_request()  # type: ignore[assignment]
+            self.response = ApiResponse(success=True, status_code=200, error="", data={})
+            for request in requests:
+                self.host = request.url.host
+                self.bytes_out += len(request.content)
+                self.response = await self.response_parser(client, request, self)
+                if not self.response.success:
+                    break
+        except Exception as e:
+            self.response = ApiResponse(
+                success=False, status_code=-1, error=str(e), data={}
+            )
+        self.output_parser(self)
+        if not self.response.success and self.raise_error:
+            raise ApiResponseError(f"{self.operation}: {self.response.error}")
+        return self.response
+
+    @classmethod
+    def create(
+        cls,
+        response_parser: Callable[..., Awaitable[ApiResponse]],
+        output_parser: str,
+        raise_error: bool,
+    ) -> Callable[..., Callable[..., "ApiTask"]]:
+        """创建任务实例"""
+
+        def decorator(func) -> Callable[..., "ApiTask"]:
+            @wraps(func)
+            def wrapper(storage: "WebDAVStorage", *args, **kwargs) -> "ApiTask":
+                return cls(
+                    func,
+                    (storage, *args),
+                    kwargs,
+                    f"webdav.{func.__name__}",
+                    response_parser,
+                    OutputParser.parser(output_parser),
+                    raise_error,
+                    queue=storage.queue,
+                )
+
+            return wrapper
+
+        return decorator
+
+
+class WebDAVResponseParser:
+    """WebDAV 响应解析器"""
+
+    PROPFIND_BODY = (
+        '<?xml version="1.0" encoding="utf-8"?>'
+        '<propfind xmlns="DAV:"><prop>'
+        "<resourcetype/><getcontentlength/><getlastmodified/>"
+        "</prop></propfind>"
+    )
+    # 状态码 -> 与 Alist 一致的错误信息
+    ERRORS = {404: "object not found", 412: "file exists", 423: "locked"}
+
+    @staticmethod
+    def error(response: httpx.Response) -> ApiResponse:
+        """请求失败"""
+
+        return ApiResponse(
+            success=False,
+            status_code=response.status_code,
+            error=WebDAVResponseParser.ERRORS.get(
+                response.status_code, response.reason_phrase
+            ),
+            data={},
+        )
+
+    @staticmethod
+    def entry(element: ElementTree.Element) -> tuple[str, dict]:
+        """
+        解析 PROPFIND 结果中的一项
+
+        :return: (解码后的路径, 文件信息)
+        """
+
+        path = unquote(urlsplit(element.findtext("{DAV:}href", "")).path)
+        prop = element.find("{DAV:}propstat/{DAV:}prop")
+        is_dir = (
+            prop is not None
+            and prop.find("{DAV:}resourcetype/{DAV:}collection") is not None
+        )
+        size = prop.findtext("{DAV:}getcontentlength", "") if prop is not None else ""
+        modified = prop.findtext("{DAV:}getlastmodified", "") if prop is not None else ""
+        try:
+            modified = parsedate_to_datetime(modified).astimezone(timezone.utc).isoformat()
+        except (TypeError, ValueError):
+            pass
+        return path, {
+            "name": path.rstrip("/").rsplit("/", 1)[-1],
+            "size": int(size) if size.isdigit() and not is_dir else 0,
+            "is_dir": is_dir,
+            "modified": modified,
+        }
+
+    @staticmethod
+    async def multistatus(
+        client: httpx.AsyncClient, request: httpx.Request, task: ApiTask
+    ) -> tuple[Optional[ApiResponse], list[tuple[str, dict]]]:
+        """
+        发送 PROPFIND 请求并流式解析结果, 每解析完一项即释放对应的 XML 节点
+
+        :return: (失败时的请求结果, [(路径, 文件信息)])
+        """
+
+        response = await client.send(request, stream=True)
+        try:
+            if response.status_code != 207:
+                return WebDAVResponseParser.error(response), []
+            parser = ElementTree.XMLPullParser(events=("end",))
+            entries: list[tuple[str, dict]] = []
+            async for chunk in response.aiter_bytes():
+                task.bytes_in += len(chunk)
+                parser.feed(chunk)
+                for _, element in parser.read_events():
+                    if element.tag == "{DAV:}response":
+                        entries.append(WebDAVResponseParser.entry(element))
+                        element.clear()
+            parser.close()
+            return None, entries
+        finally:
+            await response.aclose()
+
+    @staticmethod
+    async def file_list(
+        client: httpx.AsyncClient, request: httpx.Request, task: ApiTask
+    ) -> ApiResponse:
+        """Depth 1 PROPFIND, 结果中去除文件夹自身, 按任务参数分页"""
+
+        error, entries = await WebDAVResponseParser.multistatus(client, request, task)
+        if error is not None:
+            return error
+        folder = unquote(request.url.path).rstrip("/")
+        content = sorted(
+            (entry for path, entry in entries if path.rstrip("/") != folder),
+            key=lambda entry: entry["name"],
+        )
+        total = len(content)
+        per_page, page = task.args.get("per_page", 0), task.args.get("page", 1)
+        if per_page > 0:
+            content = content[(page - 1) * per_page : page * per_page]
+        return ApiResponse(
+            success=True,
+            status_code=207,
+            error="",
+            data={"content": content, "total": total},
+        )
+
+    @staticmethod
+    async def get(
+        client: httpx.AsyncClient, request: httpx.Request, task: ApiTask
+    ) -> ApiResponse:
+        """Depth 0 PROPFIND, 返回文件/文件夹自身信息"""
+
+        error, entries = await WebDAVResponseParser.multistatus(client, request, task)
+        if error is not None:
+            return error
+        if not entries:
+            return ApiResponse(
+                success=False, status_code=207, error="object not found", data={}
+            )
+        return ApiResponse(success=True, status_code=207, error="", data=entries[0][1])
+
+    @staticmethod
+    async def status(
+        client: httpx.AsyncClient, request: httpx.Request, task: ApiTask
+    ) -> ApiResponse:
+        """MOVE/MKCOL 等只返回状态码的请求, MKCOL 文件夹已存在 (405) 时视为成功"""
+
+        response = await client.send(request)
+        task.bytes_in += len(response.content)
+        if response.is_success or (
+            request.method == "MKCOL" and response.status_code == 405
+        ):
+            return ApiResponse(
+                success=True, status_code=response.status_code, error="", data={}
+            )
+        return WebDAVResponseParser.error(response)
+
+
+class WebDAVStorage(Storage):
+    """
+    WebDAV 存储 (如 Alist 的 /dav), 路径为相对 WebDAV 地址的路径.
+    使用 Depth 1 PROPFIND 获取文件列表, MOVE 重命名及移动, MKCOL 新建文件夹,
+    请求共用任务管理器的连接池, 并发数由调度队列限制.
+    """
+
+    # MOVE 每次只能移动一个文件, 每个文件一个任务, 由调度队列按并发上限同时发送
+    move_chunk_size = 1
+
+    def __init__(self, url: str, user: str = "", password: str = "", name: str = ""):
+        """
+        初始化参数
+
+        :param url: WebDAV 地址, 如 http://127.0.0.1:5244/dav
+        :param user: 用户名, 为空时不认证
+        :param password: 密码
+        :param name: 存储目标名称, 为空时为默认存储
+        """
+
+        self.url = url.rstrip("/")
+        self.name = name
+        self.queue = f"webdav:{name}" if name else "webdav"
+        self.headers: dict[str, str] = {}
+        if user:
+            token = base64.b64encode(f"{user}:{password}".encode()).decode()
+            self.headers["Authorization"] = f"Basic {token}"
+
+    def href(self, path: str) -> str:
+        """存储路径对应的 WebDAV 地址"""
+
+        return self.url + quote(path if path.startswith("/") else "/" + path)
+
+    def _propfind(self, path: str, depth: str) -> httpx.Request:
+        """PROPFIND 请求"""
+
+        return httpx.Request(
+            "PROPFIND",
+            self.href(path),
+            headers={
+                **self.headers,
+                "Depth": depth,
+                "Content-Type": "application/xml; charset=utf-8",
+            },
+            content=WebDAVResponseParser.PROPFIND_BODY.encode(),
+        )
+
+    def _move(self, source: str, target: str) -> httpx.Request:
+        """MOVE 请求, 目标已存在时失败"""
+
+        return httpx.Request(
+            "MOVE",
+            self.href(source),
+            headers={
+                **self.headers,
+                "Destination": self.href(target),
+                "Overwrite": "F",
+            },
+        )
+
+    @WebDAVTask.create(WebDAVResponseParser.file_list, "file_list", raise_error=True)
+    def file_list(
+        self,
+        path: str = "/",
+        password=None,
+        refresh: bool = True,
+        per_page: int = 0,
+        page: int = 1,
+    ) -> list[httpx.Request]:
+        """
+        获取文件列表
+
+        :param path: 路径, 默认为根目录/
+        :param password: 无作用, 与 Alist 接口保持一致
+        :param refresh: 无作用, 与 Alist 接口保持一致
+        :param per_page: 每页文件数量, 默认为0, 获取全部
+        :param page: 当前页数, 默认为1
+        :return: PROPFIND 请求
+        """
+
+        return [self._propfind(path if path.endswith("/") else path + "/", "1")]
+
+    @WebDAVTask.create(WebDAVResponseParser.get, "slient", raise_error=False)
+    def get(self, path: str, password=None) -> list[httpx.Request]:
+        """
+        获取文件/文件夹信息
+
+        :param path: 文件/文件夹路径
+        :param password: 无作用, 与 Alist 接口保持一致
+        :return: PROPFIND 请求
+        """
+
+        return [self._propfind(path, "0")]
+
+    @WebDAVTask.create(WebDAVResponseParser.status, "slient", raise_error=False)
+    def rename(self, name: str, path: str) -> list[httpx.Request]:
+        """
+        重命名文件/文件夹
+
+        :param name: 重命名名称
+        :param path: 源文件/文件夹路径
+        :return: MOVE 请求
+        """
+
+        parent = path.rstrip("/").rsplit("/", 1)[0]
+        return [self._move(path, f"{parent}/{name}")]
+
+    @WebDAVTask.create(WebDAVResponseParser.status, "move", raise_error=False)
+    def move(self, names: list, src_dir: str, dst_dir: str) -> list[httpx.Request]:
+        """
+        移动文件/文件夹, 每个文件一个 MOVE 请求, 同一任务中的请求依次发送.
+        重命名时每个任务只包含一个文件 (move_chunk_size), 多个文件的移动并发执行
+
+        :param names: 需要移动的文件名称列表
+        :param src_dir: 源文件所在文件夹
+        :param dst_dir: 目标文件夹
+        :return: MOVE 请求列表
+        """
+
+        src_dir = src_dir if src_dir.endswith("/") else src_dir + "/"
+        dst_dir = dst_dir if dst_dir.endswith("/") else dst_dir + "/"
+        return [self._move(src_dir + name, dst_dir + name) for name in names]
+
+    @WebDAVTask.create(WebDAVResponseParser.status, "mkdir", raise_error=False)
+    def mkdir(self, path: str) -> list[httpx.Request]:
+        """
+        新建文件夹
+
+        :param path: 新建文件夹路径
+        :return: MKCOL 请求
+        """
+
+        return [
+            httpx.Request(
+                "MKCOL",
+                self.href(path if path.endswith("/") else path + "/"),
+                headers=self.headers,
+            )
+        ]
@@ -1,14 +1,16 @@
 import asyncio
-from functools import wraps
+from collections import Counter, deque
+from functools import lru_cache, wraps
 import inspect
-import json
 import logging
-import sys
-from typing import Any, Callable, Coroutine
+from typing import Any, Callable, Coroutine, Optional
 
 import httpx
 
-from .models import ApiResponse
+from .cache import ResponseCache
+from .logger_setup import LogPayload
+from .metrics import MetricsRegistry
+from .models import ApiResponse, ApiResponseError
 from .output import OutputParser
 
 logger = logging.getLogger("Amr.Task")  # 获取子 logger
@@ -47,6 +49,8 @@ class ApiTask:
         response_parser: Callable[..., ApiResponse],
         output_parser: Callable[..., None],
         raise_error: bool,
+        cache: bool = False,
+        queue: str = "",
     ) -> None:
         # 初始化参数
         self.func: Callable[..., httpx.Request] = func  # API请求函数
@@ -57,14 +61,26 @@ class ApiTask:
         self.response_parser: Callable[..., ApiResponse] = response_parser  # 解析器
         self.output_parser: Callable[..., None] = output_parser  # 输出解析器
         self.raise_error: bool = raise_error  # 是否在错误时停止
+        self.cache: bool = cache  # 是否缓存请求结果
+        self.queue: str = queue  # 调度队列, 同一服务器的请求共用一个队列
 
         self.request: httpx.Request  # API请求
         self.response: ApiResponse  # 请求结果
+        # 请求指标, 发送时记录
+        self.host: str = ""  # 请求主机
+        self.bytes_in: int = 0  # 接收字节数
+        self.bytes_out: int = 0  # 发送字节数
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _signature(func: Callable) -> inspect.Signature:
+        """函数签名, 同一请求函数只解析一次"""
+        return inspect.signature(func)
 
     @property
     def args(self):
         # 获取函数签名
-        sig = inspect.signature(self.func)
+        sig = ApiTask._signature(self.func)
 
         # 获取参数名
         # param_names = list(sig.parameters.keys())
@@ -87,11 +103,29 @@ class ApiTask:
             "response": self.response,
         }
 
+    def build_request(self) -> httpx.Request:
+        """生成API请求"""
+        if not hasattr(self, "request"):
+            self.request = self.func(*self._args, **self._kwargs)
+        return self.request
+
+    @property
+    def cache_key(self) -> str:
+        """缓存键, 未启用缓存时为空"""
+        if not self.cache:
+            return ""
+        # 缓存可能保存到文件, 去除请求中的 api_key
+        url = self.build_request().url.copy_remove_param("api_key")
+        return f"{self.operation}:{url}"
+
     async def send(self, client=httpx.AsyncClient()) -> ApiResponse:
         """发送网络请求"""
-        self.request = self.func(*self._args, **self._kwargs)
+        self.build_request()
+        self.host = self.request.url.host
         try:
+            self.bytes_out = len(self.request.content)
             response: httpx.Response = await client.send(self.request)
+            self.bytes_in = len(response.content)
             self.response = self.response_parser(response)
         except Exception as e:
             self.response = ApiResponse(
@@ -99,13 +133,16 @@ class ApiTask:
             )
         self.output_parser(self)
         if not self.response.success and self.raise_error:
-            # raise ApiResponseError()
-            sys.exit(1)
+            raise ApiResponseError(f"{self.operation}: {self.response.error}")
         return self.response
 
     @classmethod
     def create(
-        cls, api_response_parser: str, output_parser: str, raise_error: bool
+        cls,
+        api_response_parser: str,
+        output_parser: str,
+        raise_error: bool,
+        cache: bool = False,
     ) -> Callable[..., Callable[..., "ApiTask"]]:
         """创建任务实例"""
 
@@ -120,6 +157,11 @@ class ApiTask:
                     ApiResponseParser.parser(api_response_parser),
                     OutputParser.parser(output_parser),
                     raise_error,
+                    cache,
+                    # 请求函数为 API 实例方法, 使用实例的队列名称
+                    getattr(args[0], "queue", api_response_parser)
+                    if args
+                    else api_response_parser,
                 )
 
             return wrapper
@@ -215,6 +257,15 @@ class TaskManager:
         self.limit_rate = limit_rate
         self.rename_interval = 0.0
         self._last_rename_batch_completed: float | None = None
+        # 调度队列 -> 权重 / 并发上限, 未设置的队列权重为 1, 只受全局并发数限制
+        self.queue_weights: dict[str, int] = {}
+        self.queue_limits: dict[str, int] = {}
+
+        # 请求结果缓存, 同一进程内的多次运行共享, 打开缓存文件后跨进程复用
+        self.response_cache = ResponseCache()
+        self._inflight: dict[str, asyncio.Event] = {}
+        # 请求指标, 同一进程内的多次运行累计
+        self.metrics = MetricsRegistry()
 
     def __new__(cls, *args, **kwargs):
         if cls._instance is None:
@@ -237,34 +288,86 @@ class TaskManager:
 
         # 运行异步任务
         loop = asyncio.get_event_loop()
-        result = loop.run_until_complete(self._execute())
+        try:
+            result = loop.run_until_complete(self._execute())
+        finally:
+            self._log_tasks(self.tasks_recently)
+            self.metrics.autosave()
+        return result
 
-        # 记录日志
-        for task in self.tasks_recently:
-            logger.info(
-                f"Task: {task.func.__name__}, Args: {task.args}, Success: {task.response.success}, Error: {task.response.error}"
+    @staticmethod
+    def _log_tasks(tasks: list[ApiTask]) -> None:
+        """记录任务结果, 任务参数及原始数据只在日志实际输出时序列化, 并按上限截断"""
+
+        info, debug = logger.isEnabledFor(logging.INFO), logger.isEnabledFor(logging.DEBUG)
+        if not info:
+            return
+        for task in tasks:
+            if not hasattr(task, "response"):
+                continue
+            args = LogPayload(
+                factory=lambda task=task: {
+                    name: value for name, value in task.args.items() if name != "self"
+                }
             )
-            logger.debug(
-                f"任务 '{task.func.__name__}' 的原始数据: \n{json.dumps(task.response.data, indent=2, ensure_ascii=False)}"
+            logger.info(
+                "Task: %s, Args: %s, Success: %s, Error: %s",
+                task.func.__name__,
+                args,
+                task.response.success,
+                task.response.error,
+                extra={
+                    "fields": {
+                        "operation": task.operation,
+                        "args": args,
+                        "success": task.response.success,
+                        "status_code": task.response.status_code,
+                        "error": task.response.error,
+                    }
+                },
             )
-        return result
+            if debug:
+                data = LogPayload(task.response.data)
+                logger.debug(
+                    "任务 '%s' 的原始数据: %s",
+                    task.func.__name__,
+                    data,
+                    extra={"fields": {"operation": task.operation, "data": data}},
+                )
 
     async def _execute(self) -> list[ApiResponse]:
         """执行所有任务"""
 
+        try:
+            return await self._execute_pending()
+        finally:
+            self.tasks_done.extend(self.tasks_pending)  # 保存结果
+            self.tasks_pending.clear()  # 清空任务列表
+
+    @staticmethod
+    def _throttled(task: ApiTask) -> bool:
+        """
+        是否按 -t 间隔执行: Alist API 及 WebDAV (通常为 Alist 的 /dav) 的重命名均会请求网盘,
+        本地存储的重命名不受网盘限流影响, 不等待
+        """
+        return task.operation.endswith(".rename") and not task.operation.startswith(
+            "local."
+        )
+
+    async def _execute_pending(self) -> list[ApiResponse]:
+        """按重命名批次间隔执行待处理任务"""
+
         if self.rename_interval <= 0:
             results = await self._execute_concurrently(self.tasks_pending)
         else:
             rename_tasks = [
-                task for task in self.tasks_pending if task.operation == "alist.rename"
+                task for task in self.tasks_pending if TaskManager._throttled(task)
             ]
             other_tasks = [
-                task
-                for task in self.tasks_pending
-                if task.operation != "alist.rename"
+                task for task in self.tasks_pending if not TaskManager._throttled(task)
             ]
 
-            # -t 只作用于 Alist 的重命名任务；其余请求保持原有的异步执行方式。
+            # -t 只作用于网盘的重命名任务；其余请求保持原有的异步执行方式。
             if other_tasks:
                 await self._execute_concurrently(other_tasks)
 
@@ -279,6 +382,7 @@ class TaskManager:
                         remaining = self.rename_interval - elapsed
                         if remaining > 0:
                             logger.debug(f"等待下一批重命名任务: {remaining:.2f}s")
+                            self.metrics.interval_wait += remaining
                             await asyncio.sleep(remaining)
 
                     batch = rename_tasks[start : start + batch_size]
@@ -288,26 +392,135 @@ class TaskManager:
 
             results = [task.response for task in self.tasks_pending]
 
-        self.tasks_done.extend(self.tasks_pending)  # 保存结果
-        self.tasks_pending.clear()  # 清空任务列表
         return results
 
+    def set_queue(self, queue: str, weight: int = 1, limit_rate: int = 0) -> None:
+        """
+        设置调度队列参数
+
+        :param queue: 队列名称
+        :param weight: 权重, 多个队列同时有待处理任务时按权重分配并发
+        :param limit_rate: 队列并发上限, 0 为只受全局并发数限制
+        """
+
+        self.queue_weights[queue] = max(weight, 1)
+        self.queue_limits[queue] = max(limit_rate, 0)
+
     async def _execute_concurrently(
         self, tasks_pending: list[ApiTask]
     ) -> list[ApiResponse]:
-        """按当前并发限制执行一组任务。"""
-
-        if self.limit_rate and self.limit_rate > 0:
-            semaphore = asyncio.Semaphore(self.limit_rate)
+        """
+        按当前并发限制执行一组任务.
+        任务按调度队列分组, 有空闲并发时优先发送 (运行中任务数 / 权重) 最小的队列,
+        较慢的服务器不会占满全局并发, 其余服务器的请求可以继续发送.
+        """
 
-            async def send_with_semaphore(task: ApiTask) -> ApiResponse:
-                async with semaphore:
-                    return await task.send(self._async_client)
+        limit = (
+            self.limit_rate
+            if self.limit_rate and self.limit_rate > 0
+            else len(tasks_pending)
+        )
+        queues: dict[str, deque[tuple[int, ApiTask]]] = {}
+        for index, task in enumerate(tasks_pending):
+            queues.setdefault(task.queue, deque()).append((index, task))
+        running: Counter[str] = Counter()
+        dispatched: Counter[str] = Counter()
+
+        def next_queue() -> Optional[str]:
+            ready = [
+                queue
+                for queue, pending in queues.items()
+                if pending
+                and (
+                    self.queue_limits.get(queue, 0) <= 0
+                    or running[queue] < self.queue_limits[queue]
+                )
+            ]
+            if not ready:
+                return None
+            return min(
+                ready,
+                key=lambda queue: (
+                    running[queue] / self.queue_weights.get(queue, 1),
+                    dispatched[queue] / self.queue_weights.get(queue, 1),
+                ),
+            )
 
-            tasks = [send_with_semaphore(task) for task in tasks_pending]
-        else:
-            tasks = [task.send(self._async_client) for task in tasks_pending]
+        results: list = [None] * len(tasks_pending)
+        inflight: dict[asyncio.Future, tuple[str, int]] = {}
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        while inflight or any(queues.values()):
+            while len(inflight) < limit:
+                queue = next_queue()
+                if queue is None:
+                    break
+                index, task = queues[queue].popleft()
+                running[queue] += 1
+                dispatched[queue] += 1
+                # 等待时间: 任务加入本组到获得并发名额
+                wait = loop.time() - started
+                inflight[asyncio.ensure_future(self._send(task, wait))] = (queue, index)
+                self.metrics.record_inflight(
+                    queue, running[queue], self.queue_limits.get(queue, 0) or limit
+                )
+                self.metrics.record_inflight("all", len(inflight), limit)
+            done, _ = await asyncio.wait(inflight, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                queue, index = inflight.pop(future)
+                running[queue] -= 1
+                results[index] = future.exception() or future.result()
+
+        # 等待全部任务结束后再抛出错误, 避免遗留未完成的请求
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return results
 
-        return await asyncio.gather(*tasks)
+    async def _send(self, task: ApiTask, wait: float = 0.0) -> ApiResponse:
+        """发送任务请求, 可缓存的请求优先使用缓存, 并合并同时发出的相同请求"""
+
+        key = task.cache_key
+        if not key:
+            return await self._send_measured(task, wait)
+
+        # 等待正在进行的相同请求, 其失败 (未缓存) 时由其中一个等待者重新发送
+        while key in self._inflight:
+            await self._inflight[key].wait()
+        if key in self.response_cache:
+            logger.debug(f"使用缓存: {task.operation}")
+            task.response = self.response_cache[key]
+            self.metrics.record_cache_hit(task.operation, task.build_request().url.host)
+            task.output_parser(task)
+            return task.response
+
+        event = asyncio.Event()
+        self._inflight[key] = event
+        try:
+            response = await self._send_measured(task, wait)
+            if response.success:
+                self.response_cache[key] = response
+            return response
+        finally:
+            if self._inflight.get(key) is event:
+                del self._inflight[key]
+            event.set()
+
+    async def _send_measured(self, task: ApiTask, wait: float) -> ApiResponse:
+        """发送请求并记录耗时, 收发字节数及结果"""
+
+        start = asyncio.get_running_loop().time()
+        try:
+            return await task.send(self._async_client)
+        finally:
+            self.metrics.record(
+                task.operation,
+                task.host,
+                asyncio.get_running_loop().time() - start,
+                hasattr(task, "response") and task.response.success,
+                task.bytes_in,
+                task.bytes_out,
+                wait,
+            )
 
 taskManager = TaskManager()
@@ -0,0 +1,171 @@
+import heapq
+import logging
+import unicodedata
+from array import array
+from collections import Counter
+from typing import Any, Iterable, Optional
+
+logger = logging.getLogger("Amr.TitleIndex")
+
+
+class TitleIndex:
+    """
+    标题字符 n-gram 倒排索引, 按 Dice 系数批量计算查询标题与所有已索引名称的相似度.
+    每个条目可包含多个名称 (中文名/原名/别名), 条目得分取其中最高的名称.
+    """
+
+    def __init__(self, n: int = 3):
+        """
+        初始化参数
+
+        :param n: n-gram 长度
+        """
+
+        self.n = n
+        self.keys: list[str] = []  # 条目键
+        self.payloads: list[Any] = []  # 条目附加数据
+        self._positions: dict[str, int] = {}  # 条目键 -> 条目序号
+        self._names: set[tuple[int, str]] = set()  # 已索引的 (条目序号, 名称)
+        self._postings: dict[str, array] = {}  # n-gram -> 名称序号列表
+        self._sizes = array("I")  # 名称序号 -> n-gram 数量
+        self._owners = array("I")  # 名称序号 -> 条目序号
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """统一大小写及全半角, 去除标点和空白"""
+
+        text = unicodedata.normalize("NFKC", text).lower()
+        return "".join(char for char in text if char.isalnum())
+
+    @staticmethod
+    def grams(text: str, n: int = 3) -> set[str]:
+        """
+        生成首尾补位的字符 n-gram 集合
+
+        示例:
+        输入: "庆余年"
+        输出: {" 庆余", "庆余年", "余年 "}
+        """
+
+        text = TitleIndex.normalize(text)
+        if not text:
+            return set()
+        padded = f" {text} "
+        if len(padded) <= n:
+            return {padded}
+        return {padded[i : i + n] for i in range(len(padded) - n + 1)}
+
+    @staticmethod
+    def dice(query: set[str], name: set[str]) -> float:
+        """两个 n-gram 集合的 Dice 系数"""
+
+        if not query or not name:
+            return 0.0
+        return 2 * len(query & name) / (len(query) + len(name))
+
+    @staticmethod
+    def similarity(a: str, b: str, n: int = 3) -> float:
+        """两个标题的相似度"""
+
+        return TitleIndex.dice(TitleIndex.grams(a, n), TitleIndex.grams(b, n))
+
+    def add(self, key: str, names: Iterable[str], payload: Any = None) -> None:
+        """
+        添加条目, 键已存在时为该条目追加名称
+
+        :param key: 条目键, 如 TMDB id
+        :param names: 条目名称列表
+        :param payload: 条目附加数据, 键已存在时不覆盖
+        """
+
+        position = self._positions.get(key)
+        if position is None:
+            position = len(self.keys)
+            self._positions[key] = position
+            self.keys.append(key)
+            self.payloads.append(payload)
+
+        for name in names:
+            grams = TitleIndex.grams(name, self.n) if name else set()
+            if not grams or (position, name) in self._names:
+                continue
+            self._names.add((position, name))
+            name_id = len(self._sizes)
+            self._sizes.append(len(grams))
+            self._owners.append(position)
+            for gram in grams:
+                postings = self._postings.get(gram)
+                if postings is None:
+                    postings = self._postings[gram] = array("I")
+                postings.append(name_id)
+
+    def payload(self, key: str) -> Optional[Any]:
+        """获取条目附加数据"""
+
+        position = self._positions.get(key)
+        return None if position is None else self.payloads[position]
+
+    def search(
+        self, query: str, limit: int = 10, min_score: float = 0.0
+    ) -> list[tuple[str, float]]:
+        """
+        查找与标题最相似的条目
+
+        :param query: 查询标题
+        :param limit: 最多返回条目数, 0 为不限制
+        :param min_score: 最低相似度
+        :return: (条目键, 相似度) 列表, 按相似度降序
+        """
+
+        query_grams = TitleIndex.grams(query, self.n)
+        if not query_grams:
+            return []
+
+        # 累加各名称与查询共有的 n-gram 数量
+        counts: Counter[int] = Counter()
+        for gram in query_grams:
+            postings = self._postings.get(gram)
+            if postings is not None:
+                counts.update(postings)
+
+        size = len(query_grams)
+        sizes = self._sizes
+        owners = self._owners
+        best: dict[int, float] = {}
+        for name_id, count in counts.items():
+            score = 2 * count / (size + sizes[name_id])
+            if score < min_score:
+                continue
+            position = owners[name_id]
+            if score > best.get(position, -1.0):
+                best[position] = score
+
+        ranked = (
+            heapq.nlargest(limit, best.items(), key=lambda item: item[1])
+            if limit
+            else sorted(best.items(), key=lambda item: item[1], reverse=True)
+        )
+        return [(self.keys[position], round(score, 4)) for position, score in ranked]
+
+    def search_many(
+        self, queries: list[str], limit: int = 10, min_score: float = 0.0
+    ) -> list[list[tuple[str, float]]]:
+        """
+        批量查找, 相同的查询只计算一次
+
+        :param queries: 查询标题列表
+        :return: 与查询顺序对应的结果列表
+        """
+
+        cache: dict[str, list[tuple[str, float]]] = {}
+        results = []
+        for query in queries:
+            normalized = TitleIndex.normalize(query)
+            if normalized not in cache:
+                cache[normalized] = self.search(query, limit, min_score)
+            results.append(cache[normalized])
+        logger.debug(f"批量标题查找: {len(queries)} 项, 索引条目 {len(self)}")
+        return results
@@ -1,12 +1,39 @@
+import hashlib
 import re
+import time
+from typing import Optional
+
 from natsort import natsorted
 
 from AlistMediaRename.models import ApiResponse
 from .config import Config
-from .models import MediaMeta, Formated_Variables, FileMeta, RenameTask, Folder
+from .identify import Identifier
+from .models import (
+    MediaMeta,
+    Formated_Variables,
+    FileMeta,
+    PlanItem,
+    RenamePlan,
+    RenameStep,
+    RenameTask,
+    Folder,
+)
 from .task import ApiTask
 
 
+# 常见字幕语言/轨道后缀
+SUBTITLE_TAG_PATTERN = re.compile(
+    r"(?i)(\.(?:zh|chs|cht|sc|tc|gb|big5|en|eng|ja|jp|jpn|ko|kor|und|default|forced|sdh)"
+    r"(?:[-_][a-z]{2,4})?)+$"
+)
+
+
+# 季度子文件夹名称, 如 Season 1 / S01 / 第一季 / Specials
+SEASON_FOLDER_PATTERN = re.compile(
+    r"(?i)^\s*(?:season\s*(\d{1,3})|s(\d{1,3})|第\s*([\d一二三四五六七八九十]+)\s*[季部]|(specials?|sp))\s*$"
+)
+
+
 class Utils:
     """
     工具函数类
@@ -18,6 +45,33 @@ class Utils:
 
         return natsorted([file for file in file_list if re.match(pattern, file)])
 
+    @staticmethod
+    def lookup_video_stem(
+        subtitle_stem: str, video_index: dict[str, RenameTask]
+    ) -> tuple[Optional[RenameTask], str]:
+        """
+        查找字幕对应的视频文件, 依次去掉字幕文件名末尾的 .xx 后缀进行匹配.
+
+        示例:
+        输入: "ep01.zh.forced", {"ep01": task}
+        输出: (task, ".zh.forced")
+        """
+
+        stem = subtitle_stem
+        while True:
+            if stem in video_index:
+                return video_index[stem], subtitle_stem[len(stem) :]
+            if "." not in stem:
+                return None, ""
+            stem = stem.rsplit(".", 1)[0]
+
+    @staticmethod
+    def subtitle_tag(subtitle_stem: str) -> str:
+        """提取字幕文件名末尾的语言/轨道后缀, 如 ep01.zh -> .zh"""
+
+        match = SUBTITLE_TAG_PATTERN.search(subtitle_stem)
+        return match.group(0) if match else ""
+
     @staticmethod
     def parse_page_ranges(page_ranges: str, total_pages: int) -> list[int]:
         """
@@ -195,7 +249,7 @@ class Helper:
         result_file_list: ApiResponse = task_1_file_list.response
 
         file_list: list[str] = list(
-            map(lambda x: x["name"], result_file_list.data["content"])
+            map(lambda x: x["name"], result_file_list.data.get("content") or [])
         )
 
         video_file_list: list[FileMeta] = [
@@ -209,13 +263,298 @@ class Helper:
         return video_file_list, subtitle_file_list
 
     @staticmethod
-    def match_episode_files(
+    def detect_season_folders(entries: list[dict]) -> dict[int, str]:
+        """
+        从文件列表中识别季度子文件夹
+
+        示例:
+        输入: [{"name": "Season 1", "is_dir": True}, {"name": "S02", "is_dir": True}]
+        输出: {1: "Season 1", 2: "S02"}
+
+        :param entries: 剧集文件夹的文件列表
+        :return: 季度编号 -> 子文件夹名称, 同一季度有多个子文件夹时取第一个
+        """
+
+        season_folders: dict[int, str] = {}
+        for entry in natsorted(entries, key=lambda item: item["name"]):
+            if not entry.get("is_dir"):
+                continue
+            match = SEASON_FOLDER_PATTERN.match(entry["name"])
+            if match is None:
+                continue
+            number, short, chinese, specials = match.groups()
+            season = (
+                0
+                if specials
+                else Identifier.parse_number(chinese)
+                if chinese
+                else int(number or short)
+            )
+            if season is not None:
+                season_folders.setdefault(season, entry["name"])
+        return season_folders
+
+    @staticmethod
+    def create_season_moves(
+        rename_tasks: list[RenameTask],
+        listings: dict[str, list[dict]],
+        config: Config,
+    ) -> list[PlanItem]:
+        """
+        为剧集文件夹中的视频及字幕文件创建移动到季度文件夹的条目, 已在季度文件夹中的文件除外
+
+        示例:
+        /剧集/剧集-S01E01.mkv -> /剧集/Season 01/剧集-S01E01.mkv
+
+        :param rename_tasks: 视频及字幕的全部配对, 包含无需重命名的文件
+        :param listings: 文件夹路径 -> 当前文件列表
+        :param config: 配置
+        :return: 移动条目, 名称为重命名后的名称
+        """
+
+        entries: dict[tuple[str, str], dict] = {
+            (path, item["name"]): item
+            for path, items in listings.items()
+            for item in items
+        }
+        moves: list[PlanItem] = []
+        for task in rename_tasks:
+            variables = task.media_meta.tv_format_variables
+            if variables is None:
+                continue
+            folder = task.folder_path
+            if SEASON_FOLDER_PATTERN.match(folder.current_path()):
+                continue
+            name = config.amr.season_folder_name_format.format(season=variables.season)
+            entry = entries.get((folder.path, task.original_name), {})
+            moves.append(
+                PlanItem(
+                    category="move",
+                    rename_task=task,
+                    target_folder=Folder(path=f"{folder.path}{name}/"),
+                    source_size=entry.get("size", -1),
+                    source_modified=entry.get("modified", ""),
+                )
+            )
+        return moves
+
+    @staticmethod
+    def create_listings(
+        *file_list_tasks: tuple[ApiTask, Folder],
+    ) -> dict[str, list[dict]]:
+        """
+        创建文件夹路径 -> 文件列表, 获取失败的文件夹不包含在内.
+        同一路径在多个 Alist 中获取时合并文件列表, 同名文件只保留一项.
+        """
+
+        listings: dict[str, list[dict]] = {}
+        for task, folder_path in file_list_tasks:
+            if not task.response.success:
+                continue
+            entries = task.response.data.get("content") or []
+            if folder_path.path in listings:
+                names = {entry["name"] for entry in listings[folder_path.path]}
+                entries = listings[folder_path.path] + [
+                    entry for entry in entries if entry["name"] not in names
+                ]
+            listings[folder_path.path] = entries
+        return listings
+
+    @staticmethod
+    def listing_names(listings: dict[str, list[dict]]) -> dict[str, list[str]]:
+        """提取文件夹路径 -> 文件名列表, 用于重命名预检"""
+
+        return {
+            path: [item["name"] for item in entries]
+            for path, entries in listings.items()
+        }
+
+    @staticmethod
+    def listing_fingerprint(entries: list[dict]) -> str:
+        """根据文件名称/大小/修改时间生成文件列表指纹"""
+
+        lines = sorted(
+            f"{item['name']}|{item.get('size', '')}|{item.get('modified', '')}"
+            for item in entries
+        )
+        return hashlib.sha1("\n".join(lines).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def create_rename_plan(
+        video_rename_list: list[RenameTask],
+        subtitle_rename_list: list[RenameTask],
+        folder_rename_list: list[RenameTask],
+        listings: dict[str, list[dict]],
+        config: Config,
+    ) -> RenamePlan:
+        """创建重命名计划"""
+
+        entries: dict[tuple[str, str], dict] = {
+            (path, item["name"]): item
+            for path, items in listings.items()
+            for item in items
+        }
+        categories: list[tuple[str, list[RenameTask]]] = [
+            ("video", video_rename_list),
+            ("subtitle", subtitle_rename_list),
+        ]
+        if config.amr.media_folder_rename:
+            categories.append(("folder", folder_rename_list))
+
+        items: list[PlanItem] = []
+        for category, rename_list in categories:
+            for task in rename_list:
+                entry = entries.get((task.folder_path.path, task.original_name), {})
+                items.append(
+                    PlanItem(
+                        category=category,
+                        rename_task=task,
+                        source_size=entry.get("size", -1),
+                        source_modified=entry.get("modified", ""),
+                    )
+                )
+
+        return RenamePlan(
+            created_at=time.strftime("%Y-%m-%d %H:%M:%S"),
+            fingerprints={
+                path: Helper.listing_fingerprint(items)
+                for path, items in listings.items()
+            },
+            items=items,
+            listings=listings,
+        )
+
+    @staticmethod
+    def plan_listing_index(
+        plan: RenamePlan, listings: dict[str, list[dict]]
+    ) -> dict[str, Optional[dict[str, dict]]]:
+        """
+        为检查计划条目建立各文件夹的文件索引, 每个文件夹只计算一次指纹
+
+        :return: 文件夹路径 -> 文件名 -> 文件信息, 文件列表未变化的文件夹为空 (无需逐项检查)
+        """
+
+        index: dict[str, Optional[dict[str, dict]]] = {}
+        for folder_path in {item.rename_task.folder_path.path for item in plan.items}:
+            if folder_path not in listings:
+                continue
+            entries = listings[folder_path]
+            if plan.fingerprints.get(folder_path) == Helper.listing_fingerprint(entries):
+                index[folder_path] = None
+                continue
+            names: dict[str, dict] = {}
+            for entry in entries:
+                names.setdefault(entry["name"], entry)
+            index[folder_path] = names
+        return index
+
+    @staticmethod
+    def check_plan_item(
+        item: PlanItem, index: dict[str, Optional[dict[str, dict]]]
+    ) -> str:
+        """
+        检查计划条目的源文件是否与生成计划时一致
+
+        :param item: 计划条目
+        :param index: 由 plan_listing_index 建立的文件索引
+        :return: 源文件变更原因, 未变更时返回空字符串
+        """
+
+        folder_path = item.rename_task.folder_path.path
+        if folder_path not in index:
+            return "文件夹不存在或无法访问"
+        names = index[folder_path]
+        # 文件列表未变化, 无需逐项检查
+        if names is None:
+            return ""
+        entry = names.get(item.rename_task.original_name)
+        if entry is None:
+            return "源文件不存在"
+        if (
+            entry.get("size", -1) != item.source_size
+            or entry.get("modified", "") != item.source_modified
+        ):
+            return "源文件已变更"
+        return ""
+
+    @staticmethod
+    def create_rename_step(index: int, task: RenameTask) -> RenameStep:
+        """由重命名任务创建单步重命名"""
+
+        return RenameStep(
+            task_index=index,
+            folder_path=task.folder_path,
+            original_name=task.original_name,
+            target_name=task.target_name,
+        )
+
+    @staticmethod
+    def relocate_step(step: RenameStep, renamed_folders: dict[str, str]) -> RenameStep:
+        """
+        将步骤中的文件夹路径替换为父文件夹重命名后的路径
+
+        :param step: 重命名步骤
+        :param renamed_folders: 原文件夹路径 -> 重命名后的路径
+        """
+
+        def relocate(folder: Optional[Folder]) -> Optional[Folder]:
+            if folder is None:
+                return None
+            for old, new in renamed_folders.items():
+                if folder.path.startswith(old):
+                    return Folder(path=new + folder.path[len(old) :])
+            return folder
+
+        return step.model_copy(
+            update={
+                "folder_path": relocate(step.folder_path),
+                "target_folder": relocate(step.target_folder),
+            }
+        )
+
+    @staticmethod
+    def diff_renames(
+        steps: list[RenameStep], listings: dict[str, list[str]]
+    ) -> list[str]:
+        """
+        对比重命名后的文件列表与重命名步骤
+
+        - verified: 目标存在, 源文件已不存在 (或已被其他步骤占用)
+        - unapplied: 目标不存在, 源文件仍存在, 可重试
+        - missing: 目标及源文件均不存在
+        - unexpected: 目标存在, 源文件仍存在
+
+        :param steps: 已报告成功的重命名步骤
+        :param listings: 文件夹路径 -> 重命名后的文件名列表
+        :return: 与步骤顺序对应的校验状态
+        """
+
+        names = {path: set(entries) for path, entries in listings.items()}
+        targets = {step.target_path for step in steps}
+        statuses = []
+        for step in steps:
+            target_folder = (step.target_folder or step.folder_path).path
+            target = step.target_name in names.get(target_folder, set())
+            source = (
+                step.original_name in names.get(step.folder_path.path, set())
+                and step.full_path not in targets
+            )
+            if target:
+                statuses.append("unexpected" if source else "verified")
+            else:
+                statuses.append("unapplied" if source else "missing")
+        return statuses
+
+    @staticmethod
+    def pair_episode_files(
         media_list: list[MediaMeta], file_list: list[FileMeta], config: Config
-    ) -> list[RenameTask]:
-        """匹配文件"""
+    ) -> tuple[list[RenameTask], list[RenameTask]]:
+        """
+        按顺序配对媒体信息与文件
+
+        :return: (全部配对, 需要重命名的配对)
+        """
 
-        # 创建完整列表
-        rename_list_all: list[RenameTask] = []
         # 文件名已符合要求，不需要重命名的列表
         rename_list_matched: list[RenameTask] = []
         # 创建排除已重命名的列表
@@ -246,11 +585,110 @@ class Helper:
         for file, meida in zip(pending_file_list, pending_media_list):
             rename_list_no_matched.append(RenameTask(media_meta=meida, file_meta=file))
 
+        if config.amr.exclude_renamed:
+            return rename_list_matched + rename_list_no_matched, rename_list_no_matched
+
         # 匹配全部文件
-        for file, meida in zip(file_list, media_list):
-            rename_list_all.append(RenameTask(media_meta=media, file_meta=file))
+        rename_list_all: list[RenameTask] = [
+            RenameTask(media_meta=meida, file_meta=file)
+            for file, meida in zip(file_list, media_list)
+        ]
+        return rename_list_all, rename_list_all
+
+    @staticmethod
+    def match_episode_files(
+        media_list: list[MediaMeta], file_list: list[FileMeta], config: Config
+    ) -> list[RenameTask]:
+        """匹配文件"""
+
+        _, rename_list = Helper.pair_episode_files(media_list, file_list, config)
+        return rename_list
+
+    @staticmethod
+    def match_subtitle_files(
+        video_pairs: list[RenameTask],
+        media_list: list[MediaMeta],
+        subtitle_file_list: list[FileMeta],
+        config: Config,
+        exclude_renamed: Optional[bool] = None,
+    ) -> list[RenameTask]:
+        """
+        根据视频文件名为字幕建立索引, 使字幕跟随对应视频重命名.
+        无法关联到视频的字幕按去除语言/轨道后缀的文件名分组, 各组按原有顺序匹配剩余剧集.
+
+        :param video_pairs: 视频文件与媒体信息的全部配对
+        :param media_list: 媒体信息列表
+        :param subtitle_file_list: 字幕文件列表
+        :param exclude_renamed: 是否排除已重命名的字幕, 为空时使用配置
+        :return: 字幕重命名列表
+        """
+
+        if exclude_renamed is None:
+            exclude_renamed = config.amr.exclude_renamed
+
+        # 视频文件名(不含扩展名) -> 视频配对
+        video_index: dict[str, RenameTask] = {
+            task.file_meta.prefix_name: task for task in video_pairs
+        }
 
-        return rename_list_no_matched if config.amr.exclude_renamed else rename_list_all
+        rename_list: list[RenameTask] = []
+        claimed_media: set[str] = set()
+        pending_file_list: list[FileMeta] = []
+        for file in subtitle_file_list:
+            video_task, subtitle_tag = Utils.lookup_video_stem(
+                file.prefix_name, video_index
+            )
+            if video_task is None:
+                pending_file_list.append(file)
+                continue
+            claimed_media.add(video_task.media_meta.fullname)
+            rename_list.append(
+                RenameTask(
+                    media_meta=video_task.media_meta,
+                    file_meta=file.model_copy(update={"subtitle_tag": subtitle_tag}),
+                    subtitle_format=config.amr.subtitle_name_format,
+                )
+            )
+
+        # 无同名视频的字幕, 按去除语言/轨道后缀的文件名分组, 每组按顺序匹配一集尚未关联字幕的剧集
+        pending_media_list = [
+            media for media in media_list if media.fullname not in claimed_media
+        ]
+        stem_groups: dict[str, list[FileMeta]] = {}
+        for file in pending_file_list:
+            subtitle_tag = Utils.subtitle_tag(file.prefix_name)
+            stem = file.prefix_name[: len(file.prefix_name) - len(subtitle_tag)]
+            stem_groups.setdefault(stem, []).append(
+                file.model_copy(update={"subtitle_tag": subtitle_tag})
+            )
+        stem_file_list = [
+            FileMeta(
+                filename=stem,
+                folder_path=files[0].folder_path,
+                preserve_extension=False,
+            )
+            for stem, files in stem_groups.items()
+        ]
+        all_pairs, fallback_list = Helper.pair_episode_files(
+            pending_media_list, stem_file_list, config
+        )
+        if config.amr.exclude_renamed and not exclude_renamed:
+            fallback_list = all_pairs
+        rename_list.extend(
+            RenameTask(
+                media_meta=task.media_meta,
+                file_meta=file,
+                subtitle_format=config.amr.subtitle_name_format,
+            )
+            for task in fallback_list
+            for file in stem_groups[task.file_meta.prefix_name]
+        )
+
+        if exclude_renamed:
+            rename_list = [
+                task for task in rename_list if task.original_name != task.target_name
+            ]
+        return rename_list
 
     @staticmethod
     def create_folder_rename_list(
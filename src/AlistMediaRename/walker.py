@@ -0,0 +1,138 @@
+import fnmatch
+import logging
+import re
+from collections import deque
+from typing import Callable, Iterable, Iterator, Optional
+
+from .models import Folder, LibraryFolder, Shard
+
+logger = logging.getLogger("Amr.Walker")
+
+
+class LibraryWalker:
+    """
+    广度优先遍历 Alist 文件夹树, 每次并发获取一批文件夹的文件列表,
+    并在获取下一批之前输出其中包含视频文件的文件夹, 调用方可在遍历过程中开始识别及重命名.
+    """
+
+    def __init__(
+        self,
+        list_folders: Callable[[list[str]], dict[str, list[dict]]],
+        video_pattern: str,
+        batch_size: int = 10,
+        max_depth: Optional[int] = None,
+        include: Iterable[str] = (),
+        exclude: Iterable[str] = (),
+        exclude_regex: Optional[str] = None,
+        skip_folders: Iterable[str] = (),
+        shard: Optional[Shard] = None,
+    ):
+        """
+        初始化参数
+
+        :param list_folders: 并发获取文件夹列表的函数, 返回 文件夹路径 -> 文件列表, 获取失败的文件夹不包含在内
+        :param video_pattern: 视频文件名正则
+        :param batch_size: 每批获取的文件夹数量
+        :param max_depth: 最大遍历深度, 根文件夹为 0, 为空时不限制
+        :param include: 只输出名称或路径匹配的文件夹 (glob), 为空时全部输出
+        :param exclude: 跳过名称或路径匹配的文件夹及其子文件夹 (glob)
+        :param exclude_regex: 跳过路径匹配正则的文件夹及其子文件夹
+        :param skip_folders: 跳过的文件夹路径及其子文件夹, 如已绑定的文件夹
+        :param shard: 分片, 只遍历属于当前分片的根文件夹子文件夹及其子树, 各分片之间不重复获取
+        """
+
+        self.list_folders = list_folders
+        self.video_pattern = re.compile(video_pattern)
+        self.batch_size = max(1, batch_size)
+        self.max_depth = max_depth
+        self.include = list(include)
+        self.exclude = list(exclude)
+        self.exclude_regex = re.compile(exclude_regex) if exclude_regex else None
+        self.skip_folders = {Folder(path=path).path for path in skip_folders}
+        self.shard = shard
+        self.listed = 0  # 已获取文件列表的文件夹数量
+        self.failed: list[str] = []  # 获取文件列表失败的文件夹
+
+    @staticmethod
+    def _match(path: str, patterns: list[str]) -> bool:
+        """文件夹名称或路径是否匹配任一 glob"""
+
+        name = Folder(path=path).current_path()
+        return any(
+            fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(path.rstrip("/"), pattern)
+            for pattern in patterns
+        )
+
+    def pruned(self, path: str, depth: int) -> str:
+        """
+        判断文件夹是否跳过遍历
+
+        :return: 跳过原因, 为空时不跳过
+        """
+
+        if self.max_depth is not None and depth > self.max_depth:
+            return "超过最大深度"
+        if path in self.skip_folders:
+            return "已绑定"
+        if depth == 1 and self.shard is not None and not self.shard.owns(path):
+            return f"不属于分片 {self.shard}"
+        if self.exclude and LibraryWalker._match(path, self.exclude):
+            return "匹配排除规则"
+        if self.exclude_regex is not None and self.exclude_regex.search(path):
+            return "匹配排除正则"
+        return ""
+
+    def walk(self, *roots: str) -> Iterator[LibraryFolder]:
+        """
+        遍历文件夹树
+
+        :param roots: 根文件夹路径
+        :return: 包含视频文件的文件夹, 按广度优先顺序分批输出
+        """
+
+        frontier: deque[tuple[str, int]] = deque(
+            (Folder(path=root).path, 0) for root in roots
+        )
+        seen = {path for path, _ in frontier}
+        while frontier:
+            batch = [frontier.popleft() for _ in range(min(self.batch_size, len(frontier)))]
+            batch = [(path, depth) for path, depth in batch if not self._log_pruned(path, depth)]
+            if not batch:
+                continue
+            listings = self.list_folders([path for path, _ in batch])
+            self.listed += len(batch)
+
+            for path, depth in batch:
+                if path not in listings:
+                    self.failed.append(path)
+                    logger.warning(f"获取文件列表失败, 跳过: {path}")
+                    continue
+                video_count = 0
+                for entry in listings[path]:
+                    if entry.get("is_dir"):
+                        child = f"{path}{entry['name']}/"
+                        if child not in seen:
+                            seen.add(child)
+                            frontier.append((child, depth + 1))
+                    elif self.video_pattern.match(entry["name"]):
+                        video_count += 1
+                # 根文件夹由所有分片获取, 只由所属分片输出
+                owned = depth > 0 or self.shard is None or self.shard.owns(path)
+                if (
+                    video_count
+                    and owned
+                    and (not self.include or LibraryWalker._match(path, self.include))
+                ):
+                    yield LibraryFolder(
+                        path=path,
+                        depth=depth,
+                        video_count=video_count,
+                        listing=listings[path],
+                    )
+        logger.info(f"遍历完成: 获取 {self.listed} 个文件夹, 失败 {len(self.failed)} 个")
+
+    def _log_pruned(self, path: str, depth: int) -> bool:
+        reason = self.pruned(path, depth)
+        if reason:
+            logger.debug(f"跳过文件夹: {path}, {reason}")
+        return bool(reason)
@@ -0,0 +1,143 @@
+import logging
+import os
+import sqlite3
+import time
+
+from .models import WatchEntry
+
+logger = logging.getLogger("Amr.Watch")
+
+
+class WatchRegistry:
+    """
+    监视列表及文件列表快照, 保存在 SQLite 中.
+    快照记录每个文件的名称/大小/修改时间, 用于找出新出现的文件.
+    """
+
+    FILENAME = "watch.sqlite"
+    # 连续失败时检查间隔按指数增长, 最长间隔(秒)
+    MAX_BACKOFF = 6 * 3600
+    # 文件夹修改时间未变化时, 至少每隔该时间获取一次完整文件列表(秒)
+    FULL_LIST_INTERVAL = 6 * 3600
+
+    def __init__(self, data_dir: str):
+        """
+        初始化参数
+
+        :param data_dir: 运行数据保存目录
+        """
+
+        os.makedirs(data_dir, exist_ok=True)
+        self.filepath = os.path.join(data_dir, WatchRegistry.FILENAME)
+        self._db = sqlite3.connect(self.filepath)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS watches (folder TEXT PRIMARY KEY, entry TEXT)"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS snapshots ("
+                "folder TEXT, name TEXT, size INTEGER, modified TEXT, "
+                "PRIMARY KEY (folder, name))"
+            )
+
+    def close(self) -> None:
+        self._db.close()
+
+    def add(self, entry: WatchEntry) -> None:
+        """添加或更新监视文件夹"""
+
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO watches (folder, entry) VALUES (?, ?)",
+                (entry.folder, entry.model_dump_json()),
+            )
+
+    update = add
+
+    def remove(self, folder: str) -> bool:
+        """移除监视文件夹及其快照"""
+
+        with self._db:
+            removed = self._db.execute(
+                "DELETE FROM watches WHERE folder = ?", (folder,)
+            ).rowcount
+            self._db.execute("DELETE FROM snapshots WHERE folder = ?", (folder,))
+        return removed > 0
+
+    def entries(self) -> list[WatchEntry]:
+        """全部监视文件夹"""
+
+        return [
+            WatchEntry.model_validate_json(row[0])
+            for row in self._db.execute("SELECT entry FROM watches ORDER BY folder")
+        ]
+
+    def due(self, now: float) -> list[WatchEntry]:
+        """到达检查时间的监视文件夹"""
+
+        return [entry for entry in self.entries() if entry.next_check <= now]
+
+    def schedule(self, entry: WatchEntry, error: str = "") -> None:
+        """
+        安排下次检查, 连续失败时按指数退避
+
+        :param entry: 监视文件夹
+        :param error: 本次检查的错误信息, 为空表示成功
+        """
+
+        if error:
+            entry.failures += 1
+            delay = min(entry.interval * 2**entry.failures, WatchRegistry.MAX_BACKOFF)
+            logger.warning(
+                f"检查失败: {entry.folder}, {error}, 第 {entry.failures} 次, {delay:.0f}s 后重试"
+            )
+        else:
+            entry.failures = 0
+            delay = entry.interval
+        entry.next_check = time.time() + delay
+        self.update(entry)
+
+    def snapshot(self, folder: str) -> dict[str, tuple[int, str]]:
+        """获取文件列表快照: 文件名 -> (大小, 修改时间)"""
+
+        return {
+            name: (size, modified)
+            for name, size, modified in self._db.execute(
+                "SELECT name, size, modified FROM snapshots WHERE folder = ?", (folder,)
+            )
+        }
+
+    def save_snapshot(self, folder: str, listing: list[dict]) -> None:
+        """替换文件列表快照"""
+
+        with self._db:
+            self._db.execute("DELETE FROM snapshots WHERE folder = ?", (folder,))
+            self._db.executemany(
+                "INSERT OR REPLACE INTO snapshots (folder, name, size, modified) VALUES (?, ?, ?, ?)",
+                [
+                    (folder, entry["name"], entry.get("size", -1), entry.get("modified", ""))
+                    for entry in listing
+                ],
+            )
+
+    @staticmethod
+    def diff(
+        snapshot: dict[str, tuple[int, str]], listing: list[dict]
+    ) -> tuple[list[str], list[str], list[str]]:
+        """
+        比较快照与当前文件列表
+
+        :return: (新增文件, 大小或修改时间变化的文件, 已删除文件)
+        """
+
+        added: list[str] = []
+        changed: list[str] = []
+        for entry in listing:
+            previous = snapshot.get(entry["name"])
+            if previous is None:
+                added.append(entry["name"])
+            elif previous != (entry.get("size", -1), entry.get("modified", "")):
+                changed.append(entry["name"])
+        names = {entry["name"] for entry in listing}
+        removed = [name for name in snapshot if name not in names]
+        return added, changed, removed
@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+
+import pytest
+
+from AlistMediaRename.utils import Helper
+
+
+def _task(data):
+    return SimpleNamespace(response=SimpleNamespace(data=data))
+
+
+def _season_task(number, episodes):
+    return _task(
+        {
+            "season_number": number,
+            "air_date": f"202{number}-01-01",
+            "episodes": [
+                {
+                    "episode_number": episode,
+                    "air_date": f"202{number}-01-{episode:02}",
+                    "vote_average": 8.0,
+                    "name": f"第{episode}集",
+                }
+                for episode in episodes
+            ],
+        }
+    )
+
+
+@pytest.fixture
+def tv_info_task():
+    """剧集信息请求结果: 测试剧集 (2020)"""
+
+    return _task(
+        {
+            "name": "测试剧集",
+            "original_name": "Test Show",
+            "first_air_date": "2020-01-01",
+            "original_language": "en",
+            "origin_country": ["US"],
+            "vote_average": 8.0,
+        }
+    )
+
+
+@pytest.fixture
+def season_task():
+    """季度信息请求结果的构造函数 season_task(number, episodes), 第 n 季首播于 202n 年"""
+
+    return _season_task
+
+
+@pytest.fixture
+def tv_media_list(tv_info_task):
+    """单季剧集列表的构造函数 tv_media_list(config, season, episodes)"""
+
+    def create(config, season, episodes):
+        media_list, _ = Helper.create_tv_media_list(
+            "1-", tv_info_task, _season_task(season, episodes), "123", config
+        )
+        return media_list
+
+    return create
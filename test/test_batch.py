@@ -0,0 +1,120 @@
+import asyncio
+
+import httpx
+import pytest
+from pydantic import ValidationError
+
+from AlistMediaRename import Amr
+from AlistMediaRename.models import ApiResponse, ApiResponseError
+from AlistMediaRename.task import ApiTask, TaskManager
+
+
+def _task(url, sent, cache=True, success=True, raise_error=True):
+    def request_factory():
+        return httpx.Request("GET", url)
+
+    task = ApiTask(
+        request_factory,
+        (),
+        {},
+        "tmdb.tv_info",
+        lambda response: ApiResponse(success=True, status_code=200, error="", data={}),
+        lambda api_task: None,
+        raise_error,
+        cache,
+    )
+
+    async def send(client):
+        sent.append(url)
+        await asyncio.sleep(0.01)
+        task.response = ApiResponse(
+            success=success, status_code=200, error="" if success else "失败", data={}
+        )
+        if not success and raise_error:
+            raise ApiResponseError(task.response.error)
+        return task.response
+
+    task.send = send
+    return task
+
+
+@pytest.fixture
+def task_manager():
+    manager = TaskManager()
+    manager.tasks_pending.clear()
+    manager.response_cache.clear()
+    manager.limit_rate = 10
+    manager.rename_interval = 0
+    yield manager
+    manager.tasks_pending.clear()
+    manager.response_cache.clear()
+
+
+def test_manifest_entries_are_validated(tmp_path):
+    manifest = tmp_path / "manifest.yaml"
+    manifest.write_text(
+        "entries:\n"
+        "  - dir: /剧集/A/\n"
+        "    id: 123\n"
+        "    seasons: 1\n"
+        "  - dir: /电影/B/\n"
+        "    keyword: 测试电影\n"
+        "    movie: true\n",
+        encoding="utf-8",
+    )
+
+    first, second = Amr.load_manifest(str(manifest))
+
+    assert (first.id, first.seasons, first.number, first.movie) == ("123", "1", "1-", False)
+    assert (second.keyword, second.movie) == ("测试电影", True)
+
+    manifest.write_text("- dir: /剧集/C/\n", encoding="utf-8")
+    with pytest.raises(ValidationError):
+        Amr.load_manifest(str(manifest))
+
+
+def test_identical_cacheable_requests_are_sent_once(task_manager):
+    sent = []
+    tasks = [_task("https://tmdb.invalid/tv/1", sent) for _ in range(3)]
+    task_manager.add_tasks(*tasks)
+    asyncio.run(task_manager._execute())
+
+    task_manager.add_tasks(_task("https://tmdb.invalid/tv/1", sent))
+    task_manager.add_tasks(_task("https://tmdb.invalid/tv/1", sent, cache=False))
+    asyncio.run(task_manager._execute())
+
+    assert len(sent) == 2
+    assert all(task.response.success for task in tasks)
+
+
+def test_failed_request_raises_after_other_tasks_finish(task_manager):
+    sent = []
+    task_manager.add_tasks(
+        _task("https://tmdb.invalid/tv/1", sent, success=False),
+        _task("https://tmdb.invalid/tv/2", sent),
+    )
+
+    with pytest.raises(ApiResponseError):
+        asyncio.run(task_manager._execute())
+
+    assert sorted(sent) == ["https://tmdb.invalid/tv/1", "https://tmdb.invalid/tv/2"]
+    assert task_manager.tasks_pending == []
+    assert list(task_manager.response_cache) == [
+        "tmdb.tv_info:https://tmdb.invalid/tv/2"
+    ]
+
+
+def test_waiters_resend_one_at_a_time_when_shared_request_fails(task_manager):
+    sent = []
+    tasks = [
+        _task("https://tmdb.invalid/tv/1", sent, success=False, raise_error=False)
+        for _ in range(3)
+    ]
+    task_manager.add_tasks(*tasks)
+
+    # 失败的结果不缓存, 等待者依次重新发送, 不会同时占用同一个请求
+    asyncio.run(task_manager._execute())
+
+    assert len(sent) == 3
+    assert not any(task.response.success for task in tasks)
+    assert task_manager._inflight == {}
@@ -0,0 +1,92 @@
+from types import SimpleNamespace
+
+from AlistMediaRename import Amr, Config
+from AlistMediaRename.bindings import BindingStore
+from AlistMediaRename.models import (
+    ApiResponse,
+    Binding,
+    Folder,
+    RenameOutcome,
+    RenameStep,
+)
+
+
+def _item(category, folder, target, target_folder=None):
+    return SimpleNamespace(
+        category=category,
+        rename_task=SimpleNamespace(folder_path=Folder(path=folder), target_name=target),
+        target_folder=target_folder and Folder(path=target_folder),
+    )
+
+
+def _result(folder, name, success=True):
+    return RenameOutcome(
+        step=RenameStep(
+            task_index=0,
+            folder_path=Folder(path=folder),
+            original_name=f"old-{name}",
+            target_name=name,
+        ),
+        response=ApiResponse(success=success, status_code=200, error="", data={}),
+    )
+
+
+def _amr(tmp_path):
+    config = Config()
+    config.amr.data_dir = str(tmp_path)
+    config.tmdb.cache_ttl = 0
+    return Amr(config, need_login=False)
+
+
+def test_store_moves_binding_to_renamed_folder(tmp_path):
+    store = BindingStore(str(tmp_path))
+    store.save(Binding(folder="/tv/show/", tmdb_id="1", seasons="1"))
+    store.save(
+        Binding(folder="/tv/Show (2020)/", tmdb_id="1", seasons="1,2"),
+        previous="/tv/show/",
+    )
+
+    assert store.get("/tv/show/") is None
+    assert store.get("/tv/Show (2020)/").seasons == "1,2"
+    assert store.remove("/tv/Show (2020)/")
+    assert store.entries() == []
+    store.close()
+
+
+def test_template_version_follows_name_formats():
+    config = Config()
+    version = BindingStore.template_version(config)
+    config.amr.tv_name_format += "-suffix"
+
+    assert BindingStore.template_version(config) != version
+
+
+def test_only_fully_renamed_plans_are_bound(tmp_path):
+    amr = _amr(tmp_path)
+    done = SimpleNamespace(
+        binding=Binding(folder="/tv/a/", tmdb_id="1", seasons="1"),
+        items=[_item("video", "/tv/a/", "A-S01E01.mkv"), _item("folder", "/tv/", "A (2020)")],
+    )
+    partial = SimpleNamespace(
+        binding=Binding(folder="/tv/b/", tmdb_id="2", seasons="1"),
+        items=[_item("video", "/tv/b/", "B-S01E01.mkv"), _item("video", "/tv/b/", "B-S01E02.mkv")],
+    )
+    results = {
+        "video": [
+            _result("/tv/a/", "A-S01E01.mkv"),
+            _result("/tv/b/", "B-S01E01.mkv"),
+            _result("/tv/b/", "B-S01E02.mkv", success=False),
+        ],
+        "folder": [_result("/tv/", "A (2020)")],
+    }
+
+    outcomes = Amr._plan_outcomes([done, partial], results)
+    assert outcomes == [[True, True], [True, False]]
+
+    amr._save_bindings([done, partial], outcomes)
+    assert amr.bound_id("/tv/A (2020)/", movie=False) == "1"
+    assert amr.bound_id("/tv/A (2020)/", movie=True) is None
+    assert amr.bound_id("/tv/b/", movie=False) is None
+
+    amr.use_bindings = False
+    assert amr.bound_id("/tv/A (2020)/", movie=False) is None
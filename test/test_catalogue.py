@@ -0,0 +1,85 @@
+import gzip
+import os
+import shutil
+
+from AlistMediaRename import Amr, Config
+from AlistMediaRename.catalogue import Catalogue
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def _import(tmp_path):
+    tv_export = tmp_path / "tv_series_ids.json.gz"
+    with open(os.path.join(FIXTURES, "tv_series_ids_sample.json"), "rb") as source:
+        with gzip.open(tv_export, "wb") as target:
+            shutil.copyfileobj(source, target)
+
+    catalogue = Catalogue(str(tmp_path))
+    assert catalogue.import_export(str(tv_export)) == {"tv": 9, "movie": 0}
+    assert catalogue.import_export(os.path.join(FIXTURES, "movie_ids_sample.json")) == {
+        "tv": 0,
+        "movie": 3,
+    }
+    return catalogue
+
+
+def test_exports_are_imported_and_searched(tmp_path):
+    catalogue = _import(tmp_path)
+
+    assert catalogue.count() == {"tv": 9, "movie": 3}
+    assert [r["id"] for r in catalogue.search("breaking bad")] == [1396, 62852]
+    assert [r["name"] for r in catalogue.search("spy family")] == ["SPY×FAMILY"]
+    assert catalogue.search("arcane legends") == []
+    # 少于三个字符的词使用 LIKE 查询
+    assert [r["id"] for r in catalogue.search("庆余")] == [99999]
+    movies = catalogue.search("breaking", movie=True)
+    assert [(r["id"], r["title"]) for r in movies] == [
+        (559969, "El Camino: A Breaking Bad Movie")
+    ]
+    catalogue.close()
+
+
+def test_reimport_replaces_previous_snapshot(tmp_path):
+    _import(tmp_path).close()
+    export = tmp_path / "tv_series_ids_new.json"
+    export.write_text('{"id":7,"original_name":"Breaking News","popularity":1}\n', encoding="utf-8")
+
+    catalogue = Catalogue(str(tmp_path))
+    catalogue.import_export(str(export))
+
+    assert catalogue.count() == {"tv": 1, "movie": 3}
+    assert [r["id"] for r in catalogue.search("breaking")] == [7]
+    catalogue.close()
+
+
+def test_lookup_only_returns_reliable_matches(tmp_path):
+    catalogue = _import(tmp_path)
+
+    assert catalogue.lookup("breaking bad")["results"][0]["id"] == 1396
+    assert catalogue.lookup("Spy Family")["results"][0]["id"] == 120089
+    assert catalogue.lookup("不存在的剧集") is None
+    # 相似度较低或只经 LIKE 匹配的结果仍需在线搜索
+    assert catalogue.search("breaking", movie=True)
+    assert catalogue.lookup("breaking", movie=True) is None
+    assert catalogue.search("庆余")
+    assert catalogue.lookup("庆余") is None
+    catalogue.close()
+
+
+def test_amr_reuses_one_catalogue_connection(tmp_path):
+    config = Config()
+    config.amr.data_dir = str(tmp_path)
+    config.alist.storage = "local"
+    config.alist.root = str(tmp_path)
+    amr = Amr(config)
+    assert amr._lookup_catalogue("breaking bad") is None
+    _import(tmp_path).close()
+
+    first = amr._lookup_catalogue("breaking bad")
+    catalogue = amr._catalogue
+    second = amr._lookup_catalogue("spy family")
+
+    assert (first["results"][0]["id"], second["results"][0]["id"]) == (1396, 120089)
+    assert amr._catalogue is catalogue
+    amr.use_catalogue = False
+    assert amr._lookup_catalogue("breaking bad") is None
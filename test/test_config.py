@@ -53,3 +53,28 @@ def test_config_file_is_not_exist(mocked_input):
 
     # 删除生成的文件
     os.remove("./test/test_config_file.yaml")
+
+
+def test_config_snapshot_skips_yaml_until_file_changes(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    filepath = tmp_path / "config.yaml"
+    with open("src/AlistMediaRename/default.yaml", "r", encoding="utf-8") as file:
+        filepath.write_text(file.read().replace("limit_rate: 10", "limit_rate: 7"), "utf-8")
+
+    assert Config(str(filepath)).amr.limit_rate == 7
+    assert os.path.exists(Config.snapshot_path(str(filepath)))
+    # 快照包含密码等信息, 只允许当前用户读写
+    if os.name == "posix":
+        assert os.stat(Config.snapshot_path(str(filepath))).st_mode & 0o777 == 0o600
+
+    # 配置文件未修改时不再解析 YAML
+    def fail(*args):
+        raise AssertionError("YAML parsed")
+
+    monkeypatch.setattr(YAML, "load", fail)
+    assert Config(str(filepath)).amr.limit_rate == 7
+
+    monkeypatch.undo()
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    filepath.write_text(filepath.read_text("utf-8").replace("limit_rate: 7", "limit_rate: 30", 1), "utf-8")
+    assert Config(str(filepath)).amr.limit_rate == 30
@@ -0,0 +1,61 @@
+import pytest
+
+from AlistMediaRename.identify import Identifier
+from AlistMediaRename.models import IdentifyCandidate, IdentifyResult
+
+
+@pytest.mark.parametrize(
+    "name, expected",
+    [
+        ("The.Show.2020.S02.1080p.WEB-DL-GRP", ("The Show", 2020, 2)),
+        ("[Nekomoe] 间谍过家家 第二季 [1080p]", ("间谍过家家", None, 2)),
+        ("刀剑神域 (2012)", ("刀剑神域", 2012, None)),
+        ("1917.2019.2160p.BluRay", ("1917", 2019, None)),
+        ("[进击的巨人]", ("进击的巨人", None, None)),
+        ("Breaking Bad Season 3 Complete", ("Breaking Bad", None, 3)),
+    ],
+)
+def test_folder_names_are_parsed(name, expected):
+    assert Identifier.parse_folder_name(name) == expected
+
+
+def _tv_info(*seasons):
+    return {
+        "seasons": [
+            {"season_number": number, "episode_count": count, "air_date": f"{year}-01-01"}
+            for number, count, year in seasons
+        ]
+    }
+
+
+def test_episode_count_selects_seasons():
+    info = _tv_info((0, 2, 2019), (1, 12, 2020), (2, 10, 2021))
+
+    single = Identifier.score_candidate(
+        IdentifyCandidate(tmdb_id="1", name="Test Show", year=2020),
+        "Test Show", 2021, None, 10, info,
+    )
+    whole = Identifier.score_candidate(
+        IdentifyCandidate(tmdb_id="1", name="Test Show", year=2020),
+        "Test Show", None, None, 22, info,
+    )
+
+    assert (single.seasons, single.score) == ("2", 1.0)
+    assert (whole.seasons, whole.score) == ("1-2", 1.0)
+
+
+def test_low_and_ambiguous_scores_are_sent_to_review():
+    def result(*scores):
+        return IdentifyResult(
+            folder="/a/",
+            candidates=[
+                IdentifyCandidate(tmdb_id=str(i), score=score)
+                for i, score in enumerate(scores)
+            ],
+        )
+
+    assert Identifier.decide(result(0.5, 0.95), 0.8).candidates[0].tmdb_id == "1"
+    assert Identifier.decide(result(0.5, 0.95), 0.8).accepted
+    assert Identifier.decide(result(0.7), 0.8).reason == "分数低于阈值 0.8"
+    assert Identifier.decide(result(0.9, 0.88), 0.8).reason == "多个候选分数接近"
+    assert not Identifier.decide(result(), 0.8).accepted
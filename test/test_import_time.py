@@ -0,0 +1,26 @@
+import subprocess
+import sys
+
+# amr -h / amr -v 不应导入的模块, 预算及耗时测试见 benchmarks/bench_import_time.py
+LAZY_MODULES = ("AlistMediaRename.amr", "httpx", "pydantic", "rich", "ruamel", "natsort", "pyotp")
+
+
+def test_cli_entry_point_does_not_import_heavy_dependencies():
+    code = (
+        "import sys\n"
+        "from click.testing import CliRunner\n"
+        "from AlistMediaRename.cli import start\n"
+        "for args in (['-h'], ['-v'], ['batch', '-h']):\n"
+        "    assert CliRunner().invoke(start, args).exit_code == 0\n"
+        "print('\\n'.join(sys.modules))\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+
+    loaded = [
+        name
+        for name in output.split()
+        if any(name == lazy or name.startswith(lazy + ".") for lazy in LAZY_MODULES)
+    ]
+    assert loaded == []
@@ -0,0 +1,84 @@
+import time
+
+from AlistMediaRename.jobs import JobError, JobQueue, JobWorker
+from AlistMediaRename.models import BatchResult
+
+
+def test_job_is_claimed_once_and_reclaimed_after_lease_expires(tmp_path):
+    filepath = str(tmp_path / "jobs.sqlite")
+    first, second = JobQueue(filepath), JobQueue(filepath)
+    job_id = first.add("rename", {"dir": "/剧集/"})
+
+    job = first.claim("a", lease=60)
+    assert job is not None and job.id == job_id and job.attempts == 1
+    assert second.claim("b", lease=60) is None
+
+    # 工作进程退出, 租约过期后由其他进程重新领取
+    first._db.execute("UPDATE jobs SET lease_until = 0 WHERE id = ?", (job_id,))
+    stolen = second.claim("b", lease=60)
+    assert stolen is not None and stolen.attempts == 2
+    # 原进程的结果不再提交, 也不能续约
+    assert not first.complete(job, {"ok": True})
+    assert not first.renew(job, 60)
+    assert second.complete(stolen, {"ok": True})
+    assert first.get(job_id).status == "success"
+    assert first.get(job_id).result == {"ok": True}
+
+
+def test_failed_job_backs_off_until_max_attempts(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"), wal=False)
+    job_id = queue.add("verify", {"run_id": "x"}, max_attempts=2)
+
+    job = queue.claim("a", lease=60)
+    assert queue.fail(job, "timeout")
+    retried = queue.get(job_id)
+    assert retried.status == "queued" and retried.available_at >= time.time() + 29
+    assert queue.claim("a", lease=60) is None
+
+    queue._db.execute("UPDATE jobs SET available_at = 0 WHERE id = ?", (job_id,))
+    job = queue.claim("a", lease=60)
+    queue.fail(job, "timeout")
+    assert queue.get(job_id).status == "failed"
+    assert queue.counts() == {"failed": 1}
+
+    assert queue.retry(job_id)
+    assert queue.get(job_id).attempts == 0
+
+
+class StubAmr:
+    def __init__(self):
+        self.entries = []
+
+    def batch(self, entries):
+        self.entries.extend(entries)
+        status = "failed" if entries[0].dir.startswith(("/bad", "/gone")) else "success"
+        retryable = not entries[0].dir.startswith("/gone")
+        return [
+            BatchResult(
+                entry=entries[0], status=status, message="not found", retryable=retryable
+            )
+        ]
+
+    def verify_run(self, run_id):
+        raise JobError("重试失败 1 项", retry=False)
+
+
+def test_worker_drains_queue_and_records_outcomes(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"))
+    ok = queue.add("rename", {"dir": "/剧集/", "id": "1", "seasons": "1"})
+    bad = queue.add("rename", {"dir": "/bad/", "keyword": "x"}, max_attempts=1)
+    invalid = queue.add("rename", {"dir": "/剧集/"})
+    verify = queue.add("verify", {"run_id": "x"})
+    gone = queue.add("rename", {"dir": "/gone/", "keyword": "x"})
+    amr = StubAmr()
+
+    assert JobWorker(amr, queue, owner="w").run(drain=True) == 5
+
+    assert queue.get(ok).status == "success"
+    assert queue.get(ok).result["entry"]["dir"] == "/剧集/"
+    assert queue.get(bad).error == "not found"
+    # 参数错误及校验失败不重试
+    assert queue.get(invalid).status == "failed"
+    assert queue.get(verify).status == "failed" and queue.get(verify).attempts == 1
+    assert queue.get(gone).status == "failed" and queue.get(gone).attempts == 1
+    assert [entry.dir for entry in amr.entries] == ["/剧集/", "/bad/", "/gone/"]
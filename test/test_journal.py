@@ -0,0 +1,194 @@
+from types import SimpleNamespace
+
+import pytest
+
+from AlistMediaRename import Amr
+from AlistMediaRename.journal import RenameJournal
+from AlistMediaRename.models import ApiResponse, Folder, RenameStep, VerifyResult
+
+
+def _step(index, original_name, target_name):
+    return RenameStep(
+        task_index=index,
+        folder_path=Folder(path="/剧集/"),
+        original_name=original_name,
+        target_name=target_name,
+    )
+
+
+def test_journal_records_intents_and_results(tmp_path):
+    journal = RenameJournal(str(tmp_path))
+    journal.begin()
+    first = journal.intend([("video", _step(0, "1.mkv", "a.mkv"))])
+    second = journal.intend(
+        [("video", _step(1, "2.mkv", "b.mkv")), ("subtitle", _step(2, "2.ass", "b.ass"))]
+    )
+    journal.complete([(first[0], True, ""), (second[0], False, "file exists")])
+
+    loaded, header, steps = RenameJournal.load(str(tmp_path), journal.run_id)
+
+    assert header["kind"] == "rename"
+    assert "finished" not in header
+    assert [(step.seq, step.wave, step.done) for step in steps] == [
+        (0, 0, True),
+        (1, 1, False),
+        (2, 1, False),
+    ]
+    assert RenameJournal.latest_unfinished(str(tmp_path)) == journal.run_id
+
+    # 继续写入的序号与批次接在已有记录之后
+    assert loaded.intend([("video", _step(3, "3.mkv", "c.mkv"))]) == [3]
+    loaded.finish()
+    assert RenameJournal.latest_unfinished(str(tmp_path)) is None
+
+
+def test_truncated_last_line_is_ignored(tmp_path):
+    journal = RenameJournal(str(tmp_path))
+    journal.begin()
+    journal.intend([("video", _step(0, "1.mkv", "a.mkv"))])
+    with open(journal.filepath, "a", encoding="utf-8") as file:
+        file.write('{"op": "done", "se')
+
+    _, _, steps = RenameJournal.load(str(tmp_path), journal.run_id)
+
+    assert [step.done for step in steps] == [False]
+
+
+def test_result_without_intent_is_ignored(tmp_path):
+    journal = RenameJournal(str(tmp_path))
+    journal.begin()
+    journal.intend([("video", _step(0, "1.mkv", "a.mkv"))])
+    # 意图记录写入中断, 其结果记录没有对应的步骤
+    with open(journal.filepath, "a", encoding="utf-8") as file:
+        file.write('{"op": "intent", "seq": 1, "wa\n')
+        file.write('{"op": "done", "seq": 1, "success": true, "error": ""}\n')
+
+    _, _, steps = RenameJournal.load(str(tmp_path), journal.run_id)
+
+    assert [(step.seq, step.done) for step in steps] == [(0, False)]
+
+
+def test_merged_journal_renumbers_steps_of_each_run(tmp_path):
+    first, second = RenameJournal(str(tmp_path), "a"), RenameJournal(str(tmp_path), "b")
+    for journal in (first, second):
+        journal.begin()
+    seqs = first.intend([("video", _step(0, "1.mkv", "a.mkv"))])
+    first.complete([(seqs[0], True, "")])
+    first.finish()
+    seqs = second.intend([("video", _step(0, "2.mkv", "b.mkv"))])
+    seqs += second.intend([("folder", _step(1, "S", "Show (2024)"))])
+    second.complete([(seqs[0], True, ""), (seqs[1], False, "file exists")])
+
+    merged = RenameJournal.merge(str(tmp_path), [first.filepath, second.filepath])
+    _, header, steps = RenameJournal.load(str(tmp_path), merged.run_id)
+
+    assert header["merged_from"] == ["a", "b"]
+    # 其中一个运行未完成, 合并后的运行也未完成
+    assert "finished" not in header
+    assert [(s.seq, s.wave, s.done, s.step.original_name) for s in steps] == [
+        (0, 0, True, "1.mkv"),
+        (1, 1, True, "2.mkv"),
+        (2, 2, False, "S"),
+    ]
+
+
+def _renamer(fail=(), crash_after=None):
+    """只发送重命名请求的 Amr, 记录发送的路径"""
+
+    sent: list[str] = []
+    alist = SimpleNamespace(
+        move_chunk_size=100,
+        rename=lambda name, path: SimpleNamespace(
+            operation="alist.rename", host="", path=path, response=None
+        )
+    )
+
+    def run_tasks():
+        if crash_after is not None and len(sent) >= crash_after:
+            raise KeyboardInterrupt
+        for task in pending:
+            sent.append(task.path)
+            task.response = ApiResponse(
+                success=task.path not in fail, status_code=200, error="", data={}
+            )
+        pending.clear()
+
+    pending: list = []
+    amr = SimpleNamespace(
+        sent=sent,
+        _api=lambda path: alist,
+        _ensure_folders=lambda paths: set(),
+        _taskManager=SimpleNamespace(
+            add_tasks=lambda *tasks: pending.extend(tasks), run_tasks=run_tasks
+        ),
+    )
+    return amr
+
+
+def _cycle():
+    """a.mkv 与 b.mkv 互换名称"""
+
+    return [
+        [_step(0, "a.mkv", ".amr-tmp-a.mkv")],
+        [_step(1, "b.mkv", "a.mkv")],
+        [_step(0, ".amr-tmp-a.mkv", "b.mkv")],
+    ]
+
+
+def test_later_waves_are_journaled_before_the_first_wave(tmp_path):
+    journal = RenameJournal(str(tmp_path))
+    journal.begin()
+    amr = _renamer(crash_after=1)
+
+    with pytest.raises(KeyboardInterrupt):
+        Amr._run_rename_waves(amr, _cycle(), {0: "video", 1: "video"}, journal)
+
+    # 中断在临时名称之后, 其余批次仍可继续执行
+    _, _, steps = RenameJournal.load(str(tmp_path), journal.run_id)
+    assert amr.sent == ["/剧集/a.mkv"]
+    assert [(s.wave, s.step.original_name, s.done) for s in steps] == [
+        (0, "a.mkv", True),
+        (1, "b.mkv", False),
+        (2, ".amr-tmp-a.mkv", False),
+    ]
+
+
+def test_failed_step_skips_steps_that_depend_on_its_target(tmp_path):
+    journal = RenameJournal(str(tmp_path))
+    journal.begin()
+    waves = _cycle()
+    seqs = journal.intend_waves([[("video", step) for step in wave] for wave in waves])
+    # 继续执行时任务序号为日志序号, 同一文件的前后步骤按路径关联
+    waves = [
+        [step.model_copy(update={"task_index": seq}) for step, seq in zip(wave, wave_seqs)]
+        for wave, wave_seqs in zip(waves, seqs)
+    ]
+    amr = _renamer(fail={"/剧集/a.mkv"})
+
+    results = Amr._run_rename_waves(
+        amr, waves, {0: "video", 1: "video", 2: "video"}, journal, seqs
+    )
+
+    assert amr.sent == ["/剧集/a.mkv"]
+    assert [results[seq].response.success for seq in (0, 1, 2)] == [False] * 3
+    _, _, steps = RenameJournal.load(str(tmp_path), journal.run_id)
+    assert not any(step.done for step in steps)
+
+
+def test_verifying_an_interrupted_run_keeps_it_resumable(tmp_path):
+    journal = RenameJournal(str(tmp_path))
+    journal.begin()
+    seqs = journal.intend_waves([[("video", step)] for step in _cycle()[0] + _cycle()[1]])
+    journal.complete([(seqs[0][0], True, "")])
+    amr = SimpleNamespace(
+        config=SimpleNamespace(amr=SimpleNamespace(data_dir=str(tmp_path))),
+        _verify_renames=lambda *args: VerifyResult(verified=1),
+    )
+
+    assert Amr.verify_run(amr, journal.run_id).verified == 1
+    assert RenameJournal.latest_unfinished(str(tmp_path)) == journal.run_id
+
+    journal.complete([(seqs[1][0], True, "")])
+    journal.finish()
+    Amr.verify_run(amr, journal.run_id)
+    assert RenameJournal.latest_unfinished(str(tmp_path)) is None
@@ -0,0 +1,66 @@
+import json
+import logging
+
+import pytest
+
+from AlistMediaRename.logger_setup import LogPayload, logger, setup_logging, stop_logging
+
+
+@pytest.fixture
+def amr_logger():
+    yield logger
+    stop_logging()
+    logger.setLevel(logging.NOTSET)
+
+
+def test_payload_is_serialised_only_when_emitted(amr_logger, tmp_path):
+    setup_logging(verbose=False, file_log_path=None)
+    calls = []
+
+    def factory():
+        calls.append(1)
+        return {"content": list(range(100))}
+
+    # 控制台默认只输出警告, 调试日志不会序列化数据
+    logging.getLogger("Amr.Task").debug("data: %s", LogPayload(factory=factory))
+    assert calls == []
+
+    text = str(LogPayload(factory=factory, max_items=3))
+    assert calls == [1]
+    assert json.loads(text) == {"content": [0, 1, 2, "... 共 100 项"]}
+    assert str(LogPayload("x" * 50, max_chars=10)).endswith("... (共 52 字符)")
+
+
+def test_json_lines_sink_writes_structured_fields(amr_logger, tmp_path):
+    filepath = tmp_path / "amr.jsonl"
+    setup_logging(verbose=False, file_log_path=None, json_log_path=str(filepath))
+
+    task_logger = logging.getLogger("Amr.Task")
+    task_logger.info(
+        "Task: %s",
+        "file_list",
+        extra={"fields": {"operation": "alist.file_list", "args": LogPayload([1, 2])}},
+    )
+    task_logger.debug("ignored")
+    # 停止监听线程后队列中的日志全部写入
+    stop_logging()
+
+    entries = [json.loads(line) for line in filepath.read_text("utf-8").splitlines()]
+    (entry,) = [entry for entry in entries if entry["logger"] == "Amr.Task"]
+    assert entry["message"] == "Task: file_list"
+    assert entry["operation"] == "alist.file_list"
+    assert entry["args"] == [1, 2]
+
+
+def test_log_files_rotate_by_size(amr_logger, tmp_path):
+    filepath = tmp_path / "amr.log"
+    setup_logging(verbose=True, file_log_path=str(filepath), max_bytes=1000, backup_count=2)
+
+    for index in range(100):
+        logging.getLogger("Amr.Task").debug("line %03d %s", index, "x" * 40)
+    stop_logging()
+
+    files = sorted(path.name for path in tmp_path.iterdir())
+    assert files == ["amr.log", "amr.log.1", "amr.log.2"]
+    assert all(path.stat().st_size <= 1000 for path in tmp_path.iterdir())
+    assert "line 099" in filepath.read_text("utf-8")
@@ -0,0 +1,85 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from AlistMediaRename.metrics import MetricsRegistry
+from AlistMediaRename.models import ApiResponse
+from AlistMediaRename.task import ApiTask, TaskManager
+
+
+def test_registry_summarises_latency_and_writes_both_formats(tmp_path):
+    metrics = MetricsRegistry()
+    for latency in range(1, 101):
+        metrics.record("alist.rename", "nas", latency / 1000, latency % 10 != 0, 10, 20)
+    metrics.record_retry("alist.rename", "nas")
+    metrics.record_cache_hit("tmdb.tv_info", "api.themoviedb.org")
+    metrics.record_inflight("alist", 3, 5)
+
+    (rename, tv_info) = metrics.snapshot()["operations"]
+    assert (rename["count"], rename["errors"], rename["retries"]) == (100, 10, 1)
+    assert (rename["bytes_in"], rename["bytes_out"]) == (1000, 2000)
+    assert rename["latency"]["p50"] == 0.051 and rename["latency"]["p99"] == 0.1
+    assert tv_info["cache_hits"] == 1 and tv_info["count"] == 0
+
+    metrics.save(str(tmp_path / "amr.json"))
+    assert json.loads((tmp_path / "amr.json").read_text("utf-8"))["queues"] == {
+        "alist": {"inflight_max": 3, "limit": 5}
+    }
+
+    metrics.save(str(tmp_path / "amr.prom"))
+    lines = (tmp_path / "amr.prom").read_text("utf-8").splitlines()
+    assert 'amr_requests_total{operation="alist.rename",host="nas"} 100' in lines
+    assert 'amr_request_duration_seconds_bucket{operation="alist.rename",host="nas",le="0.01"} 10' in lines
+    assert 'amr_request_duration_seconds_bucket{operation="alist.rename",host="nas",le="+Inf"} 100' in lines
+    assert 'amr_queue_inflight_max{queue="alist"} 3' in lines
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+@pytest.fixture
+def task_manager():
+    manager = TaskManager()
+    client, metrics = manager._async_client, manager.metrics
+    manager.tasks_pending.clear()
+    manager.metrics = MetricsRegistry()
+    manager._async_client = httpx.AsyncClient(
+        transport=httpx.MockTransport(
+            lambda request: httpx.Response(
+                200 if b"ok" in request.content else 500, json={"code": 200}
+            )
+        )
+    )
+    yield manager
+    manager.tasks_pending.clear()
+    manager._async_client, manager.metrics = client, metrics
+
+
+def _task(name):
+    return ApiTask(
+        lambda: httpx.Request("POST", "http://nas:5244/api/fs/rename", json={"name": name}),
+        (),
+        {},
+        "alist.rename",
+        lambda response: ApiResponse(
+            success=response.is_success, status_code=response.status_code, error="", data={}
+        ),
+        lambda api_task: None,
+        False,
+        queue="alist",
+    )
+
+
+def test_task_manager_records_requests_per_operation_and_host(task_manager):
+    task_manager.add_tasks(_task("ok 1"), _task("ok 2"), _task("bad"))
+
+    asyncio.run(task_manager._execute())
+
+    (stats,) = task_manager.metrics.snapshot()["operations"]
+    assert (stats["operation"], stats["host"]) == ("alist.rename", "nas")
+    assert (stats["count"], stats["errors"]) == (3, 1)
+    assert stats["bytes_out"] == sum(
+        len(_task(name).func().content) for name in ("ok 1", "ok 2", "bad")
+    )
+    assert stats["bytes_in"] == 3 * len(b'{"code":200}')
+    assert task_manager.metrics.snapshot()["queues"]["all"]["inflight_max"] == 3
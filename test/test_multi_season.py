@@ -2,7 +2,7 @@ from types import SimpleNamespace
 
 import pytest
 
-from AlistMediaRename import Config
+from AlistMediaRename import Amr, Config
 from AlistMediaRename.models import FileMeta, Folder
 from AlistMediaRename.output import Message
 from AlistMediaRename.utils import Helper
@@ -92,3 +92,40 @@ def test_folder_rename_replaces_the_entire_name_when_it_contains_a_dot():
 
     assert rename_task.original_name == "测试剧集.1080p"
     assert rename_task.target_name == "测试剧集 (2020)"
+
+
+def test_season_subfolders_are_detected():
+    entries = [
+        {"name": name, "is_dir": True}
+        for name in ("Season 2", "S01", "第三季", "Specials", "Extras", "Season 1 备份")
+    ] + [{"name": "S04", "is_dir": False}]
+
+    assert Helper.detect_season_folders(entries) == {
+        0: "Specials",
+        1: "S01",
+        2: "Season 2",
+        3: "第三季",
+    }
+
+
+def test_season_subfolder_results_are_grouped_by_folder():
+    config = Config()
+    tv_info = _tv_info_task()
+    rename_tasks = []
+    for number, folder in ((1, "/测试剧集/Season 1/"), (2, "/测试剧集/Season 2/")):
+        media_list, _ = Helper.create_tv_media_list(
+            "1-", tv_info, _season_task(number, [1, 2]), "123", config
+        )
+        files = [
+            FileMeta(filename=f"{episode:02}.mkv", folder_path=Folder(path=folder))
+            for episode in (1, 2)
+        ]
+        rename_tasks.extend(Helper.match_episode_files(media_list, files, config))
+    plan = Helper.create_rename_plan(rename_tasks, [], [], {}, config)
+
+    results = Amr._folder_results(plan, [True, True, True, False])
+
+    assert [(r.entry.dir, r.entry.seasons, r.status, r.succeeded, r.failed) for r in results] == [
+        ("/测试剧集/Season 1/", "1", "success", 2, 0),
+        ("/测试剧集/Season 2/", "2", "partial", 1, 1),
+    ]
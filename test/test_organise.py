@@ -0,0 +1,87 @@
+from types import SimpleNamespace
+
+from AlistMediaRename import Amr, Config
+from AlistMediaRename.models import (
+    ApiResponse,
+    FileMeta,
+    Folder,
+    RenameOutcome,
+    RenameStep,
+)
+from AlistMediaRename.utils import Helper
+
+
+def test_episodes_are_moved_into_their_season_folders(tv_media_list):
+    config = Config()
+    config.amr.tv_name_format = "{name}-S{season:0>2}E{episode:0>2}"
+    media_list = tv_media_list(config, 1, [1]) + tv_media_list(config, 2, [1])
+    files = [
+        FileMeta(filename=name, folder_path=Folder(path=path))
+        for name, path in [("a.mkv", "/剧集/"), ("b.mkv", "/剧集/")]
+    ]
+    rename_tasks = Helper.match_episode_files(media_list, files, config)
+    listings = {"/剧集/": [{"name": "a.mkv", "size": 10, "modified": "m"}]}
+
+    moves = Helper.create_season_moves(rename_tasks, listings, config)
+
+    assert [(item.category, item.target_folder.path) for item in moves] == [
+        ("move", "/剧集/Season 01/"),
+        ("move", "/剧集/Season 02/"),
+    ]
+    assert moves[0].rename_task.target_name == "测试剧集-S01E01.mkv"
+    assert (moves[0].source_size, moves[1].source_size) == (10, -1)
+
+
+def test_files_already_in_a_season_folder_are_not_moved(tv_media_list):
+    config = Config()
+    config.amr.season_folder_name_format = "S{season}"
+    media_list = tv_media_list(config, 1, [1, 2])
+    files = [
+        FileMeta(filename="a.mkv", folder_path=Folder(path="/剧集/Season 1/")),
+        FileMeta(filename="b.mkv", folder_path=Folder(path="/剧集/")),
+    ]
+    rename_tasks = Helper.match_episode_files(media_list, files, config)
+
+    moves = Helper.create_season_moves(rename_tasks, {}, config)
+
+    assert [item.target_folder.path for item in moves] == ["/剧集/S1/"]
+
+
+def test_move_requests_are_counted_once_per_file():
+    def item(category, folder, target, target_folder=None):
+        return SimpleNamespace(
+            category=category,
+            rename_task=SimpleNamespace(folder_path=Folder(path=folder), target_name=target),
+            target_folder=target_folder and Folder(path=target_folder),
+        )
+
+    plan = SimpleNamespace(
+        items=[
+            item("video", "/tv/", "E01.mkv"),
+            item("video", "/tv/", "E02.mkv"),
+            item("move", "/tv/", "E01.mkv", "/tv/Season 01/"),
+            item("move", "/tv/", "E02.mkv", "/tv/Season 01/"),
+        ]
+    )
+    def outcome(name, target_folder=None, success=True):
+        return RenameOutcome(
+            step=RenameStep(
+                task_index=0,
+                folder_path=Folder(path="/tv/"),
+                original_name=name,
+                target_name=name,
+                target_folder=target_folder and Folder(path=target_folder),
+            ),
+            response=ApiResponse(success=success, status_code=200, error="", data={}),
+        )
+
+    results = {
+        "video": [outcome("E01.mkv"), outcome("E02.mkv")],
+        # 同一请求移动的文件各有一个结果
+        "move": [
+            outcome("E01.mkv", "/tv/Season 01/"),
+            outcome("E02.mkv", "/tv/Season 01/", success=False),
+        ],
+    }
+
+    assert Amr._plan_outcomes([plan], results) == [[True, True, True, False]]
@@ -76,3 +76,21 @@ def test_rename_interval_does_not_delay_non_rename_tasks(task_manager):
 
     assert time.perf_counter() - started_at < 0.05
     assert abs(started[0] - started[1]) < 0.02
+
+
+def test_rename_interval_applies_to_webdav_but_not_local_renames(task_manager):
+    started = []
+    completed = []
+    task_manager.limit_rate = 2
+    task_manager.rename_interval = 0.03
+    task_manager.add_tasks(
+        *[_task("webdav.rename", started, completed) for _ in range(4)],
+        *[_task("local.rename", started, completed) for _ in range(2)],
+    )
+
+    asyncio.run(task_manager._execute())
+
+    # 本地重命名不等待, WebDAV 重命名每批之间等待
+    assert abs(started[0] - started[1]) < 0.02
+    assert started[2] - max(completed[:2]) < 0.02
+    assert min(started[4:]) - max(completed[2:4]) >= 0.025
@@ -0,0 +1,73 @@
+from AlistMediaRename import Amr, Config
+from AlistMediaRename.models import FileMeta, Folder, RenamePlan
+from AlistMediaRename.utils import Helper
+
+
+def _entry(name, size=1):
+    return {"name": name, "size": size, "modified": "2024-01-01T00:00:00Z"}
+
+
+def _plan(config, tv_info_task, season_task):
+    media_list, folder_media_list = Helper.create_tv_media_list(
+        "1-", tv_info_task, season_task(1, (1, 2)), "123", config
+    )
+    folder = Folder(path="/测试剧集/")
+    videos = [FileMeta(filename=name, folder_path=folder) for name in ("1.mkv", "2.mkv")]
+    listings = {
+        "/测试剧集/": [_entry("1.mkv"), _entry("2.mkv")],
+        "/": [_entry("测试剧集")],
+    }
+    return Helper.create_rename_plan(
+        Helper.match_episode_files(media_list, videos, config),
+        [],
+        Helper.create_folder_rename_list(folder, folder_media_list),
+        listings,
+        config,
+    )
+
+
+def test_plan_round_trips_through_a_file(tmp_path, tv_info_task, season_task):
+    config = Config()
+    plan = _plan(config, tv_info_task, season_task)
+
+    Amr.save_plan(plan, str(tmp_path / "plan.json"))
+    loaded = Amr.load_plan(str(tmp_path / "plan.json"))
+
+    assert isinstance(loaded, RenamePlan)
+    assert loaded.listings == {}
+    assert loaded.fingerprints == plan.fingerprints
+    assert [(item.category, item.rename_task.target_name) for item in loaded.items] == [
+        ("video", "测试剧集-S01E01.第1集.mkv"),
+        ("video", "测试剧集-S01E02.第2集.mkv"),
+        ("folder", "测试剧集 (2020)"),
+    ]
+
+
+def test_folder_items_follow_the_folder_rename_setting(tv_info_task, season_task):
+    config = Config()
+    config.amr.media_folder_rename = False
+
+    plan = _plan(config, tv_info_task, season_task)
+    assert [item.category for item in plan.items] == ["video", "video"]
+
+
+def test_changed_sources_are_detected(tv_info_task, season_task):
+    config = Config()
+    plan = _plan(config, tv_info_task, season_task)
+    plan = RenamePlan.model_validate_json(plan.model_dump_json())
+    first, second, folder = plan.items
+    listings = {
+        "/测试剧集/": [_entry("1.mkv"), _entry("2.mkv", size=2)],
+        "/": [_entry("测试剧集")],
+    }
+
+    index = Helper.plan_listing_index(plan, listings)
+    assert Helper.check_plan_item(first, index) == ""
+    assert Helper.check_plan_item(second, index) == "源文件已变更"
+    assert Helper.check_plan_item(folder, index) == ""
+    missing = Helper.plan_listing_index(plan, {"/": []})
+    assert Helper.check_plan_item(first, missing) == "文件夹不存在或无法访问"
+
+    listings["/测试剧集/"] = [_entry("2.mkv")]
+    index = Helper.plan_listing_index(plan, listings)
+    assert Helper.check_plan_item(first, index) == "源文件不存在"
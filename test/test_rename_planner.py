@@ -0,0 +1,132 @@
+from AlistMediaRename.models import (
+    FileMeta,
+    Folder,
+    Formated_Variables,
+    MediaMeta,
+    RenameTask,
+)
+from AlistMediaRename.planner import RenamePlanner
+
+
+def _rename_task(original_name, target_name, folder="/剧集/"):
+    media = MediaMeta(
+        media_type="tv",
+        rename_format=target_name,
+        movie_format_variables=None,
+        tv_format_variables=Formated_Variables.tv(
+            name="测试剧集",
+            original_name="Test Show",
+            year="2020",
+            first_air_date="2020-01-01",
+            language="en",
+            region="US",
+            rating=8.0,
+            season=1,
+            season_year="2020",
+            tmdb_id="123",
+        ),
+        episode_format_variables=None,
+    )
+    file = FileMeta(
+        filename=original_name,
+        folder_path=Folder(path=folder),
+        preserve_extension=False,
+    )
+    return RenameTask(media_meta=media, file_meta=file)
+
+
+def _apply(names, waves):
+    """模拟按批次执行重命名, 每批内目标名称不能已存在"""
+    names = set(names)
+    for wave in waves:
+        for step in wave:
+            assert step.target_name not in names
+        for step in wave:
+            names.remove(step.original_name)
+        names.update(step.target_name for step in wave)
+    return names
+
+
+def test_chained_renames_are_ordered_into_waves():
+    listing = ["1", "2", "3"]
+    tasks = [_rename_task("1", "2"), _rename_task("2", "3"), _rename_task("3", "4")]
+
+    waves, conflicts = RenamePlanner.plan(tasks, {"/剧集/": listing})
+
+    assert conflicts == []
+    assert [[step.original_name for step in wave] for wave in waves] == [
+        ["3"],
+        ["2"],
+        ["1"],
+    ]
+    assert _apply(listing, waves) == {"2", "3", "4"}
+
+
+def test_swap_is_broken_with_a_temporary_name():
+    listing = ["a", "b"]
+    tasks = [_rename_task("a", "b"), _rename_task("b", "a")]
+
+    waves, conflicts = RenamePlanner.plan(tasks, {"/剧集/": listing})
+
+    assert conflicts == []
+    assert any(step.temporary for wave in waves for step in wave)
+    assert _apply(listing, waves) == {"a", "b"}
+    final_steps = [step for wave in waves for step in wave if not step.temporary]
+    assert {(step.task_index, step.target_name) for step in final_steps} == {
+        (0, "b"),
+        (1, "a"),
+    }
+
+
+def test_existing_and_duplicate_targets_are_reported():
+    listing = ["x", "y", "z", "taken"]
+    tasks = [
+        _rename_task("x", "taken"),
+        _rename_task("y", "same"),
+        _rename_task("z", "same"),
+        _rename_task("missing", "other"),
+    ]
+
+    waves, conflicts = RenamePlanner.plan(tasks, {"/剧集/": listing})
+
+    assert [(c.task_index, c.reason) for c in conflicts] == [
+        (0, "目标文件已存在"),
+        (2, "多个文件重命名为同一名称"),
+        (3, "源文件不存在"),
+    ]
+    assert [[step.task_index for step in wave] for wave in waves] == [[1]]
+
+
+def test_rejected_task_keeps_its_source_name_occupied():
+    listing = ["a", "b", "c"]
+    # a -> c 冲突被跳过后, b -> a 也无法执行
+    tasks = [_rename_task("a", "c"), _rename_task("b", "a")]
+
+    waves, conflicts = RenamePlanner.plan(tasks, {"/剧集/": listing})
+
+    assert [c.task_index for c in conflicts] == [0, 1]
+    assert waves == []
+
+
+def test_missing_source_does_not_occupy_its_name():
+    tasks = [_rename_task("ghost.mkv", "x.mkv"), _rename_task("b.mkv", "ghost.mkv")]
+
+    waves, conflicts = RenamePlanner.plan(tasks, {"/剧集/": ["b.mkv"]})
+
+    assert [(c.task_index, c.reason) for c in conflicts] == [(0, "源文件不存在")]
+    assert [[step.task_index for step in wave] for wave in waves] == [[1]]
+
+
+def test_waves_of_different_folders_are_merged():
+    tasks = [
+        _rename_task("1", "2", "/a/"),
+        _rename_task("2", "3", "/a/"),
+        _rename_task("1", "2", "/b/"),
+    ]
+
+    waves, _ = RenamePlanner.plan(tasks, {"/a/": ["1", "2"], "/b/": ["1"]})
+
+    assert [sorted(step.task_index for step in wave) for wave in waves] == [
+        [1, 2],
+        [0],
+    ]
@@ -0,0 +1,114 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from AlistMediaRename import Amr, Config
+from AlistMediaRename.models import AlistServer, ApiResponse, Folder
+from AlistMediaRename.task import ApiTask, TaskManager
+
+
+def _task(queue, delay, events):
+    def request_factory():
+        return httpx.Request("POST", "https://example.invalid")
+
+    task = ApiTask(
+        request_factory,
+        (),
+        {},
+        "alist.rename",
+        lambda response: ApiResponse(success=True, status_code=200, error="", data={}),
+        lambda api_task: None,
+        False,
+        queue=queue,
+    )
+
+    async def send(client):
+        events.append(("start", queue))
+        await asyncio.sleep(delay)
+        task.response = ApiResponse(success=True, status_code=200, error="", data={})
+        events.append(("done", queue))
+        return task.response
+
+    task.send = send
+    return task
+
+
+@pytest.fixture
+def task_manager():
+    manager = TaskManager()
+    manager.tasks_pending.clear()
+    manager.limit_rate = 2
+    manager.rename_interval = 0
+    yield manager
+    manager.tasks_pending.clear()
+    manager.queue_weights.clear()
+    manager.queue_limits.clear()
+    manager.limit_rate = 10
+
+
+def test_slow_queue_does_not_starve_fast_queue(task_manager):
+    events = []
+    task_manager.add_tasks(
+        *[_task("alist:slow", 0.05, events) for _ in range(4)],
+        *[_task("alist", 0.001, events) for _ in range(4)],
+    )
+
+    asyncio.run(task_manager._execute())
+
+    # 慢速队列排在前面, 快速队列仍在第一个慢速请求完成前全部执行完
+    first_slow_done = events.index(("done", "alist:slow"))
+    assert events[:first_slow_done].count(("done", "alist")) == 4
+
+
+def test_queue_weight_and_limit_shape_dispatch(task_manager):
+    events = []
+    task_manager.limit_rate = 3
+    task_manager.set_queue("a", weight=2)
+    task_manager.set_queue("b", limit_rate=1)
+    task_manager.add_tasks(
+        *[_task("b", 0.01, events) for _ in range(3)],
+        *[_task("a", 0.01, events) for _ in range(3)],
+    )
+
+    asyncio.run(task_manager._execute())
+
+    first_wave = events[:3]
+    assert sorted(first_wave) == [("start", "a"), ("start", "a"), ("start", "b")]
+
+
+def test_plans_are_routed_to_their_alist_target(tmp_path):
+    config = Config()
+    config.amr.data_dir = str(tmp_path)
+    config.tmdb.cache_ttl = 0
+    config.alist.targets = {"nas": AlistServer(url="http://nas", guest_mode=True)}
+    amr = Amr(config, need_login=False)
+
+    def plan(target, folder):
+        return SimpleNamespace(
+            target=target,
+            fingerprints={folder: ""},
+            listings={},
+            items=[
+                SimpleNamespace(
+                    category="video",
+                    rename_task=SimpleNamespace(folder_path=Folder(path=folder)),
+                    target_folder=Folder(path=folder + "Season 01/"),
+                )
+            ],
+        )
+
+    # 共用的上级文件夹不影响分配
+    shared = plan("nas", "/tv/c/")
+    shared.listings = {"/tv/": [], "/tv/c/": []}
+    accepted, deferred = amr._route_plans(
+        [plan("", "/tv/a/"), plan("nas", "/tv/b/"), plan("nas", "/tv/a/"), shared]
+    )
+
+    assert len(accepted) == 3 and len(deferred) == 1
+    assert amr._api("/tv/c/a.mkv").queue == "alist:nas"
+    assert amr._api("/tv/b/Season 01/").queue == "alist:nas"
+    assert amr._api("/tv/a/").queue == "alist"
+    with pytest.raises(ValueError):
+        amr.alist_target("missing")
@@ -0,0 +1,80 @@
+import threading
+from http.server import ThreadingHTTPServer
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from AlistMediaRename.serve import AmrService
+
+
+class StubAmr:
+    """只记录调用的 Amr"""
+
+    def __init__(self, release: threading.Event):
+        self.config = SimpleNamespace(alist=SimpleNamespace(targets={"nas": None}))
+        self.release = release
+        self.threads: set[str] = set()
+
+    def _plan_batch_entry(self, entry):
+        self.threads.add(threading.current_thread().name)
+        self.release.wait(5)
+        if not entry.seasons:
+            raise EOFError
+        return SimpleNamespace(model_dump=lambda mode: {"dir": entry.dir})
+
+
+@pytest.fixture
+def service():
+    release = threading.Event()
+    created = []
+
+    def create_amr():
+        created.append(StubAmr(release))
+        return created[0]
+
+    service = AmrService(create_amr, max_pending=1)
+    service.start()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), service.handler())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = httpx.Client(base_url=f"http://127.0.0.1:{server.server_port}")
+    yield SimpleNamespace(client=client, release=release, created=created)
+    release.set()
+    client.close()
+    server.shutdown()
+    server.server_close()
+    service.stop()
+
+
+def test_jobs_run_on_the_warm_worker(service):
+    service.release.set()
+    entry = {"dir": "/tv/a/", "id": "1", "seasons": "1"}
+
+    first = service.client.post("/plan?wait=5", json=entry).json()
+    second = service.client.post("/plan?wait=5", json={**entry, "seasons": ""}).json()
+
+    assert first["status"] == "success" and first["result"] == {"dir": "/tv/a/"}
+    assert second["status"] == "failed" and "seasons" in second["error"]
+    # 所有任务使用同一个在工作线程中创建的 Amr
+    assert len(service.created) == 1 and service.created[0].threads == {"amr-serve"}
+    job = service.client.get(f"/jobs/{first['id']}").json()
+    assert job["result"] == {"dir": "/tv/a/"}
+    info = service.client.get("/info").json()
+    assert info["finished"] == 2 and info["targets"] == ["", "nas"]
+    metrics = service.client.get("/metrics")
+    assert metrics.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE amr_request_duration_seconds histogram" in metrics.text
+
+
+def test_invalid_and_overflowing_requests_are_rejected(service):
+    entry = {"dir": "/tv/a/", "id": "1", "seasons": "1"}
+
+    assert service.client.post("/plan", json={"dir": "/tv/"}).status_code == 400
+    assert service.client.post("/unknown", json={}).status_code == 404
+    assert service.client.get("/jobs/missing").status_code == 404
+
+    # 第一个任务执行中, 第二个排队, 第三个超出队列上限
+    running = service.client.post("/plan", json=entry)
+    assert running.status_code == 202
+    statuses = [service.client.post("/plan", json=entry).status_code for _ in range(3)]
+    assert statuses.count(503) >= 1
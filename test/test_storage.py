@@ -0,0 +1,129 @@
+import asyncio
+
+import pytest
+
+from AlistMediaRename import Amr, Config
+from AlistMediaRename.models import Folder, RenameStep
+from AlistMediaRename.storage import LocalStorage, Storage
+from AlistMediaRename.task import taskManager
+
+
+def _run(*tasks):
+    taskManager.add_tasks(*tasks)
+    return taskManager.run_tasks()
+
+
+@pytest.fixture(autouse=True)
+def event_loop():
+    # 任务管理器使用当前事件循环, 其他测试中的 asyncio.run 会将其清空
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    yield loop
+    asyncio.set_event_loop(None)
+    loop.close()
+
+
+@pytest.fixture
+def library(tmp_path):
+    show = tmp_path / "剧集"
+    show.mkdir()
+    for name in ("b.mkv", "a.mkv", "a.ass"):
+        (show / name).write_bytes(b"x" * 3)
+    (show / "Extras").mkdir()
+    return tmp_path
+
+
+def test_local_storage_lists_renames_and_moves(library):
+    storage = LocalStorage(str(library))
+
+    (listing,) = _run(storage.file_list("/剧集/"))
+    assert [entry["name"] for entry in listing.data["content"]] == [
+        "Extras",
+        "a.ass",
+        "a.mkv",
+        "b.mkv",
+    ]
+    assert listing.data["content"][2]["size"] == 3
+    assert listing.data["content"][0]["is_dir"] is True
+
+    rename, exists, mkdir = _run(
+        storage.rename("E01.mkv", "/剧集/a.mkv"),
+        storage.rename("a.ass", "/剧集/b.mkv"),
+        storage.mkdir("/剧集/Season 01/"),
+    )
+    assert rename.success and mkdir.success
+    # 目标已存在时不覆盖
+    assert not exists.success and (library / "剧集" / "b.mkv").exists()
+
+    (move,) = _run(storage.move(["E01.mkv", "a.ass"], "/剧集/", "/剧集/Season 01/"))
+    assert move.success
+    assert sorted(p.name for p in (library / "剧集" / "Season 01").iterdir()) == [
+        "E01.mkv",
+        "a.ass",
+    ]
+
+
+def test_local_storage_stays_inside_root(library):
+    storage = LocalStorage(str(library / "剧集"))
+
+    (result,) = _run(storage.rename("x.mkv", "/../剧集/a.mkv"))
+    assert result.success
+
+    (escaped,) = _run(storage.get("/../../"))
+    assert not escaped.success
+    assert sorted(entry["name"] for entry in storage.iter_entries("/")) == [
+        "Extras",
+        "a.ass",
+        "b.mkv",
+        "x.mkv",
+    ]
+
+
+def test_amr_uses_local_storage_without_login(library, tmp_path):
+    config = Config()
+    config.amr.data_dir = str(tmp_path / "data")
+    config.tmdb.cache_ttl = 0
+    config.alist.storage = "local"
+    config.alist.root = str(library)
+    amr = Amr(config)
+
+    listings = amr._list_folders(["/剧集/", "/missing/"])
+
+    assert isinstance(amr.alist, LocalStorage)
+    assert list(listings) == ["/剧集/"]
+
+
+def test_incomplete_storage_backend_cannot_be_created():
+    class ListOnly(Storage):
+        def file_list(self, path="/", password=None, refresh=True, per_page=0, page=1):
+            pass
+
+    with pytest.raises(TypeError):
+        ListOnly()
+
+
+def test_local_moves_report_each_file(library, tmp_path):
+    config = Config()
+    config.amr.data_dir = str(tmp_path / "data")
+    config.alist.storage = "local"
+    config.alist.root = str(library)
+    amr = Amr(config)
+    (library / "剧集" / "Season 01").mkdir()
+    (library / "剧集" / "Season 01" / "b.mkv").write_bytes(b"y")
+    steps = [
+        RenameStep(
+            task_index=index,
+            folder_path=Folder(path="/剧集/"),
+            original_name=name,
+            target_name=name,
+            target_folder=Folder(path="/剧集/Season 01/"),
+        )
+        for index, name in enumerate(["b.mkv", "a.mkv"])
+    ]
+
+    results = amr._run_rename_waves([steps], {0: "move", 1: "move"})
+
+    # 同一文件夹中一个文件失败不影响其余文件的结果
+    assert not results[0].response.success
+    assert results[1].response.success
+    assert (library / "剧集" / "Season 01" / "a.mkv").exists()
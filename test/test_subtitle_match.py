@@ -0,0 +1,80 @@
+from AlistMediaRename import Config
+from AlistMediaRename.models import FileMeta, Folder
+from AlistMediaRename.utils import Helper, Utils
+
+
+def _files(*names):
+    return [FileMeta(filename=name, folder_path=Folder(path="/测试剧集/")) for name in names]
+
+
+def test_subtitle_tracks_follow_their_video(tv_media_list):
+    config = Config()
+    media_list = tv_media_list(config, 1, [1, 2])
+    videos = _files("ep01.mkv", "ep02.mkv")
+    subtitles = _files("ep01.en.srt", "ep01.zh.ass", "ep02.sc.ass", "ep02.zh.ass")
+
+    video_pairs, _ = Helper.pair_episode_files(media_list, videos, config)
+    rename_tasks = Helper.match_subtitle_files(
+        video_pairs, media_list, subtitles, config
+    )
+
+    assert {task.original_name: task.target_name for task in rename_tasks} == {
+        "ep01.en.srt": "测试剧集-S01E01.第1集.en.srt",
+        "ep01.zh.ass": "测试剧集-S01E01.第1集.zh.ass",
+        "ep02.sc.ass": "测试剧集-S01E02.第2集.sc.ass",
+        "ep02.zh.ass": "测试剧集-S01E02.第2集.zh.ass",
+    }
+
+
+def test_subtitles_of_renamed_videos_are_renamed_and_renamed_ones_skipped(tv_media_list):
+    config = Config()
+    media_list = tv_media_list(config, 1, [1, 2])
+    videos = _files("测试剧集-S01E01.第1集.mkv", "ep02.mkv")
+    subtitles = _files(
+        "测试剧集-S01E01.第1集.zh.ass", "测试剧集-S01E01.第1集.en.ass", "ep02.en.ass"
+    )
+
+    video_pairs, video_rename_list = Helper.pair_episode_files(
+        media_list, videos, config
+    )
+    rename_tasks = Helper.match_subtitle_files(
+        video_pairs, media_list, subtitles, config
+    )
+
+    assert [task.original_name for task in video_rename_list] == ["ep02.mkv"]
+    assert [task.target_name for task in rename_tasks] == ["测试剧集-S01E02.第2集.en.ass"]
+
+
+def test_subtitles_without_videos_fall_back_to_episode_order(tv_media_list):
+    config = Config()
+    media_list = tv_media_list(config, 1, [1, 2])
+    subtitles = _files("a.chs.ass", "b.ass")
+
+    rename_tasks = Helper.match_subtitle_files([], media_list, subtitles, config)
+
+    assert [task.target_name for task in rename_tasks] == [
+        "测试剧集-S01E01.第1集.chs.ass",
+        "测试剧集-S01E02.第2集.ass",
+    ]
+
+
+def test_tracks_without_videos_share_one_episode(tv_media_list):
+    config = Config()
+    media_list = tv_media_list(config, 1, [1, 2, 3])
+    subtitles = _files("e01.zh.ass", "e01.en.ass", "e02.zh.ass", "e02.en.ass")
+
+    rename_tasks = Helper.match_subtitle_files([], media_list, subtitles, config)
+
+    assert {task.original_name: task.target_name for task in rename_tasks} == {
+        "e01.zh.ass": "测试剧集-S01E01.第1集.zh.ass",
+        "e01.en.ass": "测试剧集-S01E01.第1集.en.ass",
+        "e02.zh.ass": "测试剧集-S01E02.第2集.zh.ass",
+        "e02.en.ass": "测试剧集-S01E02.第2集.en.ass",
+    }
+
+
+def test_lookup_video_stem_prefers_the_longest_stem():
+    index = {"show.part": "short", "show.part.2": "long"}
+
+    assert Utils.lookup_video_stem("show.part.2.zh", index) == ("long", ".zh")
+    assert Utils.lookup_video_stem("other.zh", index) == (None, "")
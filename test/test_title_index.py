@@ -0,0 +1,54 @@
+from AlistMediaRename.identify import Identifier
+from AlistMediaRename.models import IdentifyCandidate, IdentifyResult
+from AlistMediaRename.title_index import TitleIndex
+
+
+def _index():
+    index = TitleIndex()
+    index.add("1", ["刀剑神域", "Sword Art Online"])
+    index.add("2", ["刀剑神域 序列之争", "Sword Art Online the Movie: Ordinal Scale"])
+    index.add("3", ["间谍过家家", "SPY×FAMILY"])
+    return index
+
+
+def test_entries_are_ranked_by_their_best_name():
+    index = _index()
+
+    assert index.search("sword.art.online")[0] == ("1", 1.0)
+    assert [key for key, _ in index.search("刀剑神域")] == ["1", "2"]
+    assert index.search("SPY FAMILY", limit=1) == [("3", 1.0)]
+    assert index.search("完全无关", min_score=0.3) == []
+
+
+def test_adding_names_to_an_existing_entry():
+    index = _index()
+    index.add("3", ["スパイファミリー"], payload="ignored")
+
+    assert len(index) == 3
+    assert index.search("スパイファミリー", limit=1) == [("3", 1.0)]
+
+
+def test_batched_search_matches_single_search():
+    index = _index()
+    queries = ["刀剑神域", "spy family", "刀剑神域"]
+
+    assert index.search_many(queries) == [index.search(query) for query in queries]
+
+
+def test_cached_titles_join_the_candidates():
+    index = Identifier.build_index(
+        [
+            {"results": [{"id": 1, "name": "测试剧集", "original_name": "Test Show", "first_air_date": "2020-01-01"}]},
+            {"results": [{"id": 2, "name": "其他剧", "original_name": "Other", "first_air_date": "2011-01-01"}]},
+        ],
+        movie=False,
+    )
+    results = [IdentifyResult(folder="/a/", title="Test Show", year=2020)]
+
+    Identifier.rank_candidates(
+        results, [[IdentifyCandidate(tmdb_id="2", name="其他剧", original_name="Other")]], index
+    )
+
+    candidates = {c.tmdb_id: c.score for c in results[0].candidates}
+    assert candidates["1"] == 1.0
+    assert candidates["2"] < 0.5
@@ -0,0 +1,49 @@
+from AlistMediaRename.models import Folder, RenameStep
+from AlistMediaRename.utils import Helper
+
+
+def _step(folder, original, target, target_folder=None, index=0):
+    return RenameStep(
+        task_index=index,
+        folder_path=Folder(path=folder),
+        original_name=original,
+        target_name=target,
+        target_folder=target_folder and Folder(path=target_folder),
+    )
+
+
+def test_listing_diff_classifies_each_step():
+    steps = [
+        _step("/tv/", "a.mkv", "E01.mkv", index=0),
+        _step("/tv/", "b.mkv", "E02.mkv", index=1),
+        _step("/tv/", "c.mkv", "E03.mkv", index=2),
+        _step("/tv/", "d.mkv", "E04.mkv", index=3),
+    ]
+    listings = {"/tv/": ["E01.mkv", "b.mkv", "d.mkv", "E04.mkv"]}
+
+    assert Helper.diff_renames(steps, listings) == [
+        "verified",
+        "unapplied",
+        "missing",
+        "unexpected",
+    ]
+
+
+def test_swapped_names_and_moves_are_verified():
+    steps = [
+        _step("/tv/", "a.mkv", "b.mkv", index=0),
+        _step("/tv/", "b.mkv", "a.mkv", index=1),
+        _step("/tv/", "E01.mkv", "E01.mkv", "/tv/Season 01/", index=2),
+    ]
+    listings = {"/tv/": ["a.mkv", "b.mkv"], "/tv/Season 01/": ["E01.mkv"]}
+
+    assert Helper.diff_renames(steps, listings) == ["verified"] * 3
+
+
+def test_steps_follow_renamed_parent_folders():
+    step = _step("/tv/Show/", "a.mkv", "E01.mkv", "/tv/Show/Season 01/")
+
+    relocated = Helper.relocate_step(step, {"/tv/Show/": "/tv/Show (2020)/"})
+
+    assert relocated.full_path == "/tv/Show (2020)/a.mkv"
+    assert relocated.target_path == "/tv/Show (2020)/Season 01/E01.mkv"
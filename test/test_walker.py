@@ -0,0 +1,82 @@
+from AlistMediaRename import Config
+from AlistMediaRename.models import Shard
+from AlistMediaRename.walker import LibraryWalker
+
+VIDEO_PATTERN = Config().amr.video_regex_pattern
+
+TREE = {
+    "/lib/": [{"name": n, "is_dir": True} for n in ("A", "B", "@eaDir")],
+    "/lib/A/": [{"name": "Season 1", "is_dir": True}, {"name": "cover.jpg"}],
+    "/lib/A/Season 1/": [{"name": "e1.mkv"}, {"name": "e2.mkv"}, {"name": "e1.ass"}],
+    "/lib/B/": [{"name": "movie.mp4"}, {"name": "Extras", "is_dir": True}],
+    "/lib/B/Extras/": [{"name": "trailer.mp4"}],
+    "/lib/@eaDir/": [{"name": "thumb.mkv"}],
+}
+
+
+def _walker(calls, **kwargs):
+    def list_folders(folders):
+        calls.append(folders)
+        return {path: TREE[path] for path in folders if path in TREE}
+
+    return LibraryWalker(list_folders, VIDEO_PATTERN, batch_size=2, **kwargs)
+
+
+def test_walk_is_breadth_first_and_batched():
+    calls = []
+    found = [(f.path, f.depth, f.video_count) for f in _walker(calls).walk("/lib")]
+
+    assert found == [
+        ("/lib/B/", 1, 1),
+        ("/lib/@eaDir/", 1, 1),
+        ("/lib/A/Season 1/", 2, 2),
+        ("/lib/B/Extras/", 2, 1),
+    ]
+    assert calls == [
+        ["/lib/"],
+        ["/lib/A/", "/lib/B/"],
+        ["/lib/@eaDir/", "/lib/A/Season 1/"],
+        ["/lib/B/Extras/"],
+    ]
+
+
+def test_walk_prunes_by_depth_glob_regex_and_bound_folders():
+    calls = []
+    walker = _walker(
+        calls,
+        max_depth=1,
+        exclude=["@eaDir"],
+        exclude_regex=r"/A/$",
+        skip_folders=["/lib/B"],
+    )
+
+    assert list(walker.walk("/lib/")) == []
+    assert calls == [["/lib/"]]
+
+
+def test_walk_filters_output_and_records_failures():
+    calls = []
+    walker = _walker(calls, include=["Season*"])
+    TREE["/lib/A/"].append({"name": "missing", "is_dir": True})
+    try:
+        found = [f.path for f in walker.walk("/lib/")]
+    finally:
+        TREE["/lib/A/"].pop()
+
+    assert found == ["/lib/A/Season 1/"]
+    assert walker.failed == ["/lib/A/missing/"]
+    assert walker.listed == 7
+
+
+def test_shards_partition_subtrees_without_duplicate_listings():
+    full = [f.path for f in _walker([]).walk("/lib/")]
+    found, listed = [], []
+    for index in (1, 2, 3):
+        calls = []
+        found += [f.path for f in _walker(calls, shard=Shard(index=index, count=3)).walk("/lib/")]
+        listed += [path for batch in calls for path in batch]
+
+    assert sorted(found) == sorted(full)
+    # 只有根文件夹由每个分片获取
+    assert listed.count("/lib/") == 3
+    assert sorted(path for path in listed if path != "/lib/") == sorted(set(TREE) - {"/lib/"})
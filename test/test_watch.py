@@ -0,0 +1,73 @@
+import time
+
+from AlistMediaRename.cache import ResponseCache
+from AlistMediaRename.models import ApiResponse, WatchEntry
+from AlistMediaRename.watch import WatchRegistry
+
+
+def test_diff_reports_added_changed_and_removed_files():
+    snapshot = {"a.mkv": (100, "t1"), "b.mkv": (200, "t1"), "c.mkv": (300, "t1")}
+    listing = [
+        {"name": "a.mkv", "size": 100, "modified": "t1"},
+        {"name": "b.mkv", "size": 250, "modified": "t2"},
+        {"name": "d.mkv", "size": 400, "modified": "t2"},
+    ]
+
+    assert WatchRegistry.diff(snapshot, listing) == (["d.mkv"], ["b.mkv"], ["c.mkv"])
+    assert WatchRegistry.diff({}, listing)[0] == ["a.mkv", "b.mkv", "d.mkv"]
+
+
+def test_registry_persists_entries_and_snapshots(tmp_path):
+    registry = WatchRegistry(str(tmp_path))
+    registry.add(WatchEntry(folder="/tv/show/", tmdb_id="1", seasons="1"))
+    registry.save_snapshot("/tv/show/", [{"name": "a.mkv", "size": 1, "modified": "t"}])
+    registry.close()
+
+    registry = WatchRegistry(str(tmp_path))
+    assert [entry.folder for entry in registry.entries()] == ["/tv/show/"]
+    assert registry.snapshot("/tv/show/") == {"a.mkv": (1, "t")}
+    assert registry.remove("/tv/show/")
+    assert registry.entries() == []
+    assert registry.snapshot("/tv/show/") == {}
+    registry.close()
+
+
+def test_schedule_backs_off_on_failures(tmp_path):
+    registry = WatchRegistry(str(tmp_path))
+    entry = WatchEntry(folder="/tv/show/", tmdb_id="1", interval=600)
+
+    registry.schedule(entry, "timeout")
+    registry.schedule(entry, "timeout")
+    assert entry.failures == 2
+    assert entry.next_check - time.time() > 600 * 4 - 5
+
+    for _ in range(10):
+        registry.schedule(entry, "timeout")
+    assert entry.next_check - time.time() <= WatchRegistry.MAX_BACKOFF
+
+    registry.schedule(entry)
+    assert entry.failures == 0
+    assert registry.due(time.time()) == []
+    assert len(registry.due(time.time() + 601)) == 1
+    registry.close()
+
+
+def test_response_cache_persists_and_expires(tmp_path):
+    filepath = str(tmp_path / "cache.sqlite")
+    cache = ResponseCache()
+    cache.open(filepath, ttl=60)
+    cache["tmdb:/tv/1"] = ApiResponse(success=True, status_code=200, error="", data={"id": 1})
+    cache["tmdb:/tv/1/season/1"] = ApiResponse(success=True, status_code=200, error="", data={})
+    cache.close()
+
+    cache = ResponseCache()
+    cache.open(filepath, ttl=60)
+    assert cache["tmdb:/tv/1"].data == {"id": 1}
+    assert [key for key, _ in cache.items("tmdb:/tv/1/")] == ["tmdb:/tv/1/season/1"]
+    assert cache.discard("/tv/1/season/") == 1
+    assert "tmdb:/tv/1/season/1" not in cache
+
+    cache.ttl = 0.01
+    time.sleep(0.02)
+    assert cache.get("tmdb:/tv/1") is None
+    cache.close()
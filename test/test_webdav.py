@@ -0,0 +1,150 @@
+import asyncio
+from urllib.parse import quote, unquote, urlsplit
+
+import httpx
+import pytest
+
+from AlistMediaRename import Amr, Config
+from AlistMediaRename.models import Folder, RenameStep
+from AlistMediaRename.storage import WebDAVStorage
+from AlistMediaRename.task import taskManager
+
+
+class FakeDav:
+    """内存中的 WebDAV 服务, 只实现 PROPFIND/MOVE/MKCOL"""
+
+    def __init__(self, paths: list[str]):
+        # 路径集合, 文件夹以 / 结尾
+        self.paths = {"/"} | set(paths)
+        self.requests: list[tuple[str, str]] = []
+
+    def _response(self, path: str) -> str:
+        collection = "<D:collection/>" if path.endswith("/") else ""
+        return (
+            f"<D:response><D:href>/dav{quote(path)}</D:href><D:propstat><D:prop>"
+            f"<D:resourcetype>{collection}</D:resourcetype>"
+            f"<D:getcontentlength>{0 if collection else 3}</D:getcontentlength>"
+            "<D:getlastmodified>Mon, 01 Jan 2024 00:00:00 GMT</D:getlastmodified>"
+            "</D:prop><D:status>HTTP/1.1 200 OK</D:status></D:propstat></D:response>"
+        )
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        assert request.headers["Authorization"].startswith("Basic ")
+        path = unquote(request.url.path).removeprefix("/dav")
+        self.requests.append((request.method, path))
+        if request.method == "PROPFIND":
+            if path not in self.paths:
+                return httpx.Response(404)
+            children = [
+                p
+                for p in sorted(self.paths)
+                if p != path
+                and p.startswith(path)
+                and "/" not in p[len(path) :].rstrip("/")
+            ]
+            listed = [path] + (children if request.headers["Depth"] == "1" else [])
+            body = '<?xml version="1.0"?><D:multistatus xmlns:D="DAV:">'
+            body += "".join(self._response(p) for p in listed) + "</D:multistatus>"
+            return httpx.Response(207, content=body.encode())
+        if request.method == "MOVE":
+            target = unquote(urlsplit(request.headers["Destination"]).path).removeprefix(
+                "/dav"
+            )
+            source = next((p for p in (path, path + "/") if p in self.paths), None)
+            if source is None:
+                return httpx.Response(404)
+            if source.endswith("/"):
+                target = target.rstrip("/") + "/"
+            if target in self.paths:
+                return httpx.Response(412)
+            self.paths = {
+                target + p[len(source) :] if p.startswith(source) else p
+                for p in self.paths
+            }
+            return httpx.Response(201)
+        if request.method == "MKCOL":
+            if path in self.paths:
+                return httpx.Response(405)
+            self.paths.add(path)
+            return httpx.Response(201)
+        return httpx.Response(405)
+
+
+@pytest.fixture
+def dav():
+    server = FakeDav(["/剧集/", "/剧集/a.mkv", "/剧集/b 1.mkv", "/剧集/a.ass"])
+    client = taskManager._async_client
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    taskManager._async_client = httpx.AsyncClient(
+        transport=httpx.MockTransport(server.handler)
+    )
+    yield server
+    taskManager._async_client = client
+    asyncio.set_event_loop(None)
+    loop.close()
+
+
+def _run(*tasks):
+    taskManager.add_tasks(*tasks)
+    return taskManager.run_tasks()
+
+
+def test_webdav_listing_is_parsed_without_the_folder_itself(dav):
+    storage = WebDAVStorage("http://nas/dav/", "user", "pass")
+
+    listing, missing, info = _run(
+        storage.file_list("/剧集/", per_page=2, page=1),
+        storage.get("/missing/"),
+        storage.get("/剧集/a.mkv"),
+    )
+
+    assert [entry["name"] for entry in listing.data["content"]] == ["a.ass", "a.mkv"]
+    assert listing.data["total"] == 3
+    assert not missing.success and missing.error == "object not found"
+    assert info.data["size"] == 3
+    assert info.data["modified"] == "2024-01-01T00:00:00+00:00"
+
+
+def test_webdav_rename_move_and_mkdir(dav):
+    storage = WebDAVStorage("http://nas/dav", "user", "pass")
+
+    rename, exists, mkdir, mkdir_again = _run(
+        storage.rename("E01.mkv", "/剧集/a.mkv"),
+        storage.rename("a.ass", "/剧集/b 1.mkv"),
+        storage.mkdir("/剧集/Season 01"),
+        storage.mkdir("/剧集/Season 01/"),
+    )
+    assert rename.success and mkdir.success and mkdir_again.success
+    assert not exists.success and exists.error == "file exists"
+
+    (move,) = _run(storage.move(["E01.mkv", "a.ass"], "/剧集/", "/剧集/Season 01/"))
+    assert move.success
+    assert {"/剧集/Season 01/E01.mkv", "/剧集/Season 01/a.ass"} <= dav.paths
+    assert [method for method, _ in dav.requests].count("MOVE") == 4
+
+
+def test_season_moves_are_sent_as_separate_tasks(dav, tmp_path):
+    config = Config()
+    config.amr.data_dir = str(tmp_path / "data")
+    config.alist.storage = "webdav"
+    config.alist.url = "http://nas/dav"
+    config.alist.user = "user"
+    amr = Amr(config)
+    steps = [
+        RenameStep(
+            task_index=index,
+            folder_path=Folder(path="/剧集/"),
+            original_name=name,
+            target_name=name,
+            target_folder=Folder(path="/剧集/Season 01/"),
+        )
+        for index, name in enumerate(["a.mkv", "b 1.mkv", "a.ass"])
+    ]
+
+    results = amr._run_rename_waves([steps], {index: "move" for index in range(3)})
+
+    # 每个 MOVE 为单独的任务, 由调度队列并发发送
+    assert len({id(task) for task in results.values()}) == 3
+    assert all(task.response.success for task in results.values())
+    assert {"/剧集/Season 01/a.mkv", "/剧集/Season 01/b 1.mkv"} <= dav.paths